@@ -0,0 +1,273 @@
+import numpy as np
+
+
+# Accumulates summary statistics of a scalar field (e.g., the Mises stress at the integration points of an element set)
+# from blocks of values, so that a field can be reduced block by block (see iterFieldBulkBlocks(...) in
+# abaqus_moser_utility_functions.py) without ever building a list of all of its values. The memory used does not grow
+# with the number of values: the min/max, sums, and variance are updated with each block, and the quantiles are
+# estimated from a KLL-style sketch (Karnin, Lang, and Liberty). The sketch keeps levels of values with weights 1, 2,
+# 4, ...; when a level is full, it is sorted and every other value (from a random first value) moves up one level. Since
+# each value is only ever halved, never re-quantized, the rank error does not grow with the number of blocks. It is
+# about 2/sketchSizeIn of the number of values (e.g., the 0.5 quantile is between the 0.4995 and 0.5005 quantiles for the
+# default size), and at most about 3*sketchSizeIn values are kept. The quantiles are exact as long as the total number
+# of values is no larger than sketchSizeIn.
+class FieldStatsAccumulator(object):
+
+    # ----> INPUTS <----
+    # quantilesIn - list[float] - Quantiles to estimate, between 0 and 1 (e.g., [0.5, 0.99])
+    # sketchSizeIn - int - Capacity of the top level of the quantile sketch. Larger is more accurate.
+    def __init__(self, quantilesIn=(), sketchSizeIn=4096):
+        self.quantiles = [float(curQuantile) for curQuantile in quantilesIn]
+        self.sketchSize = int(sketchSizeIn)
+        self.count = 0
+        self.mean = 0.0
+        self.sumSqDevs = 0.0 # Sum of the squared deviations from the mean (combined with Chan's parallel formula)
+        self.weightSum = 0.0
+        self.weightedSum = 0.0
+        self.minVal = np.inf
+        self.maxVal = -np.inf
+        self.minInfo = (None, 0, 0) # (instance name, label, integration point) of the minimum
+        self.maxInfo = (None, 0, 0)
+        self.sketchLevels = [np.zeros(0)] # Values of weight 2**levelIndex
+        self.randomState = np.random.RandomState(0) # Offsets of the compactions. Seeded, so that reruns give the same results.
+
+    # Adds a block of values. labelsIn and integPntsIn (np.array[n] each) identify the node or element of each value for
+    # the arg min/max. weightsIn is an np.array[n] of weights (e.g., the integration point volumes, IVOL) for the
+    # weighted mean, or None.
+    def addBlock(self, valsIn, instNameIn=None, labelsIn=None, integPntsIn=None, weightsIn=None):
+        blockVals = np.asarray(valsIn, dtype=float).ravel()
+        numVals = blockVals.size
+        if numVals == 0:
+            return
+
+        minIdx = np.argmin(blockVals)
+        if blockVals[minIdx] < self.minVal:
+            self.minVal = blockVals[minIdx]
+            self.minInfo = (instNameIn, self._getItem(labelsIn, minIdx), self._getItem(integPntsIn, minIdx))
+        maxIdx = np.argmax(blockVals)
+        if blockVals[maxIdx] > self.maxVal:
+            self.maxVal = blockVals[maxIdx]
+            self.maxInfo = (instNameIn, self._getItem(labelsIn, maxIdx), self._getItem(integPntsIn, maxIdx))
+
+        blockMean = blockVals.mean()
+        blockSumSqDevs = np.sum((blockVals - blockMean)**2)
+        totalCount = self.count + numVals
+        meanDiff = blockMean - self.mean
+        self.mean = self.mean + meanDiff*numVals/float(totalCount)
+        self.sumSqDevs = self.sumSqDevs + blockSumSqDevs + meanDiff**2*self.count*numVals/float(totalCount)
+        self.count = totalCount
+
+        if weightsIn is not None:
+            blockWeights = np.asarray(weightsIn, dtype=float).ravel()
+            self.weightSum = self.weightSum + blockWeights.sum()
+            self.weightedSum = self.weightedSum + np.dot(blockWeights, blockVals)
+
+        if len(self.quantiles) != 0:
+            self._addToSketch(blockVals)
+
+    def _getItem(self, arrIn, indexIn):
+        if arrIn is None:
+            return 0
+        return int(arrIn[indexIn])
+
+    # Adds values to the lowest level of the quantile sketch and compacts every level that is over its capacity. The
+    # capacity shrinks by 2/3 per level below the top one (but is at least 2), as in the KLL sketch.
+    def _addToSketch(self, valsIn):
+        self.sketchLevels[0] = np.concatenate((self.sketchLevels[0], valsIn))
+        levelIndex = 0
+        while levelIndex < len(self.sketchLevels):
+            levelCapacity = max(2, int(np.ceil(self.sketchSize*(2.0/3.0)**(len(self.sketchLevels) - 1 - levelIndex))))
+            if self.sketchLevels[levelIndex].size > levelCapacity:
+                levelVals = np.sort(self.sketchLevels[levelIndex])
+                numLeft = levelVals.size % 2 # An odd value stays on this level
+                if levelIndex + 1 == len(self.sketchLevels):
+                    self.sketchLevels.append(np.zeros(0))
+                promotedVals = levelVals[numLeft + self.randomState.randint(2)::2]
+                self.sketchLevels[levelIndex+1] = np.concatenate((self.sketchLevels[levelIndex+1], promotedVals))
+                self.sketchLevels[levelIndex] = levelVals[:numLeft]
+            levelIndex = levelIndex + 1
+
+    # Returns the estimated values (np.array[nQuantiles]) at the requested quantiles, interpolating linearly between
+    # the sorted sketch values (the same as numpy's default percentile when the sketch holds every value). The
+    # compressed sketch drops the extremes, so quantiles 0 and 1 are the exact min/max and the rest are clipped to them.
+    def getQuantiles(self):
+        if (len(self.quantiles) == 0) or (self.count == 0):
+            return np.nan*np.ones(len(self.quantiles))
+        quantiles = np.array(self.quantiles)
+        sketchVals = np.concatenate(self.sketchLevels)
+        sketchWeights = np.concatenate([(2.0**levelIndex)*np.ones(self.sketchLevels[levelIndex].size) for levelIndex in range(len(self.sketchLevels))])
+        sortIdx = np.argsort(sketchVals, kind='mergesort')
+        sketchVals = sketchVals[sortIdx]
+        sketchWeights = sketchWeights[sortIdx]
+        if sketchVals.size == 1:
+            quantileVals = sketchVals[0]*np.ones(len(self.quantiles))
+        else:
+            sketchPositions = (np.cumsum(sketchWeights) - sketchWeights)/(sketchWeights.sum() - sketchWeights[-1])
+            quantileVals = np.interp(quantiles, sketchPositions, sketchVals)
+        quantileVals = np.clip(quantileVals, self.minVal, self.maxVal)
+        quantileVals[quantiles <= 0.0] = self.minVal
+        quantileVals[quantiles >= 1.0] = self.maxVal
+        return quantileVals
+
+    # Returns the statistics as a dict with 'count', 'min', 'max', 'mean', 'std' (population standard deviation),
+    # 'weightedMean' (NaN without weights), 'quantiles' (np.array), and 'minInfo'/'maxInfo' as (instance name, label,
+    # integration point) of the minimum/maximum value
+    def getStats(self):
+        fieldStats_out = {'count': self.count, 'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan, 'weightedMean': np.nan,
+                          'quantiles': self.getQuantiles(), 'minInfo': self.minInfo, 'maxInfo': self.maxInfo}
+        if self.count != 0:
+            fieldStats_out['min'] = self.minVal
+            fieldStats_out['max'] = self.maxVal
+            fieldStats_out['mean'] = self.mean
+            fieldStats_out['std'] = np.sqrt(self.sumSqDevs/self.count)
+        if self.weightSum != 0.0:
+            fieldStats_out['weightedMean'] = self.weightedSum/self.weightSum
+        return fieldStats_out
+# ----> END FieldStatsAccumulator <----
+
+
+# Converts the per-frame statistics of reduceFieldValuesBatch(...) in abaqus_moser_utility_functions.py into a header and
+# a 2D list that can be written with write2DListCSV(...). Each row is one frame:
+#   [frame value, count, min, min instance, min label, min integ pnt, max, max instance, max label, max integ pnt, mean,
+#    weighted mean, std, quantile 1, quantile 2, ...]
+def getReductionTable(frameStatsIn, quantilesIn=()):
+    headerLine = ['frame value', 'count', 'min', 'min instance', 'min label', 'min integ pnt', 'max', 'max instance',
+                  'max label', 'max integ pnt', 'mean', 'weighted mean', 'std'] + ['q' + str(curQuantile) for curQuantile in quantilesIn]
+    tableRows = []
+    for curFrameValue, curStats in frameStatsIn:
+        tableRows.append([curFrameValue, curStats['count'], curStats['min']] + list(curStats['minInfo']) +
+                         [curStats['max']] + list(curStats['maxInfo']) +
+                         [curStats['mean'], curStats['weightedMean'], curStats['std']] + list(curStats['quantiles']))
+    return (headerLine, tableRows)
+# ----> END getReductionTable(...) <----
+
+
+# Keeps the running maximum and minimum of a scalar field for each node, element, or integration point over a series of
+# frames (a temporal envelope), together with the frame at which each extreme occurred. Only one value per entity and
+# extreme is kept, so the memory used is the same for 10 frames or 10,000. The entities are registered the first time
+# they appear; when the blocks of the later frames have the same labels in the same order (as is the case for the same
+# region of an .odb file), they are matched without any searching.
+class FieldEnvelopeAccumulator(object):
+
+    def __init__(self):
+        self.frameValues = [] # list[float] - Frame value (e.g., step time) of each frame index
+        self.instEnvelopes = {} # dict{str: dict{str: np.array[n]}} - Keys, labels, and extremes of each instance
+
+    # Adds a block of values (np.array[n]) of the frame with the index frameIndexIn. The node labels, element labels,
+    # and integration points (np.array[n] each, zeros if not applicable) identify the entity of each value.
+    def addBlock(self, valsIn, instNameIn, nodeLabelsIn, elementLabelsIn, integPntsIn, frameIndexIn):
+        blockVals = np.asarray(valsIn, dtype=float).ravel()
+        if blockVals.size == 0:
+            return
+        blockKeys = getEntityKeys(nodeLabelsIn, elementLabelsIn, integPntsIn)
+        instEnvelope = self.instEnvelopes.get(instNameIn)
+        if instEnvelope is None or instEnvelope['keys'].size == 0:
+            instEnvelope = self._addEntities(instNameIn, blockKeys, nodeLabelsIn, elementLabelsIn, integPntsIn)
+
+        # Fast path: the same entities in the same order as an earlier block of this instance (an instance with several
+        # element types has one block per type in each frame)
+        blockSignature = (blockKeys.size, blockKeys[0], blockKeys[-1])
+        lastIdx = instEnvelope['blockIdx'].get(blockSignature)
+        if (lastIdx is not None) and np.array_equal(instEnvelope['keys'][lastIdx], blockKeys):
+            entityIdx = lastIdx
+        else:
+            keyPos = np.clip(np.searchsorted(instEnvelope['keys'], blockKeys), 0, instEnvelope['keys'].size - 1)
+            if not np.all(instEnvelope['keys'][keyPos] == blockKeys):
+                instEnvelope = self._addEntities(instNameIn, blockKeys, nodeLabelsIn, elementLabelsIn, integPntsIn)
+                keyPos = np.searchsorted(instEnvelope['keys'], blockKeys)
+            entityIdx = keyPos
+            instEnvelope['blockIdx'][blockSignature] = entityIdx
+
+        isNewMax = blockVals > instEnvelope['maxVals'][entityIdx]
+        instEnvelope['maxVals'][entityIdx[isNewMax]] = blockVals[isNewMax]
+        instEnvelope['maxFrames'][entityIdx[isNewMax]] = frameIndexIn
+        isNewMin = blockVals < instEnvelope['minVals'][entityIdx]
+        instEnvelope['minVals'][entityIdx[isNewMin]] = blockVals[isNewMin]
+        instEnvelope['minFrames'][entityIdx[isNewMin]] = frameIndexIn
+
+    # Registers the entities of a block that are not yet in the envelope of an instance, keeping the keys sorted
+    def _addEntities(self, instNameIn, blockKeysIn, nodeLabelsIn, elementLabelsIn, integPntsIn):
+        blockArrs = {'keys': blockKeysIn, 'nodeLabels': np.asarray(nodeLabelsIn, dtype=np.int64),
+                     'elementLabels': np.asarray(elementLabelsIn, dtype=np.int64), 'integPnts': np.asarray(integPntsIn, dtype=np.int64)}
+        blockArrs['maxVals'] = -np.inf*np.ones(blockKeysIn.size)
+        blockArrs['minVals'] = np.inf*np.ones(blockKeysIn.size)
+        blockArrs['maxFrames'] = -np.ones(blockKeysIn.size, dtype=np.int64)
+        blockArrs['minFrames'] = -np.ones(blockKeysIn.size, dtype=np.int64)
+
+        instEnvelope = self.instEnvelopes.get(instNameIn)
+        if instEnvelope is not None:
+            isNew = ~np.in1d(blockKeysIn, instEnvelope['keys'])
+            for curKey in blockArrs.keys():
+                blockArrs[curKey] = np.concatenate((instEnvelope[curKey], blockArrs[curKey][isNew]))
+        uniqueKeys, uniqueIdx = np.unique(blockArrs['keys'], return_index=True)
+        instEnvelope = {}
+        for curKey in blockArrs.keys():
+            instEnvelope[curKey] = blockArrs[curKey][uniqueIdx]
+        instEnvelope['blockIdx'] = {} # Entity indices of the blocks seen so far, see addBlock(...)
+        self.instEnvelopes[instNameIn] = instEnvelope
+        return instEnvelope
+
+    # Returns the index to use in addBlock(...) for a new frame with the frame value frameValueIn
+    def addFrame(self, frameValueIn):
+        self.frameValues.append(frameValueIn)
+        return len(self.frameValues) - 1
+
+    # Returns the envelope as a dict of arrays with one row per entity, sorted by instance name and then label:
+    #   'instanceNames' - list[str], and 'instCodes' - np.array[n] of indices into 'instanceNames'
+    #   'nodeLabels', 'elementLabels', 'integPnts' - np.array[n] each (zeros if not applicable)
+    #   'maxVals', 'minVals' - np.array[n] of the extreme values
+    #   'maxFrameIndices', 'minFrameIndices' - np.array[n] of the frame index (see addFrame(...)) of each extreme
+    #   'maxFrameValues', 'minFrameValues' - np.array[n] of the frame value of each extreme
+    def getEnvelope(self):
+        instanceNames = sorted(self.instEnvelopes.keys())
+        envelope_out = {'instanceNames': instanceNames}
+        outKeys = [('instCodes', None), ('nodeLabels', 'nodeLabels'), ('elementLabels', 'elementLabels'), ('integPnts', 'integPnts'),
+                   ('maxVals', 'maxVals'), ('minVals', 'minVals'), ('maxFrameIndices', 'maxFrames'), ('minFrameIndices', 'minFrames')]
+        for curOutKey, curKey in outKeys:
+            curArrs = [np.zeros(0)]
+            for instIndex in range(len(instanceNames)):
+                instEnvelope = self.instEnvelopes[instanceNames[instIndex]]
+                if curKey is None:
+                    curArrs.append(instIndex*np.ones(instEnvelope['keys'].size, dtype=np.int64))
+                else:
+                    curArrs.append(instEnvelope[curKey])
+            envelope_out[curOutKey] = np.concatenate(curArrs)
+            if curOutKey not in ['maxVals', 'minVals']:
+                envelope_out[curOutKey] = envelope_out[curOutKey].astype(np.int64)
+
+        frameValues = np.array(self.frameValues + [np.nan], dtype=float) # Index -1 (never reached) gives NaN
+        envelope_out['maxFrameValues'] = frameValues[envelope_out['maxFrameIndices']]
+        envelope_out['minFrameValues'] = frameValues[envelope_out['minFrameIndices']]
+        return envelope_out
+# ----> END FieldEnvelopeAccumulator <----
+
+
+# Returns an np.array[n] of int64 keys that are unique for each entity of an instance:
+#   nodes - the node label
+#   elements/integration points - elementLabel*4096 + integration point (up to 4095 integration points)
+#   element nodes (ELEMENT_NODAL) - elementLabel*2**31 + node label
+def getEntityKeys(nodeLabelsIn, elementLabelsIn, integPntsIn):
+    nodeLabels = np.asarray(nodeLabelsIn, dtype=np.int64)
+    elementLabels = np.asarray(elementLabelsIn, dtype=np.int64)
+    integPnts = np.asarray(integPntsIn, dtype=np.int64)
+    if not np.any(elementLabels != 0):
+        return nodeLabels.copy()
+    if np.any(nodeLabels != 0):
+        return elementLabels*(2**31) + nodeLabels
+    return elementLabels*4096 + integPnts
+# ----> END getEntityKeys(...) <----
+
+
+# Converts the result of getFieldEnvelopeBatch(...) in abaqus_moser_utility_functions.py into a header and a 2D list
+# that can be written with write2DListCSV(...). Each row is one entity:
+#   [instance, element label, node label, integ pnt, max, frame value at max, min, frame value at min]
+def getEnvelopeTable(envelopeIn):
+    headerLine = ['instance', 'element label', 'node label', 'integ pnt', 'max', 'frame value at max', 'min', 'frame value at min']
+    tableRows = []
+    for rowIndex in range(envelopeIn['instCodes'].size):
+        tableRows.append([envelopeIn['instanceNames'][envelopeIn['instCodes'][rowIndex]], int(envelopeIn['elementLabels'][rowIndex]),
+                          int(envelopeIn['nodeLabels'][rowIndex]), int(envelopeIn['integPnts'][rowIndex]),
+                          envelopeIn['maxVals'][rowIndex], envelopeIn['maxFrameValues'][rowIndex],
+                          envelopeIn['minVals'][rowIndex], envelopeIn['minFrameValues'][rowIndex]])
+    return (headerLine, tableRows)
+# ----> END getEnvelopeTable(...) <----
@@ -0,0 +1,527 @@
+import numpy as np
+import math
+
+
+# A uniform grid spatial index over a cloud of points (e.g., the deformed coordinates of nodes or integration points).
+# The points are bucketed into cubic cells and sorted by their cell ID, so that every query only has to look at the
+# points of the cells that overlap it. All of the queries are batched: many query points are processed at once with
+# numpy operations rather than a Python loop over each query.
+#
+# Each point carries a label (node or element label), an instance code (index into instanceNames), and a sub-ID (the
+# integration point number, or 0 for nodes), so that query results can be mapped back to Abaqus entities.
+class UniformGridIndex(object):
+
+    # ----> INPUTS <----
+    # pntCoordsIn - array[n,3] of point coordinates (2D coordinates will be padded with a zero Z-coordinate)
+    # pntLabelsIn - array[n] of labels (int) for each point
+    # pntInstCodesIn - array[n] of indices (int) into instanceNamesIn for each point
+    # instanceNamesIn - list[str] of part instance names
+    # pntSubIdsIn - array[n] of integration point numbers (int) for each point. Use None for nodes (all zeros).
+    # pntsPerCellIn - float - Average number of points per grid cell. Smaller is faster for queries, but uses more memory.
+    def __init__(self, pntCoordsIn, pntLabelsIn, pntInstCodesIn, instanceNamesIn, pntSubIdsIn=None, pntsPerCellIn=2.0):
+        pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+        if pntCoords.shape[1] < 3:
+            pntCoords = np.column_stack((pntCoords, np.zeros((pntCoords.shape[0], 3 - pntCoords.shape[1]))))
+
+        self.coords = np.ascontiguousarray(pntCoords[:,0:3])
+        self.labels = np.asarray(pntLabelsIn, dtype=np.int64)
+        self.instCodes = np.asarray(pntInstCodesIn, dtype=np.int64)
+        self.instanceNames = list(instanceNamesIn)
+        if pntSubIdsIn is None:
+            self.subIds = np.zeros(self.labels.shape, dtype=np.int64)
+        else:
+            self.subIds = np.asarray(pntSubIdsIn, dtype=np.int64)
+        self.numPnts = self.coords.shape[0]
+
+        # ----> SIZE THE GRID <----
+        if self.numPnts == 0:
+            self.origin = np.zeros(3)
+            self.cellSize = 1.0
+            self.dims = np.ones(3, dtype=np.int64)
+        else:
+            self.origin = self.coords.min(axis=0)
+            gridExtent = self.coords.max(axis=0) - self.origin
+            maxExtent = gridExtent.max()
+            if maxExtent <= 0.0:
+                maxExtent = 1.0
+            numCellsTarget = max(1.0, self.numPnts/float(pntsPerCellIn))
+
+            # Only consider the non-degenerate axes (e.g., a planar set of nodes only has two)
+            activeExtents = gridExtent[gridExtent > 1.0e-12*maxExtent]
+            if activeExtents.size == 0:
+                self.cellSize = maxExtent
+            else:
+                self.cellSize = (np.prod(activeExtents)/numCellsTarget)**(1.0/activeExtents.size)
+                self.cellSize = max(self.cellSize, 1.0e-9*maxExtent)
+            self.dims = np.floor(gridExtent/self.cellSize).astype(np.int64) + 1
+
+        # ----> BUCKET THE POINTS <----
+        pntCellIjk = self._getCellIjk(self.coords, True)
+        pntCellIds = self._getCellIds(pntCellIjk)
+        numCells = int(np.prod(self.dims))
+        self.order = np.argsort(pntCellIds, kind='mergesort')
+        sortedCellIds = pntCellIds[self.order]
+        self.cellStart = np.searchsorted(sortedCellIds, np.arange(numCells + 1))
+
+    # Returns the integer (i, j, k) cell indices of an array of points. Clipped to the grid if clipToGrid is True.
+    def _getCellIjk(self, pntCoords, clipToGrid):
+        cellIjk = np.floor((pntCoords - self.origin)/self.cellSize).astype(np.int64)
+        if clipToGrid:
+            cellIjk = np.clip(cellIjk, 0, self.dims - 1)
+        return cellIjk
+
+    def _getCellIds(self, cellIjk):
+        return cellIjk[:,0] + self.dims[0]*(cellIjk[:,1] + self.dims[1]*cellIjk[:,2])
+
+    # Gathers all of the candidate points inside of the block of cells [cellLo, cellHi] (inclusive, already clipped to
+    # the grid) for each query. Returns (queryIndices, pointIndices) as two flat arrays of the same length.
+    def _gatherCandidates(self, cellLo, cellHi):
+        cellSizes = np.clip(cellHi - cellLo + 1, 0, None)
+        numCellsPerQuery = np.prod(cellSizes, axis=1)
+        numQueries = cellLo.shape[0]
+
+        # Enumerate every (query, cell) pair
+        queryRep = np.repeat(np.arange(numQueries), numCellsPerQuery)
+        localIndex = np.arange(queryRep.size) - np.repeat(np.cumsum(numCellsPerQuery) - numCellsPerQuery, numCellsPerQuery)
+        sizeX = cellSizes[queryRep,0]
+        sizeY = cellSizes[queryRep,1]
+        offX = localIndex % sizeX
+        offY = (localIndex // sizeX) % sizeY
+        offZ = localIndex // (sizeX*sizeY)
+        cellIds = (cellLo[queryRep,0] + offX) + self.dims[0]*((cellLo[queryRep,1] + offY) + self.dims[1]*(cellLo[queryRep,2] + offZ))
+
+        # Enumerate every (query, point) pair of the points within those cells
+        cellStarts = self.cellStart[cellIds]
+        numPntsPerCell = self.cellStart[cellIds + 1] - cellStarts
+        queryIdx_out = np.repeat(queryRep, numPntsPerCell)
+        localIndex = np.arange(queryIdx_out.size) - np.repeat(np.cumsum(numPntsPerCell) - numPntsPerCell, numPntsPerCell)
+        pntIdx_out = self.order[np.repeat(cellStarts, numPntsPerCell) + localIndex]
+        return (queryIdx_out, pntIdx_out)
+
+    # Finds all of the points within a distance, radiusIn, of each query point. qPntsIn is an array[m,3]. Returns
+    # (offsets, indices, distances) in a compressed row format: the points found for query i are
+    # indices[offsets[i]:offsets[i+1]] (indices into the points of this index), sorted by increasing distance.
+    def queryRadius(self, qPntsIn, radiusIn, chunkSizeIn=20000):
+        qPnts = self._asQueryPnts(qPntsIn)
+        radius = float(radiusIn)
+        numQueries = qPnts.shape[0]
+
+        allQueryIdx = []
+        allPntIdx = []
+        allDists = []
+        for chunkStart in range(0, numQueries, chunkSizeIn):
+            chunkPnts = qPnts[chunkStart:chunkStart+chunkSizeIn]
+            cellLo = np.clip(self._getCellIjk(chunkPnts - radius, False), 0, self.dims) # Empty block if outside of the grid
+            cellHi = np.clip(self._getCellIjk(chunkPnts + radius, False), -1, self.dims - 1)
+            queryIdx, pntIdx = self._gatherCandidates(cellLo, cellHi)
+
+            pntDists = np.sqrt(np.sum((self.coords[pntIdx] - chunkPnts[queryIdx])**2, axis=1))
+            inRadius = pntDists <= radius
+            allQueryIdx.append(queryIdx[inRadius] + chunkStart)
+            allPntIdx.append(pntIdx[inRadius])
+            allDists.append(pntDists[inRadius])
+
+        if numQueries == 0:
+            return (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+        queryIdx = np.concatenate(allQueryIdx)
+        pntIdx = np.concatenate(allPntIdx)
+        pntDists = np.concatenate(allDists)
+
+        sortOrder = self._argsortWithinQueries(queryIdx, pntDists)
+        offsets_out = np.zeros(numQueries + 1, dtype=np.int64)
+        offsets_out[1:] = np.cumsum(np.bincount(queryIdx, minlength=numQueries))
+        return (offsets_out, pntIdx[sortOrder], pntDists[sortOrder])
+
+    # Finds the k nearest points of each query point. qPntsIn is an array[m,3]. Returns (indices, distances) as
+    # np.array[m,k]. If fewer than k points exist in the index, the missing entries are -1 with an infinite distance.
+    # The search starts with a small block of cells around each query and doubles the size of the block only for the
+    # queries whose k-th neighbor could still lie outside of the searched block.
+    def queryNearest(self, qPntsIn, kIn=1, chunkSizeIn=20000):
+        qPnts = self._asQueryPnts(qPntsIn)
+        numNeighbors = int(kIn)
+        numQueries = qPnts.shape[0]
+
+        indices_out = -np.ones((numQueries, numNeighbors), dtype=np.int64)
+        dists_out = np.inf*np.ones((numQueries, numNeighbors))
+        if self.numPnts == 0 or numQueries == 0:
+            return (indices_out, dists_out)
+
+        # Initial half-width of the searched block, sized so that it should contain about k points
+        pntsPerCell = self.numPnts/float(np.prod(self.dims))
+        initHalfWidth = self.cellSize*max(0.5, 0.75*(numNeighbors/pntsPerCell)**(1.0/3.0))
+
+        for chunkStart in range(0, numQueries, chunkSizeIn):
+            chunkQueries = np.arange(chunkStart, min(chunkStart + chunkSizeIn, numQueries))
+            halfWidth = initHalfWidth
+            while chunkQueries.size > 0:
+                chunkPnts = qPnts[chunkQueries]
+                cellLo = self._getCellIjk(chunkPnts - halfWidth, True)
+                cellHi = self._getCellIjk(chunkPnts + halfWidth, True)
+                queryIdx, pntIdx = self._gatherCandidates(cellLo, cellHi)
+                pntDists = np.sqrt(np.sum((self.coords[pntIdx] - chunkPnts[queryIdx])**2, axis=1))
+
+                # Keep the k closest candidates of each query
+                sortOrder = self._argsortWithinQueries(queryIdx, pntDists)
+                queryIdx = queryIdx[sortOrder]
+                pntIdx = pntIdx[sortOrder]
+                pntDists = pntDists[sortOrder]
+                numCandidates = np.bincount(queryIdx, minlength=chunkQueries.size)
+                candRank = np.arange(queryIdx.size) - np.repeat(np.cumsum(numCandidates) - numCandidates, numCandidates)
+                keepMask = candRank < numNeighbors
+
+                # Distance that is guaranteed to have been fully searched: the closest face of the searched block of
+                # cells. Faces on the boundary of the grid don't count, since no points exist beyond them.
+                blockLo = self.origin + cellLo*self.cellSize
+                blockHi = self.origin + (cellHi + 1)*self.cellSize
+                distToLo = np.where(cellLo == 0, np.inf, chunkPnts - blockLo)
+                distToHi = np.where(cellHi == self.dims - 1, np.inf, blockHi - chunkPnts)
+                searchedRadius = np.minimum(distToLo.min(axis=1), distToHi.min(axis=1))
+
+                kthDist = np.inf*np.ones(chunkQueries.size)
+                hasK = numCandidates >= numNeighbors
+                kthMask = keepMask & (candRank == numNeighbors - 1)
+                kthDist[queryIdx[kthMask]] = pntDists[kthMask]
+                isResolved = (hasK & (kthDist <= searchedRadius)) | np.isinf(searchedRadius)
+
+                resolvedCand = keepMask & isResolved[queryIdx]
+                outRows = chunkQueries[queryIdx[resolvedCand]]
+                outCols = candRank[resolvedCand]
+                indices_out[outRows, outCols] = pntIdx[resolvedCand]
+                dists_out[outRows, outCols] = pntDists[resolvedCand]
+
+                chunkQueries = chunkQueries[~isResolved]
+                halfWidth = 2.0*halfWidth
+
+        return (indices_out, dists_out)
+
+    # The candidate arrays from _gatherCandidates(...) are already grouped by (nondecreasing) query index, so sorting by
+    # distance within each query only needs a single argsort of a combined key, which is much faster than np.lexsort.
+    def _argsortWithinQueries(self, queryIdx, pntDists):
+        if pntDists.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        maxDist = pntDists.max()
+        if maxDist <= 0.0:
+            return np.arange(pntDists.size)
+        return np.argsort(queryIdx + pntDists/(maxDist*(1.0 + 1.0e-9)))
+
+    # Finds all of the points inside of an axis-aligned box defined by its minimum and maximum corners (array[3] each).
+    # Returns an np.array of indices into the points of this index.
+    def queryBox(self, boxMinIn, boxMaxIn):
+        boxMin = np.asarray(boxMinIn, dtype=float).reshape(1,3)
+        boxMax = np.asarray(boxMaxIn, dtype=float).reshape(1,3)
+        if self.numPnts == 0 or np.any(boxMax < boxMin):
+            return np.zeros(0, dtype=np.int64)
+
+        cellLo = np.clip(self._getCellIjk(boxMin, False), 0, self.dims) # Empty block if outside of the grid
+        cellHi = np.clip(self._getCellIjk(boxMax, False), -1, self.dims - 1)
+        queryIdx, pntIdx = self._gatherCandidates(cellLo, cellHi)
+
+        candCoords = self.coords[pntIdx]
+        inBox = np.all((candCoords >= boxMin) & (candCoords <= boxMax), axis=1)
+        return np.sort(pntIdx[inBox])
+
+    # Returns (labels, instanceNames, subIds) for an array of point indices returned by one of the queries. Negative
+    # indices (missing neighbors) return a label of 0 and an empty instance name.
+    def getPointInfo(self, pntIndicesIn):
+        pntIndices = np.asarray(pntIndicesIn, dtype=np.int64)
+        validMask = pntIndices >= 0
+        safeIndices = np.where(validMask, pntIndices, 0)
+
+        labels_out = np.where(validMask, self.labels[safeIndices], 0)
+        subIds_out = np.where(validMask, self.subIds[safeIndices], 0)
+        instNamesArr = np.array(self.instanceNames + [''], dtype=object)
+        instCodes = np.where(validMask, self.instCodes[safeIndices], len(self.instanceNames))
+        return (labels_out, instNamesArr[instCodes], subIds_out)
+
+    def _asQueryPnts(self, qPntsIn):
+        qPnts = np.atleast_2d(np.asarray(qPntsIn, dtype=float))
+        if qPnts.shape[1] < 3:
+            qPnts = np.column_stack((qPnts, np.zeros((qPnts.shape[0], 3 - qPnts.shape[1]))))
+        return qPnts[:,0:3]
+# ----> END UniformGridIndex <----
+
+
+# Builds a UniformGridIndex from the output of calcDeformedNodeCoords(...) in abaqus_moser_utility_functions.py. That
+# output is either a 2D list, list[[Node Label, X1, X2, X3]], for a node set on a single part instance, or a 3D list with
+# one such 2D list for each part instance. instanceNames_in should be the corresponding instance name(s): a single str
+# (or None) for the 2D case, or a list[str] for the 3D case (e.g., OdbSet.instanceNames).
+def buildSpatialIndexFromNodeCoords(nodeCoordList_in, instanceNames_in):
+    nodeCoordList = nodeCoordList_in
+    instanceNames = instanceNames_in
+
+    if len(nodeCoordList) != 0 and not isinstance(nodeCoordList[0][0], (list, tuple)):
+        nodeCoordList = [nodeCoordList] # Make a 3D list, even if only one part instance was used in the node set
+        if instanceNames is None or isinstance(instanceNames, str):
+            instanceNames = [instanceNames or '']
+
+    allCoords = []
+    allLabels = []
+    allInstCodes = []
+    for instIndex in range(len(nodeCoordList)):
+        curInstArr = np.array(nodeCoordList[instIndex], dtype=float)
+        if curInstArr.size == 0:
+            continue
+        allCoords.append(curInstArr[:,1:])
+        allLabels.append(curInstArr[:,0].astype(np.int64))
+        allInstCodes.append(instIndex*np.ones(curInstArr.shape[0], dtype=np.int64))
+
+    if len(allCoords) == 0:
+        return UniformGridIndex(np.zeros((0,3)), [], [], list(instanceNames))
+    return UniformGridIndex(np.vstack(allCoords), np.concatenate(allLabels), np.concatenate(allInstCodes), list(instanceNames))
+# ----> END buildSpatialIndexFromNodeCoords(...) <----
+
+
+# Builds a UniformGridIndex from the output of getIntegPntFieldValuesFromSetBatch(...) in abaqus_moser_utility_functions.py,
+# which is a 4D list: [instance][element][integ pnt][Element label, X, Y, Z, Field Values ...]. The integration points
+# padded with zeros (for elements with fewer integration points than the maximum) are skipped. The sub-ID of each point
+# is the integration point number (starting at 1).
+def buildSpatialIndexFromIntegPntVals(elemFieldVals_in, instanceNames_in):
+    elemFieldVals = elemFieldVals_in
+    instanceNames = instanceNames_in # list[str] - Instance names corresponding to the first index of elemFieldVals
+
+    allCoords = []
+    allLabels = []
+    allInstCodes = []
+    allSubIds = []
+    for instIndex in range(len(elemFieldVals)):
+        curInstArr = np.array(elemFieldVals[instIndex], dtype=float)
+        if curInstArr.size == 0:
+            continue
+        numElems, numIntegPnts = curInstArr.shape[0:2]
+        curLabels = curInstArr[:,:,0].reshape(-1).astype(np.int64)
+        curSubIds = np.tile(np.arange(1, numIntegPnts + 1), numElems)
+        validMask = curLabels != 0 # Element labels start at 1, so a label of 0 denotes padding
+
+        allCoords.append(curInstArr[:,:,1:4].reshape(-1,3)[validMask])
+        allLabels.append(curLabels[validMask])
+        allSubIds.append(curSubIds[validMask])
+        allInstCodes.append(instIndex*np.ones(np.count_nonzero(validMask), dtype=np.int64))
+
+    if len(allCoords) == 0:
+        return UniformGridIndex(np.zeros((0,3)), [], [], list(instanceNames))
+    return UniformGridIndex(np.vstack(allCoords), np.concatenate(allLabels), np.concatenate(allInstCodes), list(instanceNames),
+                            np.concatenate(allSubIds))
+# ----> END buildSpatialIndexFromIntegPntVals(...) <----
+
+
+# ----> GEOMETRIC SELECTORS <----
+# Each selector below takes an array[n,3] of coordinates (undeformed or deformed) and returns a boolean np.array[n] that
+# is True for the points inside of the selected region. Boundaries are inclusive.
+
+# Axis-aligned box between the minimum and maximum corners
+def selectPntsInBox(pntCoordsIn, boxMinIn, boxMaxIn):
+    pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    boxMin = np.asarray(boxMinIn, dtype=float).reshape(1,-1)
+    boxMax = np.asarray(boxMaxIn, dtype=float).reshape(1,-1)
+    return np.all((pntCoords >= boxMin) & (pntCoords <= boxMax), axis=1)
+
+# Sphere with a given center and radius
+def selectPntsInSphere(pntCoordsIn, centerIn, radiusIn):
+    pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    center = np.asarray(centerIn, dtype=float).reshape(1,-1)
+    return np.sum((pntCoords - center)**2, axis=1) <= float(radiusIn)**2
+
+# Cylinder defined by a point on its axis, the axis direction, and the radius. The axial extent is measured from axisPntIn
+# along axisDirIn, and is infinite if axialMinIn/axialMaxIn are None.
+def selectPntsInCylinder(pntCoordsIn, axisPntIn, axisDirIn, radiusIn, axialMinIn=None, axialMaxIn=None):
+    pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    axisPnt = np.asarray(axisPntIn, dtype=float).reshape(1,-1)
+    axisDir = np.asarray(axisDirIn, dtype=float)
+    axisDir = axisDir/np.sqrt(np.sum(axisDir**2))
+
+    relCoords = pntCoords - axisPnt
+    axialDist = np.dot(relCoords, axisDir)
+    radialDistSq = np.sum(relCoords**2, axis=1) - axialDist**2
+    selMask = radialDistSq <= float(radiusIn)**2
+    if axialMinIn is not None:
+        selMask = selMask & (axialDist >= axialMinIn)
+    if axialMaxIn is not None:
+        selMask = selMask & (axialDist <= axialMaxIn)
+    return selMask
+
+# Half-space on the side of a plane that the normal points towards
+def selectPntsInHalfSpace(pntCoordsIn, planePntIn, planeNormalIn):
+    return selectPntsInSlab(pntCoordsIn, planePntIn, planeNormalIn, 0.0, None)
+
+# Slab between two planes parallel to a reference plane. The signed distances (along the normal) of the two bounding 
+# planes from the reference plane are distMinIn and distMaxIn. Use None for an unbounded side.
+def selectPntsInSlab(pntCoordsIn, planePntIn, planeNormalIn, distMinIn, distMaxIn):
+    pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    planePnt = np.asarray(planePntIn, dtype=float).reshape(1,-1)
+    planeNormal = np.asarray(planeNormalIn, dtype=float)
+    planeNormal = planeNormal/np.sqrt(np.sum(planeNormal**2))
+
+    signedDist = np.dot(pntCoords - planePnt, planeNormal)
+    selMask = np.ones(pntCoords.shape[0], dtype=bool)
+    if distMinIn is not None:
+        selMask = selMask & (signedDist >= distMinIn)
+    if distMaxIn is not None:
+        selMask = selMask & (signedDist <= distMaxIn)
+    return selMask
+
+# Points within a distance of a surface. The surface can be given as either:
+#   array[m,3] - Points on the surface (e.g., the coordinates of the nodes of a surface); the distance to the closest point is used.
+#   array[m,3,3] - Triangular facets of the surface; the exact distance to the closest facet is used.
+def selectPntsNearSurface(pntCoordsIn, surfaceIn, distanceIn):
+    pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    surface = np.asarray(surfaceIn, dtype=float)
+    distance = float(distanceIn)
+
+    if surface.ndim == 2:
+        surfIndex = UniformGridIndex(surface, np.arange(surface.shape[0]), np.zeros(surface.shape[0], dtype=np.int64), [''])
+        nearIdx, nearDists = surfIndex.queryNearest(pntCoords, 1)
+        return nearDists[:,0] <= distance
+
+    # Candidate facets are the ones whose centroids are within the distance plus the facet size
+    triCentroids = surface.mean(axis=1)
+    triRadius = np.sqrt(np.max(np.sum((surface - triCentroids[:,np.newaxis,:])**2, axis=2)))
+    triIndex = UniformGridIndex(triCentroids, np.arange(surface.shape[0]), np.zeros(surface.shape[0], dtype=np.int64), [''])
+    candOffsets, candTriIdx, candDists = triIndex.queryRadius(pntCoords, distance + triRadius)
+    candPntIdx = np.repeat(np.arange(pntCoords.shape[0]), np.diff(candOffsets))
+
+    triDists = calcPntTriangleDists(pntCoords[candPntIdx], surface[candTriIdx])
+    selMask = np.zeros(pntCoords.shape[0], dtype=bool)
+    selMask[candPntIdx[triDists <= distance]] = True
+    return selMask
+
+
+# Vectorized distance between pairs of points, array[n,3], and triangles, array[n,3,3]. Follows the closest point on a
+# triangle algorithm (Voronoi regions of the vertices, edges, and face) from Ericson's "Real-Time Collision Detection".
+def calcPntTriangleDists(pntCoordsIn, trianglesIn):
+    p = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    tri = np.asarray(trianglesIn, dtype=float).reshape(-1,3,3)
+    a = tri[:,0,:]
+    b = tri[:,1,:]
+    c = tri[:,2,:]
+
+    ab = b - a
+    ac = c - a
+    ap = p - a
+    d1 = np.sum(ab*ap, axis=1)
+    d2 = np.sum(ac*ap, axis=1)
+    bp = p - b
+    d3 = np.sum(ab*bp, axis=1)
+    d4 = np.sum(ac*bp, axis=1)
+    cp = p - c
+    d5 = np.sum(ab*cp, axis=1)
+    d6 = np.sum(ac*cp, axis=1)
+
+    va = d3*d6 - d5*d4
+    vb = d5*d2 - d1*d6
+    vc = d1*d4 - d3*d2
+
+    # Start with the face region, and then overwrite with the edge and vertex regions (vertex regions take priority)
+    denom = va + vb + vc
+    denom = np.where(np.abs(denom) > 0.0, denom, 1.0)
+    v = vb/denom
+    w = vc/denom
+    closest = a + ab*v[:,np.newaxis] + ac*w[:,np.newaxis]
+
+    def safeDiv(num, den):
+        return num/np.where(np.abs(den) > 0.0, den, 1.0)
+
+    edgeBC = (va <= 0.0) & ((d4 - d3) >= 0.0) & ((d5 - d6) >= 0.0)
+    wBC = safeDiv(d4 - d3, (d4 - d3) + (d5 - d6))
+    closest[edgeBC] = (b + (c - b)*wBC[:,np.newaxis])[edgeBC]
+
+    edgeAC = (vb <= 0.0) & (d2 >= 0.0) & (d6 <= 0.0)
+    wAC = safeDiv(d2, d2 - d6)
+    closest[edgeAC] = (a + ac*wAC[:,np.newaxis])[edgeAC]
+
+    edgeAB = (vc <= 0.0) & (d1 >= 0.0) & (d3 <= 0.0)
+    vAB = safeDiv(d1, d1 - d3)
+    closest[edgeAB] = (a + ab*vAB[:,np.newaxis])[edgeAB]
+
+    vertC = (d6 >= 0.0) & (d5 <= d6)
+    closest[vertC] = c[vertC]
+    vertB = (d3 >= 0.0) & (d4 <= d3)
+    closest[vertB] = b[vertB]
+    vertA = (d1 <= 0.0) & (d2 <= 0.0)
+    closest[vertA] = a[vertA]
+
+    return np.sqrt(np.sum((p - closest)**2, axis=1))
+
+
+# Vectorized geometry of the faces (facets) of elements from the coordinates of their corner nodes, array[n,4,3]. For
+# triangular facets, numCornersIn is 3 and the fourth corner is ignored. The area vector of a quadrilateral is half of
+# the cross product of its diagonals, which is exact for planar facets and the average over a warped one. Returns the
+# centroids (mean of the corners), the unit normals (right-hand rule about the corner order), and the areas as
+# (np.array[n,3], np.array[n,3], np.array[n]).
+def calcFacetGeometry(cornerCoordsIn, numCornersIn):
+    cornerCoords = np.asarray(cornerCoordsIn, dtype=float).reshape(-1,4,3)
+    numCorners = np.asarray(numCornersIn, dtype=np.int64)*np.ones(cornerCoords.shape[0], dtype=np.int64)
+
+    isTri = numCorners == 3
+    lastCorner = cornerCoords[:,3,:].copy()
+    lastCorner[isTri] = cornerCoords[isTri,2,:] # A collapsed quadrilateral has the area vector of the triangle
+
+    areaVecs = 0.5*np.cross(cornerCoords[:,2,:] - cornerCoords[:,0,:], lastCorner - cornerCoords[:,1,:])
+    areas = np.sqrt(np.sum(areaVecs**2, axis=1))
+    normals = areaVecs/np.where(areas > 0.0, areas, 1.0)[:,np.newaxis]
+    centroids = (np.sum(cornerCoords[:,0:3,:], axis=1) + np.where(isTri, 0.0, 1.0)[:,np.newaxis]*cornerCoords[:,3,:])/numCorners[:,np.newaxis]
+    return (centroids, normals, areas)
+
+
+# Evaluates a selector given as a tuple (or a list of tuples, which are combined so that all must be satisfied). This is 
+# meant for the user inputs of the driver scripts. The first entry of the tuple is the selector type:
+#   ('BOX', boxMin, boxMax)
+#   ('SPHERE', center, radius)
+#   ('CYLINDER', axisPnt, axisDir, radius)   or   ('CYLINDER', axisPnt, axisDir, radius, axialMin, axialMax)
+#   ('HALFSPACE', planePnt, planeNormal)
+#   ('SLAB', planePnt, planeNormal, distMin, distMax)
+#   ('NEAR_SURFACE', surfacePntsOrTriangles, distance)
+# Prefix the type with 'NOT_' (e.g., 'NOT_SPHERE') to invert the selection. Returns a boolean np.array[n].
+def evalSelectorSpec(pntCoordsIn, selectorSpecIn):
+    pntCoords = np.atleast_2d(np.asarray(pntCoordsIn, dtype=float))
+    selectorSpec = selectorSpecIn
+
+    if isinstance(selectorSpec, list):
+        selMask = np.ones(pntCoords.shape[0], dtype=bool)
+        for curSpec in selectorSpec:
+            selMask = selMask & evalSelectorSpec(pntCoords, curSpec)
+        return selMask
+
+    selType = selectorSpec[0].upper()
+    selArgs = selectorSpec[1:]
+    invertSel = False
+    if selType.startswith('NOT_'):
+        invertSel = True
+        selType = selType[4:]
+
+    if selType == 'BOX':
+        selMask = selectPntsInBox(pntCoords, *selArgs)
+    elif selType == 'SPHERE':
+        selMask = selectPntsInSphere(pntCoords, *selArgs)
+    elif selType == 'CYLINDER':
+        selMask = selectPntsInCylinder(pntCoords, *selArgs)
+    elif selType == 'HALFSPACE':
+        selMask = selectPntsInHalfSpace(pntCoords, *selArgs)
+    elif selType == 'SLAB':
+        selMask = selectPntsInSlab(pntCoords, *selArgs)
+    elif selType == 'NEAR_SURFACE':
+        selMask = selectPntsNearSurface(pntCoords, *selArgs)
+    else:
+        print 'ERROR: Unknown selector type, ', selectorSpec[0]
+        return np.zeros(pntCoords.shape[0], dtype=bool)
+
+    if invertSel:
+        return ~selMask
+    return selMask
+
+
+# Converts a selection into the per-instance label list format used by NodeSetFromNodeLabels(...) and
+# ElementSetFromElementLabels(...), as well as readCSVFileOdbSet(...):
+#   [['InstanceName1', (11, 12, ...)], ['InstanceName2', (21, 22, ...)]]
+# The labels are sorted, unique, and converted to Python ints. Instances without any selected labels are left out.
+def getOdbLabelListFromMask(selMaskIn, pntLabelsIn, pntInstCodesIn, instanceNamesIn):
+    selMask = np.asarray(selMaskIn, dtype=bool)
+    pntLabels = np.asarray(pntLabelsIn, dtype=np.int64)
+    pntInstCodes = np.asarray(pntInstCodesIn, dtype=np.int64)
+    instanceNames = instanceNamesIn # list[str] - Instance names that pntInstCodesIn index into
+
+    odbLabelList_out = []
+    for instIndex in range(len(instanceNames)):
+        curLabels = np.unique(pntLabels[selMask & (pntInstCodes == instIndex)])
+        if curLabels.size != 0:
+            odbLabelList_out.append([instanceNames[instIndex], tuple(int(curLabel) for curLabel in curLabels)])
+    return odbLabelList_out
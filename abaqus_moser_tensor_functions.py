@@ -0,0 +1,317 @@
+import numpy as np
+
+
+# ----> SYMMETRIC TENSOR INVARIANTS <----
+# The functions below work on symmetric tensor field outputs (stress, strain, ...) of many points at once. The
+# components are given as an np.array[n,nComponents] in the order of the field's componentLabels, e.g.
+# ['S11', 'S22', 'S33', 'S12', 'S13', 'S23'] for 3D elements, ['S11', 'S22', 'S33', 'S12'] for plane strain and
+# axisymmetric elements, or ['S11', 'S22', 'S12'] for plane stress and shell elements. Missing components are zero.
+# The principal values are found with the closed-form (trigonometric) solution of the characteristic cubic, rather than
+# calling an eigenvalue solver once per point.
+
+# Abaqus writes the shear components of these strain outputs as engineering shear strains (2*E12)
+engShearStrainKeys = ['E', 'LE', 'NE', 'PE', 'EE', 'IE', 'THE', 'ER']
+
+# Number of output columns of each invariant key of calcTensorInvariants(...)
+tensorInvariantNumCols = {'MISES': 1, 'PRESS': 1, 'TRESCA': 1, 'MAX_PRINCIPAL': 1, 'MID_PRINCIPAL': 1, 'MIN_PRINCIPAL': 1,
+                          'TRIAXIALITY': 1, 'LODE_ANGLE': 1, 'PRINCIPAL_DIRECTIONS': 9}
+
+
+# Builds the full symmetric tensors, np.array[n,3,3], from the components and their labels (see above). If
+# engShearIn is None, the shear components are halved for the strain outputs in engShearStrainKeys, so that the
+# tensors hold tensorial shear strains. Returns None if the labels are not those of a symmetric tensor.
+def getSymTensorArrays(compsIn, componentLabelsIn, engShearIn=None):
+    comps = np.asarray(compsIn, dtype=float).reshape((-1, len(componentLabelsIn)))
+    engShear = engShearIn
+    if engShear is None:
+        engShear = getComponentLabelRoot(componentLabelsIn[0]) in engShearStrainKeys
+
+    tensors_out = np.zeros((comps.shape[0], 3, 3))
+    for compIndex in range(len(componentLabelsIn)):
+        curLabel = str(componentLabelsIn[compIndex])
+        if (len(curLabel) < 3) or (not curLabel[-2:].isdigit()) or (curLabel[-2] not in '123') or (curLabel[-1] not in '123'):
+            print 'ERROR: Could not identify the tensor component, ', curLabel
+            return None
+        rowIndex = int(curLabel[-2]) - 1
+        colIndex = int(curLabel[-1]) - 1
+        curComp = comps[:,compIndex]
+        if (rowIndex != colIndex) and engShear:
+            curComp = 0.5*curComp
+        tensors_out[:,rowIndex,colIndex] = curComp
+        tensors_out[:,colIndex,rowIndex] = curComp
+    return tensors_out
+
+
+# Returns the letters of a component label before its indices, e.g. 'LE' for 'LE12'
+def getComponentLabelRoot(componentLabelIn):
+    return str(componentLabelIn).rstrip('0123456789')
+
+
+# Returns the principal values, np.array[n,3] sorted as [max, mid, min], of symmetric tensors (np.array[n,3,3]).
+# Also returns the Lode angle (np.array[n], radians from 0 to pi/3), since it falls out of the same calculation.
+def calcPrincipalValues(tensorsIn):
+    tensors = np.asarray(tensorsIn, dtype=float)
+    numTensors = tensors.shape[0]
+    meanStress = (tensors[:,0,0] + tensors[:,1,1] + tensors[:,2,2])/3.0
+    devTensors = tensors - meanStress[:,np.newaxis,np.newaxis]*np.eye(3)[np.newaxis,:,:]
+
+    # devScale is the Mises equivalent divided by 3: sqrt(s:s/6)
+    devScale = np.sqrt(np.sum(np.sum(devTensors**2, axis=2), axis=1)/6.0)
+    isIsotropic = devScale <= 1e-12*np.maximum(np.abs(meanStress), 1e-300)
+    safeScale = np.where(isIsotropic, 1.0, devScale)
+    normTensors = devTensors/safeScale[:,np.newaxis,np.newaxis]
+
+    halfDet = 0.5*(normTensors[:,0,0]*(normTensors[:,1,1]*normTensors[:,2,2] - normTensors[:,1,2]*normTensors[:,2,1])
+                   - normTensors[:,0,1]*(normTensors[:,1,0]*normTensors[:,2,2] - normTensors[:,1,2]*normTensors[:,2,0])
+                   + normTensors[:,0,2]*(normTensors[:,1,0]*normTensors[:,2,1] - normTensors[:,1,1]*normTensors[:,2,0]))
+    lodeAngles = np.arccos(np.clip(halfDet, -1.0, 1.0))/3.0
+    lodeAngles[isIsotropic] = 0.0
+
+    principals_out = np.zeros((numTensors, 3))
+    principals_out[:,0] = meanStress + 2.0*devScale*np.cos(lodeAngles)
+    principals_out[:,2] = meanStress + 2.0*devScale*np.cos(lodeAngles + 2.0*np.pi/3.0)
+    principals_out[:,1] = 3.0*meanStress - principals_out[:,0] - principals_out[:,2]
+    return (principals_out, lodeAngles)
+
+
+# Returns the unit principal directions, np.array[n,3,3] where [:,:,i] is the direction of principalsIn[:,i], of
+# symmetric tensors. Each direction is the largest cross product of two rows of (T - lambda*I). When two principal values
+# are (nearly) equal, the distinct direction is found this way and the other two are any right-handed pair normal to it.
+def calcPrincipalDirections(tensorsIn, principalsIn, relTolIn=1e-8):
+    tensors = np.asarray(tensorsIn, dtype=float)
+    principals = np.asarray(principalsIn, dtype=float)
+    numTensors = tensors.shape[0]
+    valScale = np.maximum(np.max(np.abs(principals), axis=1), 1e-300)
+    isDegen12 = (principals[:,0] - principals[:,1]) <= relTolIn*valScale
+    isDegen23 = (principals[:,1] - principals[:,2]) <= relTolIn*valScale
+
+    dirMax = getNullDirections(tensors, principals[:,0])
+    dirMin = getNullDirections(tensors, principals[:,2])
+
+    # Max and mid are equal: the min direction is unique, so build the others around it (and vice versa)
+    dirMax = np.where(isDegen12[:,np.newaxis], getNormalDirections(dirMin), dirMax)
+    dirMin = np.where((isDegen23 & ~isDegen12)[:,np.newaxis], getNormalDirections(dirMax), dirMin)
+    isAllEqual = isDegen12 & isDegen23
+    dirMax[isAllEqual,:] = [1.0, 0.0, 0.0]
+    dirMin[isAllEqual,:] = [0.0, 0.0, 1.0]
+
+    # Make the min direction exactly orthogonal to the max direction, then mid = min x max (right-handed)
+    dirMin = dirMin - np.sum(dirMin*dirMax, axis=1)[:,np.newaxis]*dirMax
+    dirMin = dirMin/np.maximum(np.sqrt(np.sum(dirMin**2, axis=1)), 1e-300)[:,np.newaxis]
+    dirMid = np.cross(dirMin, dirMax)
+
+    directions_out = np.zeros((numTensors, 3, 3))
+    directions_out[:,:,0] = dirMax
+    directions_out[:,:,1] = dirMid
+    directions_out[:,:,2] = dirMin
+    return directions_out
+
+
+# Returns the unit vectors, np.array[n,3], that (T - lambda*I) maps to zero, or zeros where no unique vector exists
+def getNullDirections(tensorsIn, eigenValsIn):
+    shiftedTensors = tensorsIn - eigenValsIn[:,np.newaxis,np.newaxis]*np.eye(3)[np.newaxis,:,:]
+    rowCrosses = np.array([np.cross(shiftedTensors[:,0,:], shiftedTensors[:,1,:]),
+                           np.cross(shiftedTensors[:,0,:], shiftedTensors[:,2,:]),
+                           np.cross(shiftedTensors[:,1,:], shiftedTensors[:,2,:])]) # [3,n,3]
+    crossNorms = np.sqrt(np.sum(rowCrosses**2, axis=2)) # [3,n]
+    bestIdx = np.argmax(crossNorms, axis=0)
+    allIdx = np.arange(tensorsIn.shape[0])
+    bestNorms = crossNorms[bestIdx,allIdx]
+    nullDirs_out = rowCrosses[bestIdx,allIdx,:]/np.maximum(bestNorms, 1e-300)[:,np.newaxis]
+    nullDirs_out[bestNorms == 0.0,:] = 0.0
+    return nullDirs_out
+
+
+# Returns a unit vector, np.array[n,3], normal to each of the unit vectors in dirsIn
+def getNormalDirections(dirsIn):
+    # Cross with the global axis that is the least aligned with each direction
+    helperAxes = np.eye(3)[np.argmin(np.abs(dirsIn), axis=1)]
+    normalDirs = np.cross(dirsIn, helperAxes)
+    return normalDirs/np.maximum(np.sqrt(np.sum(normalDirs**2, axis=1)), 1e-300)[:,np.newaxis]
+
+
+# Returns the column names of the invariants of calcTensorInvariants(...). PRINCIPAL_DIRECTIONS has nine columns: the
+# X, Y, and Z components of the max, mid, and min principal directions.
+def getInvariantColumnNames(invariantKeysIn):
+    columnNames_out = []
+    for curKey in invariantKeysIn:
+        if curKey == 'PRINCIPAL_DIRECTIONS':
+            for curPrincipal in ['MAX', 'MID', 'MIN']:
+                columnNames_out.extend([curPrincipal + '_DIR_X', curPrincipal + '_DIR_Y', curPrincipal + '_DIR_Z'])
+        else:
+            columnNames_out.append(curKey)
+    return columnNames_out
+
+
+# Calculates invariants of symmetric tensors from their components (see the top of this section), all points at once.
+# Returns an np.array[n,nColumns] with the columns in the order of invariantKeysIn (see getInvariantColumnNames(...)),
+# or None if an invariant key or the component labels are unknown. The invariant keys are:
+#   'MISES' - Von Mises equivalent, sqrt(3/2 s:s) where s is the deviatoric tensor
+#       Note, the same formula is applied to strain tensors (e.g. 'E' or 'LE'), which is NOT the equivalent strain of
+#       Abaqus, sqrt(2/3 e:e). Scale by 2/3 for that, or use an equivalent strain field output such as 'PEEQ' instead.
+#   'PRESS' - Equivalent pressure stress, -trace/3
+#   'TRESCA' - Max principal - min principal
+#   'MAX_PRINCIPAL', 'MID_PRINCIPAL', 'MIN_PRINCIPAL' - Principal values
+#   'TRIAXIALITY' - Stress triaxiality, -PRESS/MISES (zero where MISES is zero)
+#   'LODE_ANGLE' - Lode angle in radians, from 0 (axisymmetric tension) to pi/3 (axisymmetric compression)
+#   'PRINCIPAL_DIRECTIONS' - Unit directions of the max, mid, and min principal values (nine columns)
+def calcTensorInvariants(compsIn, componentLabelsIn, invariantKeysIn, engShearIn=None):
+    for curKey in invariantKeysIn:
+        if curKey not in tensorInvariantNumCols:
+            print 'ERROR: Unknown tensor invariant, ', curKey, '. Use one of ', sorted(tensorInvariantNumCols.keys())
+            return None
+
+    tensors = getSymTensorArrays(compsIn, componentLabelsIn, engShearIn)
+    if tensors is None:
+        return None
+    principals, lodeAngles = calcPrincipalValues(tensors)
+    pressures = -(tensors[:,0,0] + tensors[:,1,1] + tensors[:,2,2])/3.0
+    misesVals = np.sqrt(0.5*((principals[:,0] - principals[:,1])**2 + (principals[:,1] - principals[:,2])**2 + (principals[:,2] - principals[:,0])**2))
+
+    invariantCols = []
+    for curKey in invariantKeysIn:
+        if curKey == 'MISES':
+            invariantCols.append(misesVals)
+        elif curKey == 'PRESS':
+            invariantCols.append(pressures)
+        elif curKey == 'TRESCA':
+            invariantCols.append(principals[:,0] - principals[:,2])
+        elif curKey == 'MAX_PRINCIPAL':
+            invariantCols.append(principals[:,0])
+        elif curKey == 'MID_PRINCIPAL':
+            invariantCols.append(principals[:,1])
+        elif curKey == 'MIN_PRINCIPAL':
+            invariantCols.append(principals[:,2])
+        elif curKey == 'TRIAXIALITY':
+            invariantCols.append(np.where(misesVals > 0.0, -pressures/np.where(misesVals > 0.0, misesVals, 1.0), 0.0))
+        elif curKey == 'LODE_ANGLE':
+            invariantCols.append(lodeAngles)
+        elif curKey == 'PRINCIPAL_DIRECTIONS':
+            principalDirs = calcPrincipalDirections(tensors, principals)
+            invariantCols.extend([principalDirs[:,curDim,curPrincipal] for curPrincipal in range(3) for curDim in range(3)])
+
+    if len(invariantCols) == 0:
+        return np.zeros((tensors.shape[0], 0))
+    return np.column_stack(invariantCols)
+
+
+# ----> COORDINATE SYSTEMS <----
+# A coordinate system is a dict with 'type' ('RECTANGULAR', 'CYLINDRICAL', or 'SPHERICAL'), 'origin' (np.array[3]), and
+# 'axes' (np.array[3,3], the unit X, Y, and Z axes as rows). The local base vectors of a cylindrical or spherical system
+# depend on the position, so the rotation matrices are built for every point at once from the point coordinates:
+#   RECTANGULAR - (1, 2, 3) = (X, Y, Z) axes, the same everywhere
+#   CYLINDRICAL - (1, 2, 3) = (R, Theta, Z): radial from the Z axis, circumferential, and the Z axis
+#   SPHERICAL   - (1, 2, 3) = (R, Theta, Phi): radial from the origin, circumferential about the Z axis, and R x Theta
+# The components of vectors and tensors in the local system are then found with batched matrix products.
+
+# Builds a coordinate system from an origin, a point on the X axis, and a point in the X-Y plane, the same way as a
+# datum coordinate system defined by three points in Abaqus CAE (the Z axis of a cylindrical system is normal to the
+# X-Y plane). Returns None if the points are collinear.
+def getCsysFromPoints(csysTypeIn, originIn, xAxisPntIn, xyPlanePntIn):
+    origin = np.asarray(originIn, dtype=float)
+    xAxis = np.asarray(xAxisPntIn, dtype=float) - origin
+    xyVec = np.asarray(xyPlanePntIn, dtype=float) - origin
+    zAxis = np.cross(xAxis, xyVec)
+    if (np.sqrt(np.dot(xAxis, xAxis)) == 0.0) or (np.sqrt(np.dot(zAxis, zAxis)) <= 1e-12*np.sqrt(np.dot(xAxis, xAxis)*np.dot(xyVec, xyVec))):
+        print 'ERROR: The points of the coordinate system are collinear.'
+        return None
+    xAxis = xAxis/np.sqrt(np.dot(xAxis, xAxis))
+    zAxis = zAxis/np.sqrt(np.dot(zAxis, zAxis))
+    return getCsysFromAxes(csysTypeIn, origin, xAxis, np.cross(zAxis, xAxis))
+
+
+# Builds a coordinate system from an origin and its X and Y axes (e.g., from the origin, xAxis, and yAxis members of
+# an Abaqus datum coordinate system). The axes are made orthonormal in case of round-off in the .odb file.
+def getCsysFromAxes(csysTypeIn, originIn, xAxisIn, yAxisIn):
+    csysType = str(csysTypeIn).upper()
+    if csysType == 'CARTESIAN': # Name used by Abaqus
+        csysType = 'RECTANGULAR'
+    if csysType not in ['RECTANGULAR', 'CYLINDRICAL', 'SPHERICAL']:
+        print 'ERROR: Unknown coordinate system type, ', csysTypeIn
+        return None
+    xAxis = np.asarray(xAxisIn, dtype=float)
+    xAxis = xAxis/np.sqrt(np.dot(xAxis, xAxis))
+    zAxis = np.cross(xAxis, np.asarray(yAxisIn, dtype=float))
+    zAxis = zAxis/np.sqrt(np.dot(zAxis, zAxis))
+    return {'type': csysType, 'origin': np.asarray(originIn, dtype=float).ravel(), 'axes': np.array([xAxis, np.cross(zAxis, xAxis), zAxis])}
+
+
+# Returns the rotation matrices, np.array[n,3,3], from the global system to the local base vectors of a coordinate
+# system at each of the points (np.array[n,3], 2D coordinates are padded with zeros). The rows of each matrix are the
+# local 1, 2, and 3 directions. On the axis of a cylindrical system (or at the origin of a spherical one), where the
+# radial direction is undefined, the X axis of the system is used as the radial direction.
+def getCsysRotations(csysIn, pntCoordsIn):
+    givenCoords = np.asarray(pntCoordsIn, dtype=float)
+    numPnts = givenCoords.shape[0]
+    pntCoords = np.zeros((numPnts, 3))
+    pntCoords[:,0:min(3, givenCoords.shape[1])] = givenCoords[:,0:3]
+    csysAxes = csysIn['axes']
+    rotations_out = np.zeros((numPnts, 3, 3))
+    if csysIn['type'] == 'RECTANGULAR':
+        rotations_out[:,:,:] = csysAxes[np.newaxis,:,:]
+        return rotations_out
+
+    relCoords = pntCoords - csysIn['origin'][np.newaxis,:]
+    if csysIn['type'] == 'CYLINDRICAL':
+        relCoords = relCoords - np.dot(relCoords, csysAxes[2])[:,np.newaxis]*csysAxes[2][np.newaxis,:]
+    radialNorms = np.sqrt(np.sum(relCoords**2, axis=1))
+    coordScale = 1.0
+    if numPnts != 0:
+        coordScale = max(1.0, np.max(np.abs(pntCoords)))
+    isOnAxis = radialNorms <= 1e-12*coordScale
+    radialDirs = relCoords/np.where(isOnAxis, 1.0, radialNorms)[:,np.newaxis]
+    radialDirs[isOnAxis,:] = csysAxes[0]
+
+    # Circumferential direction about the Z axis. For spherical points on the Z axis, use the Y axis of the system.
+    thetaDirs = np.cross(csysAxes[2][np.newaxis,:], radialDirs)
+    thetaNorms = np.sqrt(np.sum(thetaDirs**2, axis=1))
+    isPolar = thetaNorms <= 1e-12
+    thetaDirs = thetaDirs/np.where(isPolar, 1.0, thetaNorms)[:,np.newaxis]
+    thetaDirs[isPolar,:] = csysAxes[1]
+
+    rotations_out[:,0,:] = radialDirs
+    rotations_out[:,1,:] = thetaDirs
+    if csysIn['type'] == 'CYLINDRICAL':
+        rotations_out[:,2,:] = csysAxes[2]
+    else:
+        rotations_out[:,2,:] = np.cross(radialDirs, thetaDirs)
+    return rotations_out
+
+
+# Returns the components (np.array[n,nComponents], in the same order as componentLabelsIn) of vector or symmetric tensor
+# field values in a local coordinate system, given the global components and the coordinates of each point (see
+# getCsysRotations(...)). Vectors have labels ending in one index (e.g., 'U1'), and tensors in two (e.g., 'S12').
+# Engineering shear strains are converted back after the rotation. Components that are not in componentLabelsIn (e.g.,
+# S13 for plane stress) are dropped, so 2D fields should use a system whose Z axis is normal to the model plane.
+# Returns None if the field is neither a vector nor a symmetric tensor.
+def transformFieldComponents(compsIn, componentLabelsIn, csysIn, pntCoordsIn, engShearIn=None):
+    componentLabels = [str(curLabel) for curLabel in componentLabelsIn]
+    if len(componentLabels) == 0:
+        print 'ERROR: A scalar field can not be transformed to another coordinate system.'
+        return None
+    comps = np.asarray(compsIn, dtype=float).reshape((-1, len(componentLabels)))
+    rotations = getCsysRotations(csysIn, pntCoordsIn)
+    compIndices = [curLabel[len(getComponentLabelRoot(curLabel)):] for curLabel in componentLabels]
+
+    if all([(len(curIndices) == 1) and (curIndices in '123') for curIndices in compIndices]): # Vector
+        vectors = np.zeros((comps.shape[0], 3))
+        for compIndex in range(len(componentLabels)):
+            vectors[:,int(compIndices[compIndex]) - 1] = comps[:,compIndex]
+        localVectors = np.sum(rotations*vectors[:,np.newaxis,:], axis=2)
+        return np.column_stack([localVectors[:,int(curIndices) - 1] for curIndices in compIndices])
+
+    tensors = getSymTensorArrays(comps, componentLabels, engShearIn)
+    if tensors is None:
+        return None
+    engShear = engShearIn
+    if engShear is None:
+        engShear = getComponentLabelRoot(componentLabels[0]) in engShearStrainKeys
+    localTensors = np.einsum('nik,nkl,njl->nij', rotations, tensors, rotations) # Q T Q^T for all of the points at once
+    localComps_out = np.zeros(comps.shape)
+    for compIndex in range(len(componentLabels)):
+        rowIndex = int(compIndices[compIndex][0]) - 1
+        colIndex = int(compIndices[compIndex][1]) - 1
+        localComps_out[:,compIndex] = localTensors[:,rowIndex,colIndex]
+        if (rowIndex != colIndex) and engShear:
+            localComps_out[:,compIndex] = 2.0*localComps_out[:,compIndex]
+    return localComps_out
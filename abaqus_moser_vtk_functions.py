@@ -0,0 +1,132 @@
+import numpy as np
+import os
+import abaqus_moser_shape_functions as sf
+
+
+# VTK cell type of each element shape family (see getElemShapeFamily(...) in abaqus_moser_shape_functions.py). The
+# Abaqus node numbering of these elements is the same as the VTK point ordering of the corresponding cells, including the
+# midside nodes of C3D20 (bottom edges, top edges, then vertical edges) and C3D10 (edges 1-2, 2-3, 3-1, 1-4, 2-4, 3-4).
+vtkCellTypes = {'QUAD8': 12, # VTK_HEXAHEDRON
+                'QUAD20': 25, # VTK_QUADRATIC_HEXAHEDRON
+                'TET4': 10, # VTK_TETRA
+                'TET10': 24} # VTK_QUADRATIC_TETRA
+
+vtkNumCellNodes = {'QUAD8': 8, 'QUAD20': 20, 'TET4': 4, 'TET10': 10}
+
+# Type names of the VTK data arrays for the numpy data types that are written
+vtkDataTypeNames = {'float64': 'Float64', 'float32': 'Float32', 'int64': 'Int64', 'int32': 'Int32', 'uint8': 'UInt8'}
+
+
+# Returns the VTK cell type (int) and the number of nodes of an Abaqus element type, or (None, 0) if the element type is
+# not currently supported.
+def getVtkCellType(elemTypeIn):
+    shapeFamily = sf.getElemShapeFamily(elemTypeIn)
+    if shapeFamily not in vtkCellTypes:
+        return (None, 0)
+    return (vtkCellTypes[shapeFamily], vtkNumCellNodes[shapeFamily])
+
+
+# Returns True if the component labels of a field output are those of a full 3D symmetric tensor in the Abaqus order,
+# e.g. ['S11', 'S22', 'S33', 'S12', 'S13', 'S23']
+def isSymTensorLabels(componentLabelsIn):
+    return [str(curLabel)[-2:] for curLabel in componentLabelsIn] == ['11', '22', '33', '12', '13', '23']
+
+
+# Reorders the 6 components of a symmetric tensor from the Abaqus order (11, 22, 33, 12, 13, 23) to the order that VTK
+# and ParaView use for symmetric tensors (XX, YY, ZZ, XY, YZ, XZ) if isSymTensorIn is True. Other arrays, including
+# any other field with six components, are returned as they are.
+def getVtkComponentOrder(dataArrIn, isSymTensorIn=False):
+    dataArr = np.asarray(dataArrIn)
+    if isSymTensorIn and (dataArr.ndim == 2) and (dataArr.shape[1] == 6):
+        return dataArr[:,[0, 1, 2, 3, 5, 4]]
+    return dataArr
+
+
+# Writes an unstructured grid to a VTK XML (.vtu) file with all of the arrays in a raw, appended binary block, which
+# ParaView reads directly without any parsing. The arrays are written from their numpy buffers with tofile(...) (only
+# converted if they are not already contiguous little-endian arrays). Inputs:
+#   pntCoordsIn - array[nPnts,3] of the point coordinates
+#   cellConnIn - array[sum(nodes per cell)] of 0-based point indices, with the points of each cell in VTK order
+#   cellOffsetsIn - array[nCells] of the end of each cell in cellConnIn (i.e., the cumulative sum of the nodes per cell)
+#   cellTypesIn - array[nCells] of the VTK cell types (see getVtkCellType(...))
+#   pntDataIn, cellDataIn - list[(str, array[n] or array[n,nComps])] of the named point and cell data arrays. An entry
+#       may have a third item, True for a symmetric tensor in the Abaqus component order (see getVtkComponentOrder(...)).
+# Returns the number of bytes written.
+def writeVtuFile(vtuFilePathIn, pntCoordsIn, cellConnIn, cellOffsetsIn, cellTypesIn, pntDataIn=(), cellDataIn=()):
+    vtuFilePath = vtuFilePathIn
+
+    dataBlocks = [] # (array, XML tag) in the order of the appended data
+    dataBlocks.append((np.asarray(pntCoordsIn, dtype='<f8').reshape(-1,3), 'Points'))
+    dataBlocks.append((np.asarray(cellConnIn, dtype='<i8').ravel(), 'connectivity'))
+    dataBlocks.append((np.asarray(cellOffsetsIn, dtype='<i8').ravel(), 'offsets'))
+    dataBlocks.append((np.asarray(cellTypesIn, dtype='<u1').ravel(), 'types'))
+    numPnts = dataBlocks[0][0].shape[0]
+    numCells = dataBlocks[3][0].size
+    for curData in pntDataIn:
+        dataBlocks.append((getVtkComponentOrder(curData[1], len(curData) > 2 and curData[2]), 'PointData:' + curData[0]))
+    for curData in cellDataIn:
+        dataBlocks.append((getVtkComponentOrder(curData[1], len(curData) > 2 and curData[2]), 'CellData:' + curData[0]))
+
+    # ----> XML HEADER WITH THE OFFSETS OF THE BINARY ARRAYS <----
+    xmlArrays = {'Points': [], 'Cells': [], 'PointData': [], 'CellData': []}
+    blockOffset = 0
+    for blockIndex in range(len(dataBlocks)):
+        curArr, curTag = dataBlocks[blockIndex]
+        curArr = np.ascontiguousarray(curArr)
+        if curArr.dtype.byteorder == '>':
+            curArr = curArr.astype(curArr.dtype.newbyteorder('<'))
+        if curArr.dtype.name not in vtkDataTypeNames:
+            curArr = curArr.astype('<f8')
+        dataBlocks[blockIndex] = (curArr, curTag)
+        numComps = 1
+        if curArr.ndim == 2:
+            numComps = curArr.shape[1]
+
+        if curTag == 'Points':
+            arrGroup, arrName = ('Points', 'Points')
+        elif curTag in ['connectivity', 'offsets', 'types']:
+            arrGroup, arrName = ('Cells', curTag)
+        else:
+            arrGroup, arrName = curTag.split(':', 1)
+        xmlArrays[arrGroup].append('        <DataArray type="' + vtkDataTypeNames[curArr.dtype.name] + '" Name="' + arrName +
+                                   '" NumberOfComponents="' + str(numComps) + '" format="appended" offset="' + str(blockOffset) + '"/>\n')
+        blockOffset = blockOffset + 8 + curArr.nbytes # UInt64 size header in front of each array
+
+    xmlHeader = '<?xml version="1.0"?>\n'
+    xmlHeader += '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n'
+    xmlHeader += '  <UnstructuredGrid>\n'
+    xmlHeader += '    <Piece NumberOfPoints="' + str(numPnts) + '" NumberOfCells="' + str(numCells) + '">\n'
+    for arrGroup in ['PointData', 'CellData', 'Points', 'Cells']:
+        xmlHeader += '      <' + arrGroup + '>\n' + ''.join(xmlArrays[arrGroup]) + '      </' + arrGroup + '>\n'
+    xmlHeader += '    </Piece>\n'
+    xmlHeader += '  </UnstructuredGrid>\n'
+    xmlHeader += '  <AppendedData encoding="raw">\n_'
+
+    # ----> RAW BINARY ARRAYS <----
+    vtuFile = open(vtuFilePath, 'wb')
+    vtuFile.write(xmlHeader.encode('ascii'))
+    for curArr, curTag in dataBlocks:
+        np.array([curArr.nbytes], dtype='<u8').tofile(vtuFile)
+        curArr.tofile(vtuFile)
+    vtuFile.write('\n  </AppendedData>\n</VTKFile>\n'.encode('ascii'))
+    vtuFile.close()
+    return os.path.getsize(vtuFilePath)
+
+
+# Writes a ParaView collection (.pvd) file that lists a series of .vtu files with their time values (e.g., the frame
+# values of a step), so that the frames can be animated. The .vtu paths are written relative to the .pvd file.
+def writePvdFile(pvdFilePathIn, vtuFilePathsIn, timeValsIn):
+    pvdFilePath = pvdFilePathIn
+    pvdDir = os.path.dirname(os.path.abspath(pvdFilePath))
+
+    pvdLines = ['<?xml version="1.0"?>\n', '<VTKFile type="Collection" version="0.1" byte_order="LittleEndian">\n', '  <Collection>\n']
+    for curVtuPath, curTimeVal in zip(vtuFilePathsIn, timeValsIn):
+        curRelPath = os.path.relpath(os.path.abspath(curVtuPath), pvdDir).replace(os.sep, '/')
+        pvdLines.append('    <DataSet timestep="' + repr(float(curTimeVal)) + '" group="" part="0" file="' + curRelPath + '"/>\n')
+    pvdLines.append('  </Collection>\n')
+    pvdLines.append('</VTKFile>\n')
+
+    pvdFile = open(pvdFilePath, 'w')
+    pvdFile.writelines(pvdLines)
+    pvdFile.close()
+    return os.path.getsize(pvdFilePath)
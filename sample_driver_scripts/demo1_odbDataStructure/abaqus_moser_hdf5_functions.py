@@ -0,0 +1,205 @@
+import numpy as np
+try:
+    import h5py # Not part of every Abaqus Python installation
+except ImportError:
+    h5py = None
+
+
+# Stores the values of field outputs over many frames in an HDF5 file, rather than one .csv file per frame. Each field is
+# a group with one chunked (and optionally compressed) dataset of values of shape (frames, entities, components), where
+# an entity is a node or an integration point, and side datasets for the frame values, the labels, instance indices, and
+# integration points of the entities, and (optionally) the coordinates of the entities in each frame, (frames, entities,
+# 3). Frames can be appended one at a time as they are extracted, and the chunks are shaped so that both a time slice
+# (all entities of a few frames) and an entity slice (a few entities over all frames) only read a small part of the file.
+# If h5py is not installed, h5File is None and the store can't be used.
+class FieldResultsStore(object):
+
+    # ----> INPUTS <----
+    # h5FilePathIn - str - Path of the HDF5 file, e.g. 'results.h5'
+    # modeIn - str - 'a' to create the file or add to an existing one, 'r' to only read, 'w' to overwrite
+    def __init__(self, h5FilePathIn, modeIn='a'):
+        self.h5FilePath = h5FilePathIn
+        self.h5File = None
+        if h5py is None:
+            print 'ERROR: The h5py module is not available in this Python installation. The HDF5 results store can not be used.'
+            return
+        self.h5File = h5py.File(self.h5FilePath, modeIn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, excTraceback):
+        self.close()
+        return False
+
+    def close(self):
+        if self.h5File is not None:
+            self.h5File.close()
+            self.h5File = None
+
+    # Returns the names of the fields in the store
+    def getFieldNames(self):
+        return sorted([str(curName) for curName in self.h5File.keys()])
+
+    # Creates the group of a field. The entities (rows) are fixed when the field is created; the number of frames grows
+    # with appendFrame(...). If the field already exists with the same rows (instance, label, and integration point of
+    # each entity) and number of components, it is kept so that more frames can be appended to it. Inputs:
+    #   instanceNamesIn - list[str] of the part instance names, and instCodesIn - np.array[n] of indices into them
+    #   labelsIn - np.array[n] of node or element labels, and integPntsIn - np.array[n] (zeros for nodes) or None
+    #   componentLabelsIn - list[str], e.g. ['S11', 'S22', ...]
+    #   hasCoordsIn - bool - Also store the coordinates of the entities in each frame
+    #   compressionIn - 'gzip', 'lzf', or None. dtypeIn is the data type of the stored values (float32 halves the size).
+    #   chunkFramesIn - int - Frames per chunk. The entities per chunk are chosen so that a chunk is about chunkBytesIn.
+    # Returns True if the field can be appended to.
+    def createField(self, fieldNameIn, instanceNamesIn, instCodesIn, labelsIn, integPntsIn, componentLabelsIn, hasCoordsIn=True,
+                    compressionIn='gzip', dtypeIn='float32', chunkFramesIn=16, chunkBytesIn=2**20):
+        numEntities = int(np.asarray(labelsIn).size)
+        numComps = max(1, len(componentLabelsIn))
+        if fieldNameIn in self.h5File:
+            fieldGroup = self.h5File[fieldNameIn]
+            if fieldGroup['values'].shape[1:] != (numEntities, numComps):
+                print 'ERROR: The field ', fieldNameIn, ' is already in the store with a different shape, ', fieldGroup['values'].shape[1:]
+                return False
+            if integPntsIn is None:
+                integPntsIn = np.zeros(numEntities, dtype=np.int32)
+            storedInstNames = [getAttrString(curName) for curName in fieldGroup.attrs['instanceNames']]
+            sameRows = np.array_equal(fieldGroup['labels'][...], np.asarray(labelsIn, dtype=np.int64))
+            sameRows = sameRows and np.array_equal(fieldGroup['integPnts'][...], np.asarray(integPntsIn, dtype=np.int32))
+            # The instance codes are only comparable through the names that they index
+            storedRowInstNames = np.array(storedInstNames + [''], dtype=object)[fieldGroup['instCodes'][...]]
+            rowInstNames = np.array([str(curName) for curName in instanceNamesIn] + [''], dtype=object)[np.asarray(instCodesIn, dtype=np.int64)]
+            sameRows = sameRows and np.array_equal(storedRowInstNames, rowInstNames)
+            if not sameRows:
+                print 'ERROR: The field ', fieldNameIn, ' is already in the store with different rows (instances, labels, or integration points)'
+                return False
+            return True
+
+        itemBytes = np.dtype(dtypeIn).itemsize
+        chunkFrames = max(1, int(chunkFramesIn))
+        chunkEntities = int(max(1, min(numEntities, chunkBytesIn//(itemBytes*numComps*chunkFrames))))
+        compressionOpts = {}
+        if compressionIn is not None:
+            compressionOpts = {'compression': compressionIn, 'shuffle': True}
+            if compressionIn == 'gzip':
+                compressionOpts['compression_opts'] = 4
+
+        fieldGroup = self.h5File.create_group(fieldNameIn)
+        fieldGroup.create_dataset('values', shape=(0, numEntities, numComps), maxshape=(None, numEntities, numComps),
+                                  dtype=dtypeIn, chunks=(chunkFrames, chunkEntities, numComps), **compressionOpts)
+        fieldGroup.create_dataset('frameValues', shape=(0,), maxshape=(None,), dtype='float64', chunks=(1024,))
+        if hasCoordsIn:
+            fieldGroup.create_dataset('coords', shape=(0, numEntities, 3), maxshape=(None, numEntities, 3),
+                                      dtype=dtypeIn, chunks=(chunkFrames, chunkEntities, 3), **compressionOpts)
+        fieldGroup.create_dataset('labels', data=np.asarray(labelsIn, dtype=np.int64))
+        fieldGroup.create_dataset('instCodes', data=np.asarray(instCodesIn, dtype=np.int32))
+        if integPntsIn is None:
+            integPntsIn = np.zeros(numEntities, dtype=np.int32)
+        fieldGroup.create_dataset('integPnts', data=np.asarray(integPntsIn, dtype=np.int32))
+        fieldGroup.attrs['instanceNames'] = np.array([str(curName) for curName in instanceNamesIn], dtype='S')
+        compLabels = list(componentLabelsIn)
+        if len(compLabels) == 0:
+            compLabels = [fieldNameIn]
+        fieldGroup.attrs['componentLabels'] = np.array([str(curLabel) for curLabel in compLabels], dtype='S')
+        return True
+
+    # Appends one frame: valuesIn is an array[nEntities,nComponents], and coordsIn an array[nEntities,3] (or None). Returns
+    # the index of the new frame.
+    def appendFrame(self, fieldNameIn, frameValueIn, valuesIn, coordsIn=None):
+        return self.appendFrames(fieldNameIn, [frameValueIn], np.asarray(valuesIn)[np.newaxis], None if coordsIn is None else np.asarray(coordsIn)[np.newaxis])
+
+    # Appends several frames at once: valuesIn is an array[nNewFrames,nEntities,nComponents]. Returns the index of the
+    # first new frame, or -1 (and nothing is appended) if a frame value is already stored, so that repeating an
+    # extraction into the same file does not duplicate frames (see hasFrameValue(...)).
+    def appendFrames(self, fieldNameIn, frameValuesIn, valuesIn, coordsIn=None):
+        fieldGroup = self.h5File[fieldNameIn]
+        frameValues = np.asarray(frameValuesIn, dtype=float).ravel()
+        storedFrameValues = fieldGroup['frameValues'][...]
+        if np.any(np.in1d(frameValues, storedFrameValues)) or (np.unique(frameValues).size != frameValues.size):
+            print 'ERROR: The frame values ', frameValues[np.in1d(frameValues, storedFrameValues)].tolist(), ' are already in the field ', fieldNameIn, \
+                  ' (or repeated). No frames were appended.'
+            return -1
+        numOldFrames = fieldGroup['values'].shape[0]
+        numNewFrames = frameValues.size
+        numEntities, numComps = fieldGroup['values'].shape[1:]
+
+        fieldGroup['values'].resize(numOldFrames + numNewFrames, axis=0)
+        fieldGroup['values'][numOldFrames:,:,:] = np.asarray(valuesIn).reshape(numNewFrames, numEntities, numComps)
+        fieldGroup['frameValues'].resize(numOldFrames + numNewFrames, axis=0)
+        fieldGroup['frameValues'][numOldFrames:] = frameValues
+        if 'coords' in fieldGroup:
+            fieldGroup['coords'].resize(numOldFrames + numNewFrames, axis=0)
+            if coordsIn is not None:
+                fieldGroup['coords'][numOldFrames:,:,:] = np.asarray(coordsIn).reshape(numNewFrames, numEntities, 3)
+        return numOldFrames
+
+    # Returns True if a frame with the frame value (e.g., the step time) is already stored in a field
+    def hasFrameValue(self, fieldNameIn, frameValueIn):
+        if fieldNameIn not in self.h5File:
+            return False
+        return bool(np.any(self.h5File[fieldNameIn]['frameValues'][...] == float(frameValueIn)))
+
+    # Returns a dict with the side data of a field: 'instanceNames', 'componentLabels', 'instCodes', 'labels', 'integPnts',
+    # 'frameValues', and 'shape' (frames, entities, components)
+    def getFieldInfo(self, fieldNameIn):
+        fieldGroup = self.h5File[fieldNameIn]
+        fieldInfo = {}
+        fieldInfo['instanceNames'] = [getAttrString(curName) for curName in fieldGroup.attrs['instanceNames']]
+        fieldInfo['componentLabels'] = [getAttrString(curLabel) for curLabel in fieldGroup.attrs['componentLabels']]
+        for curKey in ['instCodes', 'labels', 'integPnts', 'frameValues']:
+            fieldInfo[curKey] = fieldGroup[curKey][...]
+        fieldInfo['shape'] = fieldGroup['values'].shape
+        return fieldInfo
+
+    # Returns the values (and the coordinates, or None) of all of the entities in the frames [frameStartIn, frameStopIn)
+    # as (np.array[nFrames,nEntities,nComponents], np.array[nFrames,nEntities,3]). Only the chunks of these frames are read.
+    def readFrames(self, fieldNameIn, frameStartIn, frameStopIn=None):
+        fieldGroup = self.h5File[fieldNameIn]
+        if frameStopIn is None:
+            frameStopIn = frameStartIn + 1
+        frameVals = fieldGroup['values'][frameStartIn:frameStopIn,:,:]
+        frameCoords = None
+        if 'coords' in fieldGroup:
+            frameCoords = fieldGroup['coords'][frameStartIn:frameStopIn,:,:]
+        return (frameVals, frameCoords)
+
+    # Returns the values of some of the entities (entityIndicesIn, e.g. from findEntities(...)) over the frames
+    # [frameStartIn, frameStopIn) as an np.array[nFrames,len(entityIndicesIn),nComponents]. Only the chunks that hold these
+    # entities are read.
+    def readEntities(self, fieldNameIn, entityIndicesIn, frameStartIn=0, frameStopIn=None):
+        fieldGroup = self.h5File[fieldNameIn]
+        entityIndices = np.asarray(entityIndicesIn, dtype=np.int64).ravel()
+        # h5py reads a list of indices only if they are increasing and unique
+        uniqueIndices, uniqueInv = np.unique(entityIndices, return_inverse=True)
+        entityVals = fieldGroup['values'][frameStartIn:frameStopIn,uniqueIndices.tolist(),:]
+        return entityVals[:,uniqueInv,:]
+
+    # Returns the indices of entities in a field from their instance name, labels, and integration points (None for
+    # nodes), with -1 for the entities that are not in the field.
+    def findEntities(self, fieldNameIn, instNameIn, labelsIn, integPntsIn=None):
+        fieldInfo = self.getFieldInfo(fieldNameIn)
+        queryLabels = np.atleast_1d(np.asarray(labelsIn, dtype=np.int64))
+        entityIndices_out = -np.ones(queryLabels.size, dtype=np.int64)
+        if instNameIn not in fieldInfo['instanceNames']:
+            return entityIndices_out
+        queryIntegPnts = np.zeros(queryLabels.size, dtype=np.int64)
+        if integPntsIn is not None:
+            queryIntegPnts = np.atleast_1d(np.asarray(integPntsIn, dtype=np.int64))
+
+        instEntityIdx = np.nonzero(fieldInfo['instCodes'] == fieldInfo['instanceNames'].index(instNameIn))[0]
+        instKeys = fieldInfo['labels'][instEntityIdx]*4096 + fieldInfo['integPnts'][instEntityIdx]
+        sortIdx = np.argsort(instKeys, kind='mergesort')
+        queryKeys = queryLabels*4096 + queryIntegPnts
+        if instKeys.size == 0:
+            return entityIndices_out
+        sortedPos = np.clip(np.searchsorted(instKeys[sortIdx], queryKeys), 0, instKeys.size - 1)
+        foundMask = instKeys[sortIdx][sortedPos] == queryKeys
+        entityIndices_out[foundMask] = instEntityIdx[sortIdx[sortedPos[foundMask]]]
+        return entityIndices_out
+# ----> END FieldResultsStore <----
+
+
+# Strings in the attributes are read back as bytes by some versions of h5py
+def getAttrString(attrValIn):
+    if isinstance(attrValIn, bytes) and not isinstance(attrValIn, str):
+        return attrValIn.decode('utf-8')
+    return str(attrValIn)
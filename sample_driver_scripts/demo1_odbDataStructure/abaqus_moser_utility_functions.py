@@ -4,26 +4,212 @@ from abaqusConstants import *
 
 # Python imports
 import csv
+import re
 from math import *
 import shutil
 import os
+import hashlib
+import tempfile
+import threading
+import time
+import json
+import cProfile
+import pstats
 import numpy as np
+try:
+    import tracemalloc # Only available in Python 3 (Abaqus 2024 and newer)
+except ImportError:
+    tracemalloc = None
 
 # User defined modules
 import abaqus_moser_shape_functions as sf
+import abaqus_moser_spatial_functions as sp
+import abaqus_moser_history_functions as hf
+import abaqus_moser_set_functions as setf
+import abaqus_moser_reduction_functions as rf
+import abaqus_moser_tensor_functions as tf
+import abaqus_moser_vtk_functions as vf
+import abaqus_moser_hdf5_functions as h5f
+
+
+# ----> SETTINGS FOR .ODB FILES THAT NEED TO BE UPGRADED <----
+# These can be changed by a driver script after importing this module, e.g. abqUtil.odbUpgradePolicy = 'CACHE'
+#   'PROMPT' - Ask the user in the command prompt (default). Blocks unattended batch runs.
+#   'CACHE'  - No prompt. The upgraded copy is kept in odbUpgradeCacheDir and reused by every later open of the same
+#              (unmodified) .odb file, so the upgrade is only paid once. The original .odb is never modified.
+#   'ERROR'  - No prompt. Print an error and return None instead of upgrading.
+odbUpgradePolicy = 'PROMPT'
+odbUpgradeCacheDir = None # str - Directory for the upgraded copies. None uses a folder in the system temp directory.
+odbUpgradeCacheMaxBytes = 100*1024**3 # int - Least recently used copies are deleted when the cache exceeds this size
+odbUpgradeUseContentHash = False # bool - Also hash the file contents when identifying an .odb (slow for large files)
+
+
+# ----> SETTINGS FOR STAGING .ODB FILES ON LOCAL SCRATCH <----
+# Random-access reads of an .odb file on a network filesystem are much slower than on a local disk. If odbStagingDir is
+# set (e.g., abqUtil.odbStagingDir = '/local/scratch/odbs'), openReadOnlyAbqOdb(...) first copies the .odb file there
+# with large sequential reads, and opens the local copy instead. Staged copies are reused by later runs as long as the
+# original .odb file is unchanged. See also prefetchOdbsToStaging(...) to copy the next .odb files of a batch in the
+# background while the current one is processed.
+odbStagingDir = None # str - Local scratch directory for the staged copies. None disables staging.
+odbStagingMaxBytes = 200*1024**3 # int - Least recently used copies are deleted when the staging directory exceeds this size
+odbStagingChunkBytes = 16*1024**2 # int - Size of each sequential read/write when copying
+odbStagingEvents = {} # {staged .odb path: threading.Event that is set when its background copy has finished}
+odbStagingLock = threading.Lock()
+odbStagingOpenPaths = {} # {staged .odb path: number of OdbSession objects that have it open}. Never evicted while open.
+
+
+# ----> SETTINGS FOR THE EXTRACTION RESULT CACHE <----
+# If resultCacheDir is set, the results of getNodeFieldValuesFromSetBatch(...), getIntegPntFieldValuesFromSetBatch(...),
+# and getHistoryValuesBatch(...) are saved there as binary numpy (.npz) files. A later call with the same inputs on the
+# same (unmodified) .odb file loads the saved result without opening the .odb file at all. The key of a result includes
+# the .odb identity, the step, frame, set definition (the contents of a user set file), field output key, position, and
+# resultCacheVersion, which should be increased whenever the extraction code changes what it returns.
+resultCacheDir = None # str - Directory for the cached results. None disables the result cache.
+resultCacheMaxBytes = 20*1024**3 # int - Least recently used results are deleted when the cache exceeds this size
+resultCacheVersion = 1
+
+
+# ----> SETTINGS FOR TIMING AND PROFILING <----
+# The time spent in each stage of an extraction (opening the .odb, resolving sets, getSubset(...), calculating
+# coordinates, reshaping, and writing files) and counters of the extracted entities and written bytes are always
+# collected in runStats. A driver script can save them with writeRunReport('report.json') at the end of the run.
+#   quietMode - bool - If True, the progress messages inside the extraction loops (every 2000 nodes/elements) are not
+#               printed, since printing to the console in a hot loop costs time itself.
+#   profileWithCProfile, profileWithTracemalloc - bool - If True, startRunProfiling(...) also runs cProfile and/or
+#               tracemalloc (Python 3 only), and their summaries are added to the report.
+quietMode = False
+profileWithCProfile = False
+profileWithTracemalloc = False
+runStats = {'timers': {}, 'counters': {}} # {'timers': {stage: {'seconds': float, 'calls': int}}, 'counters': {name: int}}
+runProfiler = None # cProfile.Profile object while profiling
+
+
+# Times a stage of the extraction and adds it to runStats['timers'][stageNameIn]. Use as:
+#   with StageTimer('getSubset'):
+#       ... code to time ...
+# Stages may be nested (e.g., 'getSubset' inside 'coordinates'), in which case the time of the inner stage is also
+# included in the outer one.
+class StageTimer(object):
+
+    # ----> INPUTS <----
+    # stageNameIn - str - Name of the stage in the report
+    def __init__(self, stageNameIn):
+        self.stageName = stageNameIn
+        self.startTime = None
+
+    def __enter__(self):
+        self.startTime = time.time()
+        return self
+
+    def __exit__(self, excType, excValue, excTraceback):
+        stageTimer = runStats['timers'].setdefault(self.stageName, {'seconds': 0.0, 'calls': 0})
+        stageTimer['seconds'] = stageTimer['seconds'] + (time.time() - self.startTime)
+        stageTimer['calls'] = stageTimer['calls'] + 1
+        return False
+# ----> END StageTimer <----
+
+
+# Decorator that times every call of a function as a stage (see StageTimer), e.g. @timedStage('coordinates')
+def timedStage(stageName_in):
+    def decorateFunc(stageFunc):
+        def timedFunc(*args, **kwargs):
+            with StageTimer(stageName_in):
+                return stageFunc(*args, **kwargs)
+        timedFunc.__name__ = stageFunc.__name__
+        timedFunc.__doc__ = stageFunc.__doc__
+        return timedFunc
+    return decorateFunc
+# ----> END timedStage(...) <----
+
+
+# Adds amount_in to the counter, runStats['counters'][counterName_in] (e.g., 'nodes', 'elements', 'bytesWritten')
+def addRunCount(counterName_in, amount_in=1):
+    runStats['counters'][counterName_in] = runStats['counters'].get(counterName_in, 0) + int(amount_in)
+# ----> END addRunCount(...) <----
+
+
+# Clears the timers and counters, and starts cProfile and/or tracemalloc if they are enabled in the settings above.
+# Call this at the start of a driver script when profiling.
+def startRunProfiling():
+    global runProfiler
+    runStats['timers'] = {}
+    runStats['counters'] = {}
+    runStats['startTime'] = time.time()
+    if profileWithTracemalloc:
+        if tracemalloc is None:
+            print 'WARNING: tracemalloc is not available in this version of Python. Memory will not be profiled.'
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start()
+    if profileWithCProfile:
+        runProfiler = cProfile.Profile()
+        runProfiler.enable()
+# ----> END startRunProfiling(...) <----
+
+
+# Writes the timers, counters, and (if enabled) the cProfile and tracemalloc summaries to a JSON file. Profiling that
+# was started by startRunProfiling(...) is stopped. numTopEntries_in is the number of functions/allocation sites listed.
+def writeRunReport(jsonFilePath_in, numTopEntries_in=25):
+    global runProfiler
+    jsonFilePath = jsonFilePath_in # str - File path of the JSON report
+    numTopEntries = numTopEntries_in # int
+
+    runReport = {'timers': runStats['timers'], 'counters': runStats['counters']}
+    if 'startTime' in runStats:
+        runReport['wallSeconds'] = time.time() - runStats['startTime']
+
+    if runProfiler is not None:
+        runProfiler.disable()
+        profStats = pstats.Stats(runProfiler)
+        profEntries = []
+        for curFuncKey, curFuncStats in profStats.stats.items():
+            numCalls, numPrimCalls, selfSeconds, cumSeconds = curFuncStats[0:4]
+            profEntries.append({'function': '%s:%d(%s)' % curFuncKey, 'calls': numCalls, 'selfSeconds': selfSeconds, 'cumulativeSeconds': cumSeconds})
+        profEntries.sort(key=lambda curEntry: curEntry['cumulativeSeconds'], reverse=True)
+        runReport['cProfile'] = profEntries[0:numTopEntries]
+        runProfiler = None
+
+    if (tracemalloc is not None) and tracemalloc.is_tracing():
+        curBytes, peakBytes = tracemalloc.get_traced_memory()
+        topAllocs = tracemalloc.take_snapshot().statistics('lineno')[0:numTopEntries]
+        runReport['tracemalloc'] = {'currentBytes': curBytes, 'peakBytes': peakBytes,
+                                    'top': [{'location': str(curStat.traceback), 'bytes': curStat.size, 'count': curStat.count} for curStat in topAllocs]}
+        tracemalloc.stop()
+
+    with open(jsonFilePath, 'w') as jsonFile:
+        json.dump(runReport, jsonFile, indent=2, sort_keys=True)
+    print 'Wrote the run report: ', jsonFilePath
+    return runReport
+# ----> END writeRunReport(...) <----
 
 
 # Opens an Abaqus .odb output file as read only in the Abaqus Command Line. If the .odb version needs to be upgraded,
 # the user will need to interact (enter Y or n) in the command prompt depending if a copy of the old .odb should be made.
+# This prompt can be avoided with the upgrade policy settings above (or upgradePolicy_in), for unattended batch runs.
 # The root odb object is returned at the end of the function. Don't forget to include odb.close() at the end of the script
-# that calls openReadOnlyAbqOdb(...)
-def openReadOnlyAbqOdb(odbFilePath_in):
+# that calls openReadOnlyAbqOdb(...). If odbStagingDir is set, the .odb file is first staged there, unless isStaged_in
+# is True because odbFilePath_in already is a staged copy from getStagedOdbPath(...) (see OdbSession).
+def openReadOnlyAbqOdb(odbFilePath_in, upgradePolicy_in=None, isStaged_in=False):
 
     odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file to be opened
 
+    # str - 'PROMPT', 'CACHE', or 'ERROR'. None uses the module setting, odbUpgradePolicy.
+    upgradePolicy = upgradePolicy_in
+    if upgradePolicy is None:
+        upgradePolicy = odbUpgradePolicy
+
+    if (odbStagingDir is not None) and (not isStaged_in): # Work on a local copy of the .odb file
+        odbFilePath = getStagedOdbPath(odbFilePath)
+
     print 'Opening ', odbFilePath
     needsUpgrade = isUpgradeRequiredForOdb(upgradeRequiredOdbPath=odbFilePath) # Check to see if the .odb needs to be upgraded
-    if needsUpgrade:
+    if needsUpgrade and (upgradePolicy.upper() == 'CACHE'):
+        odbFilePath = getUpgradedOdbCachePath(odbFilePath)
+        odb = openOdb(path=odbFilePath, readOnly=True) # Open the cached, upgraded odb as read only
+    elif needsUpgrade and (upgradePolicy.upper() == 'ERROR'):
+        print 'ERROR: ', odbFilePath, ' must be upgraded, but the upgrade policy does not allow it.'
+        print 'Set odbUpgradePolicy to "CACHE" or "PROMPT" to upgrade the .odb file.\n'
+        return
+    elif needsUpgrade:
         print odbFilePath, ' must be upgraded to continue. Note: Upgrading may take a while.'
         upgradeUserInput = raw_input('Make a local backup copy of the original .odb file [Y/n]? If n, the existing .odb will be overwritten:  ')
         upgradeUserInputUpp = upgradeUserInput.upper()
@@ -53,6 +239,344 @@ def openReadOnlyAbqOdb(odbFilePath_in):
 # ----> END openReadOnlyAbqOdb(...) <----
 
 
+# Returns a key (hex str) that identifies a file by its absolute path, size, and modification time. If useContentHash_in
+# is True, the SHA-1 of the file contents is included as well, so that a file that was replaced by a different file with
+# the same size and time stamp is still detected (at the cost of reading the whole file).
+def getFileIdentityKey(filePath_in, useContentHash_in=False):
+    filePath = os.path.abspath(filePath_in) # str - File to identify
+    useContentHash = useContentHash_in # bool
+
+    fileStats = os.stat(filePath)
+    keyHash = hashlib.sha1()
+    keyHash.update(os.path.normcase(filePath).encode('utf-8'))
+    keyHash.update(('|' + str(fileStats.st_size) + '|' + repr(fileStats.st_mtime)).encode('utf-8'))
+    if useContentHash:
+        with open(filePath, 'rb') as fileIn:
+            while True:
+                fileChunk = fileIn.read(16*1024**2)
+                if not fileChunk:
+                    break
+                keyHash.update(fileChunk)
+    return keyHash.hexdigest()
+# ----> END getFileIdentityKey(...) <----
+
+
+# Deletes the least recently used files in a cache directory until the total size is no larger than maxBytes_in. The
+# modification time of a cached file is treated as its last use (see touchCacheFile(...)). Files listed in
+# keepPaths_in are never deleted. Returns the number of bytes that were freed.
+def evictLRUCacheFiles(cacheDir_in, maxBytes_in, keepPaths_in=()):
+    cacheDir = cacheDir_in # str - Directory containing only cached files
+    maxBytes = maxBytes_in # int - Maximum total size of the files in the cache directory
+    keepPaths = [os.path.abspath(curPath) for curPath in keepPaths_in] # list[str] - Files that are in use
+
+    cachedFiles = []
+    for curName in os.listdir(cacheDir):
+        curPath = os.path.abspath(os.path.join(cacheDir, curName))
+        if os.path.isfile(curPath) and (not curName.endswith('.part')): # Skip files that are still being written
+            curStats = os.stat(curPath)
+            cachedFiles.append((curStats.st_mtime, curStats.st_size, curPath))
+
+    totalBytes = sum([curFile[1] for curFile in cachedFiles])
+    freedBytes = 0
+    for curTime, curSize, curPath in sorted(cachedFiles): # Oldest first
+        if totalBytes <= maxBytes:
+            break
+        if curPath in keepPaths:
+            continue
+        try:
+            os.remove(curPath)
+        except OSError: # Possibly opened by another process
+            continue
+        print 'Removed least recently used cache file: ', curPath
+        totalBytes = totalBytes - curSize
+        freedBytes = freedBytes + curSize
+    return freedBytes
+# ----> END evictLRUCacheFiles(...) <----
+
+
+# Marks a cached file as recently used for evictLRUCacheFiles(...)
+def touchCacheFile(filePath_in):
+    try:
+        os.utime(filePath_in, None)
+    except OSError:
+        pass
+# ----> END touchCacheFile(...) <----
+
+
+# Returns the path to an upgraded copy of an .odb file in the upgraded .odb cache, upgrading the .odb only if a copy for
+# the current version of the file does not exist yet. The copy is identified by getFileIdentityKey(...), so modifying or
+# replacing the original .odb creates a new copy. The upgrade is written to a temporary file that is renamed when the
+# upgrade is complete, so an interrupted upgrade never leaves a corrupt copy in the cache.
+def getUpgradedOdbCachePath(odbFilePath_in):
+    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file that needs to be upgraded
+
+    cacheDir = odbUpgradeCacheDir
+    if cacheDir is None:
+        cacheDir = os.path.join(tempfile.gettempdir(), 'abaqus_moser_odb_cache')
+    if not os.path.isdir(cacheDir):
+        os.makedirs(cacheDir)
+
+    odbBaseName = os.path.splitext(os.path.basename(odbFilePath))[0]
+    cachedOdbPath = os.path.join(cacheDir, odbBaseName + '_' + getFileIdentityKey(odbFilePath, odbUpgradeUseContentHash)[0:16] + '.odb')
+    if os.path.isfile(cachedOdbPath):
+        print 'Using the previously upgraded copy: ', cachedOdbPath
+        touchCacheFile(cachedOdbPath)
+        return cachedOdbPath
+
+    print odbFilePath, ' must be upgraded to continue. Note: Upgrading may take a while.'
+    print 'The upgraded copy will be kept in: ', cachedOdbPath
+    tempOdbPath = cachedOdbPath[0:-4] + '_tmp' + str(os.getpid()) + '.odb'
+    upgradeOdb(existingOdbPath=odbFilePath, upgradedOdbPath=tempOdbPath)
+    if os.path.isfile(cachedOdbPath): # Another process finished the same upgrade first
+        os.remove(tempOdbPath)
+    else:
+        os.rename(tempOdbPath, cachedOdbPath)
+
+    evictLRUCacheFiles(cacheDir, odbUpgradeCacheMaxBytes, [cachedOdbPath])
+    return cachedOdbPath
+# ----> END getUpgradedOdbCachePath(...) <----
+
+
+# Copies a file with large sequential reads and writes, which is much faster than the small random reads of openOdb(...)
+# on a network filesystem. The copy is written to a temporary ".part" file that is renamed when the copy is complete, so
+# that an interrupted copy is never mistaken for a complete one. The modification time of the source is kept.
+def copyFileSequential(srcFilePath_in, dstFilePath_in, chunkBytes_in=16*1024**2):
+    srcFilePath = srcFilePath_in # str - File to copy
+    dstFilePath = dstFilePath_in # str - Destination file path
+    chunkBytes = chunkBytes_in # int - Number of bytes read and written at a time
+
+    partFilePath = dstFilePath + '_' + str(os.getpid()) + '_' + str(threading.current_thread().ident) + '.part'
+    with open(srcFilePath, 'rb') as srcFile:
+        with open(partFilePath, 'wb') as dstFile:
+            while True:
+                fileChunk = srcFile.read(chunkBytes)
+                if not fileChunk:
+                    break
+                dstFile.write(fileChunk)
+    shutil.copystat(srcFilePath, partFilePath)
+    if os.path.isfile(dstFilePath): # Another process finished the same copy first
+        os.remove(partFilePath)
+    else:
+        os.rename(partFilePath, dstFilePath)
+# ----> END copyFileSequential(...) <----
+
+
+# Returns the path in odbStagingDir of the staged copy of the current version of an .odb file (whether it exists or not)
+def getStagedOdbCopyPath(odbFilePath_in):
+    odbBaseName = os.path.splitext(os.path.basename(odbFilePath_in))[0]
+    return os.path.join(odbStagingDir, odbBaseName + '_' + getFileIdentityKey(odbFilePath_in)[0:16] + '.odb')
+# ----> END getStagedOdbCopyPath(...) <----
+
+
+# Returns the path of the staged (local) copy of an .odb file in odbStagingDir, copying it only if a copy of the current
+# version of the file does not exist yet. If the file is still being copied by prefetchOdbsToStaging(...), this waits
+# for that copy to finish rather than starting a second one. If markOpen_in is True, the copy is marked as open (see
+# odbStagingOpenPaths) before it can be evicted, until it is released with releaseStagedOdbPath(...). The mark is only
+# held if this function returns: if the copy fails, the mark is released before the exception is passed on.
+def getStagedOdbPath(odbFilePath_in, markOpen_in=False):
+    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file on the (slow) shared filesystem
+    markOpen = markOpen_in # bool - Mark the staged copy as open, so that it is not evicted for other .odb files
+
+    if not os.path.isdir(odbStagingDir):
+        os.makedirs(odbStagingDir)
+    stagedOdbPath = getStagedOdbCopyPath(odbFilePath)
+
+    with odbStagingLock:
+        stagingEvent = odbStagingEvents.get(stagedOdbPath)
+    if (stagingEvent is not None) and (threading.current_thread().name != 'odbStagingThread'):
+        print 'Waiting for the background copy of ', odbFilePath, ' to finish ...'
+        stagingEvent.wait()
+
+    with odbStagingLock:
+        if markOpen:
+            odbStagingOpenPaths[stagedOdbPath] = odbStagingOpenPaths.get(stagedOdbPath, 0) + 1
+        keepPaths = [stagedOdbPath] + list(odbStagingOpenPaths.keys()) # Never evict a copy that is open
+    try:
+        if os.path.isfile(stagedOdbPath):
+            print 'Using the staged copy: ', stagedOdbPath
+            touchCacheFile(stagedOdbPath)
+            return stagedOdbPath
+
+        print 'Staging ', odbFilePath, ' to ', stagedOdbPath, ' ...'
+        evictLRUCacheFiles(odbStagingDir, max(0, odbStagingMaxBytes - os.path.getsize(odbFilePath)), keepPaths)
+        copyFileSequential(odbFilePath, stagedOdbPath, odbStagingChunkBytes)
+    except:
+        if markOpen:
+            releaseStagedOdbPath(stagedOdbPath)
+        raise
+    return stagedOdbPath
+# ----> END getStagedOdbPath(...) <----
+
+
+# Releases a staged copy that was marked as open by getStagedOdbPath(..., True), so that it can be evicted again
+def releaseStagedOdbPath(stagedOdbPath_in):
+    with odbStagingLock:
+        numOpen = odbStagingOpenPaths.get(stagedOdbPath_in, 0) - 1
+        if numOpen > 0:
+            odbStagingOpenPaths[stagedOdbPath_in] = numOpen
+        elif stagedOdbPath_in in odbStagingOpenPaths:
+            del odbStagingOpenPaths[stagedOdbPath_in]
+# ----> END releaseStagedOdbPath(...) <----
+
+
+# Starts copying .odb files to odbStagingDir in a background thread (one file after the other), so that the copy time of
+# the next .odb files in a batch is hidden behind the processing of the current one. Returns the Thread object. A later
+# openReadOnlyAbqOdb(...) of one of these files waits for its copy to finish, if necessary. Example:
+#   for odbIndex in range(len(odbFilePaths)):
+#       abqUtil.prefetchOdbsToStaging(odbFilePaths[odbIndex+1:odbIndex+2])
+#       ... extract the data from odbFilePaths[odbIndex] ...
+def prefetchOdbsToStaging(odbFilePaths_in):
+    odbFilePaths = list(odbFilePaths_in) # list[str] - .odb files that will be opened later
+    if (odbStagingDir is None) or (len(odbFilePaths) == 0):
+        return
+
+    stagedOdbPaths = []
+    for curOdbPath in odbFilePaths:
+        stagedOdbPaths.append(getStagedOdbCopyPath(curOdbPath))
+
+    stagingEvents = []
+    with odbStagingLock:
+        for curStagedPath in stagedOdbPaths:
+            if curStagedPath in odbStagingEvents: # Already being copied by an earlier prefetch
+                stagingEvents.append(None)
+            else:
+                stagingEvents.append(threading.Event())
+                odbStagingEvents[curStagedPath] = stagingEvents[-1]
+
+    def stageOdbFiles():
+        for odbIndex in range(len(odbFilePaths)):
+            if stagingEvents[odbIndex] is None:
+                continue
+            try:
+                getStagedOdbPath(odbFilePaths[odbIndex])
+            except (IOError, OSError) as stagingError:
+                print 'WARNING: Could not stage ', odbFilePaths[odbIndex], ' in the background: ', stagingError
+            finally:
+                with odbStagingLock:
+                    del odbStagingEvents[stagedOdbPaths[odbIndex]]
+                stagingEvents[odbIndex].set() # A failed copy is simply retried by the next open
+
+    stagingThread = threading.Thread(target=stageOdbFiles, name='odbStagingThread')
+    stagingThread.daemon = True
+    stagingThread.start()
+    return stagingThread
+# ----> END prefetchOdbsToStaging(...) <----
+
+
+# Returns the path of the .npz file in resultCacheDir for one extraction, or None if the result cache is disabled.
+# resultKeyParts_in is a list of everything that defines the extraction besides the .odb file, e.g. ['NODE', step, frame,
+# set, field output key, position]. A set given as a user set file is identified by the SHA-1 of the file contents.
+def getResultCachePath(odbFilePath_in, resultKeyParts_in):
+    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file
+    resultKeyParts = resultKeyParts_in # list - Inputs that define the extraction
+
+    if resultCacheDir is None:
+        return
+    if not os.path.isfile(odbFilePath):
+        return
+
+    keyHash = hashlib.sha1()
+    keyHash.update(getFileIdentityKey(odbFilePath, odbUpgradeUseContentHash).encode('utf-8'))
+    keyHash.update(('|v' + str(resultCacheVersion)).encode('utf-8'))
+    for curKeyPart in resultKeyParts:
+        if isinstance(curKeyPart, str) and (curKeyPart.upper().endswith('.TXT') or curKeyPart.upper().endswith('.CSV')) and os.path.isfile(curKeyPart):
+            with open(curKeyPart, 'rb') as setFile:
+                curKeyPart = 'SETFILE:' + hashlib.sha1(setFile.read()).hexdigest()
+        keyHash.update(('|' + repr(curKeyPart)).encode('utf-8')) # repr(...) keeps 0 and 0.0 (frame index vs time) apart
+    return os.path.join(resultCacheDir, resultKeyParts[0].lower() + '_' + keyHash.hexdigest() + '.npz')
+# ----> END getResultCachePath(...) <----
+
+
+# Saves the result of an extraction function to the result cache. resultType_in is 'NODE' for
+# getNodeFieldValuesFromSetBatch(...), 'INTEG_PNT' for getIntegPntFieldValuesFromSetBatch(...), 'HISTORY' for
+# getHistoryValuesBatch(...), or 'RESULTANT' for getNodeFieldResultantBatch(...). Each part instance (or time series) is
+# stored as its own numpy array, so nothing is pickled.
+@timedStage('resultCache')
+def saveCachedResult(resultCachePath_in, resultType_in, result_in):
+    resultCachePath = resultCachePath_in # str - Path from getResultCachePath(...)
+    resultType = resultType_in # str - 'NODE', 'INTEG_PNT', 'HISTORY', or 'RESULTANT'
+
+    if (resultCachePath is None) or (result_in is None):
+        return
+    if not os.path.isdir(resultCacheDir):
+        os.makedirs(resultCacheDir)
+
+    resultArrs = {}
+    if resultType == 'HISTORY':
+        resultArrs['histData'] = np.array(result_in, dtype=np.float64).reshape((-1, 2))
+    elif resultType == 'RESULTANT':
+        for curKey, curHist in result_in.items():
+            resultArrs['hist_' + curKey] = np.array(curHist, dtype=np.float64).reshape((-1, 2))
+    else:
+        resultVals, resultInstNames = result_in
+        if resultInstNames is None: # A single part instance; the values are not nested in a list for each instance
+            resultValsList = [resultVals]
+            resultArrs['instNames'] = np.array([], dtype=str)
+            resultArrs['nestedByInstance'] = np.array(False)
+        else:
+            resultValsList = resultVals
+            resultArrs['instNames'] = np.array(list(resultInstNames), dtype=str)
+            resultArrs['nestedByInstance'] = np.array(True)
+        for instIndex in range(len(resultValsList)):
+            curValsArr = np.array(resultValsList[instIndex], dtype=np.float64)
+            if resultType == 'NODE': # Keep the node labels as exact integers
+                curValsArr = curValsArr.reshape((len(resultValsList[instIndex]), -1)) if curValsArr.size != 0 else np.zeros((0, 1))
+                resultArrs['labels_' + str(instIndex)] = np.array([curRow[0] for curRow in resultValsList[instIndex]], dtype=np.int64)
+                curValsArr = curValsArr[:,1:]
+            resultArrs['vals_' + str(instIndex)] = curValsArr
+        resultArrs['numInstances'] = np.array(len(resultValsList))
+
+    # Write to a temporary file first, so that an interrupted run never leaves a partial result in the cache
+    tempCachePath = resultCachePath + '.' + str(os.getpid()) + '.part'
+    with open(tempCachePath, 'wb') as cacheFile:
+        np.savez(cacheFile, **resultArrs)
+    if os.path.isfile(resultCachePath):
+        os.remove(resultCachePath)
+    os.rename(tempCachePath, resultCachePath)
+    addRunCount('bytesWritten', os.path.getsize(resultCachePath))
+    evictLRUCacheFiles(resultCacheDir, resultCacheMaxBytes, [resultCachePath])
+# ----> END saveCachedResult(...) <----
+
+
+# Loads a result that was saved by saveCachedResult(...), in the same format that the extraction function returns.
+# Returns None if the result is not in the cache.
+@timedStage('resultCache')
+def loadCachedResult(resultCachePath_in, resultType_in):
+    resultCachePath = resultCachePath_in # str - Path from getResultCachePath(...)
+    resultType = resultType_in # str - 'NODE', 'INTEG_PNT', 'HISTORY', or 'RESULTANT'
+
+    if (resultCachePath is None) or (not os.path.isfile(resultCachePath)):
+        return
+    try:
+        with open(resultCachePath, 'rb') as cacheFile:
+            resultArrs = np.load(cacheFile)
+            resultArrs = dict([(curName, resultArrs[curName]) for curName in resultArrs.files])
+    except (IOError, OSError, ValueError, KeyError):
+        print 'WARNING: Could not read the cached result, ', resultCachePath, ' - extracting it again.'
+        return
+    touchCacheFile(resultCachePath)
+    addRunCount('resultCacheHits')
+    print 'Loaded the cached result: ', resultCachePath
+    print ''
+
+    if resultType == 'HISTORY':
+        return resultArrs['histData'].tolist()
+    elif resultType == 'RESULTANT':
+        return dict([(curName[len('hist_'):], resultArrs[curName]) for curName in resultArrs.keys() if curName.startswith('hist_')])
+
+    resultValsList = []
+    for instIndex in range(int(resultArrs['numInstances'])):
+        curValsList = resultArrs['vals_' + str(instIndex)].tolist()
+        if resultType == 'NODE':
+            curLabels = resultArrs['labels_' + str(instIndex)].tolist()
+            curValsList = [[curLabels[rowIndex]] + curValsList[rowIndex] for rowIndex in range(len(curLabels))]
+        resultValsList.append(curValsList)
+    if not bool(resultArrs['nestedByInstance']):
+        return (resultValsList[0], None)
+    return (resultValsList, [str(curInstName) for curInstName in resultArrs['instNames'].tolist()])
+# ----> END loadCachedResult(...) <----
+
+
 # Opens an Abaqus .odb output file without read only in the Abaqus Command Line. If the .odb version needs to be upgraded,
 # the user will need to interact (enter Y or n) in the command prompt depending if a copy of the old .odb should be made.
 # The root odb object is returned at the end of the function. Don't forget to include odb.close() at the end of the script
@@ -102,288 +626,10 @@ def openAbqOdbDangerously(odbFilePath_in):
 # node set keys, surface keys, frame keys, field output keys, history region keys, and
 # history output keys.
 def writeOutAllKeysInAbqODB(odbFilePath_in, textFilePath_out):
-
-    # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
-    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file to be opened
-    filePath = textFilePath_out # str - file path to a text file that will be written to (side effect)
-    # ----> END LOCAL VARIABLE DEFINITIONS <----
-
-    # Open Abaqus .odb file
-    print ''
-    odb = openReadOnlyAbqOdb(odbFilePath)
-    myAssembly = odb.rootAssembly
-
-    # Open text file to be written to
-    print 'Opening file, ', filePath
-    fileOut = open(filePath, 'w')
-    print filePath, ' opened successfully.'
-    print ''
-
-    fileOut.write('Python Interpreter 2.7.3 for Abaqus 2017 Command Line\n\n')
-    fileOut.write('Scripted by NEWELL MOSER, PhD Candidate\n')
-    fileOut.write('Mechanical Engineering, Northwestern University\n')
-    fileOut.write('Script Created on September 20th, 2018\n\n')
-    fileOut.write('Abaqus ODB File: ' + '"' + odbFilePath + '"' + '\n\n\n')
-
-#   ----> ODB PARTS <----
-    print 'Writing out odb.parts ...'
-    if len(odb.parts.keys()) != 0:
-        fileOut.write('odb.parts[name]\n')
-        for partKey in odb.parts.keys():
-            fileOut.write('    ' + '"' + partKey + '"' + '\n')
-        fileOut.write('\n')
-
-#   ----> ODB INSTANCES <----
-    print 'Writing out odb.rootAssembly.instances ...'
-    if len(myAssembly.instances.keys()) != 0:
-        fileOut.write('odb.rootAssembly.instances[name]\n')
-        for instanceKey in myAssembly.instances.keys():
-            fileOut.write('    ' + '"' + instanceKey + '"' + '\n')
-        fileOut.write('\n')
-
-#   ----> ODB SECTIONS <----
-    print 'Writing out odb.sections ...'
-    if len(odb.sections.keys()) != 0:
-        fileOut.write('odb.sections[name]\n')
-        for sectionKey in odb.sections.keys():
-            fileOut.write('    ' + '"' + sectionKey + '"' + '\n')
-        fileOut.write('\n')
-
-#   ----> ODB MATERIALS <----
-    print 'Writing out odb.materials ...'
-    if len(odb.materials.keys()) != 0:
-        fileOut.write('odb.materials[name]\n')
-        for materialKey in odb.materials.keys():
-            fileOut.write('    ' + '"' + materialKey + '"' + '\n')
-        fileOut.write('\n')
-
-#   ----> ODB STEPS <----
-    print 'Writing out odb.steps ...'
-    if len(odb.steps.keys()) != 0:
-        fileOut.write('odb.steps[name]\n')
-        for stepKey in odb.steps.keys():
-            fileOut.write('    ' + '"' + stepKey + '"' + '\n')
-        fileOut.write('\n')
-
-#   ----> ALL ELEMENT SETS <----
-    print 'Writing out element odbSets ...'
-    fileOut.write('Searching for elementSets[name]\n')
-
-    for partKey in odb.parts.keys():
-        curPart = odb.parts[partKey]
-        fileOut.write('odb.parts[name]: ' + '"' + partKey + '"' + '\n')
-        if len(curPart.elementSets.keys()) == 0:
-            fileOut.write('    ..elementSets[name]: ~ \n')
-        else:
-            odbSetsStr = ''
-            odbSetIndex = 0
-            for odbSetKey in curPart.elementSets.keys():
-                if odbSetIndex != 0:
-                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-                else:
-                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-                odbSetIndex = odbSetIndex + 1
-            fileOut.write('    ..elementSets[name]: ' + odbSetsStr + '\n')
-
-    if len(myAssembly.elementSets.keys()) != 0:
-        odbSetsStr = ''
-        odbSetIndex = 0
-        for odbSetKey in myAssembly.elementSets.keys():
-            if odbSetIndex != 0:
-                odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-            else:
-                odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-            odbSetIndex = odbSetIndex + 1
-        fileOut.write('odb.rootAssembly.elementSets[name]: ' + odbSetsStr + '\n')
-
-    for instanceKey in myAssembly.instances.keys():
-        curInstance = myAssembly.instances[instanceKey]
-        fileOut.write('odb.rootAssembly.instances[name]: ' + '"' + instanceKey + '"' + '\n')
-        if len(curInstance.elementSets.keys()) == 0:
-            fileOut.write('    ..elementSets[name]: ~ \n')
-        else:
-            odbSetsStr = ''
-            odbSetIndex = 0
-            for odbSetKey in curInstance.elementSets.keys():
-                if odbSetIndex != 0:
-                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-                else:
-                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-                odbSetIndex = odbSetIndex + 1
-            fileOut.write('    ..elementSets[name]: ' + odbSetsStr + '\n')
-    fileOut.write('\n')
-
-#   ----> ALL NODE SETS <----
-    print 'Writing out node odbSets ...'
-    fileOut.write('Searching for nodeSets[name]\n')
-
-    for partKey in odb.parts.keys():
-        curPart = odb.parts[partKey]
-        fileOut.write('odb.parts[name]: ' + '"' +  partKey + '"' + '\n')
-        if len(curPart.nodeSets.keys()) == 0:
-            fileOut.write('    ..nodeSets[name]: ~ \n')
-        else:
-            odbSetsStr = ''
-            odbSetIndex = 0
-            for odbSetKey in curPart.nodeSets.keys():
-                if odbSetIndex != 0:
-                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-                else:
-                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-                odbSetIndex = odbSetIndex + 1
-            fileOut.write('    ..nodeSets[name]: ' + odbSetsStr + '\n')
-
-    if len(myAssembly.nodeSets.keys()) != 0:
-        odbSetsStr = ''
-        odbSetIndex = 0
-        for odbSetKey in myAssembly.nodeSets.keys():
-            if odbSetIndex != 0:
-                odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-            else:
-                odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-            odbSetIndex = odbSetIndex + 1
-        fileOut.write('odb.rootAssembly.nodeSets[name]: ' + odbSetsStr + '\n')
-
-    for instanceKey in myAssembly.instances.keys():
-        curInstance = myAssembly.instances[instanceKey]
-        fileOut.write('odb.rootAssembly.instances[name]: ' + '"' + instanceKey + '"' + '\n')
-        if len(curInstance.nodeSets.keys()) == 0:
-            fileOut.write('    ..nodeSets[name]: ~ \n')
-        else:
-            odbSetsStr = ''
-            odbSetIndex = 0
-            for odbSetKey in curInstance.nodeSets.keys():
-                if odbSetIndex != 0:
-                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-                else:
-                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-                odbSetIndex = odbSetIndex + 1
-            fileOut.write('    ..nodeSets[name]: ' + odbSetsStr + '\n')
-    fileOut.write('\n')
-
-#   ----> ALL SURFACES <----
-    print 'Writing out surface odbSets ...'
-    fileOut.write('Searching for surfaces[name]\n')
-
-    for partKey in odb.parts.keys():
-        curPart = odb.parts[partKey]
-        fileOut.write('odb.parts[name]: ' + '"' +  partKey + '"' + '\n')
-        if len(curPart.surfaces.keys()) == 0:
-            fileOut.write('    ..surfaces[name]: ~ \n')
-        else:
-            odbSetsStr = ''
-            odbSetIndex = 0
-            for odbSetKey in curPart.surfaces.keys():
-                if odbSetIndex != 0:
-                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-                else:
-                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-                odbSetIndex = odbSetIndex + 1
-            fileOut.write('    ..surfaces[name]: ' + odbSetsStr + '\n')
-
-    if len(myAssembly.surfaces.keys()) != 0:
-        odbSetsStr = ''
-        odbSetIndex = 0
-        for odbSetKey in myAssembly.surfaces.keys():
-            if odbSetIndex != 0:
-                odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-            else:
-                odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-            odbSetIndex = odbSetIndex + 1
-        fileOut.write('odb.rootAssembly.surfaces[name]: ' + odbSetsStr + '\n')
-
-    for instanceKey in myAssembly.instances.keys():
-        curInstance = myAssembly.instances[instanceKey]
-        fileOut.write('odb.rootAssembly.instances[name]: ' + '"' +  instanceKey + '"' + '\n')
-        if len(curInstance.surfaces.keys()) == 0:
-            fileOut.write('    ..surfaces[name]: ~ \n')
-        else:
-            odbSetsStr = ''
-            odbSetIndex = 0
-            for odbSetKey in curInstance.surfaces.keys():
-                if odbSetIndex != 0:
-                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
-                else:
-                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
-                odbSetIndex = odbSetIndex + 1
-            fileOut.write('    ..surfaces[name]: ' + odbSetsStr + '\n')
-    fileOut.write('\n')
-
-#   ----> FRAMES AND FIELD OUTPUTS FOR EACH STEP <----
-    print 'Writing out odb.steps.frames ...'
-    print ''
-    print '(This could take a while)'
-
-    fileOut.write('Searching through all odb.steps[name].frames[i].fieldOutputs[name] \n')
-    for stepKey in odb.steps.keys():
-        fileOut.write('odb.steps[name]: ' + '"' + stepKey + '"' + '\n')
-        curStepObj = odb.steps[stepKey]
-        curFramesArr = curStepObj.frames
-
-        curNumFrames = len(curFramesArr)
-        for frameIndex in range(curNumFrames):
-            curFrame = curFramesArr[frameIndex]
-            curFrameStepTime = curFrame.frameValue
-            fileOut.write('    ' + '..frames[i]: ' + str(frameIndex) + '    (step time: ' + str(curFrameStepTime) + ')\n')
-
-            fieldOutKeysStr = ''
-            fieldOutIndex = 0
-            for fieldOutKey in curFrame.fieldOutputs.keys():
-                if fieldOutIndex != 0:
-                    fieldOutKeysStr = fieldOutKeysStr + ', ' + '"' + fieldOutKey + '"'
-                else:
-                    fieldOutKeysStr = fieldOutKeysStr + '"' + fieldOutKey + '"'
-                fieldOutIndex = fieldOutIndex + 1
-            fileOut.write('        ' + '..fieldOutputs[name]: ' + fieldOutKeysStr + '\n')
-
-            if (frameIndex % 10) == 0:
-                print 'In Step: ', stepKey, '    Current Frame Index: ', frameIndex, '/', (curNumFrames-1)
-            elif frameIndex == (curNumFrames-1):
-                print 'In Step: ', stepKey, '    Current Frame Index: ', frameIndex, '/', (curNumFrames-1)
-
-            if 100 < frameIndex <= 101:
-                print ''
-                print 'Whoa! You got a lot of frames here. Sorry that Python is slow ...'
-                print ''
-    
-    print ''
-    fileOut.write('\n')
-
-#   ----> HISTORY REGIONS AND HISTORY OUTPUTS <----
-    print 'Writing odb.steps.historyRegions ...'
-    fileOut.write('Searching for odb.steps[name].historyRegions[name].historyOutputs[name]\n')
-
-    for stepKey in odb.steps.keys():
-        fileOut.write('odb.steps[name]: ' + '"' + stepKey + '"' + '\n')
-        curStepObj = odb.steps[stepKey]
-        
-        if len(curStepObj.historyRegions.keys()) != 0:
-            for histRegKey in curStepObj.historyRegions.keys():
-                curHistRegObj = curStepObj.historyRegions[histRegKey]
-                fileOut.write('    ' + '..historyRegions[name]: ' + '"' + histRegKey + '"' + '\n')
-
-                if len(curHistRegObj.historyOutputs.keys()) != 0:
-                    histOutKeysStr = ''
-                    histOutIndex = 0
-                    for histOutKey in curHistRegObj.historyOutputs.keys():
-                        if histOutIndex != 0:
-                            histOutKeysStr = histOutKeysStr + ', ' + '"' + histOutKey + '"'
-                        else:
-                            histOutKeysStr = histOutKeysStr + '"' + histOutKey + '"'
-                        histOutIndex = histOutIndex + 1
-                    fileOut.write('        ' + '..historyOutputs[name]: ' + histOutKeysStr + '\n')
-                else:
-                    fileOut.write('        ' + '..historyOutputs[name]: ' + '~ \n')
-        else:
-            fileOut.write('    ' + '..historyRegions[name]: ' + '~' + '\n')
-
-    fileOut.write('\n')
-
-#   ----> CLEAN UP AND CLOSE FILES <----
-    odb.close()
-    fileOut.close()
-    print 'writeOutAllKeysInAbqODB(...) finished successfully!'
-    print ''
+    with OdbSession(odbFilePath_in) as odbSession: # Thin wrapper: the extraction itself is done by OdbSession.writeOutAllKeys(...)
+        if odbSession.odb is None:
+            return
+        odbSession.writeOutAllKeys(textFilePath_out)
 # ----> END writeOutAllKeysInAbqODB(...) <----
 
 
@@ -402,38 +648,39 @@ def readCSVFileInts(CSVFilePath_in, hasHeaderLine_in, flatten_in, ascendingSort_
 
     print ''
     print 'Opening ', CSVFilePath, ' ...'
-    with open(CSVFilePath, 'r') as csvfile: # Open the csv type of text file and create a text file object
-        fileReader = csv.reader(csvfile, delimiter=',', skipinitialspace=True) # Create a csv reader file object
-        if hasHeaderLine:
-            next(fileReader, None) # Skip the header line
-
-        csvCollapsedListIn = [] # Instantiate the list (single column) that will contain all of the data
-        origCSV_out = [] # Instantiate the list that will contain the "as-read" CSV data; no modifications or row/column collapsing
-        for row in fileReader: # Grab the rows (iterator)
-            origCSV_out.append(row)
-            for col in row: # Grab the columns in the current row (iterator)
-                if col: # Make sure it is not an empty string
-                    curColInt = int(col) # Convert to an integer and add to the storage list
-                    csvCollapsedListIn.append(curColInt)
-
-        print 'Parsed user .csv file ...'
-        print ''
+    if not flatten:
+        with open(CSVFilePath, 'r') as csvfile: # Open the csv type of text file and create a text file object
+            fileReader = csv.reader(csvfile, delimiter=',', skipinitialspace=True) # Create a csv reader file object
+            if hasHeaderLine:
+                next(fileReader, None) # Skip the header line
+
+            origCSV_out = [] # Instantiate the list that will contain the "as-read" CSV data; no modifications or row/column collapsing
+            for row in fileReader: # Grab the rows (iterator)
+                origCSV_out.append(row)
+
+            print 'Parsed user .csv file ...'
+            print ''
+        return origCSV_out
+
+    with open(CSVFilePath, 'r') as csvfile:
+        csvText = csvfile.read()
+    if hasHeaderLine:
+        csvText = csvText.split('\n', 1)[1] if '\n' in csvText else ''
+    csvCollapsedArr = parseCSVTextInts(csvText) # All values in a single column, parsed in bulk
+    print 'Parsed user .csv file ...'
+    print ''
 
     if ascendingSort and remDuplicates:
-        csvCollapsedListIn.sort() # Sort the list into ascending order
-        csvCollapsedListOut = set(csvCollapsedListIn) # Remove duplicates if they exist
+        csvCollapsedListOut = np.unique(csvCollapsedArr).tolist() # Sorted, with duplicates removed
     elif ascendingSort:
-        csvCollapsedListIn.sort() # Sort the list into ascending order
-        csvCollapsedListOut = csvCollapsedListIn
+        csvCollapsedListOut = np.sort(csvCollapsedArr).tolist() # Sort the list into ascending order
     elif remDuplicates:
-        csvCollapsedListOut = set(csvCollapsedListIn) # Remove duplicates if they exist
+        uniqueFirstIdx = np.unique(csvCollapsedArr, return_index=True)[1] # Remove duplicates, keeping the original order
+        csvCollapsedListOut = csvCollapsedArr[np.sort(uniqueFirstIdx)].tolist()
     else:
-        csvCollapsedListOut = csvCollapsedListIn
+        csvCollapsedListOut = csvCollapsedArr.tolist()
 
-    if flatten:
-        return csvCollapsedListOut
-    else:
-        return origCSV_out
+    return csvCollapsedListOut
 # ----> END readCSVFileInts(...) <----
 
 
@@ -464,60 +711,165 @@ def readCSVFileOdbSet(CSVFilePath_in, hasHeaderLine_in):
     # listOutput = readCSVFileOdbSet(my_CSVFilePath, False):
     # listOutput == [['InstanceName1',[11,12,13,14,15,16,17,18,19]], ['InstanceName2',[21,22,23,24,25,26,27,28]]]
 
+    # Parsing is done in bulk by readCSVFileOdbSetArrays(...). The labels are converted back to lists of ints here.
+    abqSetArrList = readCSVFileOdbSetArrays(CSVFilePath, hasHeaderLine)
+    if abqSetArrList is None:
+        return
+    abqSetList_out = []
+    for curInstName, curLabelsArr in abqSetArrList:
+        abqSetList_out.append([curInstName, curLabelsArr.tolist()])
+
+    return abqSetList_out
+# ----> END readCSVFileOdbSet(...) <----
+
+
+# Parses all of the integers in a block of comma and/or whitespace separated text at once, rather than calling int()
+# on each cell. Returns an np.array[n] of int64 values. Like int(), a ValueError is raised if a value is not an integer.
+def parseCSVTextInts(csvText_in):
+    csvText = csvText_in # str - Text containing only integers separated by commas, spaces, tabs, or new lines
+
+    csvTokens = re.sub(r'[,\s]+', ' ', csvText).split()
+    if len(csvTokens) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.array(csvTokens, dtype=np.int64)
+# ----> END parseCSVTextInts(...) <----
+
+
+# Cache of parsed user set files, so that a set file shared by several extraction calls (e.g., for multiple steps or
+# field outputs) is only parsed once. Keys are (absolute file path, hasHeaderLine) and values are
+# (file modification time, file size, parsed list). An entry is reused only if the file has not changed since.
+odbSetFileCache = {}
+
+
+# Vectorized version of readCSVFileOdbSet(...) for user set files with millions of labels. Each instance block is
+# parsed in bulk, and the labels are returned as np.array[n] of int64 instead of a list of ints:
+#   [['InstanceName1', np.array([11,12,...])], ['InstanceName2', np.array([21,22,...])]]
+#
+# In addition to the file format described in readCSVFileOdbSet(...), an instance block can use the Abaqus "generate"
+# syntax. Each line after the instance name is then read as "start, stop, step" (step defaults to 1), e.g.:
+#
+#       *InstanceName1, generate
+#       1, 1000, 1
+#       2001, 3000, 2
+#
+# A generate line without two or three values, with a step below 1, or with start > stop is rejected (returns None).
+#
+# If rootOdbObj_in is given, the labels are validated against the nodes (or elements, see odbSetType_in) of each part
+# instance. Labels that do not exist are removed with a warning. Returns None if an instance name does not exist, or if
+# the file contains a value that is not an integer.
+def readCSVFileOdbSetArrays(CSVFilePath_in, hasHeaderLine_in, rootOdbObj_in=None, odbSetType_in='NODE', meshArrsCache_in=None):
+
+# ----> COPY INPUTS INTO LOCAL VARIABLES <----
+    CSVFilePath = CSVFilePath_in # str - File path to the user set file, see readCSVFileOdbSet(...)
+    hasHeaderLine = hasHeaderLine_in # bool - Skip first line if True
+    rootOdbObj = rootOdbObj_in # Abaqus odb object used to validate the labels. Use None to skip the validation.
+    odbSetType = odbSetType_in # str - 'NODE' or 'ELEMENT' - Type of labels, only used for validation
+    meshArrsCache = meshArrsCache_in # dict{str: dict} - Mesh tables of each instance to reuse (and add to). None to not reuse them.
+
     print ''
     print 'Opening ', CSVFilePath
-    with open(CSVFilePath, 'r') as csvfile: # Open the csv type of text file and create a text file object
-        fileReader = csv.reader(csvfile, delimiter=',', skipinitialspace=True) # Create a csv reader file object
+    cacheKey = (os.path.abspath(CSVFilePath), hasHeaderLine)
+    fileStats = os.stat(CSVFilePath)
+    cacheEntry = odbSetFileCache.get(cacheKey)
+    if (cacheEntry is not None) and (cacheEntry[0] == fileStats.st_mtime) and (cacheEntry[1] == fileStats.st_size):
+        print 'Reusing the previously parsed labels (file has not been modified).'
+        abqSetArrList = cacheEntry[2]
+    else:
+        with open(CSVFilePath, 'r') as csvfile:
+            csvText = csvfile.read()
         if hasHeaderLine:
-            next(fileReader, None) # Skip the header line
+            csvText = csvText.split('\n', 1)[1] if '\n' in csvText else ''
 
         print 'Looking for instance keywords denoted with "*"...\n'
-        origCSV = [] # Instantiate the list that will contain the "as-read" CSV data; no modifications or row/column collapsing
-        foundInstance = False
-        curInstanceName = ''
-        curLabelsList = []
-        curInstList = []
-        abqSetList_out = []
-        for row in fileReader: # Grab the rows (iterator). Is a list[str]
-            if not row: # Don't store empty rows
-                continue
+        abqSetArrList = []
+        instBlocks = re.split(r'(?m)^[ \t]*\*', csvText)
+        for curInstBlock in instBlocks[1:]: # Anything before the first "*" is ignored
+            curBlockLines = curInstBlock.split('\n', 1)
+            curHeaderFields = [curField.strip() for curField in curBlockLines[0].split(',')]
+            curInstanceName = curHeaderFields[0]
+            curLabelsText = curBlockLines[1] if len(curBlockLines) > 1 else ''
+            print 'Found instance name: ', '"' + curInstanceName + '"', '    Searching for corresponding labels...'
+
+            try:
+                if 'GENERATE' in [curField.upper() for curField in curHeaderFields[1:]]:
+                    curRangesList = []
+                    for curLine in curLabelsText.split('\n'):
+                        curRange = parseCSVTextInts(curLine)
+                        if curRange.size == 0:
+                            continue
+                        if (curRange.size < 2) or (curRange.size > 3):
+                            raise ValueError('A generate line needs "start, stop" or "start, stop, step", not "' + curLine.strip() + '"')
+                        curStep = curRange[2] if curRange.size > 2 else 1
+                        if (curStep < 1) or (curRange[0] > curRange[1]):
+                            raise ValueError('A generate line needs start <= stop and a step of at least 1, not "' + curLine.strip() + '"')
+                        curRangesList.append(np.arange(curRange[0], curRange[1] + 1, curStep, dtype=np.int64))
+                    if curRangesList:
+                        curLabelsArr = np.concatenate(curRangesList)
+                    else:
+                        curLabelsArr = np.zeros(0, dtype=np.int64)
+                else:
+                    curLabelsArr = parseCSVTextInts(curLabelsText)
+            except ValueError as parseError:
+                print 'ERROR: Could not read the labels of the part instance ', '"' + curInstanceName + '"', ' in ', CSVFilePath, ': ', parseError
+                print 'Aborting ... after the instance name, a list of comma separated integers (any number of columns and rows), or'
+                print '    "start, stop, step" lines for a generate block, should be present.\n'
+                return
 
-            origCSV.append(row)
-            firstCharacterInRow = row[0][0] # First character in first string of row
-            if firstCharacterInRow == "*":
-                if foundInstance: # Do this if this is not the first instance keyword found
-                    # Need to store the label list that has been accumulated with the current instance name
-                    curInstList.append(curLabelsList)
-                    abqSetList_out.append(curInstList)
-                    foundInstance = True
-                    curInstanceName = row[0][1:] # Don't keep the "*" of the instance name
-                    curLabelsList = []
-                    curInstList = []
-                    curInstList.append(curInstanceName)
-                else: # Do this if this is the first instance keyword found
-                    foundInstance = True
-                    curInstanceName = row[0][1:] # Don't keep the "*" of the instance name
-                    curLabelsList = []
-                    curInstList = []
-                    curInstList.append(curInstanceName)
-                print 'Found instance name: ', '"' + curInstanceName + '"', '    Searching for corresponding labels...'
-            elif foundInstance: # Get all labels for this current instance name
-                for col in row: # Grab the columns in the current row (iterator)
-                    if col: # Make sure it is not an empty string
-                        curColInt = int(col) # Convert to an int and add to the storage list
-                        curLabelsList.append(curColInt)
-            else:
-                continue
-            
-        curInstList.append(curLabelsList) # Store the last set of labels that were found
-        abqSetList_out.append(curInstList)
+            abqSetArrList.append([curInstanceName, curLabelsArr])
+
+        odbSetFileCache[cacheKey] = (fileStats.st_mtime, fileStats.st_size, abqSetArrList)
         print '\nFinished parsing user .csv file ... \n'
 
-    return abqSetList_out
-# ----> END readCSVFileOdbSet(...) <----
+    # Copy the arrays so that the cached labels cannot be modified by the caller
+    abqSetArrList_out = []
+    for curInstName, curLabelsArr in abqSetArrList:
+        abqSetArrList_out.append([curInstName, curLabelsArr.copy()])
+
+    if rootOdbObj is not None:
+        myInstances = rootOdbObj.rootAssembly.instances
+        for curInstList in abqSetArrList_out:
+            if curInstList[0] not in myInstances.keys():
+                print 'ERROR: The part instance ', '"' + curInstList[0] + '"', ' in the user set file does not exist.'
+                return
+            if (meshArrsCache is not None) and (curInstList[0] in meshArrsCache):
+                curMeshArrs = meshArrsCache[curInstList[0]]
+            else:
+                curMeshArrs = getInstanceMeshArrays(myInstances[curInstList[0]])
+                if meshArrsCache is not None:
+                    meshArrsCache[curInstList[0]] = curMeshArrs
+            if odbSetType.upper() == 'ELEMENT':
+                isValidLabel = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], curInstList[1]) >= 0
+            else:
+                isValidLabel = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], curInstList[1]) >= 0
+            if not np.all(isValidLabel):
+                print 'WARNING: Removed ', np.count_nonzero(~isValidLabel), ' labels that do not exist in part instance ', curInstList[0]
+                curInstList[1] = curInstList[1][isValidLabel]
+
+    return abqSetArrList_out
+# ----> END readCSVFileOdbSetArrays(...) <----
+
+
+# Writes a list of labels corresponding to part instances out to a text file, in the format that is read by
+# readCSVFileOdbSet(...). The input should have the same format as the output of readCSVFileOdbSet(...), e.g.:
+#   [['InstanceName1',[11,12,13,14,15,16,17,18,19]], ['InstanceName2',[21,22,23,24,25,26,27,28]]]
+@timedStage('write')
+def writeCSVFileOdbSet(odbSetLabelsList_in, CSVFilePath_in, numColumns_in=16):
+
+# ----> COPY INPUTS INTO LOCAL VARIABLES <----
+    odbSetLabelsList = odbSetLabelsList_in # list[[str, list[int]]] - Instance names with their labels
+    CSVFilePath = CSVFilePath_in # str - File to be opened (overwritten) and written to
+    numColumns = numColumns_in # int - Number of labels written on each row
+
+    print 'Writing user set labels to ', CSVFilePath
+    setf.OdbLabelSet(odbSetLabelsList).writeCSVFile(CSVFilePath, False, numColumns) # Same writer as the label sets
+    addRunCount('bytesWritten', os.path.getsize(CSVFilePath))
+    print 'Finished writing to file.'
+    print ''
+# ----> END writeCSVFileOdbSet(...) <----
 
 
 # Writes a 2D list (i.e., a list of lists) out to a csv text file.
+@timedStage('write')
 def write2DListCSV(listData2D_in, CSVFilePath_in, headerLine_in):
 
 # ----> COPY INPUTS INTO LOCAL VARIABLES <----
@@ -530,64 +882,97 @@ def write2DListCSV(listData2D_in, CSVFilePath_in, headerLine_in):
         fileWriter = csv.writer(csvfile, delimiter=',', lineterminator='\n')
         fileWriter.writerow(headerLine) # Note that this writes a single row at a time
         fileWriter.writerows(listData2D) # Add an 's' to write all of the rows from a 2D list
+    addRunCount('bytesWritten', os.path.getsize(CSVFilePath))
     print 'Finished writing to file.'
     print ''
 # ----> END write2DListCSV(...) <----
 
 
 # Retrieves the history output data of an existing history output variable in the .odb file and returns the data
-# as a list[[float,float]]. That is, a list of pairs.
-def getHistoryValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbHistRegKey_in, odbHistOutKey_in):
-
-    # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
-    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file to be opened
-
-    # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
-    # int - Index of the .odb simulation step. EX: Use 0 for the first, -1 for the last.
-    # str - Name of the key used to get the OdbStep object.
-    odbStepPositionKey = odbStepPositionKey_in
-
-    odbHistRegKey = odbHistRegKey_in # str - Name of the key used to get the historyRegion object. 
-    odbHistOutKey = odbHistOutKey_in # str - Name of the key used to get the historyOutput object
-    # ----> END LOCAL VARIABLE DEFINITIONS <----
-
-    # Open Abaqus .odb file (MUST BE SAFELY CLOSED LATER)
-    odb = openReadOnlyAbqOdb(odbFilePath)
-    myAssembly = odb.rootAssembly
-
-    # ----> WORKING THROUGH THE ABAQUS DATA STRUCTURES TO GET TO THE HISTORY VARIABLES <----
-    print 'Looking for the .odb step, ', odbStepPositionKey
-    # Get the OdbStep object from the user specified step
-    if isinstance(odbStepPositionKey, int):
-        odbStepObj = odb.steps.values()[odbStepPositionKey] 
-    elif isinstance(odbStepPositionKey, str):
-        odbStepObj = odb.steps[odbStepPositionKey]
-
-    # Get history region from the user specified key
-    print 'Looking for the history region, ', odbHistRegKey
-    odbHistRegObj = odbStepObj.historyRegions[odbHistRegKey]
-
-    # Get history output from the user specified key
-    print 'Looking for the history output, ', odbHistOutKey
-    odbHistOutObj = odbHistRegObj.historyOutputs[odbHistOutKey]
-
-    # Retrieve the data (tuple of pairs of Floats) from the historyOutput object
-    histOutDataTuples = odbHistOutObj.data
-    histOutDataList = [] # Convert to a mutable list
-    for curPair in histOutDataTuples:
-        histOutDataList.append(list(curPair))
-
-    # Return data, close .odb file, and end script
-    histData_out = histOutDataList
-    
-    odb.close()
-    print 'getHistoryValuesBatch(...) ended successfully!'
-    print ''
-
+# as a list[[float,float]]. That is, a list of pairs. If returnArray_in is True, the data is returned as an np.array[n,2]
+# instead, which avoids building the Python lists for long histories. If maxPnts_in is given, the history is reduced to
+# at most that many points while it is read (see decimateHistory(...) in abaqus_moser_history_functions.py for the
+# 'STRIDE', 'MINMAX', and 'LTTB' modes of decimateMode_in).
+def getHistoryValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbHistRegKey_in, odbHistOutKey_in, returnArray_in=False, maxPnts_in=None, decimateMode_in='LTTB'):
+    # A cached result skips opening the .odb file (see resultCacheDir)
+    resultKeyParts = ['HISTORY', odbStepPositionKey_in, odbHistRegKey_in, odbHistOutKey_in]
+    if maxPnts_in is not None:
+        resultKeyParts = resultKeyParts + [int(maxPnts_in), decimateMode_in.upper()]
+    resultCachePath = getResultCachePath(odbFilePath_in, resultKeyParts)
+    histData_out = loadCachedResult(resultCachePath, 'HISTORY')
+    if histData_out is not None:
+        if returnArray_in:
+            return np.array(histData_out, dtype=float).reshape((-1, 2))
+        return histData_out
+
+    with OdbSession(odbFilePath_in) as odbSession: # Thin wrapper: the extraction itself is done by OdbSession.getHistoryValues(...)
+        if odbSession.odb is None:
+            return
+        histData_out = odbSession.getHistoryValues(odbStepPositionKey_in, odbHistRegKey_in, odbHistOutKey_in, returnArray_in, maxPnts_in, decimateMode_in)
+    saveCachedResult(resultCachePath, 'HISTORY', histData_out)
     return histData_out
 # ----> END getHistoryValuesBatch(...) <----
 
 
+# Retrieves several history outputs from the .odb file (opened only once) and aligns them onto one common time grid, so
+# that outputs written at different times (e.g., from different history regions or output intervals) can be combined
+# into one table. Returns an np.array[m,1+nHist] with rows of [time, hist1, hist2, ...]. See getAlignedHistoryValues(...)
+# in OdbSession for the inputs.
+def getAlignedHistoryValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbHistRegKeys_in, odbHistOutKeys_in, gridMode_in='UNION', gridParam_in=None, interpMode_in='LINEAR', extrapMode_in='HOLD', filterSpec_in=None):
+    # Thin wrapper around OdbSession.getHistoryValues(...). The .odb file is only opened if one of the histories is not
+    # in the result cache (see resultCacheDir).
+    odbHistOutKeys = list(odbHistOutKeys_in)
+    odbHistRegKeys = odbHistRegKeys_in
+    if isinstance(odbHistRegKeys, str):
+        odbHistRegKeys = [odbHistRegKeys]*len(odbHistOutKeys)
+
+    odbSession = None
+    histArrs = []
+    try: # The .odb file is closed even if an extraction raises an exception
+        for histIndex in range(len(odbHistOutKeys)):
+            resultCachePath = getResultCachePath(odbFilePath_in, ['HISTORY', odbStepPositionKey_in, odbHistRegKeys[histIndex], odbHistOutKeys[histIndex]])
+            curHistData = loadCachedResult(resultCachePath, 'HISTORY')
+            if curHistData is None:
+                if odbSession is None:
+                    odbSession = OdbSession(odbFilePath_in)
+                    if odbSession.odb is None:
+                        return
+                curHistData = odbSession.getHistoryValues(odbStepPositionKey_in, odbHistRegKeys[histIndex], odbHistOutKeys[histIndex], True)
+                saveCachedResult(resultCachePath, 'HISTORY', curHistData)
+            histArrs.append(np.array(curHistData, dtype=float).reshape((-1, 2)))
+    finally:
+        if odbSession is not None:
+            odbSession.close()
+
+    histTable_out = hf.getAlignedHistoryTable(histArrs, gridMode_in, gridParam_in, interpMode_in, extrapMode_in, filterSpec_in)
+    if histTable_out is not None:
+        print 'Aligned ', len(histArrs), ' history outputs onto ', histTable_out.shape[0], ' output times.\n'
+    return histTable_out
+# ----> END getAlignedHistoryValuesBatch(...) <----
+
+
+# Retrieves the history outputs of many history regions in a single pass over the step, rather than one call (and one
+# opening of the .odb file) per region and output key. Regions and outputs are selected with patterns, e.g. all of the
+# displacements of the nodes of an instance with odbHistRegPattern_in='Node ROD1-1.*' and odbHistOutPattern_in='U?'.
+# patternType_in is 'GLOB' (shell-style wildcards) or 'REGEX'. Optionally, only the regions of the nodes (or elements)
+# in a set are used, given by odbSetStr_in (repository key or user set file) and odbSetType_in ('NODE' or 'ELEMENT').
+# filterSpec_in optionally filters the histories (e.g., ('CFC', 60)); see filterHistoryValues(...).
+#
+# Returns a dict with one entry per history output key, each being a dict with:
+#   'times'         - np.array[m] of output times
+#   'values'        - np.array[m,nRegions] of the history output, with one column per history region
+#   'regionNames'   - list[str] of the history region keys of the columns
+#   'regionTypes', 'instanceNames', 'labels', 'integPnts' - Parsed from the region keys (see parseHistoryRegionName(...)
+#                     in abaqus_moser_history_functions.py). None/-1/0 for regions that are not a single node or element.
+def getHistoryMatrixBatch(odbFilePath_in, odbStepPositionKey_in, odbHistRegPattern_in, odbHistOutPattern_in, patternType_in='GLOB', odbSetStr_in=None, odbSetType_in='NODE', filterSpec_in=None):
+    with OdbSession(odbFilePath_in) as odbSession: # Thin wrapper: the extraction itself is done by OdbSession.getHistoryMatrix(...)
+        if odbSession.odb is None:
+            return
+        histMatrices_out = odbSession.getHistoryMatrix(odbStepPositionKey_in, odbHistRegPattern_in, odbHistOutPattern_in, patternType_in, odbSetStr_in, odbSetType_in, filterSpec_in)
+    return histMatrices_out
+# ----> END getHistoryMatrixBatch(...) <----
+
+
 # Searches the odb object for an OdbSet object corresponding to a given repository key. 
 # Returns said OdbSet object
 def getOdbSetFromKey(rootOdbObj_in, odbUserSetKey_in, odbSetType_in):
@@ -662,6 +1047,7 @@ def getOdbSetFromKey(rootOdbObj_in, odbUserSetKey_in, odbSetType_in):
 # list[[int(node label), float(current X1), float(current X2), float(current X3)]]. If the OdbSet spans
 # multiple part instances, then the returned object will be a list of 2D lists where each 2D list corresponds
 # to each part instance. (Note: The code considering multiple part instances has not been tested yet!)
+@timedStage('coordinates')
 def calcDeformedNodeCoords(odbFrame_in, odbSetObj_in):
     
     # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
@@ -683,8 +1069,9 @@ def calcDeformedNodeCoords(odbFrame_in, odbSetObj_in):
     odbUField = odbFrame.fieldOutputs['U'] 
 
     # Get the subdomain of field outputs based on the nodes in the OdbSet
-    odbUSubField = odbUField.getSubset(region=odbSetObj, position=NODAL)
-    odbUFieldValsArr = odbUSubField.values # Get the FieldValueArray object of the displacements
+    with StageTimer('getSubset'):
+        odbUSubField = odbUField.getSubset(region=odbSetObj, position=NODAL)
+        odbUFieldValsArr = odbUSubField.values # Get the FieldValueArray object of the displacements
     
     odbMeshNodeArr = odbSetObj.nodes # Get the OdbMeshNodeArray object
     if len(odbMeshNodeArr) == 0:
@@ -760,7 +1147,7 @@ def calcDeformedNodeCoords(odbFrame_in, odbSetObj_in):
             nodeCoordList_out.append(tempFinalCoord) # Finally, store the deformed coordinates into list that will be returned
 
             nodeIndex = nodeIndex + 1
-            if (nodeIndex % 2000) == 0:
+            if (not quietMode) and ((nodeIndex % 2000) == 0):
                 print '\nCalculated coordinates for ', nodeIndex, ' nodes ...\n'
 
         nodeCoordListShape_out = tuple([nodeIndex, len(initNodeCoords[0])])
@@ -820,7 +1207,7 @@ def calcDeformedNodeCoords(odbFrame_in, odbSetObj_in):
 
                 nodeIndex = nodeIndex + 1
                 allNodesCount = allNodesCount + 1
-                if (allNodesCount % 2000) == 0:
+                if (not quietMode) and ((allNodesCount % 2000) == 0):
                     print '\nCalculated coordinates for ', allNodesCount, ' nodes ...\n'
 
             nodeCoordList_out.append(tempInstFinalCoord)
@@ -833,449 +1220,1999 @@ def calcDeformedNodeCoords(odbFrame_in, odbSetObj_in):
 
 
 # Retrieves the field value data of an existing field value key in the .odb file for all of the nodes in an OdbSet (node set) 
-def getNodeFieldValuesFromSetBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in):
+def getNodeFieldValuesFromSetBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, invariantKeys_in=None, csysSpec_in=None):
+    # Thin wrapper: the extraction itself is done by OdbSession.getNodeFieldValuesFromSet(...). See its comments for the inputs.
+    # A cached result skips opening the .odb file (see resultCacheDir)
+    resultCachePath = getResultCachePath(odbFilePath_in, ['NODE', odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, str(fieldPosKey_in), invariantKeys_in, csysSpec_in])
+    fieldVals_out = loadCachedResult(resultCachePath, 'NODE')
+    if fieldVals_out is not None:
+        return fieldVals_out
+
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        fieldVals_out = odbSession.getNodeFieldValuesFromSet(odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, invariantKeys_in, csysSpec_in)
+    saveCachedResult(resultCachePath, 'NODE', fieldVals_out)
+    return fieldVals_out
+# ----> END getNodeFieldValuesFromSetBatch(...) <----
 
-    # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
-    # str - File path to the Abaqus .odb file to be opened (as read-only)
-    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file to be opened (as read-only)
 
-    # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
-    # int - Index of the .odb simulation step. Example: Use 0 for the first, -1 for the last.
-    # str - Name of the key used to get the OdbStep object.
-    odbStepPositionKey = odbStepPositionKey_in
+# Retrieves the field value data of an existing field value key in the .odb file for all of the elements in an OdbSet (element set) 
+def getIntegPntFieldValuesFromSetBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, invariantKeys_in=None, csysSpec_in=None):
+    # Thin wrapper: the extraction itself is done by OdbSession.getIntegPntFieldValuesFromSet(...). See its comments for the inputs.
+    # A cached result skips opening the .odb file (see resultCacheDir)
+    resultCachePath = getResultCachePath(odbFilePath_in, ['INTEG_PNT', odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, str(fieldPosKey_in), invariantKeys_in, csysSpec_in])
+    fieldVals_out = loadCachedResult(resultCachePath, 'INTEG_PNT')
+    if fieldVals_out is not None:
+        return fieldVals_out
+
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        fieldVals_out = odbSession.getIntegPntFieldValuesFromSet(odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, invariantKeys_in, csysSpec_in)
+    saveCachedResult(resultCachePath, 'INTEG_PNT', fieldVals_out)
+    return fieldVals_out
+# ----> END getIntegPntFieldValuesFromSetBatch(...) <----
 
-    # odbFramePosition can be an index (input must be of type int) or a step time (input must be type float)
-    # int - Index of the desired frame in the step. EX: Use 0 for the first, -1 for the last.
-    # float - Step time. The frame that is closest to the this step time will be used. 
-    odbFramePosition = odbFramePosition_in
 
-    # This input could be either of the following.
-    # str - A string of the repository key of the existing Abaqus node OdbSet object representing the nodes to extract the field values
-    # str - If the supplied string ends with ".txt" or ".csv", then it is assumed to be a filepath to a user-supplied node list.
-    #       The file should use "*" at the beginning of a line to denote the name of the part instance that the subsequent nodes correspond 
-    #       to. Then, on the next line(s), a comma-separated list of integers (any number of rows and columns) representing the node
-    #       labels should be given. No header line should be present in the file. Node labels will be continuosly read-in until another 
-    #       "*" is found. An example file input for a custom node set is given below:
-    #
-    #       *InstanceName1
-    #       11,12,13,14,
-    #       15,16,17,18,19
-    #       *InstanceName2
-    #       21,22,23,24,25,26
-    #       27,28
-    #
-    odbSetStr = odbSetStr_in 
+# Appends tensor invariant columns to a 2D list of rows that end with the components of a tensor field output (e.g.,
+# [Node Label, X, Y, Z, S11, S22, S33, S12, S13, S23]). The invariants of all of the rows are calculated at once with
+# calcTensorInvariants(...) in abaqus_moser_tensor_functions.py. Returns the new 2D list, or None if the invariants
+# could not be calculated.
+def appendTensorInvariantCols(fieldValRows_in, componentLabels_in, invariantKeys_in):
+    fieldValRows = fieldValRows_in # list[list] - 2D list with the tensor components in the last columns of each row
+    componentLabels = componentLabels_in # list[str] - Labels of the tensor components, e.g. ['S11', 'S22', ...]
+    invariantKeys = invariantKeys_in # list[str] - Invariants to append, e.g. ['MISES', 'PRESS']
+
+    if len(fieldValRows) == 0:
+        return []
+    numComps = len(componentLabels)
+    tensorComps = np.array([curRow[-numComps:] for curRow in fieldValRows], dtype=float)
+    invariantVals = tf.calcTensorInvariants(tensorComps, componentLabels, invariantKeys)
+    if invariantVals is None:
+        return
+    invariantRows = invariantVals.tolist()
+    return [fieldValRows[rowIndex] + invariantRows[rowIndex] for rowIndex in range(len(fieldValRows))]
+# ----> END appendTensorInvariantCols(...) <----
+
+
+# Rotates the vector or tensor components at the end of each row of a 2D list (e.g., [Node Label, X, Y, Z, U1, U2, U3])
+# into a local coordinate system, using the coordinates in the columns between the label and the components. All of the
+# rows are transformed at once with transformFieldComponents(...) in abaqus_moser_tensor_functions.py. Returns the new
+# 2D list, or None if the field could not be transformed.
+def transformFieldValRows(fieldValRows_in, componentLabels_in, csysObj_in):
+    fieldValRows = fieldValRows_in # list[list] - 2D list: [Label, Coordinates ..., Components ...]
+    componentLabels = componentLabels_in # list[str] - Labels of the components, e.g. ['U1', 'U2', 'U3']
+    csysObj = csysObj_in # dict - Coordinate system from getCsysFromSpec(...)
+
+    if len(fieldValRows) == 0:
+        return []
+    numComps = len(componentLabels)
+    fieldValArr = np.array(fieldValRows, dtype=float)
+    localComps = tf.transformFieldComponents(fieldValArr[:,-numComps:], componentLabels, csysObj, fieldValArr[:,1:-numComps])
+    if localComps is None:
+        return
+    localRows = localComps.tolist()
+    return [fieldValRows[rowIndex][:-numComps] + localRows[rowIndex] for rowIndex in range(len(fieldValRows))]
+# ----> END transformFieldValRows(...) <----
+
+
+# Returns a coordinate system (see abaqus_moser_tensor_functions.py) from any of the following specifications:
+#   str - Name of a datum coordinate system in the .odb file (odb.rootAssembly.datumCsyses)
+#   tuple - (csysType, origin, pointOnXAxis, pointInXYPlane), where csysType is 'RECTANGULAR', 'CYLINDRICAL', or
+#           'SPHERICAL', and the points are [X, Y, Z]. EX: ('CYLINDRICAL', [0,0,0], [1,0,0], [0,1,0]) for a cylindrical
+#           system about the global Z axis.
+#   dict - A coordinate system that was already built (returned as-is)
+# Returns None if the coordinate system could not be found or built.
+def getCsysFromSpec(rootOdbObj_in, csysSpec_in):
+    rootOdbObj = rootOdbObj_in # Abaqus odb object
+    csysSpec = csysSpec_in
+
+    if isinstance(csysSpec, dict):
+        return csysSpec
+    elif isinstance(csysSpec, str):
+        odbDatumCsyses = rootOdbObj.rootAssembly.datumCsyses
+        if csysSpec not in odbDatumCsyses.keys():
+            print 'ERROR: Could not find the datum coordinate system ', csysSpec, '. Available: ', odbDatumCsyses.keys()
+            return None
+        odbDatumCsys = odbDatumCsyses[csysSpec]
+        return tf.getCsysFromAxes(str(odbDatumCsys.coordSysType), odbDatumCsys.origin, odbDatumCsys.xAxis, odbDatumCsys.yAxis)
+    elif isinstance(csysSpec, (list, tuple)) and (len(csysSpec) == 4):
+        return tf.getCsysFromPoints(csysSpec[0], csysSpec[1], csysSpec[2], csysSpec[3])
+    print 'ERROR: Unknown coordinate system specification, ', csysSpec
+    return None
+# ----> END getCsysFromSpec(...) <----
+
+
+# Goes through the nodes and elements of a part instance once and stores the mesh as numpy arrays, so that later
+# calculations can be vectorized rather than looping over OdbMeshNode and OdbMeshElement objects. Returns a dict with:
+#   'nodeLabels' - np.array[nNodes] of node labels (int)
+#   'nodeCoords' - np.array[nNodes,3] of the initial (undeformed) nodal coordinates
+#   'elemLabels' - np.array[nElems] of element labels (int)
+#   'elemTypes'  - np.array[nElems] of Abaqus element type identifiers (str)
+#   'elemConn'   - np.array[nElems,maxNodesPerElem] of node labels for each element. Padded with 0 for elements with fewer nodes.
+#   'nodeSortIdx', 'elemSortIdx' - Sorting indices of the label arrays, used by getIndicesFromLabels(...)
+def getInstanceMeshArrays(odbInstanceObj_in):
+    odbInstanceObj = odbInstanceObj_in # OdbInstance object: odb.rootAssembly.instances[name]
+
+    odbMeshNodeArr = odbInstanceObj.nodes
+    numNodes = len(odbMeshNodeArr)
+    nodeLabels = np.zeros(numNodes, dtype=np.int64)
+    nodeCoords = np.zeros((numNodes,3))
+    nodeIndex = 0
+    for curOdbMeshNode in odbMeshNodeArr:
+        nodeLabels[nodeIndex] = curOdbMeshNode.label
+        curCoords = curOdbMeshNode.coordinates
+        nodeCoords[nodeIndex,0:len(curCoords)] = curCoords
+        nodeIndex = nodeIndex + 1
+
+    odbMeshElemArr = odbInstanceObj.elements
+    elemLabelsList = []
+    elemTypesList = []
+    elemConnList = []
+    maxNodesPerElem = 1
+    for curOdbMeshElem in odbMeshElemArr:
+        curElemConn = curOdbMeshElem.connectivity
+        elemLabelsList.append(curOdbMeshElem.label)
+        elemTypesList.append(str(curOdbMeshElem.type))
+        elemConnList.append(curElemConn)
+        if len(curElemConn) > maxNodesPerElem:
+            maxNodesPerElem = len(curElemConn)
+
+    elemConn = np.zeros((len(elemConnList), maxNodesPerElem), dtype=np.int64)
+    for elemIndex in range(len(elemConnList)):
+        curElemConn = elemConnList[elemIndex]
+        elemConn[elemIndex,0:len(curElemConn)] = curElemConn
+
+    meshArrs_out = {}
+    meshArrs_out['nodeLabels'] = nodeLabels
+    meshArrs_out['nodeCoords'] = nodeCoords
+    meshArrs_out['elemLabels'] = np.array(elemLabelsList, dtype=np.int64)
+    meshArrs_out['elemTypes'] = np.array(elemTypesList)
+    meshArrs_out['elemConn'] = elemConn
+    meshArrs_out['nodeSortIdx'] = np.argsort(nodeLabels, kind='mergesort')
+    meshArrs_out['elemSortIdx'] = np.argsort(meshArrs_out['elemLabels'], kind='mergesort')
+    return meshArrs_out
+# ----> END getInstanceMeshArrays(...) <----
+
+
+# Vectorized lookup of the positions of labels within a (not necessarily sorted) label array. The sorting indices should
+# come from np.argsort(allLabels_in). Returns an np.array of indices the same shape as queryLabels_in, where -1 denotes
+# a label that could not be found.
+def getIndicesFromLabels(allLabels_in, sortIdx_in, queryLabels_in):
+    allLabels = np.asarray(allLabels_in) # np.array[n] of labels (int)
+    sortIdx = np.asarray(sortIdx_in) # np.array[n] of indices that sort allLabels
+    queryLabels = np.asarray(queryLabels_in) # np.array of labels (int) to look up
+
+    indices_out = -np.ones(queryLabels.shape, dtype=np.int64)
+    if allLabels.size == 0:
+        return indices_out
+
+    sortedLabels = allLabels[sortIdx]
+    sortedPos = np.searchsorted(sortedLabels, queryLabels)
+    sortedPos = np.clip(sortedPos, 0, sortedLabels.size - 1)
+    foundMask = sortedLabels[sortedPos] == queryLabels
+    indices_out[foundMask] = sortIdx[sortedPos[foundMask]]
+    return indices_out
+# ----> END getIndicesFromLabels(...) <----
+
+
+# Extrapolates integration point field values to the nodes of each element using the per-element extrapolation matrices
+# in abaqus_moser_shape_functions.py, rather than requesting ELEMENT_NODAL output. All elements of the same type are
+# extrapolated at once with a single batched matrix product.
+#
+# The input should be the output of getIntegPntFieldValuesFromSetBatch(...) with INTEGRATION_POINT as the position.
+# If averageNodes_in is False, the returned list per part instance is a 2D list with each row as:
+#   [Element Label, Node Label, Field Values ...]   (one row for each node of each element)
+# If averageNodes_in is True, the nodal values from all elements in the set that share a node are averaged:
+#   [Node Label, Field Values ...]   (one row for each unique node)
+# The second returned value is the list of instance names corresponding to the first index of the returned list.
+def calcExtrapolatedNodeFieldVals(rootOdbObj_in, elemFieldVals_in, instanceNames_in, averageNodes_in, meshArrsCache_in=None):
+    # ----> MAKE LOCAL COPIES OF INPUTS <----
+    rootOdbObj = rootOdbObj_in # Abaqus odb object
+    meshArrsCache = meshArrsCache_in # dict{str: dict} - Mesh tables of each instance to reuse (and add to). None to not reuse them.
+    elemFieldVals = elemFieldVals_in # list[[[[]]]] - 4D list: [instance][element][integ pnt][Element label, X, Y, Z, Field Values ...]
+    instanceNames = instanceNames_in # list[str] - Instance names corresponding to the first index of elemFieldVals
+    averageNodes = averageNodes_in # bool - Average the extrapolated values of elements that share a node if True
+    # ----> END COPYING INPUTS <----
 
-    # str - The type of nodal values to extract, in which case, fieldPosKey_in must be NODAL. The field values will be extrapolated (0% averaging)
-    #        to the nodes if an integration point field variable is given, in which case, fieldPosKey_in must be ELEMENT_NODAL. 
-    fieldOutputKey =  fieldOutputKey_in 
-    
-    # Symbolic constant - Use NODAL or ELEMENT_NODAL (do not include quotes, this is not a string)
-    # Use NODAL to extract field values that exist at the nodes (displacement, velocity, acceleration, contact pressure, etc.)
-    # Use ELEMENT_NODAL to interpolate (much slower) integration point field values (0% averaging) to the nodes (stress, plastic strain, etc.)
-    fieldPosKey = fieldPosKey_in 
-    # ----> END LOCAL VARIABLE DEFINITIONS <----
-    
+    myAssembly = rootOdbObj.rootAssembly
+    nodeFieldVals_out = []
+
+    for instIndex in range(len(instanceNames)):
+        curInstName = instanceNames[instIndex]
+        curInstVals = np.array(elemFieldVals[instIndex], dtype=float) # [element][integ pnt][label, X, Y, Z, Field Values ...]
+        if curInstVals.size == 0:
+            nodeFieldVals_out.append([])
+            continue
+        numComps = curInstVals.shape[2] - 4
+
+        print 'Extrapolating integration point values to the nodes for instance: ', curInstName
+        if (meshArrsCache is not None) and (curInstName in meshArrsCache):
+            curMeshArrs = meshArrsCache[curInstName]
+        else:
+            curMeshArrs = getInstanceMeshArrays(myAssembly.instances[curInstName])
+            if meshArrsCache is not None:
+                meshArrsCache[curInstName] = curMeshArrs
+        curElemLabels = curInstVals[:,0,0].astype(np.int64)
+        curElemIndices = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], curElemLabels)
+        if np.any(curElemIndices < 0):
+            print 'ERROR: Some element labels could not be found in part instance ', curInstName
+            return
 
-    nodeFieldVals_out = [] # Instantiate the variable to be returned
-    instanceNames_out = None # Instantiate the second variable to be returned
+        curElemTypes = curMeshArrs['elemTypes'][curElemIndices]
+        curElemLabelRows = []
+        curNodeLabelRows = []
+        curNodeValRows = []
+        for curElemType in np.unique(curElemTypes): # One batched extrapolation for each element type
+            curTypeMask = curElemTypes == curElemType
+            curNodalVals = sf.extrapIntegPntValsToNodes(curElemType, curInstVals[curTypeMask,:,4:])
+            if curNodalVals is None:
+                print 'WARNING: Skipping elements of type ', curElemType, ' in extrapolation to the nodes.'
+                continue
+            numElemNodes = curNodalVals.shape[1]
+            curElemConn = curMeshArrs['elemConn'][curElemIndices[curTypeMask],0:numElemNodes]
+
+            curElemLabelRows.append(np.repeat(curElemLabels[curTypeMask], numElemNodes))
+            curNodeLabelRows.append(curElemConn.reshape(-1))
+            curNodeValRows.append(curNodalVals.reshape(-1, numComps))
+
+        if len(curNodeValRows) == 0:
+            nodeFieldVals_out.append([])
+            continue
+
+        allElemLabels = np.concatenate(curElemLabelRows)
+        allNodeLabels = np.concatenate(curNodeLabelRows)
+        allNodeVals = np.vstack(curNodeValRows)
+
+        if averageNodes:
+            uniqueNodeLabels, uniqueNodeInv = np.unique(allNodeLabels, return_inverse=True)
+            nodeValSums = np.zeros((uniqueNodeLabels.size, numComps))
+            for compIndex in range(numComps):
+                nodeValSums[:,compIndex] = np.bincount(uniqueNodeInv, weights=allNodeVals[:,compIndex], minlength=uniqueNodeLabels.size)
+            nodeCounts = np.bincount(uniqueNodeInv, minlength=uniqueNodeLabels.size)
+            nodeValAvgs = nodeValSums/nodeCounts[:,np.newaxis]
+            curInstRows = np.column_stack((uniqueNodeLabels, nodeValAvgs)).tolist()
+            for curRow in curInstRows:
+                curRow[0] = int(curRow[0])
+        else:
+            curInstRows = np.column_stack((allElemLabels, allNodeLabels, allNodeVals)).tolist()
+            for curRow in curInstRows:
+                curRow[0] = int(curRow[0])
+                curRow[1] = int(curRow[1])
 
-    # Open Abaqus .odb file (MUST BE SAFELY CLOSED LATER)
-    print ''
-    odb = openReadOnlyAbqOdb(odbFilePath)
-    myAssembly = odb.rootAssembly
+        nodeFieldVals_out.append(curInstRows)
 
-    # ----> WORKING THROUGH THE ABAQUS DATA STRUCTURES TO GET TO THE HISTORY VARIABLES <----
-    print 'Looking for the .odb step, ', odbStepPositionKey
-    # Get the OdbStep object from the user specified step
-    if isinstance(odbStepPositionKey, int):
-        odbStepObj = odb.steps.values()[odbStepPositionKey] 
-    elif isinstance(odbStepPositionKey, str):
-        odbStepObj = odb.steps[odbStepPositionKey]
+    return (nodeFieldVals_out, list(instanceNames));
+# ----> END calcExtrapolatedNodeFieldVals(...) <----
 
-    # Get the desired OdbFrame object 
-    odbFrameArr = odbStepObj.frames
-    if isinstance(odbFramePosition, int):
-        odbFrame = odbFrameArr[odbFramePosition]
-        print 'Found the desired frame at index: ', odbFramePosition, '    Corresponding to step time: ', odbFrame.frameValue
-    elif isinstance(odbFramePosition, float):
-        odbFrame = odbStepObj.getFrame(frameValue=odbFramePosition, match=CLOSEST)
-        print 'Found the desired frame at step time: ', odbFramePosition
-    print ''
-
-    # Access the repository of FieldOutput objects, and then get just the one identified by 'fieldOutputKey'
-    print 'Looking for the field output data: ', fieldOutputKey
-    odbFields = odbFrame.fieldOutputs[fieldOutputKey] 
-    print 'Found desired type of field output data.'
-    print ''
 
-    # Get the subset of the full field by using the node set object
-    odbSetFileGiven = False
-    if odbSetStr.endswith('.txt') or odbSetStr.endswith('.TXT') or odbSetStr.endswith('.csv') or odbSetStr.endswith('.CSV'):
-        odbSetFileGiven = True
-        odbNodeSetLabelsList = readCSVFileOdbSet(odbSetStr, False) # Assumes no header
-        odbSetObj = myAssembly.NodeSetFromNodeLabels('myLocalNodeSet', odbNodeSetLabelsList)
-        if odbSetObj is None:
-            print 'Aborting ... are you sure that the format of the given node set file is correct?'
-            print 'Do not include a header line. Instance names should be denoted with an "*" at the start of the line - do not use extra spaces or quotes.'
-            print 'After the instance name, a list of comma separated integers (any number of columns and rows) should be present representing node labels.\n'
+# Retrieves integration point field values for an element set and extrapolates them to the nodes of each element. This
+# is an alternative to requesting ELEMENT_NODAL output in the .odb file (which bloats its size) when using
+# getNodeFieldValuesFromSetBatch(...). See calcExtrapolatedNodeFieldVals(...) for the format of the returned lists.
+def getExtrapolatedNodeFieldValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, averageNodes_in):
+    # Thin wrapper: the extraction itself is done by OdbSession.getExtrapolatedNodeFieldValues(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
             return
+        nodeFieldVals_out = odbSession.getExtrapolatedNodeFieldValues(odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, averageNodes_in)
+    return nodeFieldVals_out
+# ----> END getExtrapolatedNodeFieldValuesBatch(...) <----
+
+
+# Returns the OdbStep object corresponding to either an index (int) or the repository key (str) of the step.
+def getOdbStepFromKey(rootOdbObj_in, odbStepPositionKey_in):
+    rootOdbObj = rootOdbObj_in # Abaqus odb object
+
+    # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
+    # int - Index of the .odb simulation step. EX: Use 0 for the first, -1 for the last.
+    # str - Name of the key used to get the OdbStep object.
+    odbStepPositionKey = odbStepPositionKey_in
+
+    if isinstance(odbStepPositionKey, int):
+        return rootOdbObj.steps.values()[odbStepPositionKey] 
+    elif isinstance(odbStepPositionKey, str):
+        return rootOdbObj.steps[odbStepPositionKey]
+    print 'ERROR: Could not find the .odb step, ', odbStepPositionKey
+# ----> END getOdbStepFromKey(...) <----
+
+
+# Returns a list of OdbFrame objects of a step. The frame position(s) can be given as:
+#   int - Index of the desired frame in the step. EX: Use 0 for the first, -1 for the last.
+#   float - Step time. The frame that is closest to the this step time will be used.
+#   str - 'ALL' to return all of the frames in the step
+#   list - A list of any of the above ints and floats
+def getOdbFramesFromPositions(odbStepObj_in, odbFramePositions_in):
+    odbStepObj = odbStepObj_in # OdbStep object
+    odbFramePositions = odbFramePositions_in
+
+    odbFrameArr = odbStepObj.frames
+    if isinstance(odbFramePositions, str):
+        if odbFramePositions.upper() in ['ALL']:
+            return [curFrame for curFrame in odbFrameArr]
+        print 'ERROR: Unknown frame position, ', odbFramePositions
+        return []
+    if not isinstance(odbFramePositions, (list, tuple)):
+        odbFramePositions = [odbFramePositions]
+
+    odbFrames_out = []
+    for curFramePosition in odbFramePositions:
+        if isinstance(curFramePosition, int):
+            odbFrames_out.append(odbFrameArr[curFramePosition])
+        elif isinstance(curFramePosition, float):
+            odbFrames_out.append(odbStepObj.getFrame(frameValue=curFramePosition, match=CLOSEST))
+    return odbFrames_out
+# ----> END getOdbFramesFromPositions(...) <----
+
+
+# Retrieves all of the field values of a FieldOutput object (optionally restricted to a region and position) as numpy
+# arrays through the bulkDataBlocks member, instead of looping over individual FieldValue objects. Returns a dict with:
+#   'data' - np.array[n,nComponents] of the field values (a scalar field has one component)
+#   'instanceNames' - list[str] of the unique part instance names found
+#   'instCodes' - np.array[n] of indices into 'instanceNames' for each row
+#   'nodeLabels' - np.array[n] of node labels (zeros if the position has no nodes, e.g., INTEGRATION_POINT)
+#   'elementLabels' - np.array[n] of element labels (zeros if the position has no elements, e.g., NODAL)
+#   'integPnts' - np.array[n] of integration point numbers (zeros if not applicable)
+#   'componentLabels' - list[str] of the component labels (e.g., ['S11', 'S22', ...])
+#   'baseElementTypes' - list[str] with the base element type of each row's block (empty string for nodal data)
+@timedStage('getSubset')
+def getFieldBulkValues(odbFieldOut_in, odbRegionObj_in, fieldPosKey_in):
+    odbSubField = getFieldSubset(odbFieldOut_in, odbRegionObj_in, fieldPosKey_in)
+
+    instanceNames = []
+    allData = []
+    allInstCodes = []
+    allNodeLabels = []
+    allElemLabels = []
+    allIntegPnts = []
+    allBaseElemTypes = []
+    for curBlock in iterFieldBulkBlocks(odbSubField):
+        numRows = curBlock['data'].shape[0]
+        curInstName = curBlock['instanceName']
+        if curInstName not in instanceNames:
+            instanceNames.append(curInstName)
+
+        allData.append(curBlock['data'])
+        allInstCodes.append(instanceNames.index(curInstName)*np.ones(numRows, dtype=np.int64))
+        allNodeLabels.append(curBlock['nodeLabels'])
+        allElemLabels.append(curBlock['elementLabels'])
+        allIntegPnts.append(curBlock['integPnts'])
+        allBaseElemTypes.extend([curBlock['baseElementType']]*numRows)
+
+    bulkVals_out = {}
+    bulkVals_out['componentLabels'] = list(odbSubField.componentLabels)
+    bulkVals_out['instanceNames'] = instanceNames
+    bulkVals_out['baseElementTypes'] = allBaseElemTypes
+    if len(allData) == 0:
+        numComps = max(1, len(bulkVals_out['componentLabels']))
+        bulkVals_out['data'] = np.zeros((0,numComps))
+        for curKey in ['instCodes', 'nodeLabels', 'elementLabels', 'integPnts']:
+            bulkVals_out[curKey] = np.zeros(0, dtype=np.int64)
+        return bulkVals_out
+
+    bulkVals_out['data'] = np.vstack(allData)
+    bulkVals_out['instCodes'] = np.concatenate(allInstCodes)
+    bulkVals_out['nodeLabels'] = np.concatenate(allNodeLabels)
+    bulkVals_out['elementLabels'] = np.concatenate(allElemLabels)
+    bulkVals_out['integPnts'] = np.concatenate(allIntegPnts)
+    return bulkVals_out
+# ----> END getFieldBulkValues(...) <----
+
+
+# Returns the subset of a FieldOutput object for a region (OdbSet, OdbInstance, or None for the entire model) and a
+# position (NODAL, ELEMENT_NODAL, INTEGRATION_POINT, CENTROID, or None to keep as-is)
+def getFieldSubset(odbFieldOut_in, odbRegionObj_in, fieldPosKey_in):
+    odbFieldOut = odbFieldOut_in # FieldOutput object: odbFrame.fieldOutputs[key]
+    odbRegionObj = odbRegionObj_in
+    fieldPosKey = fieldPosKey_in
+
+    if odbRegionObj is not None and fieldPosKey is not None:
+        return odbFieldOut.getSubset(region=odbRegionObj, position=fieldPosKey)
+    elif odbRegionObj is not None:
+        return odbFieldOut.getSubset(region=odbRegionObj)
+    elif fieldPosKey is not None:
+        return odbFieldOut.getSubset(position=fieldPosKey)
+    return odbFieldOut
+# ----> END getFieldSubset(...) <----
+
+
+# Selects the scalar of a FieldOutput object that is reduced by reduceFieldValuesBatch(...) and getFieldEnvelopeBatch(...).
+# componentKey_in is None for the first (or only) component, a component label (e.g., 'S11'), or an invariant of
+# FieldOutput.getScalarField(...) (e.g., MISES or MAX_PRINCIPAL). Returns (FieldOutput object, component index), or
+# (None, None) if the component does not exist.
+def getFieldComponent(odbFieldOut_in, componentKey_in):
+    odbFieldOut = odbFieldOut_in # FieldOutput object: odbFrame.fieldOutputs[key]
+    componentKey = componentKey_in
+
+    if componentKey is None:
+        return (odbFieldOut, 0)
+    if not isinstance(componentKey, str):
+        return (odbFieldOut.getScalarField(invariant=componentKey), 0)
+    if componentKey not in list(odbFieldOut.componentLabels):
+        print 'ERROR: Could not find the component ', componentKey, ' in ', list(odbFieldOut.componentLabels)
+        return (None, None)
+    return (odbFieldOut, list(odbFieldOut.componentLabels).index(componentKey))
+# ----> END getFieldComponent(...) <----
+
+
+# Yields the bulk data blocks of a FieldOutput object one at a time as a dict of numpy arrays, so that a field can be
+# processed block by block without holding all of it in memory. Each dict has 'data' (np.array[n,nComponents]),
+# 'instanceName' (str), 'nodeLabels', 'elementLabels', 'integPnts' (np.array[n] each, zeros if not applicable), and
+# 'baseElementType' (str). See getFieldBulkValues(...) to get all of the blocks as one set of arrays.
+def iterFieldBulkBlocks(odbFieldOut_in):
+    for curBlock in odbFieldOut_in.bulkDataBlocks:
+        if curBlock.precision == SINGLE_PRECISION:
+            curData = np.array(curBlock.data, dtype=float)
+        else:
+            curData = np.array(curBlock.dataDouble, dtype=float)
+        if curData.ndim == 1:
+            curData = curData.reshape(-1,1)
+        numRows = curData.shape[0]
+
+        curBlockArrs = {'data': curData, 'instanceName': '', 'baseElementType': str(getattr(curBlock, 'baseElementType', '') or '')}
+        if curBlock.instance is not None:
+            curBlockArrs['instanceName'] = curBlock.instance.name
+        for curAttrName, curKey in [('nodeLabels', 'nodeLabels'), ('elementLabels', 'elementLabels'), ('integrationPoints', 'integPnts')]:
+            curAttr = getattr(curBlock, curAttrName, None)
+            if curAttr is None or len(curAttr) != numRows:
+                curBlockArrs[curKey] = np.zeros(numRows, dtype=np.int64)
+            else:
+                curBlockArrs[curKey] = np.array(curAttr, dtype=np.int64)
+        yield curBlockArrs
+# ----> END iterFieldBulkBlocks(...) <----
+
+
+# Builds a lookup table of the weights of a weighted mean from a volume field output (IVOL per integration point, or
+# EVOL per element) in a region. Returns {instance name: (sorted keys, weights, hasIntegPnts)}, see lookupFieldWeights(...).
+def getFieldWeightLookup(odbWeightFieldOut_in, odbRegionObj_in):
+    weightBulkVals = getFieldBulkValues(odbWeightFieldOut_in, odbRegionObj_in, None)
+    weightLookup_out = {}
+    for instIndex in range(len(weightBulkVals['instanceNames'])):
+        isCurInst = (weightBulkVals['instCodes'] == instIndex)
+        curIntegPnts = weightBulkVals['integPnts'][isCurInst]
+        hasIntegPnts = bool(np.any(curIntegPnts != 0))
+        curKeys = weightBulkVals['elementLabels'][isCurInst]*4096 + curIntegPnts # Unique for up to 4095 integration points
+        if not hasIntegPnts:
+            curKeys = weightBulkVals['elementLabels'][isCurInst]
+        sortIdx = np.argsort(curKeys)
+        weightLookup_out[weightBulkVals['instanceNames'][instIndex]] = (curKeys[sortIdx], weightBulkVals['data'][isCurInst,0][sortIdx], hasIntegPnts)
+    return weightLookup_out
+# ----> END getFieldWeightLookup(...) <----
+
+
+# Returns the weights (np.array[n]) for the rows of a bulk data block (see iterFieldBulkBlocks(...)) from the lookup
+# table of getFieldWeightLookup(...). Element volumes (EVOL) are used for every integration point of an element. Rows
+# without a weight get a weight of zero.
+def lookupFieldWeights(weightLookup_in, fieldBlock_in):
+    if fieldBlock_in['instanceName'] not in weightLookup_in:
+        return np.zeros(fieldBlock_in['data'].shape[0])
+    sortedKeys, sortedWeights, hasIntegPnts = weightLookup_in[fieldBlock_in['instanceName']]
+    if sortedKeys.size == 0:
+        return np.zeros(fieldBlock_in['data'].shape[0])
+    if hasIntegPnts:
+        blockKeys = fieldBlock_in['elementLabels']*4096 + fieldBlock_in['integPnts']
     else:
-        print 'Looking for a node set corresponding to repository key: ', odbSetStr
-        odbSetObj = getOdbSetFromKey(odb, odbSetStr, 'NODE')
-        if odbSetObj is None:
-            print 'Aborting ... are you sure that you specified a node set and not an element set or surface?\n'
+        blockKeys = fieldBlock_in['elementLabels']
+    keyPos = np.clip(np.searchsorted(sortedKeys, blockKeys), 0, sortedKeys.size - 1)
+    return np.where(sortedKeys[keyPos] == blockKeys, sortedWeights[keyPos], 0.0)
+# ----> END lookupFieldWeights(...) <----
+
+
+# Copies the components of one field output (from getFieldBulkValues(...) over the union region of a position) into the
+# columns starting at colIndex_in of the values (np.array[n,nColumns]) of a result of OdbSession.getFieldValuesPlan(...).
+# The rows are matched by instance, label, and integration point; rows without a value are not changed. Returns the
+# number of columns of the field.
+def joinPlanFieldValues(planResult_in, bulkVals_in, planValues_out, colIndex_in):
+    planResult = planResult_in # dict - See OdbSession.initPlanResult(...)
+    bulkVals = bulkVals_in # dict - Output of getFieldBulkValues(...)
+    colIndex = colIndex_in # int - First column of the field in planValues_out
+
+    numCols = bulkVals['data'].shape[1]
+    isNodal = planResult['fieldPosKey'] == NODAL
+    for instIndex in range(len(planResult['instanceNames'])):
+        curInstName = planResult['instanceNames'][instIndex]
+        if curInstName not in bulkVals['instanceNames']:
+            continue
+        planRowIdx = np.nonzero(planResult['instCodes'] == instIndex)[0]
+        isBulkRow = bulkVals['instCodes'] == bulkVals['instanceNames'].index(curInstName)
+        if isNodal:
+            planKeys = planResult['labels'][planRowIdx]
+            bulkKeys = bulkVals['nodeLabels'][isBulkRow]
+        else:
+            planKeys = planResult['labels'][planRowIdx]*4096 + planResult['integPnts'][planRowIdx]
+            bulkIntegPnts = bulkVals['integPnts'][isBulkRow]
+            if planResult['fieldPosKey'] == CENTROID:
+                bulkIntegPnts = np.zeros(bulkIntegPnts.size, dtype=np.int64)
+            bulkKeys = bulkVals['elementLabels'][isBulkRow]*4096 + bulkIntegPnts
+        if (planKeys.size == 0) or (bulkKeys.size == 0):
+            continue
+
+        # The plan rows are sorted by key within each instance, so each bulk row is found with a binary search
+        keyPos = np.clip(np.searchsorted(planKeys, bulkKeys), 0, planKeys.size - 1)
+        isFound = planKeys[keyPos] == bulkKeys
+        planValues_out[planRowIdx[keyPos[isFound]], colIndex:colIndex+numCols] = bulkVals['data'][isBulkRow][isFound,:]
+    return numCols
+# ----> END joinPlanFieldValues(...) <----
+
+
+# Averages the nodal values of a field output (from getFieldBulkValues(...)) over the nodes of each facet of
+# getSurfaceFacetArrays(...). Returns an np.array[nFacets,nComponents], with NaN for facets without any nodal values.
+def calcFacetFieldValues(facetArrs_in, bulkVals_in):
+    facetArrs = facetArrs_in # dict - Output of getSurfaceFacetArrays(...)
+    bulkVals = bulkVals_in # dict - Output of getFieldBulkValues(...) at the NODAL position
+
+    numComps = bulkVals['data'].shape[1]
+    facetVals_out = np.nan*np.ones((facetArrs['elemLabels'].size, numComps))
+    for instIndex in range(len(facetArrs['instanceNames'])):
+        curInstName = facetArrs['instanceNames'][instIndex]
+        if curInstName not in bulkVals['instanceNames']:
+            continue
+        isCurFacet = facetArrs['instCodes'] == instIndex
+        isBulkRow = bulkVals['instCodes'] == bulkVals['instanceNames'].index(curInstName)
+        curBulkLabels = bulkVals['nodeLabels'][isBulkRow]
+        curBulkData = bulkVals['data'][isBulkRow,:]
+
+        # The padded node labels (0) are not found, and neither are nodes without a value
+        curFaceNodeIdx = getIndicesFromLabels(curBulkLabels, np.argsort(curBulkLabels, kind='mergesort'), facetArrs['faceNodeLabels'][isCurFacet])
+        isFound = curFaceNodeIdx >= 0
+        curNodeVals = curBulkData[np.clip(curFaceNodeIdx, 0, None),:]*isFound[:,:,np.newaxis] # [nFacets,8,nComps]
+        numFound = np.sum(isFound, axis=1)
+        curFacetVals = np.sum(curNodeVals, axis=1)/np.where(numFound > 0, numFound, 1)[:,np.newaxis]
+        curFacetVals[numFound == 0,:] = np.nan
+        facetVals_out[isCurFacet,:] = curFacetVals
+    return facetVals_out
+# ----> END calcFacetFieldValues(...) <----
+
+
+# Adds the area-integrated resultants in each frame to a result of OdbSession.getSurfaceFieldValues(...) (see
+# getSurfaceFieldValuesBatch(...)). Facets without a value do not contribute.
+def calcSurfaceResultants(surfResult_in):
+    surfResult = surfResult_in # dict - Result of getSurfaceFieldValues(...), which the resultants are added to (side effect)
+
+    areas = surfResult['areas'] # [nFrames,nFacets]
+    values = surfResult['values'] # [nFrames,nFacets,nColumns]
+    resultantLabels = ['AREA']
+    resultantCols = [np.sum(areas, axis=1)]
+    for colIndex in range(len(surfResult['columnLabels'])):
+        resultantLabels.append('INT_' + surfResult['columnLabels'][colIndex])
+        resultantCols.append(np.nansum(values[:,:,colIndex]*areas, axis=1))
+
+    for colIndex in range(len(surfResult['columnLabels'])):
+        if not surfResult['columnFieldKeys'][colIndex].upper().startswith('CPRESS'):
+            continue
+        curPress = values[:,:,colIndex]
+        resultantLabels.append('CAREA')
+        resultantCols.append(np.sum(areas*(np.nan_to_num(curPress) > 0.0), axis=1))
+        curForces = -np.nan_to_num(curPress*areas)[:,:,np.newaxis]*surfResult['normals'] # [nFrames,nFacets,3]
+        for compIndex in range(3):
+            resultantLabels.append('CPRESS_F' + str(compIndex+1))
+            resultantCols.append(np.sum(curForces[:,:,compIndex], axis=1))
+
+    surfResult['resultantLabels'] = resultantLabels
+    surfResult['resultants'] = np.column_stack(resultantCols)
+# ----> END calcSurfaceResultants(...) <----
+
+
+# Vectorized counterpart to calcDeformedNodeCoords(...) for all of the nodes of a part instance. Uses the COORD field if
+# it is available, and otherwise adds the displacement field to the initial coordinates. Returns an np.array[nNodes,3]
+# in the same order as meshArrs_in['nodeLabels'] (see getInstanceMeshArrays(...)).
+@timedStage('coordinates')
+def calcDeformedNodeCoordsBulk(odbFrame_in, odbInstanceObj_in, meshArrs_in):
+    odbFrame = odbFrame_in # OdbFrame object that determines the step time of the deformed coordinates
+    odbInstanceObj = odbInstanceObj_in # OdbInstance object
+    meshArrs = meshArrs_in # dict - Output of getInstanceMeshArrays(odbInstanceObj)
+
+    nodeCoords_out = meshArrs['nodeCoords'].copy()
+    if 'COORD' in odbFrame.fieldOutputs.keys():
+        coordBulkVals = getFieldBulkValues(odbFrame.fieldOutputs['COORD'], odbInstanceObj, NODAL)
+        if coordBulkVals['data'].shape[0] != 0:
+            nodeIndices = getIndicesFromLabels(meshArrs['nodeLabels'], meshArrs['nodeSortIdx'], coordBulkVals['nodeLabels'])
+            validMask = nodeIndices >= 0
+            numComps = min(3, coordBulkVals['data'].shape[1])
+            nodeCoords_out[nodeIndices[validMask],0:numComps] = coordBulkVals['data'][validMask,0:numComps]
+            return nodeCoords_out
+
+    if 'U' not in odbFrame.fieldOutputs.keys():
+        print 'WARNING: No displacement field, "U", was found. Using the undeformed coordinates.'
+        return nodeCoords_out
+
+    dispBulkVals = getFieldBulkValues(odbFrame.fieldOutputs['U'], odbInstanceObj, NODAL)
+    nodeIndices = getIndicesFromLabels(meshArrs['nodeLabels'], meshArrs['nodeSortIdx'], dispBulkVals['nodeLabels'])
+    validMask = nodeIndices >= 0
+    numComps = min(3, dispBulkVals['data'].shape[1])
+    nodeCoords_out[nodeIndices[validMask],0:numComps] += dispBulkVals['data'][validMask,0:numComps]
+    return nodeCoords_out
+# ----> END calcDeformedNodeCoordsBulk(...) <----
+
+
+# Vectorized calculation of the coordinates of integration points (or element centroids) from the nodal coordinates of
+# an instance with the element shape functions in abaqus_moser_shape_functions.py. All elements of the same type are
+# done at once. Returns an np.array[n,3]; the coordinates of unsupported element types are left as zeros.
+@timedStage('coordinates')
+def calcElemPntCoordsBulk(meshArrs_in, nodeCoords_in, elemLabels_in, integPnts_in, fieldPosKey_in):
+    meshArrs = meshArrs_in # dict - Output of getInstanceMeshArrays(...)
+    nodeCoords = nodeCoords_in # np.array[nNodes,3] - (Deformed) coordinates in the order of meshArrs['nodeLabels']
+    elemLabels = np.asarray(elemLabels_in, dtype=np.int64) # np.array[n] - Element label of each point
+    integPnts = np.asarray(integPnts_in, dtype=np.int64) # np.array[n] - Integration point number of each point (ignored for CENTROID)
+    fieldPosKey = fieldPosKey_in # SymbolicConstant - INTEGRATION_POINT or CENTROID
+
+    pntCoords_out = np.zeros((elemLabels.size, 3))
+    elemIndices = getIndicesFromLabels(meshArrs['elemLabels'], meshArrs['elemSortIdx'], elemLabels)
+    elemTypes = meshArrs['elemTypes'][np.clip(elemIndices, 0, None)]
+    for curElemType in np.unique(elemTypes[elemIndices >= 0]):
+        curShapeFamily = sf.getElemShapeFamily(curElemType)
+        if curShapeFamily is None:
+            print 'WARNING: Coordinates of element type ', curElemType, ' are not supported. Writing out zeros.'
+            continue
+        curTypeMask = (elemTypes == curElemType) & (elemIndices >= 0)
+        if fieldPosKey == CENTROID:
+            if curShapeFamily in ['TET4', 'TET10']:
+                curNatCoords = 0.25*np.ones((1,4))
+            else:
+                curNatCoords = np.zeros((1,3))
+            curPntNatIdx = np.zeros(np.sum(curTypeMask), dtype=np.int64)
+        else:
+            curNatCoords = sf.getCorrectIntegPntsNatCoord(curElemType)
+            curPntNatIdx = np.clip(integPnts[curTypeMask] - 1, 0, curNatCoords.shape[0] - 1)
+        curShapeVals = sf.getCorrectShapeFunVals(curElemType, curNatCoords) # [nNatCoords,nElemNodes]
+        numElemNodes = curShapeVals.shape[1]
+        curElemConn = meshArrs['elemConn'][elemIndices[curTypeMask],0:numElemNodes]
+        curNodeIdx = getIndicesFromLabels(meshArrs['nodeLabels'], meshArrs['nodeSortIdx'], curElemConn)
+        curElemNodeCoords = nodeCoords[curNodeIdx,:] # [nPnts,nElemNodes,3]
+        pntCoords_out[curTypeMask,:] = np.sum(curShapeVals[curPntNatIdx,:,np.newaxis]*curElemNodeCoords, axis=1)
+    return pntCoords_out
+# ----> END calcElemPntCoordsBulk(...) <----
+
+
+# Expands an element-based surface of the .odb file (e.g., from getOdbSetFromKey(..., 'SURFACE')) into the faces of its
+# elements, using the face-local node numbering of getElemFaceNodeTable(...) in abaqus_moser_shape_functions.py. All of
+# the faces of the same element type are expanded at once. Returns a dict of np.arrays with one row per facet:
+#   'instanceNames' - list[str], and 'instCodes' - indices into 'instanceNames'
+#   'elemLabels', 'faceNums' - Element label and face number (1 for FACE1, ...)
+#   'faceNodeLabels' - np.array[n,8] of the node labels of each face (corner nodes first), padded with 0
+#   'numCorners' - 4 for the faces of bricks, 3 for the faces of tetrahedrals
+#   'normalSigns' - +1 or -1 so that the normal from the corner order points out of the element
+# Faces of unsupported element types are skipped with a warning. Returns None if the surface has no element faces.
+def getSurfaceFacetArrays(rootOdbObj_in, odbSurfaceObj_in, meshArrsCache_in=None):
+    rootOdbObj = rootOdbObj_in # Abaqus odb object
+    odbSurfaceObj = odbSurfaceObj_in # OdbSet of a surface (element faces)
+    meshArrsCache = meshArrsCache_in # dict{str: dict} - Mesh tables of each instance to reuse (and add to). None to not reuse them.
+
+    odbElemArr = odbSurfaceObj.elements
+    odbFaceArr = odbSurfaceObj.faces
+    # If the surface only spans one part instance, the elements and faces are not nested in a list for each instance
+    if odbSurfaceObj.instanceNames is None:
+        odbElemArr = [odbElemArr]
+        odbFaceArr = [odbFaceArr]
+    if (odbFaceArr is None) or (sum([len(curFaces) for curFaces in odbFaceArr]) == 0):
+        print 'ERROR: The surface ', odbSurfaceObj.name, ' has no element faces. Node-based surfaces are not supported.'
+        return None
+
+    facetArrs_out = {'instanceNames': []}
+    facetRows = {'instCodes': [], 'elemLabels': [], 'faceNums': [], 'faceNodeLabels': [], 'numCorners': [], 'normalSigns': []}
+    for curElemArr, curFaceArr in zip(odbElemArr, odbFaceArr):
+        if len(curElemArr) == 0:
+            continue
+        curInstName = curElemArr[0].instanceName
+        if (meshArrsCache is not None) and (curInstName in meshArrsCache):
+            curMeshArrs = meshArrsCache[curInstName]
+        else:
+            curMeshArrs = getInstanceMeshArrays(rootOdbObj.rootAssembly.instances[curInstName])
+            if meshArrsCache is not None:
+                meshArrsCache[curInstName] = curMeshArrs
+        facetArrs_out['instanceNames'].append(curInstName)
+        curInstCode = len(facetArrs_out['instanceNames']) - 1
+
+        curElemLabels = np.array([curElem.label for curElem in curElemArr], dtype=np.int64)
+        curFaceNums = np.array([int(str(curFace).upper().replace('FACE', '')) for curFace in curFaceArr], dtype=np.int64)
+        curElemIndices = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], curElemLabels)
+        curElemTypes = curMeshArrs['elemTypes'][curElemIndices]
+        for curElemType in np.unique(curElemTypes): # All of the faces of one element type at once
+            faceNodeTable, numCorners = sf.getElemFaceNodeTable(curElemType)
+            if faceNodeTable is None:
+                print 'WARNING: Skipping the faces of elements of type ', curElemType, ' on the surface ', odbSurfaceObj.name
+                continue
+            curTypeMask = curElemTypes == curElemType
+            curElemConn = curMeshArrs['elemConn'][curElemIndices[curTypeMask],:]
+            curLocalIdx = faceNodeTable[curFaceNums[curTypeMask] - 1,:] # [nFacets,nFaceNodes]
+            curRowIdx = np.arange(curElemConn.shape[0])[:,np.newaxis]
+            curFaceNodeLabels = np.zeros((curElemConn.shape[0], 8), dtype=np.int64)
+            curFaceNodeLabels[:,0:curLocalIdx.shape[1]] = curElemConn[curRowIdx,curLocalIdx]
+
+            # Orient the normals out of the elements with the undeformed coordinates
+            numElemCorners = 2*numCorners # 8 corners for bricks, and 4 for tetrahedrals
+            curElemCornerIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], curElemConn[:,0:numElemCorners])
+            curElemCentroids = curMeshArrs['nodeCoords'][curElemCornerIdx,:].mean(axis=1)
+            curCornerCoords = getFacetCornerCoords(curMeshArrs, curMeshArrs['nodeCoords'], curFaceNodeLabels, numCorners)
+            curCentroids, curNormals, curAreas = sp.calcFacetGeometry(curCornerCoords, numCorners)
+            curSigns = np.where(np.sum(curNormals*(curCentroids - curElemCentroids), axis=1) < 0.0, -1, 1)
+
+            facetRows['instCodes'].append(curInstCode*np.ones(curElemConn.shape[0], dtype=np.int64))
+            facetRows['elemLabels'].append(curElemLabels[curTypeMask])
+            facetRows['faceNums'].append(curFaceNums[curTypeMask])
+            facetRows['faceNodeLabels'].append(curFaceNodeLabels)
+            facetRows['numCorners'].append(numCorners*np.ones(curElemConn.shape[0], dtype=np.int64))
+            facetRows['normalSigns'].append(curSigns)
+
+    if len(facetRows['instCodes']) == 0:
+        print 'ERROR: None of the faces of the surface ', odbSurfaceObj.name, ' belong to supported element types.'
+        return None
+    for curKey in facetRows.keys():
+        facetArrs_out[curKey] = np.concatenate(facetRows[curKey])
+    return facetArrs_out
+# ----> END getSurfaceFacetArrays(...) <----
+
+
+# Returns the coordinates of the corner nodes of facets as an np.array[n,4,3], where the fourth corner of triangular
+# facets is a copy of the third. nodeCoords_in follows the order of meshArrs_in['nodeLabels'].
+def getFacetCornerCoords(meshArrs_in, nodeCoords_in, faceNodeLabels_in, numCorners_in):
+    meshArrs = meshArrs_in # dict - Output of getInstanceMeshArrays(...)
+    nodeCoords = nodeCoords_in # np.array[nNodes,3] - (Deformed) coordinates of the nodes of the instance
+    faceNodeLabels = faceNodeLabels_in # np.array[n,8] - Node labels of each facet, corner nodes first
+    numCorners = np.asarray(numCorners_in)*np.ones(faceNodeLabels.shape[0], dtype=np.int64) # np.array[n] - 3 or 4
+
+    cornerLabels = faceNodeLabels[:,0:4].copy()
+    isTri = numCorners == 3
+    cornerLabels[isTri,3] = cornerLabels[isTri,2]
+    cornerIdx = getIndicesFromLabels(meshArrs['nodeLabels'], meshArrs['nodeSortIdx'], cornerLabels)
+    return nodeCoords[cornerIdx,:]
+# ----> END getFacetCornerCoords(...) <----
+
+
+# Locates the element of a part instance that contains each probe point. Candidate elements are the ones with the
+# nearest centroids (from a spatial index), and the inverse isoparametric mapping is solved for all candidates of the
+# same element type at once. Returns (elemIndices, natCoords) where elemIndices is an np.array[nProbes] of indices into
+# the mesh arrays (-1 if not found) and natCoords is an np.array[nProbes,4] (only the first 3 columns used for bricks).
+def locateProbePntsInMesh(meshArrs_in, nodeCoords_in, probePnts_in, numCandidates_in=8):
+    meshArrs = meshArrs_in # dict - Output of getInstanceMeshArrays(...)
+    nodeCoords = nodeCoords_in # np.array[nNodes,3] - Current (or initial) nodal coordinates, ordered as meshArrs['nodeLabels']
+    probePnts = np.atleast_2d(np.asarray(probePnts_in, dtype=float)) # np.array[nProbes,3]
+    numCandidates = numCandidates_in # int - Number of nearest element centroids to try for each probe
+
+    numProbes = probePnts.shape[0]
+    elemIndices_out = -np.ones(numProbes, dtype=np.int64)
+    natCoords_out = np.zeros((numProbes,4))
+
+    # Only the supported element types can be used; unsupported ones are left out of the spatial index
+    elemTypes = meshArrs['elemTypes']
+    supportedTypes = [curType for curType in np.unique(elemTypes) if sf.getElemShapeFamily(curType) is not None]
+    supportedElemIdx = np.where(np.in1d(elemTypes, supportedTypes))[0]
+    if supportedElemIdx.size == 0 or numProbes == 0:
+        return (elemIndices_out, natCoords_out)
+
+    connNodeIdx = getIndicesFromLabels(meshArrs['nodeLabels'], meshArrs['nodeSortIdx'], meshArrs['elemConn'])
+    elemCentroids = np.zeros((supportedElemIdx.size,3))
+    for curType in supportedTypes:
+        curNumNodes = sf.getCorrectNodesNatCoord(curType).shape[0]
+        curMask = elemTypes[supportedElemIdx] == curType
+        elemCentroids[curMask] = nodeCoords[connNodeIdx[supportedElemIdx[curMask],0:curNumNodes]].mean(axis=1)
+
+    centroidIndex = sp.UniformGridIndex(elemCentroids, supportedElemIdx, np.zeros(supportedElemIdx.size, dtype=np.int64), [''])
+    candIdx, candDists = centroidIndex.queryNearest(probePnts, min(numCandidates, supportedElemIdx.size))
+
+    for candRank in range(candIdx.shape[1]): # Try the closest candidates first
+        curProbes = np.where((elemIndices_out < 0) & (candIdx[:,candRank] >= 0))[0]
+        if curProbes.size == 0:
+            break
+        curElemIdx = supportedElemIdx[candIdx[curProbes,candRank]]
+        curElemTypes = elemTypes[curElemIdx]
+        for curType in np.unique(curElemTypes): # One batched inverse mapping for each element type
+            curTypeMask = curElemTypes == curType
+            curNumNodes = sf.getCorrectNodesNatCoord(curType).shape[0]
+            curTypeElemIdx = curElemIdx[curTypeMask]
+            curElemNodeCoords = nodeCoords[connNodeIdx[curTypeElemIdx,0:curNumNodes]]
+            natCoords, isConverged, isInside = sf.calcNatCoordsBatch(curType, curElemNodeCoords, probePnts[curProbes[curTypeMask]])
+
+            foundProbes = curProbes[curTypeMask][isInside]
+            elemIndices_out[foundProbes] = curTypeElemIdx[isInside]
+            natCoords_out[foundProbes,0:natCoords.shape[1]] = natCoords[isInside]
+
+    return (elemIndices_out, natCoords_out)
+# ----> END locateProbePntsInMesh(...) <----
+
+
+# Evaluates a field output at arbitrary probe points (e.g., sensor locations or points along a path) that do not need to
+# coincide with nodes or integration points. For every frame, the element containing each probe point is located, and
+# the field is interpolated with the element shape functions. NODAL fields are interpolated directly from the nodes.
+# INTEGRATION_POINT fields are first extrapolated to the nodes of each element (see calcExtrapolatedNodeFieldVals(...)).
+# The .odb file is only opened once, and all of the probes of a frame are processed together.
+def probeFieldValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, probePnts_in, fieldOutputKey_in, fieldPosKey_in, odbInstanceNames_in=None, useDeformedCoords_in=True):
+    # Thin wrapper: the extraction itself is done by OdbSession.probeFieldValues(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
             return
-        print 'Found OdbSet ', odbSetObj.name
-
-    odbSubFields = odbFields.getSubset(region=odbSetObj, position=fieldPosKey)
-    nodeFieldValArr = odbSubFields.values # An array of FieldValue objects
-    if len(nodeFieldValArr) != 0:
-        print 'Found the subfield for values of ', fieldOutputKey, ' at position: ', fieldPosKey
-        if fieldPosKey == ELEMENT_NODAL:
-            print '\nWARNING: Extrapolation to the nodes is not averaged between neighboring integration points! \nThis is equivalent to setting the "Averaging threshold (%)" to 0% in Abaqus CAE'
-    else:
-        print 'ERROR: Subfield is empty! Script is aborting ...'
-        return
+        probeResults_out = odbSession.probeFieldValues(odbStepPositionKey_in, odbFramePositions_in, probePnts_in, fieldOutputKey_in, fieldPosKey_in, odbInstanceNames_in, useDeformedCoords_in)
+    return probeResults_out
+# ----> END probeFieldValuesBatch(...) <----
+
+
+# Builds node or element sets from geometric selectors, instead of hand-writing a user set file. The selectors are
+# evaluated (vectorized) on either the undeformed coordinates or the deformed coordinates of a given frame. The returned
+# list has the format used by NodeSetFromNodeLabels(...) and ElementSetFromElementLabels(...):
+#   [['InstanceName1', (11, 12, ...)], ['InstanceName2', (21, 22, ...)]]
+# which can also be written to a file for the other extraction functions with writeCSVFileOdbSet(...).
+def getSpatialSelectionLabelsBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePosition_in, selectorSpec_in, odbSetType_in, odbInstanceNames_in=None, elemSelectMode_in='CENTROID'):
+    # Thin wrapper: the selection itself is done by OdbSession.getSpatialSelectionLabels(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        odbLabelList_out = odbSession.getSpatialSelectionLabels(odbStepPositionKey_in, odbFramePosition_in, selectorSpec_in, odbSetType_in, odbInstanceNames_in, elemSelectMode_in)
+    return odbLabelList_out
+# ----> END getSpatialSelectionLabelsBatch(...) <----
+
+
+# Reduces a field output over a set to summary statistics in each frame (e.g., the maximum Mises stress and where it
+# occurs, the mean equivalent plastic strain, or the 99th percentile), directly from the bulk data blocks of each frame,
+# without building a list of every value. Returns a list with one (frame value, stats dict) pair per frame, where the
+# stats dict is from FieldStatsAccumulator.getStats() in abaqus_moser_reduction_functions.py. Use getReductionTable(...)
+# in the same module to write the result with write2DListCSV(...). See OdbSession.reduceFieldValues(...) for the inputs.
+def reduceFieldValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, componentKey_in=None, weightFieldKey_in=None, quantiles_in=(0.5, 0.99)):
+    # Thin wrapper: the reduction itself is done by OdbSession.reduceFieldValues(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        frameStats_out = odbSession.reduceFieldValues(odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, componentKey_in, weightFieldKey_in, quantiles_in)
+    return frameStats_out
+# ----> END reduceFieldValuesBatch(...) <----
+
+
+# Finds the largest and smallest value of a field output over a range of frames for each node, element, or integration
+# point of a set (a peak-over-time envelope), and the frame at which each of them occurred. The running extremes are
+# kept in one array per entity and updated frame by frame, so the memory used does not depend on the number of frames.
+# Returns the dict of FieldEnvelopeAccumulator.getEnvelope() in abaqus_moser_reduction_functions.py. Use
+# getEnvelopeTable(...) in the same module to write the result with write2DListCSV(...). See
+# OdbSession.getFieldEnvelope(...) for the inputs.
+def getFieldEnvelopeBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, componentKey_in=None):
+    # Thin wrapper: the envelope itself is found by OdbSession.getFieldEnvelope(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        envelope_out = odbSession.getFieldEnvelope(odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, componentKey_in)
+    return envelope_out
+# ----> END getFieldEnvelopeBatch(...) <----
+
+
+# Extracts several field outputs on several sets in one pass over the frames, instead of one extraction per set and
+# field. Each request is a tuple of (set, list of field output keys, position), e.g.:
+#   [('RODS12_ELSET', ['S', 'PEEQ', 'LE'], INTEGRATION_POINT), ('SHEETTOP_ELSET', ['S'], CENTROID), ('rod1Back_NSet', ['V'], NODAL)]
+# where the set is a repository key or a user set file (see OdbSession.getSet(...)), and the position is NODAL,
+# INTEGRATION_POINT, or CENTROID. The sets are resolved once, the requests with the same position share one union region
+# so that each field output is pulled with getSubset(...) only once per frame, and the coordinates are calculated once
+# per frame and set. The components of all of the fields of a request are joined into one row per node or integration
+# point. Returns a list with one dict per request:
+#   'instanceNames' - list[str], and 'instCodes' - np.array[n] of indices into 'instanceNames'
+#   'labels' - np.array[n] of node (NODAL) or element labels, and 'integPnts' - np.array[n] (zeros for NODAL and CENTROID)
+#   'columnLabels' - list[str] of the joined components, e.g. ['S11', ..., 'S23', 'PEEQ', 'LE11', ...]
+#   'frameValues' - np.array[nFrames]
+#   'coords' - np.array[nFrames,n,3] of the deformed coordinates
+#   'values' - np.array[nFrames,n,nColumns] of the field values. NaN where a field has no value for the row.
+# The rows follow the nodes or integration points of the first field output of the request, sorted by instance name,
+# label, and integration point. Use getPlanResultTable(...) to write a frame with write2DListCSV(...).
+def getFieldValuesPlanBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, extractionRequests_in):
+    # Thin wrapper: the extraction itself is done by OdbSession.getFieldValuesPlan(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        planResults_out = odbSession.getFieldValuesPlan(odbStepPositionKey_in, odbFramePositions_in, extractionRequests_in)
+    return planResults_out
+# ----> END getFieldValuesPlanBatch(...) <----
+
+
+# Converts one frame of a result of getFieldValuesPlanBatch(...) into a header and a 2D list for write2DListCSV(...).
+# Each row is [Label, Integ Pnt, X, Y, Z, Field Values ..., Instance].
+def getPlanResultTable(planResult_in, frameIndex_in):
+    planResult = planResult_in # dict - One of the results of getFieldValuesPlanBatch(...)
+    frameIndex = frameIndex_in # int - Index into planResult['frameValues']
+
+    headerLine_out = ['Label', 'Integ Pnt', 'X1', 'X2', 'X3'] + list(planResult['columnLabels']) + ['Instance']
+    tableRows = np.column_stack((planResult['labels'], planResult['integPnts'], planResult['coords'][frameIndex], planResult['values'][frameIndex])).tolist()
+    for rowIndex in range(len(tableRows)):
+        tableRows[rowIndex][0] = int(tableRows[rowIndex][0])
+        tableRows[rowIndex][1] = int(tableRows[rowIndex][1])
+        tableRows[rowIndex].append(planResult['instanceNames'][planResult['instCodes'][rowIndex]])
+    return (headerLine_out, tableRows)
+# ----> END getPlanResultTable(...) <----
+
+
+# Extracts the facet geometry of an element-based surface (e.g., 'rod1_surf') and pairs it with nodal contact outputs
+# such as CPRESS and CSHEAR1 over a range of frames. The surface is expanded into its element faces with
+# getSurfaceFacetArrays(...), and the deformed centroid, outward unit normal, and area of every facet are calculated at
+# once in each frame. The value of a field output on a facet is the average of its values at the nodes of the face.
+# Returns a dict with one row per facet:
+#   'instanceNames', 'instCodes', 'elemLabels', 'faceNums' - See getSurfaceFacetArrays(...)
+#   'columnLabels' - list[str] of the components of the field outputs. Scalar outputs are labeled with the first word of
+#                    their key (e.g., 'CPRESS' for 'CPRESS   ASSEMBLY_ROD1_SURF/ASSEMBLY_SHEET_SURF').
+#   'columnFieldKeys' - list[str] of the field output key of each column
+#   'frameValues' - np.array[nFrames]
+#   'centroids', 'normals' - np.array[nFrames,n,3], and 'areas' - np.array[nFrames,n]
+#   'values' - np.array[nFrames,n,nColumns]. NaN where a face has no nodal values.
+#   'resultantLabels', 'resultants' - np.array[nFrames,nResultants] of the area-integrated values in each frame: the
+#                    total area, the integral of each column, and for CPRESS outputs, the contact area (CPRESS > 0) and
+#                    the resultant normal force vector, -CPRESS*normal*area.
+# Nodal forces, such as CNORMF or CSHEARF, should be summed over the nodes rather than integrated over the area. Use
+# getSurfaceFacetTable(...) and getSurfaceResultantTable(...) to write the result with write2DListCSV(...).
+def getSurfaceFieldValuesBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, odbSurfaceKey_in, fieldKeys_in):
+    # Thin wrapper: the extraction itself is done by OdbSession.getSurfaceFieldValues(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        surfResult_out = odbSession.getSurfaceFieldValues(odbStepPositionKey_in, odbFramePositions_in, odbSurfaceKey_in, fieldKeys_in)
+    return surfResult_out
+# ----> END getSurfaceFieldValuesBatch(...) <----
+
+
+# Converts one frame of a result of getSurfaceFieldValuesBatch(...) into a header and a 2D list for write2DListCSV(...).
+# Each row is [Element Label, Face, X1, X2, X3, N1, N2, N3, Area, Field Values ..., Instance].
+def getSurfaceFacetTable(surfResult_in, frameIndex_in):
+    surfResult = surfResult_in # dict - Output of getSurfaceFieldValuesBatch(...)
+    frameIndex = frameIndex_in # int - Index into surfResult['frameValues']
+
+    headerLine_out = ['Element Label', 'Face', 'X1', 'X2', 'X3', 'N1', 'N2', 'N3', 'Area'] + list(surfResult['columnLabels']) + ['Instance']
+    tableRows = np.column_stack((surfResult['elemLabels'], surfResult['faceNums'], surfResult['centroids'][frameIndex],
+                                 surfResult['normals'][frameIndex], surfResult['areas'][frameIndex], surfResult['values'][frameIndex])).tolist()
+    for rowIndex in range(len(tableRows)):
+        tableRows[rowIndex][0] = int(tableRows[rowIndex][0])
+        tableRows[rowIndex][1] = int(tableRows[rowIndex][1])
+        tableRows[rowIndex].append(surfResult['instanceNames'][surfResult['instCodes'][rowIndex]])
+    return (headerLine_out, tableRows)
+# ----> END getSurfaceFacetTable(...) <----
+
+
+# Converts the area-integrated resultants of a result of getSurfaceFieldValuesBatch(...) into a header and a 2D list for
+# write2DListCSV(...), with one row per frame: [Frame Value, Resultants ...].
+def getSurfaceResultantTable(surfResult_in):
+    surfResult = surfResult_in # dict - Output of getSurfaceFieldValuesBatch(...)
+
+    headerLine_out = ['Frame Value'] + list(surfResult['resultantLabels'])
+    tableRows = np.column_stack((surfResult['frameValues'], surfResult['resultants'])).tolist()
+    return (headerLine_out, tableRows)
+# ----> END getSurfaceResultantTable(...) <----
+
+
+# Sums a nodal vector field output, such as the reaction forces (RF) or the contact normal forces (CNORMF), over a node
+# set in every frame, e.g. for force-displacement curves. The bulk data of each frame is read once for the whole set, and
+# no rows are built for the individual nodes. If a moment point is given, the moment of the nodal forces about it,
+# sum((x - x0) x F), is also calculated, using the deformed (or undeformed) nodal coordinates, including those of
+# assembly-level nodes such as the reference points of rigid bodies. The result is a dict of
+# time series in the same format as getHistoryValuesBatch(...), i.e. a list of [frame value, value] pairs (or an
+# np.array[nFrames,2] if returnArray_in is True), with the keys:
+#   The component labels of the field output (e.g., 'RF1', 'RF2', 'RF3'), and the magnitude (e.g., 'RF_MAG')
+#   The moment components about the moment point (e.g., 'RF_M1', 'RF_M2', 'RF_M3'), if momentPnt_in is not None
+def getNodeFieldResultantBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKey_in, momentPnt_in=None, useDeformedCoords_in=True, returnArray_in=False):
+    # A cached result skips opening the .odb file (see resultCacheDir)
+    resultKeyParts = ['RESULTANT', odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKey_in, momentPnt_in, bool(useDeformedCoords_in)]
+    resultCachePath = getResultCachePath(odbFilePath_in, resultKeyParts)
+    resultantHists_out = loadCachedResult(resultCachePath, 'RESULTANT')
+    if resultantHists_out is None:
+        with OdbSession(odbFilePath_in) as odbSession: # Thin wrapper: the extraction itself is done by OdbSession.getNodeFieldResultant(...)
+            if odbSession.odb is None:
+                return
+            resultantHists_out = odbSession.getNodeFieldResultant(odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKey_in, momentPnt_in, useDeformedCoords_in, True)
+        if resultantHists_out is None:
+            return
+        saveCachedResult(resultCachePath, 'RESULTANT', resultantHists_out)
+    if not returnArray_in:
+        resultantHists_out = dict([(curKey, np.asarray(curHist).tolist()) for curKey, curHist in resultantHists_out.items()])
+    return resultantHists_out
+# ----> END getNodeFieldResultantBatch(...) <----
+
+
+# Writes the mesh of the part instances and field outputs of a range of frames to binary VTK unstructured grid (.vtu)
+# files for ParaView: vtuFilePathPrefix_in + '_0000.vtu', '_0001.vtu', ... (one per frame), and a collection file,
+# vtuFilePathPrefix_in + '.pvd', which lists them with their frame values. The C3D8, C3D20, C3D4, and C3D10 element
+# families are written as VTK cells (other element types are skipped), at the deformed nodal coordinates of each frame.
+# nodeFieldKeys_in (e.g., ['U', 'V']) are written as point data, and elemFieldKeys_in (e.g., ['S', 'PEEQ']) as cell
+# data: either the CENTROID values or the average of the INTEGRATION_POINT values of each element. Symmetric tensors are
+# written in the component order of ParaView. Returns the list of the written .vtu file paths.
+def writeVtuFilesBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, vtuFilePathPrefix_in, nodeFieldKeys_in, elemFieldKeys_in, elemFieldPosKey_in=INTEGRATION_POINT, odbInstanceNames_in=None, useDeformedCoords_in=True):
+    # Thin wrapper: the export itself is done by OdbSession.writeVtuFiles(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        vtuFilePaths_out = odbSession.writeVtuFiles(odbStepPositionKey_in, odbFramePositions_in, vtuFilePathPrefix_in, nodeFieldKeys_in, elemFieldKeys_in,
+                                                    elemFieldPosKey_in, odbInstanceNames_in, useDeformedCoords_in)
+    return vtuFilePaths_out
+# ----> END writeVtuFilesBatch(...) <----
+
+
+# Streams a field output of a set over a range of frames into an HDF5 results store (see FieldResultsStore in
+# abaqus_moser_hdf5_functions.py), one frame at a time, instead of writing one .csv file per frame. Each field output key
+# becomes a field of the store (named storeFieldPrefix_in + key, e.g. 'SHEETTOP_S') with a chunked, compressed dataset
+# of shape (frames, nodes or integration points, components), together with the labels, instance indices, integration
+# points, frame values, and (optionally) the coordinates of each frame. If the field is already in the store with the
+# same rows, the frames are appended to it, skipping the frames whose frame values are already stored. Later, a time
+# slice or the history of a few nodes or elements is read back with readFrames(...) or readEntities(...) without loading
+# the rest. Requires h5py in the Abaqus Python installation. The set can be a repository key, a user set file,
+# 'INSTANCE:<name>', or 'ASSEMBLY'. Returns the names of the written fields of the store.
+def writeFieldValuesToStoreBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKeys_in, fieldPosKey_in, h5FilePath_in, storeFieldPrefix_in='', writeCoords_in=True, compression_in='gzip'):
+    # Thin wrapper: the extraction itself is done by OdbSession.writeFieldValuesToStore(...)
+    with OdbSession(odbFilePath_in) as odbSession:
+        if odbSession.odb is None:
+            return
+        storeFieldNames_out = odbSession.writeFieldValuesToStore(odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKeys_in, fieldPosKey_in,
+                                                                 h5FilePath_in, storeFieldPrefix_in, writeCoords_in, compression_in)
+    return storeFieldNames_out
+# ----> END writeFieldValuesToStoreBatch(...) <----
+
+
+# An open .odb file together with everything that is expensive to look up again, so that a driver script doing several
+# extractions on the same .odb file only opens it once. The extraction functions above (e.g.,
+# getNodeFieldValuesFromSetBatch(...)) are thin wrappers that create an OdbSession, call the corresponding method, and
+# close it again. To reuse the .odb file and its caches across extractions, use the methods directly:
+#
+#   odbSession = OdbSession('myJob.odb')
+#   velVals, velInstNames = odbSession.getNodeFieldValuesFromSet(-1, -1, 'MY_NODE_SET', 'V', NODAL)
+#   accVals, accInstNames = odbSession.getNodeFieldValuesFromSet(-1, -1, 'MY_NODE_SET', 'A', NODAL)
+#   odbSession.close()
+#
+# The session caches the OdbSet objects (including the sets created from user set files), the OdbStep and OdbFrame
+# objects, and the mesh tables of getInstanceMeshArrays(...). Temporary sets created in the .odb get unique names, since
+# Abaqus does not allow two sets with the same name.
+class OdbSession(object):
+
+    # ----> INPUTS <----
+    # odbFilePathIn - str - File path to the Abaqus .odb file to be opened (as read-only)
+    # upgradePolicyIn - str - See openReadOnlyAbqOdb(...). None uses the module setting, odbUpgradePolicy.
+    def __init__(self, odbFilePathIn, upgradePolicyIn=None):
+        self.odbFilePath = odbFilePathIn
+        self.stagedOdbPath = None # Staged copy that is marked as open while the session uses it (see odbStagingDir)
+        print ''
+        with StageTimer('open'):
+            if odbStagingDir is not None: # Only set once the copy is marked as open, so a failure never releases another session's mark
+                self.stagedOdbPath = getStagedOdbPath(odbFilePathIn, True)
+            try:
+                if self.stagedOdbPath is not None:
+                    self.odb = openReadOnlyAbqOdb(self.stagedOdbPath, upgradePolicyIn, True) # None if the .odb could not be opened
+                else:
+                    self.odb = openReadOnlyAbqOdb(odbFilePathIn, upgradePolicyIn)
+            except:
+                self.releaseStagedOdb()
+                raise
+        if self.odb is None:
+            self.releaseStagedOdb()
+        addRunCount('odbOpens')
+        self.setCache = {} # {(repository key or file identity, set type): OdbSet}
+        self.stepCache = {} # {step position key: OdbStep}
+        self.frameCache = {} # {(step position key, frame position): OdbFrame}
+        self.meshArrsCache = {} # {instance name: dict from getInstanceMeshArrays(...)}
+        self.tempSetNames = [] # Names of all of the sets created in the .odb by this session
+        self.tempSetCount = 0
+
+    def close(self):
+        if self.odb is not None:
+            self.odb.close()
+        self.odb = None
+        self.releaseStagedOdb()
+        self.setCache = {}
+        self.stepCache = {}
+        self.frameCache = {}
+        self.meshArrsCache = {}
+
+    # Allows the staged copy of the .odb file (if any) to be evicted again
+    def releaseStagedOdb(self):
+        if self.stagedOdbPath is not None:
+            releaseStagedOdbPath(self.stagedOdbPath)
+        self.stagedOdbPath = None
+
+    # Allows "with OdbSession(path) as odbSession:", which closes the .odb file even if an exception is raised
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, excTraceback):
+        self.close()
+        return False
+
+    # Returns the OdbStep object of an index (int) or repository key (str). See getOdbStepFromKey(...).
+    def getStep(self, odbStepPositionKeyIn):
+        if odbStepPositionKeyIn not in self.stepCache:
+            print 'Looking for the .odb step, ', odbStepPositionKeyIn
+            odbStepObj = getOdbStepFromKey(self.odb, odbStepPositionKeyIn)
+            if odbStepObj is None:
+                return
+            self.stepCache[odbStepPositionKeyIn] = odbStepObj
+        return self.stepCache[odbStepPositionKeyIn]
+
+    # Returns the OdbFrame object of a frame index (int) or the frame closest to a step time (float) in a step
+    def getFrame(self, odbStepPositionKeyIn, odbFramePositionIn):
+        frameKey = (odbStepPositionKeyIn, odbFramePositionIn)
+        if frameKey not in self.frameCache:
+            odbStepObj = self.getStep(odbStepPositionKeyIn)
+            if odbStepObj is None:
+                return
+            odbFrame = getOdbFramesFromPositions(odbStepObj, odbFramePositionIn)[0]
+            if isinstance(odbFramePositionIn, int):
+                print 'Found the desired frame at index: ', odbFramePositionIn, '    Corresponding to step time: ', odbFrame.frameValue
+            else:
+                print 'Found the desired frame at step time: ', odbFramePositionIn
+            print ''
+            self.frameCache[frameKey] = odbFrame
+        return self.frameCache[frameKey]
+
+    # Returns an OdbSet from either a repository key or a user set file (see readCSVFileOdbSet(...)), which is turned into
+    # a set of the .odb. odbSetTypeIn is 'NODE', 'ELEMENT', 'SURFACE', or 'ALL' (repository keys only). The set made from
+    # a file is reused by later calls as long as the file has not been modified. Returns None if the set can't be found.
+    @timedStage('setResolution')
+    def getSet(self, odbSetStrIn, odbSetTypeIn):
+        odbSetStr = odbSetStrIn
+        odbSetType = odbSetTypeIn.upper()
+        odbSetFileGiven = odbSetStr.upper().endswith('.TXT') or odbSetStr.upper().endswith('.CSV')
+        if odbSetFileGiven:
+            setKey = (getFileIdentityKey(odbSetStr), odbSetType)
+        else:
+            setKey = (odbSetStr, odbSetType)
+        if setKey in self.setCache:
+            return self.setCache[setKey]
+
+        myAssembly = self.odb.rootAssembly
+        if odbSetFileGiven:
+            odbSetArrList = readCSVFileOdbSetArrays(odbSetStr, False, self.odb, odbSetType, self.meshArrsCache) # Assumes no header
+            if odbSetArrList is None:
+                return
+            odbSetLabelsList = [[curInstName, tuple(curLabelsArr.tolist())] for curInstName, curLabelsArr in odbSetArrList]
+            if odbSetType == 'ELEMENT':
+                odbSetObj = myAssembly.ElementSetFromElementLabels(self.getTempSetName('myLocalElemSet'), odbSetLabelsList)
+            else:
+                odbSetObj = myAssembly.NodeSetFromNodeLabels(self.getTempSetName('myLocalNodeSet'), odbSetLabelsList)
+            if odbSetObj is None:
+                print 'Aborting ... are you sure that the format of the given ' + odbSetType.lower() + ' set file is correct?'
+                print 'Do not include a header line. Instance names should be denoted with an "*" at the start of the line - do not use extra spaces or quotes.'
+                print 'After the instance name, a list of comma separated integers (any number of columns and rows) should be present representing ' + odbSetType.lower() + ' labels.\n'
+                return
+        else:
+            print 'Looking for a ' + odbSetType.lower() + ' set corresponding to repository key: ', odbSetStr
+            odbSetObj = getOdbSetFromKey(self.odb, odbSetStr, odbSetType)
+            if odbSetObj is None:
+                print 'Aborting ... are you sure that you specified the correct type of set (node set, element set, or surface)?\n'
+                return
+            print 'Found OdbSet ', odbSetObj.name
+
+        self.setCache[setKey] = odbSetObj
+        return odbSetObj
+
+    # Returns a set name that has not been used yet in this session, e.g. 'tempNodeSetName_12'
+    def getTempSetName(self, namePrefixIn):
+        self.tempSetCount = self.tempSetCount + 1
+        tempSetName = namePrefixIn + '_' + str(self.tempSetCount)
+        self.tempSetNames.append(tempSetName)
+        return tempSetName
+
+    # Returns the (cached) mesh tables of a part instance. See getInstanceMeshArrays(...). An empty instance name gives the
+    # nodes and elements of the assembly itself (e.g., reference points), which the bulk data lists without an instance.
+    def getMeshArrays(self, instNameIn):
+        if instNameIn not in self.meshArrsCache:
+            if instNameIn == '':
+                self.meshArrsCache[instNameIn] = getInstanceMeshArrays(self.odb.rootAssembly)
+            else:
+                self.meshArrsCache[instNameIn] = getInstanceMeshArrays(self.odb.rootAssembly.instances[instNameIn])
+        return self.meshArrsCache[instNameIn]
 
-    doubleVals = True # Need the right precision of the field values to access them correctly later
-    if nodeFieldValArr[0].precision == SINGLE_PRECISION:
-        doubleVals = False
+    # Writes out the repository keys of the .odb file to a text file. See writeOutAllKeysInAbqODB(...).
+    def writeOutAllKeys(self, textFilePath_out):
 
-    # It's nice to have the deformed coordinates of the nodes; calculating them here
-    print '\nCalculating the coordinates of the node set in the deformed domain ...'
-    nodeFinalCoords, nodeFinalCoordsShape = calcDeformedNodeCoords(odbFrame, odbSetObj) # 2D list with each row: [Node Label, Final X1, Final X2, Final X3]
-    # Could actually be 3D rather than 2D if multiple part instances used in node set. 
-
-    singleInstanceSet = False
-    odbSetInstNames = odbSetObj.instanceNames  
-    if len(nodeFinalCoordsShape) == 2:  # Slightly different method depending if 2D or 3D array
-        singleInstanceSet = True
-        nodeFinalCoords2D = nodeFinalCoords
-    elif (len(nodeFinalCoordsShape) == 3) and (nodeFinalCoordsShape[0] == 1):
-        singleInstanceSet = True
-        nodeFinalCoords2D = nodeFinalCoords[0]
-
-    print '\nExtracting the field values from the nodes ...'
-    print '(This could take a while if extrapolating from integration points is necessary)\n'
-    if singleInstanceSet:
-        # Concatenate field value data corresponding to the nodes from nodeFinalCoords2D
-        nodeFinalCoordsWidth = len(nodeFinalCoords2D[0]) # With the node label, should be 3 for 2D displacement fields and 4 for 3D displacement fields
-        nodeIndex = 0
-        for curNodeCoord in nodeFinalCoords2D:
-            curNodeLabel = curNodeCoord[0]
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        filePath = textFilePath_out # str - file path to a text file that will be written to (side effect)
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
 
-            curNodeFieldVal = nodeFieldValArr[nodeIndex] # Should contain corresponding node's displacement field value object
-            if curNodeFieldVal.nodeLabel != curNodeLabel: # If labels don't line up, need to go find it.
-                for tempNodeFieldVal in nodeFieldValArr: # Order got messed up somewhere. Need to make sure to grab the correct displacement 
-                    if tempNodeFieldVal.nodeLabel == curNodeLabel:
-                        curNodeFieldVal = tempNodeFieldVal # Copy the correct field value object
-                        break
+        odb = self.odb
+        myAssembly = odb.rootAssembly
 
-            # Abaqus requires different calls to get the data depending if double precision was used
-            if doubleVals:
-                curFieldArr = curNodeFieldVal.dataDouble
+        # Open text file to be written to
+        print 'Opening file, ', filePath
+        fileOut = open(filePath, 'w')
+        print filePath, ' opened successfully.'
+        print ''
+
+        fileOut.write('Python Interpreter 2.7.3 for Abaqus 2017 Command Line\n\n')
+        fileOut.write('Scripted by NEWELL MOSER, PhD Candidate\n')
+        fileOut.write('Mechanical Engineering, Northwestern University\n')
+        fileOut.write('Script Created on September 20th, 2018\n\n')
+        fileOut.write('Abaqus ODB File: ' + '"' + self.odbFilePath + '"' + '\n\n\n')
+
+    #   ----> ODB PARTS <----
+        print 'Writing out odb.parts ...'
+        if len(odb.parts.keys()) != 0:
+            fileOut.write('odb.parts[name]\n')
+            for partKey in odb.parts.keys():
+                fileOut.write('    ' + '"' + partKey + '"' + '\n')
+            fileOut.write('\n')
+
+    #   ----> ODB INSTANCES <----
+        print 'Writing out odb.rootAssembly.instances ...'
+        if len(myAssembly.instances.keys()) != 0:
+            fileOut.write('odb.rootAssembly.instances[name]\n')
+            for instanceKey in myAssembly.instances.keys():
+                fileOut.write('    ' + '"' + instanceKey + '"' + '\n')
+            fileOut.write('\n')
+
+    #   ----> ODB DATUM COORDINATE SYSTEMS <----
+        print 'Writing out odb.rootAssembly.datumCsyses ...'
+        if len(myAssembly.datumCsyses.keys()) != 0:
+            fileOut.write('odb.rootAssembly.datumCsyses[name]\n')
+            for csysKey in myAssembly.datumCsyses.keys():
+                fileOut.write('    ' + '"' + csysKey + '"' + ' (' + str(myAssembly.datumCsyses[csysKey].coordSysType) + ')\n')
+            fileOut.write('\n')
+
+    #   ----> ODB SECTIONS <----
+        print 'Writing out odb.sections ...'
+        if len(odb.sections.keys()) != 0:
+            fileOut.write('odb.sections[name]\n')
+            for sectionKey in odb.sections.keys():
+                fileOut.write('    ' + '"' + sectionKey + '"' + '\n')
+            fileOut.write('\n')
+
+    #   ----> ODB MATERIALS <----
+        print 'Writing out odb.materials ...'
+        if len(odb.materials.keys()) != 0:
+            fileOut.write('odb.materials[name]\n')
+            for materialKey in odb.materials.keys():
+                fileOut.write('    ' + '"' + materialKey + '"' + '\n')
+            fileOut.write('\n')
+
+    #   ----> ODB STEPS <----
+        print 'Writing out odb.steps ...'
+        if len(odb.steps.keys()) != 0:
+            fileOut.write('odb.steps[name]\n')
+            for stepKey in odb.steps.keys():
+                fileOut.write('    ' + '"' + stepKey + '"' + '\n')
+            fileOut.write('\n')
+
+    #   ----> ALL ELEMENT SETS <----
+        print 'Writing out element odbSets ...'
+        fileOut.write('Searching for elementSets[name]\n')
+
+        for partKey in odb.parts.keys():
+            curPart = odb.parts[partKey]
+            fileOut.write('odb.parts[name]: ' + '"' + partKey + '"' + '\n')
+            if len(curPart.elementSets.keys()) == 0:
+                fileOut.write('    ..elementSets[name]: ~ \n')
             else:
-                curFieldArr = curNodeFieldVal.data
-            if isinstance(curFieldArr, float) or isinstance(curFieldArr, int):
-                curFieldArr = [curFieldArr]
+                odbSetsStr = ''
+                odbSetIndex = 0
+                for odbSetKey in curPart.elementSets.keys():
+                    if odbSetIndex != 0:
+                        odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                    else:
+                        odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                    odbSetIndex = odbSetIndex + 1
+                fileOut.write('    ..elementSets[name]: ' + odbSetsStr + '\n')
+
+        if len(myAssembly.elementSets.keys()) != 0:
+            odbSetsStr = ''
+            odbSetIndex = 0
+            for odbSetKey in myAssembly.elementSets.keys():
+                if odbSetIndex != 0:
+                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                else:
+                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                odbSetIndex = odbSetIndex + 1
+            fileOut.write('odb.rootAssembly.elementSets[name]: ' + odbSetsStr + '\n')
 
-            tempRow = curNodeCoord + list(curFieldArr)
-            nodeFieldVals_out.append(tempRow)
-            nodeIndex = nodeIndex + 1
+        for instanceKey in myAssembly.instances.keys():
+            curInstance = myAssembly.instances[instanceKey]
+            fileOut.write('odb.rootAssembly.instances[name]: ' + '"' + instanceKey + '"' + '\n')
+            if len(curInstance.elementSets.keys()) == 0:
+                fileOut.write('    ..elementSets[name]: ~ \n')
+            else:
+                odbSetsStr = ''
+                odbSetIndex = 0
+                for odbSetKey in curInstance.elementSets.keys():
+                    if odbSetIndex != 0:
+                        odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                    else:
+                        odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                    odbSetIndex = odbSetIndex + 1
+                fileOut.write('    ..elementSets[name]: ' + odbSetsStr + '\n')
+        fileOut.write('\n')
 
-            if (nodeIndex % 2000) == 0:
-                print '\nExtracted field outputs from ', nodeIndex, ' nodes ...\n'
+    #   ----> ALL NODE SETS <----
+        print 'Writing out node odbSets ...'
+        fileOut.write('Searching for nodeSets[name]\n')
 
-    else:
-        nodeSetInstanceNames = odbSetObj.instanceNames
-        instanceNames_out = nodeSetInstanceNames
-        instIndex = 0
-        nodeSumIndex = 0
-        for nodeFinalCoords2D in nodeFinalCoords: # First loop through each node subset corresponding to the part instances
-            curInstName = nodeSetInstanceNames[instIndex]
+        for partKey in odb.parts.keys():
+            curPart = odb.parts[partKey]
+            fileOut.write('odb.parts[name]: ' + '"' +  partKey + '"' + '\n')
+            if len(curPart.nodeSets.keys()) == 0:
+                fileOut.write('    ..nodeSets[name]: ~ \n')
+            else:
+                odbSetsStr = ''
+                odbSetIndex = 0
+                for odbSetKey in curPart.nodeSets.keys():
+                    if odbSetIndex != 0:
+                        odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                    else:
+                        odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                    odbSetIndex = odbSetIndex + 1
+                fileOut.write('    ..nodeSets[name]: ' + odbSetsStr + '\n')
+
+        if len(myAssembly.nodeSets.keys()) != 0:
+            odbSetsStr = ''
+            odbSetIndex = 0
+            for odbSetKey in myAssembly.nodeSets.keys():
+                if odbSetIndex != 0:
+                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                else:
+                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                odbSetIndex = odbSetIndex + 1
+            fileOut.write('odb.rootAssembly.nodeSets[name]: ' + odbSetsStr + '\n')
 
-            instanceNodeFieldVals = []
-            nodeIndex = 0
-            for curNodeCoord in nodeFinalCoords2D: # Go through each node and their corresponding initial coordinates of this part instance
-                curNodeLabel = curNodeCoord[0]
+        for instanceKey in myAssembly.instances.keys():
+            curInstance = myAssembly.instances[instanceKey]
+            fileOut.write('odb.rootAssembly.instances[name]: ' + '"' + instanceKey + '"' + '\n')
+            if len(curInstance.nodeSets.keys()) == 0:
+                fileOut.write('    ..nodeSets[name]: ~ \n')
+            else:
+                odbSetsStr = ''
+                odbSetIndex = 0
+                for odbSetKey in curInstance.nodeSets.keys():
+                    if odbSetIndex != 0:
+                        odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                    else:
+                        odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                    odbSetIndex = odbSetIndex + 1
+                fileOut.write('    ..nodeSets[name]: ' + odbSetsStr + '\n')
+        fileOut.write('\n')
 
-                curFieldVal = nodeFieldValArr[0] # Initialize to the first object
-                for tempFieldVal in nodeFieldValArr: # Find the corresponding displacement field value object (node label and instance name)
-                    tempFieldValNodeLabel = tempFieldVal.nodeLabel
-                    tempFieldValInstName = tempFieldVal.instance.name
-                    if (tempFieldValNodeLabel == curNodeLabel) and (tempFieldValInstName == curInstName):
-                        curFieldVal = tempFieldVal # Copy the correct field value object
-                        break
+    #   ----> ALL SURFACES <----
+        print 'Writing out surface odbSets ...'
+        fileOut.write('Searching for surfaces[name]\n')
 
-                if doubleVals:
-                    curFieldArr = curFieldVal.dataDouble
+        for partKey in odb.parts.keys():
+            curPart = odb.parts[partKey]
+            fileOut.write('odb.parts[name]: ' + '"' +  partKey + '"' + '\n')
+            if len(curPart.surfaces.keys()) == 0:
+                fileOut.write('    ..surfaces[name]: ~ \n')
+            else:
+                odbSetsStr = ''
+                odbSetIndex = 0
+                for odbSetKey in curPart.surfaces.keys():
+                    if odbSetIndex != 0:
+                        odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                    else:
+                        odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                    odbSetIndex = odbSetIndex + 1
+                fileOut.write('    ..surfaces[name]: ' + odbSetsStr + '\n')
+
+        if len(myAssembly.surfaces.keys()) != 0:
+            odbSetsStr = ''
+            odbSetIndex = 0
+            for odbSetKey in myAssembly.surfaces.keys():
+                if odbSetIndex != 0:
+                    odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
                 else:
-                    curFieldArr = curFieldVal.data
-                if isinstance(curFieldArr, float) or isinstance(curFieldArr, int):
-                    curFieldArr = [curFieldArr]
+                    odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                odbSetIndex = odbSetIndex + 1
+            fileOut.write('odb.rootAssembly.surfaces[name]: ' + odbSetsStr + '\n')
 
-                tempRow = curNodeCoord + list(curFieldArr)
-                instanceNodeFieldVals.append(tempRow)
-                nodeIndex = nodeIndex + 1
-                nodeSumIndex = nodeSumIndex + 1
+        for instanceKey in myAssembly.instances.keys():
+            curInstance = myAssembly.instances[instanceKey]
+            fileOut.write('odb.rootAssembly.instances[name]: ' + '"' +  instanceKey + '"' + '\n')
+            if len(curInstance.surfaces.keys()) == 0:
+                fileOut.write('    ..surfaces[name]: ~ \n')
+            else:
+                odbSetsStr = ''
+                odbSetIndex = 0
+                for odbSetKey in curInstance.surfaces.keys():
+                    if odbSetIndex != 0:
+                        odbSetsStr = odbSetsStr + ', ' + '"' + odbSetKey + '"'
+                    else:
+                        odbSetsStr = odbSetsStr +  '"' + odbSetKey + '"'
+                    odbSetIndex = odbSetIndex + 1
+                fileOut.write('    ..surfaces[name]: ' + odbSetsStr + '\n')
+        fileOut.write('\n')
 
-                if (nodeSumIndex % 2000) == 0:
-                    print '\nExtracted field outputs from ', nodeSumIndex, ' nodes ...\n'
+    #   ----> FRAMES AND FIELD OUTPUTS FOR EACH STEP <----
+        print 'Writing out odb.steps.frames ...'
+        print ''
+        print '(This could take a while)'
 
-            instIndex = instIndex + 1
-            nodeFieldVals_out.append(instanceNodeFieldVals)
+        fileOut.write('Searching through all odb.steps[name].frames[i].fieldOutputs[name] \n')
+        for stepKey in odb.steps.keys():
+            fileOut.write('odb.steps[name]: ' + '"' + stepKey + '"' + '\n')
+            curStepObj = odb.steps[stepKey]
+            curFramesArr = curStepObj.frames
+
+            curNumFrames = len(curFramesArr)
+            for frameIndex in range(curNumFrames):
+                curFrame = curFramesArr[frameIndex]
+                curFrameStepTime = curFrame.frameValue
+                fileOut.write('    ' + '..frames[i]: ' + str(frameIndex) + '    (step time: ' + str(curFrameStepTime) + ')\n')
+
+                fieldOutKeysStr = ''
+                fieldOutIndex = 0
+                for fieldOutKey in curFrame.fieldOutputs.keys():
+                    if fieldOutIndex != 0:
+                        fieldOutKeysStr = fieldOutKeysStr + ', ' + '"' + fieldOutKey + '"'
+                    else:
+                        fieldOutKeysStr = fieldOutKeysStr + '"' + fieldOutKey + '"'
+                    fieldOutIndex = fieldOutIndex + 1
+                fileOut.write('        ' + '..fieldOutputs[name]: ' + fieldOutKeysStr + '\n')
+
+                if (frameIndex % 10) == 0:
+                    print 'In Step: ', stepKey, '    Current Frame Index: ', frameIndex, '/', (curNumFrames-1)
+                elif frameIndex == (curNumFrames-1):
+                    print 'In Step: ', stepKey, '    Current Frame Index: ', frameIndex, '/', (curNumFrames-1)
+
+                if 100 < frameIndex <= 101:
+                    print ''
+                    print 'Whoa! You got a lot of frames here. Sorry that Python is slow ...'
+                    print ''
 
-    odb.close()
-    print 'getNodeFieldValuesFromSetBatch(...) ended successfully!'
-    print ''
-    return (nodeFieldVals_out, instanceNames_out);
-# ----> END getNodeFieldValuesFromSetBatch(...) <----
+        print ''
+        fileOut.write('\n')
 
+    #   ----> HISTORY REGIONS AND HISTORY OUTPUTS <----
+        print 'Writing odb.steps.historyRegions ...'
+        fileOut.write('Searching for odb.steps[name].historyRegions[name].historyOutputs[name]\n')
 
-# Retrieves the field value data of an existing field value key in the .odb file for all of the elements in an OdbSet (element set) 
-def getIntegPntFieldValuesFromSetBatch(odbFilePath_in, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in):
+        for stepKey in odb.steps.keys():
+            fileOut.write('odb.steps[name]: ' + '"' + stepKey + '"' + '\n')
+            curStepObj = odb.steps[stepKey]
+
+            if len(curStepObj.historyRegions.keys()) != 0:
+                for histRegKey in curStepObj.historyRegions.keys():
+                    curHistRegObj = curStepObj.historyRegions[histRegKey]
+                    fileOut.write('    ' + '..historyRegions[name]: ' + '"' + histRegKey + '"' + '\n')
+
+                    if len(curHistRegObj.historyOutputs.keys()) != 0:
+                        histOutKeysStr = ''
+                        histOutIndex = 0
+                        for histOutKey in curHistRegObj.historyOutputs.keys():
+                            if histOutIndex != 0:
+                                histOutKeysStr = histOutKeysStr + ', ' + '"' + histOutKey + '"'
+                            else:
+                                histOutKeysStr = histOutKeysStr + '"' + histOutKey + '"'
+                            histOutIndex = histOutIndex + 1
+                        fileOut.write('        ' + '..historyOutputs[name]: ' + histOutKeysStr + '\n')
+                    else:
+                        fileOut.write('        ' + '..historyOutputs[name]: ' + '~ \n')
+            else:
+                fileOut.write('    ' + '..historyRegions[name]: ' + '~' + '\n')
 
-    # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
-    # str - File path to the Abaqus .odb file to be opened (as read-only)
-    odbFilePath = odbFilePath_in # str - File path to the Abaqus .odb file to be opened (as read-only)
+        fileOut.write('\n')
 
-    # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
-    # int - Index of the .odb simulation step. Example: Use 0 for the first, -1 for the last.
-    # str - Name of the key used to get the OdbStep object.
-    odbStepPositionKey = odbStepPositionKey_in
+    #   ----> CLEAN UP AND CLOSE FILES <----
+        fileOut.close()
+        print 'writeOutAllKeys(...) finished successfully!'
+        print ''
+    # ----> END writeOutAllKeys(...) <----
+
+    # Returns the history output data as a list of [time, value] pairs. See getHistoryValuesBatch(...).
+    def getHistoryValues(self, odbStepPositionKey_in, odbHistRegKey_in, odbHistOutKey_in, returnArray_in=False, maxPnts_in=None, decimateMode_in='LTTB'):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
+        # int - Index of the .odb simulation step. EX: Use 0 for the first, -1 for the last.
+        # str - Name of the key used to get the OdbStep object.
+        odbStepPositionKey = odbStepPositionKey_in
+
+        odbHistRegKey = odbHistRegKey_in # str - Name of the key used to get the historyRegion object. 
+        odbHistOutKey = odbHistOutKey_in # str - Name of the key used to get the historyOutput object
+        returnArray = returnArray_in # bool - If True, return an np.array[n,2] rather than a list of pairs
+        maxPnts = maxPnts_in # int - Maximum number of points to return. None returns every point.
+        decimateMode = decimateMode_in # str - 'STRIDE', 'MINMAX', or 'LTTB'. See decimateHistory(...).
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        # ----> WORKING THROUGH THE ABAQUS DATA STRUCTURES TO GET TO THE HISTORY VARIABLES <----
+        odbStepObj = self.getStep(odbStepPositionKey)
+
+        # Get history region from the user specified key
+        print 'Looking for the history region, ', odbHistRegKey
+        odbHistRegObj = odbStepObj.historyRegions[odbHistRegKey]
+
+        # Get history output from the user specified key
+        print 'Looking for the history output, ', odbHistOutKey
+        odbHistOutObj = odbHistRegObj.historyOutputs[odbHistOutKey]
+
+        # Retrieve the data (tuple of pairs of Floats) from the historyOutput object
+        histOutDataTuples = odbHistOutObj.data
+        if (maxPnts is not None) and (len(histOutDataTuples) > maxPnts):
+            print 'Reducing ', len(histOutDataTuples), ' points to at most ', maxPnts, ' points (', decimateMode, ')'
+            histData_out = hf.decimateHistory(histOutDataTuples, maxPnts, decimateMode)
+            if not returnArray:
+                histData_out = histData_out.tolist()
+            print 'getHistoryValues(...) ended successfully!'
+            print ''
+            return histData_out
+
+        if returnArray:
+            histData_out = np.array(histOutDataTuples, dtype=float).reshape((-1, 2))
+            print 'getHistoryValues(...) ended successfully!'
+            print ''
+            return histData_out
+
+        histOutDataList = [] # Convert to a mutable list
+        for curPair in histOutDataTuples:
+            histOutDataList.append(list(curPair))
+
+        # Return data, close .odb file, and end script
+        histData_out = histOutDataList
+        print 'getHistoryValues(...) ended successfully!'
+        print ''
 
-    # odbFramePosition can be an index (input must be of type int) or a step time (input must be type float)
-    # int - Index of the desired frame in the step. EX: Use 0 for the first, -1 for the last.
-    # float - Step time. The frame that is closest to the this step time will be used. 
-    odbFramePosition = odbFramePosition_in
+        return histData_out
+    # ----> END getHistoryValues(...) <----
 
-    # This input could be either of the following.
-    # str - A string of the repository key of the existing Abaqus element OdbSet object representing the elements to extract the field values
-    # str - If the supplied string ends with ".txt" or ".csv", then it is assumed to be a filepath to a user-supplied element list.
-    #       The file should use "*" at the beginning of a line to denote the name of the part instance that the subsequent elements correspond 
-    #       to. Then, on the next line(s), a comma-separated list of integers (any number of rows and columns) representing the element
-    #       labels should be given. No header line should be present in the file. Element labels will be continuosly read-in until another 
-    #       "*" is found. An example file input for a custom element set is given below:
-    #
-    #       *InstanceName1
-    #       11,12,13,14,
-    #       15,16,17,18,19
-    #       *InstanceName2
-    #       21,22,23,24,25,26
-    #       27,28
-    #
-    odbSetStr = odbSetStr_in 
+    # Retrieves several history outputs and aligns them onto one common time grid (see alignHistories(...) in
+    # abaqus_moser_history_functions.py). Returns an np.array[m,1+nHist] with rows of [time, hist1, hist2, ...].
+    def getAlignedHistoryValues(self, odbStepPositionKey_in, odbHistRegKeys_in, odbHistOutKeys_in, gridMode_in='UNION', gridParam_in=None, interpMode_in='LINEAR', extrapMode_in='HOLD', filterSpec_in=None):
 
-    # # str - The integration point field values output to extract. 
-    fieldOutputKey =  fieldOutputKey_in # Examples: 'PEEQ' for the equivalent plastic strain, or 'S' for all stress components.
-    
-    # SymbolicConstant - Use INTEGRATION_POINT or CENTROID (do not include quotes, this is not a string)
-    #       Use INTEGRATION_POINT to extract field values at all of the integration points for each element
-    #       Use CENTROID to interpolate and average the integration point field values to the centroid of each element 
-    fieldPosKey = fieldPosKey_in 
-    # ----> END LOCAL VARIABLE DEFINITIONS <----
-    
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - See getHistoryValues(...)
 
-    elemFieldVals_out = [] # Instantiate the variable to be returned
-    instanceNames_out = None # Instantiate the second variable to be returned
+        # str or list[str] - Key of the history region for all of the history outputs, or one key for each history output
+        odbHistRegKeys = odbHistRegKeys_in
 
-    # Open Abaqus .odb file (MUST BE SAFELY CLOSED LATER)
-    print ''
-    odb = openReadOnlyAbqOdb(odbFilePath)
-    myAssembly = odb.rootAssembly
+        odbHistOutKeys = list(odbHistOutKeys_in) # list[str] - Keys of the history outputs to combine
 
-    # ----> WORKING THROUGH THE ABAQUS DATA STRUCTURES TO GET TO THE HISTORY VARIABLES <----
-    print 'Looking for the .odb step, ', odbStepPositionKey
-    # Get the OdbStep object from the user specified step
-    if isinstance(odbStepPositionKey, int):
-        odbStepObj = odb.steps.values()[odbStepPositionKey] 
-    elif isinstance(odbStepPositionKey, str):
-        odbStepObj = odb.steps[odbStepPositionKey]
+        # str - 'UNION' (every output time of any history), 'REFERENCE' (the output times of one history; gridParam_in
+        #       is its index), or 'UNIFORM' (evenly spaced; gridParam_in is the number of points (int) or time increment (float))
+        gridMode = gridMode_in
+        gridParam = gridParam_in
 
-    # Get the desired OdbFrame object 
-    odbFrameArr = odbStepObj.frames
-    if isinstance(odbFramePosition, int):
-        odbFrame = odbFrameArr[odbFramePosition]
-        print 'Found the desired frame at index: ', odbFramePosition, '    Corresponding to step time: ', odbFrame.frameValue
-    elif isinstance(odbFramePosition, float):
-        odbFrame = odbStepObj.getFrame(frameValue=odbFramePosition, match=CLOSEST)
-        print 'Found the desired frame at step time: ', odbFramePosition
-    print ''
+        # str or list[str] - 'LINEAR' or 'STEP' (zero-order hold) interpolation, for all or for each history
+        interpMode = interpMode_in
 
-    # Access the repository of FieldOutput objects, and then get just the one identified by 'fieldOutputKey'
-    print 'Looking for the field output data: ', fieldOutputKey
-    odbFields = odbFrame.fieldOutputs[fieldOutputKey] 
-    print 'Found desired type of field output data.'
-    print ''
+        # str - 'HOLD' to hold the first/last value outside the time span of a history, or 'NAN' to use NaN
+        extrapMode = extrapMode_in
 
-    # Get the subset of the full field by using the element set object
-    odbSetFileGiven = False
-    if odbSetStr.endswith('.txt') or odbSetStr.endswith('.TXT') or odbSetStr.endswith('.csv') or odbSetStr.endswith('.CSV'):
-        odbSetFileGiven = True
-        odbElemSetLabelsList = readCSVFileOdbSet(odbSetStr, False) # Assumes no header
-        odbSetObj = myAssembly.ElementSetFromElementLabels('myLocalElemSet', odbElemSetLabelsList)
-        if odbSetObj is None:
-            print 'Aborting ... are you sure that the format of the given element set file is correct?'
-            print 'Do not include a header line. Instance names should be denoted with an "*" at the start of the line - do not use extra spaces or quotes.'
-            print 'After the instance name, a list of comma separated integers (any number of columns and rows) should be present representing element labels.\n'
-            return
-    else:
-        print 'Looking for a element set corresponding to repository key: ', odbSetStr
-        odbSetObj = getOdbSetFromKey(odb, odbSetStr, 'ELEMENT')
-        if odbSetObj is None:
-            print 'Aborting ... are you sure that you specified a element set and not an node set or surface?\n'
+        # tuple - Zero-phase filter applied to all of the aligned histories, e.g. ('CFC', 60), ('BUTTERWORTH', 500.0, 4),
+        #         or ('MOVING_AVERAGE', 11). None for no filtering. See filterHistoryValues(...) in abaqus_moser_history_functions.py.
+        filterSpec = filterSpec_in
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        if (filterSpec is not None) and (not hf.checkFilterSpec(filterSpec)):
             return
-        print 'Found OdbSet ', odbSetObj.name
+        if isinstance(odbHistRegKeys, str):
+            odbHistRegKeys = [odbHistRegKeys]*len(odbHistOutKeys)
 
-    odbSubFields = odbFields.getSubset(region=odbSetObj, position=fieldPosKey)
-    elemFieldValArr = odbSubFields.values # An array of FieldValue objects
-    if len(elemFieldValArr) != 0:
-        print 'Found the subfield for values of ', fieldOutputKey, ' at position: ', fieldPosKey, '\n'
-    else:
-        print 'ERROR: Subfield is empty! Script is aborting ...'
-        return
+        histArrs = []
+        for histIndex in range(len(odbHistOutKeys)):
+            histArrs.append(self.getHistoryValues(odbStepPositionKey, odbHistRegKeys[histIndex], odbHistOutKeys[histIndex], True))
 
-    doubleVals = True # Need the right precision of the field values to access them correctly later
-    if elemFieldValArr[0].precision == SINGLE_PRECISION:
-        doubleVals = False
+        histTable_out = hf.getAlignedHistoryTable(histArrs, gridMode, gridParam, interpMode, extrapMode, filterSpec)
+        if histTable_out is not None:
+            print 'Aligned ', len(histArrs), ' history outputs onto ', histTable_out.shape[0], ' output times.\n'
+        return histTable_out
+    # ----> END getAlignedHistoryValues(...) <----
 
-    # Explore to see if the COORD is available in the output for integration points. Makes my life easier if it is
-    coordFieldPresent = False
-    for fieldIter in odbFrame.fieldOutputs.keys():
-        if fieldIter in ['COORD']:
-            coordFields = odbFrame.fieldOutputs['COORD']
-            odbSubCoordFields = coordFields.getSubset(region=odbSetObj, position=fieldPosKey)
-            elemCoordFieldArr = odbSubCoordFields.values
-            if len(elemCoordFieldArr) != 0:
-                coordFieldPresent = True
-            break
+    # Gathers the history outputs of many history regions at once (e.g., the thousands of 'Node ROD1-1.123' regions
+    # written for node-based history output) into one matrix per history output key. See getHistoryMatrixBatch(...).
+    def getHistoryMatrix(self, odbStepPositionKey_in, odbHistRegPattern_in, odbHistOutPattern_in, patternType_in='GLOB', odbSetStr_in=None, odbSetType_in='NODE', filterSpec_in=None):
 
-    # Shit hits the fan from here on out...
-    odbMeshElemArr = odbSetObj.elements
-    odbSetInstNames = odbSetObj.instanceNames
-    singleInstanceSet = False 
-    if odbSetInstNames is None: # Implies the element set spans a single instance or part, and will be list of OdbMeshElement objects
-        singleInstanceSet = True
-        # For consistency with/without multiple part instances, I want to odbMeshElemArr to always be a 2D list
-        odbMeshElemArr = [odbMeshElemArr] 
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - See getHistoryValues(...)
 
-    print 'Extracting the field value outputs ...'
-    if fieldPosKey == CENTROID:
+        # str or list[str] - Pattern(s) of the history region keys, e.g. 'Node ROD1-1.*'. Use '*' for all of the regions.
+        odbHistRegPattern = odbHistRegPattern_in
 
-        if singleInstanceSet: # Calculate the number instances
-            numInstances = 1
-        else:
-            numInstances = len(odbSetInstNames)
+        # str or list[str] - Pattern(s) of the history output keys, e.g. 'U?' or ['RF1', 'RF2', 'RF3']
+        odbHistOutPattern = odbHistOutPattern_in
 
-        # Same as number of OdbMeshElements in odbSetObj.elements, but I don't have to go through the part instances with For-loops
-        numElements = len(elemFieldValArr) 
-        numElemOutPnts = 1 # Centroid so only one location within the element being queried
+        # str - 'GLOB' for shell-style wildcards (* and ?), or 'REGEX' for regular expressions
+        patternType = patternType_in
 
-        if doubleVals:
-            numDataFieldVals = 4 + len(elemFieldValArr[0].dataDouble) # Element Label, X, Y, Z, Field Values ...
-        else:
-            numDataFieldVals = 4 + len(elemFieldValArr[0].data)
+        # str - Repository key or user set file (see getSet(...)) of a node or element set. If given, only the history
+        #       regions of the nodes/elements in the set are used (in addition to matching the pattern).
+        odbSetStr = odbSetStr_in
+        odbSetType = odbSetType_in.upper() # str - 'NODE' or 'ELEMENT'; the type of odbSetStr and of the history regions
+        filterSpec = filterSpec_in # tuple - Zero-phase filter applied to every matrix. See getAlignedHistoryValues(...).
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
 
-        # Can now instantiate the list of data that will be organized by part instances later and returned
-        allElemVals = np.zeros((numElements,numElemOutPnts,numDataFieldVals))
-        allElemInstNames = []
+        if (filterSpec is not None) and (not hf.checkFilterSpec(filterSpec)):
+            return
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+
+        # Select the history regions by name first, and then (vectorized) by the node/element set
+        odbHistRegions = odbStepObj.historyRegions
+        histRegNames = hf.matchHistoryKeys(odbHistRegions.keys(), odbHistRegPattern, patternType)
+        histRegNames.sort(key=hf.getHistoryRegionSortKey) # Columns ordered by instance name and label
+        histRegInfo = [hf.parseHistoryRegionName(curRegName) for curRegName in histRegNames]
+        if odbSetStr is not None:
+            odbSetObj = self.getSet(odbSetStr, odbSetType)
+            if odbSetObj is None:
+                return
+            setLabelSet = setf.buildLabelSetFromOdbSet(odbSetObj, odbSetType)
+            regInSet = np.zeros(len(histRegNames), dtype=bool)
+            regTypes = np.array([str(curInfo[0]) for curInfo in histRegInfo])
+            regInstNames = np.array([str(curInfo[1]) for curInfo in histRegInfo])
+            regLabels = np.array([-1 if curInfo[2] is None else curInfo[2] for curInfo in histRegInfo], dtype=np.int64)
+            for curInstName in setLabelSet.getInstanceNames():
+                isCurInst = (regInstNames == curInstName) & (regTypes == odbSetType)
+                regInSet[isCurInst] = setLabelSet.contains(curInstName, regLabels[isCurInst])
+            histRegNames = [histRegNames[regIndex] for regIndex in np.nonzero(regInSet)[0]]
+            histRegInfo = [histRegInfo[regIndex] for regIndex in np.nonzero(regInSet)[0]]
+        print 'Found ', len(histRegNames), ' history regions matching ', odbHistRegPattern
+
+        # A single pass over the selected regions, sorting every matching history output by its output key
+        histArrsByKey = {} # {history output key: [np.array[n,2] of each region]}
+        regIndicesByKey = {} # {history output key: [index into histRegNames of each region]}
+        for regIndex in range(len(histRegNames)):
+            odbHistOutputs = odbHistRegions[histRegNames[regIndex]].historyOutputs
+            for curOutKey in hf.matchHistoryKeys(odbHistOutputs.keys(), odbHistOutPattern, patternType):
+                histArrsByKey.setdefault(curOutKey, []).append(np.array(odbHistOutputs[curOutKey].data, dtype=float).reshape((-1, 2)))
+                regIndicesByKey.setdefault(curOutKey, []).append(regIndex)
+
+            if (not quietMode) and (((regIndex + 1) % 2000) == 0):
+                print '\nRead the history outputs of ', regIndex + 1, ' history regions ...\n'
+
+        histMatrices_out = {}
+        for curOutKey in sorted(histArrsByKey.keys()):
+            curTimes, curVals = hf.stackHistories(histArrsByKey[curOutKey])
+            if filterSpec is not None:
+                curVals = hf.filterHistoryValues(curTimes, curVals, filterSpec)
+            curRegIndices = regIndicesByKey[curOutKey]
+            histMatrices_out[curOutKey] = {'times': curTimes, 'values': curVals,
+                                           'regionNames': [histRegNames[regIndex] for regIndex in curRegIndices],
+                                           'regionTypes': [histRegInfo[regIndex][0] for regIndex in curRegIndices],
+                                           'instanceNames': [histRegInfo[regIndex][1] for regIndex in curRegIndices],
+                                           'labels': np.array([-1 if histRegInfo[regIndex][2] is None else histRegInfo[regIndex][2] for regIndex in curRegIndices], dtype=np.int64),
+                                           'integPnts': np.array([0 if histRegInfo[regIndex][3] is None else histRegInfo[regIndex][3] for regIndex in curRegIndices], dtype=np.int64)}
+            print 'History output ', curOutKey, ': ', curVals.shape[0], ' output times x ', curVals.shape[1], ' regions'
+        addRunCount('historyRegions', len(histRegNames))
+
+        print 'getHistoryMatrix(...) ended successfully!\n'
+        return histMatrices_out
+    # ----> END getHistoryMatrix(...) <----
+
+    # See getNodeFieldValuesFromSetBatch(...) for a description of the inputs and the returned lists.
+    def getNodeFieldValuesFromSet(self, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, invariantKeys_in=None, csysSpec_in=None):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
+        # int - Index of the .odb simulation step. Example: Use 0 for the first, -1 for the last.
+        # str - Name of the key used to get the OdbStep object.
+        odbStepPositionKey = odbStepPositionKey_in
+
+        # odbFramePosition can be an index (input must be of type int) or a step time (input must be type float)
+        # int - Index of the desired frame in the step. EX: Use 0 for the first, -1 for the last.
+        # float - Step time. The frame that is closest to the this step time will be used. 
+        odbFramePosition = odbFramePosition_in
+
+        # This input could be either of the following.
+        # str - A string of the repository key of the existing Abaqus node OdbSet object representing the nodes to extract the field values
+        # str - If the supplied string ends with ".txt" or ".csv", then it is assumed to be a filepath to a user-supplied node list.
+        #       The file should use "*" at the beginning of a line to denote the name of the part instance that the subsequent nodes correspond 
+        #       to. Then, on the next line(s), a comma-separated list of integers (any number of rows and columns) representing the node
+        #       labels should be given. No header line should be present in the file. Node labels will be continuosly read-in until another 
+        #       "*" is found. An example file input for a custom node set is given below:
+        #
+        #       *InstanceName1
+        #       11,12,13,14,
+        #       15,16,17,18,19
+        #       *InstanceName2
+        #       21,22,23,24,25,26
+        #       27,28
+        #
+        # str - 'INSTANCE:<name>' (e.g., 'INSTANCE:ROD1-1') for all of the nodes of a part instance, or 'ASSEMBLY' for all
+        #       of the nodes of the model. The instance is used as the region directly, so no set is created.
+        odbSetStr = odbSetStr_in 
+
+        # str - The type of nodal values to extract, in which case, fieldPosKey_in must be NODAL. The field values will be extrapolated (0% averaging)
+        #        to the nodes if an integration point field variable is given, in which case, fieldPosKey_in must be ELEMENT_NODAL. 
+        fieldOutputKey =  fieldOutputKey_in 
+
+        # Symbolic constant - Use NODAL or ELEMENT_NODAL (do not include quotes, this is not a string)
+        # Use NODAL to extract field values that exist at the nodes (displacement, velocity, acceleration, contact pressure, etc.)
+        # Use ELEMENT_NODAL to interpolate (much slower) integration point field values (0% averaging) to the nodes (stress, plastic strain, etc.)
+        fieldPosKey = fieldPosKey_in 
+
+        # list[str] - Invariants of a tensor field output (e.g., 'S' or 'LE') to append as extra columns after the field
+        #       values, e.g. ['MISES', 'PRESS', 'MAX_PRINCIPAL']. See calcTensorInvariants(...) in abaqus_moser_tensor_functions.py
+        #       for the available invariants. None to not append any.
+        invariantKeys = invariantKeys_in
+
+        # The coordinate system for the components of a vector or tensor field output. None keeps the global system. See
+        # getCsysFromSpec(...). The invariants (if any) are calculated after the transformation.
+        csysSpec = csysSpec_in
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+
+        nodeFieldVals_out = [] # Instantiate the variable to be returned
+        instanceNames_out = None # Instantiate the second variable to be returned
+
+        odb = self.odb
+        myAssembly = odb.rootAssembly
+
+        # ----> WORKING THROUGH THE ABAQUS DATA STRUCTURES TO GET TO THE FIELD OUTPUTS <----
+        odbFrame = self.getFrame(odbStepPositionKey, odbFramePosition)
+
+        # Access the repository of FieldOutput objects, and then get just the one identified by 'fieldOutputKey'
+        print 'Looking for the field output data: ', fieldOutputKey
+        odbFields = odbFrame.fieldOutputs[fieldOutputKey] 
+        print 'Found desired type of field output data.'
+        print ''
 
-        # Loop through all of the field values (one for each element for the CENTROID case)
-        curFieldObjIndex = 0
-        for curFieldValObj in elemFieldValArr: 
-            curElemInstObj = curFieldValObj.instance
-            if curElemInstObj is None:
-                print 'ERROR: An element was found that does not belong to a part instance.'
+        # Whole part instances are read with getSubset(region=instance), without creating a set
+        regionInstNames = self.getRegionInstanceNames(odbSetStr)
+        if regionInstNames is not None:
+            if len(regionInstNames) == 0:
                 return
-            curElemInstName = curElemInstObj.name
-            curElemLabel = curFieldValObj.elementLabel
-            # From the field values, get the actual element object
-            curElemObj = curElemInstObj.getElementFromLabel(curElemLabel)
-
-            # From the element object, get the node objects in order to calculate their current coordinates
-            curElemType = curElemObj.type
-            curElemNodeConn = curElemObj.connectivity # Node connectivity labels (i.e., integers) for the given element
-            curElemNodeInstNames = curElemObj.instanceNames # list of instance names for each of the nodes that make up the element
-            if curElemNodeInstNames is None:
-                print 'ERROR: Elements were found that are made up of nodes which do not belong to a part instance.'
+            instanceRows, regionInstNames = self.getRegionNodeFieldValues(odbFrame, odbFields, regionInstNames, fieldPosKey)
+            if len(instanceRows) == 0:
+                print 'ERROR: Subfield is empty! Script is aborting ...'
                 return
-            elif len(set(curElemNodeInstNames)) == 1: # Implies all nodes belong to one part instance (just one unique name)
-                tempNodeConnSetLabels = [ [curElemNodeInstNames[0],curElemNodeConn] ]
-            else: # Shitty - multiple part instances involved in the nodes that define this element. WHY?!
-                tempNodeConnSetLabels = []
-                for curNodeConnIndex in range(len(curElemNodeConn)):
-                    tempNodeConnSetLabels.append( [ curElemNodeInstNames[curNodeConnIndex] ,[ curElemNodeConn[curNodeConnIndex] ] ] )
-            
-            if coordFieldPresent: # Grab coordinates of all of the centroid point if the COORD field is available
-                curIntegPntCoords = []
-                curNumIntegPnts = 1
-                tempCoordValObj = elemCoordFieldArr[curFieldObjIndex]
+            singleInstanceSet = len(instanceRows) == 1
+            if singleInstanceSet:
+                nodeFieldVals_out = instanceRows[0]
+            else:
+                nodeFieldVals_out = instanceRows
+                instanceNames_out = tuple(regionInstNames)
+            nodeFieldVals_out = self.finishNodeFieldValues(nodeFieldVals_out, singleInstanceSet, list(odbFields.componentLabels), invariantKeys, csysSpec)
+            if nodeFieldVals_out is None:
+                return
+            print 'getNodeFieldValuesFromSet(...) ended successfully!'
+            print ''
+            return (nodeFieldVals_out, instanceNames_out);
+
+        # Get the subset of the full field by using the node set object (created only once per session for set files)
+        odbSetObj = self.getSet(odbSetStr, 'NODE')
+        if odbSetObj is None:
+            return
+
+        with StageTimer('getSubset'):
+            odbSubFields = odbFields.getSubset(region=odbSetObj, position=fieldPosKey)
+            nodeFieldValArr = odbSubFields.values # An array of FieldValue objects
+        if len(nodeFieldValArr) != 0:
+            print 'Found the subfield for values of ', fieldOutputKey, ' at position: ', fieldPosKey
+            if fieldPosKey == ELEMENT_NODAL:
+                print '\nWARNING: Extrapolation to the nodes is not averaged between neighboring integration points! \nThis is equivalent to setting the "Averaging threshold (%)" to 0% in Abaqus CAE'
+        else:
+            print 'ERROR: Subfield is empty! Script is aborting ...'
+            return
+
+        doubleVals = True # Need the right precision of the field values to access them correctly later
+        if nodeFieldValArr[0].precision == SINGLE_PRECISION:
+            doubleVals = False
+
+        # It's nice to have the deformed coordinates of the nodes; calculating them here
+        print '\nCalculating the coordinates of the node set in the deformed domain ...'
+        nodeFinalCoords, nodeFinalCoordsShape = calcDeformedNodeCoords(odbFrame, odbSetObj) # 2D list with each row: [Node Label, Final X1, Final X2, Final X3]
+        # Could actually be 3D rather than 2D if multiple part instances used in node set. 
+
+        singleInstanceSet = False
+        odbSetInstNames = odbSetObj.instanceNames  
+        if len(nodeFinalCoordsShape) == 2:  # Slightly different method depending if 2D or 3D array
+            singleInstanceSet = True
+            nodeFinalCoords2D = nodeFinalCoords
+        elif (len(nodeFinalCoordsShape) == 3) and (nodeFinalCoordsShape[0] == 1):
+            singleInstanceSet = True
+            nodeFinalCoords2D = nodeFinalCoords[0]
+
+        print '\nExtracting the field values from the nodes ...'
+        print '(This could take a while if extrapolating from integration points is necessary)\n'
+        if singleInstanceSet:
+            # Concatenate field value data corresponding to the nodes from nodeFinalCoords2D
+            nodeFinalCoordsWidth = len(nodeFinalCoords2D[0]) # With the node label, should be 3 for 2D displacement fields and 4 for 3D displacement fields
+            nodeIndex = 0
+            for curNodeCoord in nodeFinalCoords2D:
+                curNodeLabel = curNodeCoord[0]
+
+                curNodeFieldVal = nodeFieldValArr[nodeIndex] # Should contain corresponding node's displacement field value object
+                if curNodeFieldVal.nodeLabel != curNodeLabel: # If labels don't line up, need to go find it.
+                    for tempNodeFieldVal in nodeFieldValArr: # Order got messed up somewhere. Need to make sure to grab the correct displacement 
+                        if tempNodeFieldVal.nodeLabel == curNodeLabel:
+                            curNodeFieldVal = tempNodeFieldVal # Copy the correct field value object
+                            break
+
+                # Abaqus requires different calls to get the data depending if double precision was used
                 if doubleVals:
-                    curCoordFieldData = tempCoordValObj.dataDouble # Tuple of floats
+                    curFieldArr = curNodeFieldVal.dataDouble
                 else:
-                    curCoordFieldData = tempCoordValObj.data
-                curIntegPntCoords.append(list(curCoordFieldData))
+                    curFieldArr = curNodeFieldVal.data
+                if isinstance(curFieldArr, float) or isinstance(curFieldArr, int):
+                    curFieldArr = [curFieldArr]
 
-            else: # Otherwise, need to calculate the centroid of the element manually with shape functions
-                tempNodeOdbSet = myAssembly.NodeSetFromNodeLabels('tempNodeSetName' + str(curFieldObjIndex), tempNodeConnSetLabels)
-                curElemNodalCoords, curElemNodalCoordsShape = calcDeformedNodeCoords(odbFrame, tempNodeOdbSet) # Calculate the current coordinates of the element's nodes
+                tempRow = curNodeCoord + list(curFieldArr)
+                nodeFieldVals_out.append(tempRow)
+                nodeIndex = nodeIndex + 1
 
-                if len(curElemNodalCoordsShape) == 2: # Make a 3D list, even if only one part instance was used in the node set
-                    curElemNodalCoords = [curElemNodalCoords]
+                if (not quietMode) and ((nodeIndex % 2000) == 0):
+                    print '\nExtracted field outputs from ', nodeIndex, ' nodes ...\n'
 
-                # Use these node coordinates and element type to calculate the centroid via hand-coded element shape functions
-                curIntegPntCoords, curNumIntegPnts = sf.getCorrectShapeFunc(curElemType, 'CENTROID', curElemNodalCoords) # Returns a 2D List
+        else:
+            nodeSetInstanceNames = odbSetObj.instanceNames
+            instanceNames_out = nodeSetInstanceNames
+            instIndex = 0
+            nodeSumIndex = 0
+            for nodeFinalCoords2D in nodeFinalCoords: # First loop through each node subset corresponding to the part instances
+                curInstName = nodeSetInstanceNames[instIndex]
+
+                instanceNodeFieldVals = []
+                nodeIndex = 0
+                for curNodeCoord in nodeFinalCoords2D: # Go through each node and their corresponding initial coordinates of this part instance
+                    curNodeLabel = curNodeCoord[0]
+
+                    curFieldVal = nodeFieldValArr[0] # Initialize to the first object
+                    for tempFieldVal in nodeFieldValArr: # Find the corresponding displacement field value object (node label and instance name)
+                        tempFieldValNodeLabel = tempFieldVal.nodeLabel
+                        tempFieldValInstName = tempFieldVal.instance.name
+                        if (tempFieldValNodeLabel == curNodeLabel) and (tempFieldValInstName == curInstName):
+                            curFieldVal = tempFieldVal # Copy the correct field value object
+                            break
 
-            if doubleVals:
-                curFieldData = curFieldValObj.dataDouble # Tuple of floats
-            else:
-                curFieldData = curFieldValObj.data
-            if isinstance(curFieldData, float) or isinstance(curFieldData, int):
-                curFieldData = [curFieldData]
+                    if doubleVals:
+                        curFieldArr = curFieldVal.dataDouble
+                    else:
+                        curFieldArr = curFieldVal.data
+                    if isinstance(curFieldArr, float) or isinstance(curFieldArr, int):
+                        curFieldArr = [curFieldArr]
 
-            # Have everything, but it needs to be indexed correctly for storage
-            for integPntIndex in range(numElemOutPnts):
-                tempDataList = [curElemLabel] + curIntegPntCoords[integPntIndex] + list(curFieldData)
-                for curTempValIndex in range(len(tempDataList)):
-                    allElemVals[curFieldObjIndex,integPntIndex,curTempValIndex] = tempDataList[curTempValIndex]
+                    tempRow = curNodeCoord + list(curFieldArr)
+                    instanceNodeFieldVals.append(tempRow)
+                    nodeIndex = nodeIndex + 1
+                    nodeSumIndex = nodeSumIndex + 1
 
-            allElemInstNames.append(curElemInstName) # Instance names that match up with the element index in allElemVals
-            curFieldObjIndex = curFieldObjIndex + 1
+                    if (not quietMode) and ((nodeSumIndex % 2000) == 0):
+                        print '\nExtracted field outputs from ', nodeSumIndex, ' nodes ...\n'
 
-            if (curFieldObjIndex % 2000) == 0:
-                print '\nExtracted field outputs from ', curFieldObjIndex, ' elements ...\n'
+                instIndex = instIndex + 1
+                nodeFieldVals_out.append(instanceNodeFieldVals)
 
-    elif fieldPosKey == INTEGRATION_POINT:
-        if singleInstanceSet: # Calculate the number instances
-            numInstances = 1
-        else:
-            numInstances = len(odbSetInstNames)
+        nodeFieldVals_out = self.finishNodeFieldValues(nodeFieldVals_out, singleInstanceSet, list(odbFields.componentLabels), invariantKeys, csysSpec)
+        if nodeFieldVals_out is None:
+            return
+
+        addRunCount('nodes', len(nodeFieldValArr))
+        print 'getNodeFieldValuesFromSet(...) ended successfully!'
+        print ''
+        return (nodeFieldVals_out, instanceNames_out);
+    # ----> END getNodeFieldValuesFromSet(...) <----
+
+    # See getIntegPntFieldValuesFromSetBatch(...) for a description of the inputs and the returned lists.
+    def getIntegPntFieldValuesFromSet(self, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, invariantKeys_in=None, csysSpec_in=None):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        # odbStepPositionKey can be an index (input must be of type int) or the step name (input must be of type string)
+        # int - Index of the .odb simulation step. Example: Use 0 for the first, -1 for the last.
+        # str - Name of the key used to get the OdbStep object.
+        odbStepPositionKey = odbStepPositionKey_in
+
+        # odbFramePosition can be an index (input must be of type int) or a step time (input must be type float)
+        # int - Index of the desired frame in the step. EX: Use 0 for the first, -1 for the last.
+        # float - Step time. The frame that is closest to the this step time will be used. 
+        odbFramePosition = odbFramePosition_in
+
+        # This input could be either of the following.
+        # str - A string of the repository key of the existing Abaqus element OdbSet object representing the elements to extract the field values
+        # str - If the supplied string ends with ".txt" or ".csv", then it is assumed to be a filepath to a user-supplied element list.
+        #       The file should use "*" at the beginning of a line to denote the name of the part instance that the subsequent elements correspond 
+        #       to. Then, on the next line(s), a comma-separated list of integers (any number of rows and columns) representing the element
+        #       labels should be given. No header line should be present in the file. Element labels will be continuosly read-in until another 
+        #       "*" is found. An example file input for a custom element set is given below:
+        #
+        #       *InstanceName1
+        #       11,12,13,14,
+        #       15,16,17,18,19
+        #       *InstanceName2
+        #       21,22,23,24,25,26
+        #       27,28
+        #
+        # str - 'INSTANCE:<name>' (e.g., 'INSTANCE:ROD1-1') for all of the elements of a part instance, or 'ASSEMBLY' for
+        #       all of the elements of the model. The instance is used as the region directly, so no set is created.
+        odbSetStr = odbSetStr_in 
+
+        # # str - The integration point field values output to extract. 
+        fieldOutputKey =  fieldOutputKey_in # Examples: 'PEEQ' for the equivalent plastic strain, or 'S' for all stress components.
+
+        # SymbolicConstant - Use INTEGRATION_POINT or CENTROID (do not include quotes, this is not a string)
+        #       Use INTEGRATION_POINT to extract field values at all of the integration points for each element
+        #       Use CENTROID to interpolate and average the integration point field values to the centroid of each element 
+        fieldPosKey = fieldPosKey_in 
+
+        # list[str] - Invariants of a tensor field output (e.g., 'S' or 'LE') to append as extra columns after the field
+        #       values, e.g. ['MISES', 'TRIAXIALITY', 'LODE_ANGLE']. See calcTensorInvariants(...) in abaqus_moser_tensor_functions.py
+        #       for the available invariants. None to not append any.
+        invariantKeys = invariantKeys_in
+
+        # The coordinate system for the components of a vector or tensor field output. None keeps the global system. See
+        # getCsysFromSpec(...). The invariants (if any) are calculated after the transformation.
+        csysSpec = csysSpec_in
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+
+        elemFieldVals_out = [] # Instantiate the variable to be returned
+        instanceNames_out = None # Instantiate the second variable to be returned
+
+        odb = self.odb
+        myAssembly = odb.rootAssembly
+
+        # ----> WORKING THROUGH THE ABAQUS DATA STRUCTURES TO GET TO THE FIELD OUTPUTS <----
+        odbFrame = self.getFrame(odbStepPositionKey, odbFramePosition)
+
+        # Access the repository of FieldOutput objects, and then get just the one identified by 'fieldOutputKey'
+        print 'Looking for the field output data: ', fieldOutputKey
+        odbFields = odbFrame.fieldOutputs[fieldOutputKey] 
+        print 'Found desired type of field output data.'
+        print ''
+
+        # Whole part instances are read with getSubset(region=instance), without creating a set
+        regionInstNames = self.getRegionInstanceNames(odbSetStr)
+        if regionInstNames is not None:
+            if len(regionInstNames) == 0:
+                return
+            if fieldPosKey not in [INTEGRATION_POINT, CENTROID]:
+                print 'ERROR: Use INTEGRATION_POINT or CENTROID for the position of the field output, not ', fieldPosKey
+                return
+            allElemVals, allElemInstNames = self.getRegionIntegPntFieldValues(odbFrame, odbFields, regionInstNames, fieldPosKey)
+            if allElemVals is None:
+                print 'ERROR: Subfield is empty! Script is aborting ...'
+                return
+            integPntResults = self.finishIntegPntFieldValues(allElemVals, allElemInstNames, list(odbFields.componentLabels), invariantKeys, csysSpec)
+            if integPntResults is None:
+                return
+            addRunCount('elements', len(allElemInstNames))
+            print 'getIntegPntFieldValuesFromSet(...) ended successfully!\n'
+            return integPntResults
 
-        if doubleVals:
-            numDataFieldVals = 4 + len(elemFieldValArr[0].dataDouble) # Element Label, X, Y, Z, Field Values ...
+        # Get the subset of the full field by using the element set object (created only once per session for set files)
+        odbSetObj = self.getSet(odbSetStr, 'ELEMENT')
+        if odbSetObj is None:
+            return
+
+        with StageTimer('getSubset'):
+            odbSubFields = odbFields.getSubset(region=odbSetObj, position=fieldPosKey)
+            elemFieldValArr = odbSubFields.values # An array of FieldValue objects
+        if len(elemFieldValArr) != 0:
+            print 'Found the subfield for values of ', fieldOutputKey, ' at position: ', fieldPosKey, '\n'
         else:
-            numDataFieldVals = 4 + len(elemFieldValArr[0].data)
+            print 'ERROR: Subfield is empty! Script is aborting ...'
+            return
 
-        allElemInstNames = []
+        doubleVals = True # Need the right precision of the field values to access them correctly later
+        if elemFieldValArr[0].precision == SINGLE_PRECISION:
+            doubleVals = False
+
+        # Explore to see if the COORD is available in the output for integration points. Makes my life easier if it is
+        coordFieldPresent = False
+        for fieldIter in odbFrame.fieldOutputs.keys():
+            if fieldIter in ['COORD']:
+                coordFields = odbFrame.fieldOutputs['COORD']
+                odbSubCoordFields = coordFields.getSubset(region=odbSetObj, position=fieldPosKey)
+                elemCoordFieldArr = odbSubCoordFields.values
+                if len(elemCoordFieldArr) != 0:
+                    coordFieldPresent = True
+                break
+
+        # Shit hits the fan from here on out...
+        odbMeshElemArr = odbSetObj.elements
+        odbSetInstNames = odbSetObj.instanceNames
+        singleInstanceSet = False 
+        if odbSetInstNames is None: # Implies the element set spans a single instance or part, and will be list of OdbMeshElement objects
+            singleInstanceSet = True
+            # For consistency with/without multiple part instances, I want to odbMeshElemArr to always be a 2D list
+            odbMeshElemArr = [odbMeshElemArr] 
+
+        print 'Extracting the field value outputs ...'
+        if fieldPosKey == CENTROID:
+
+            if singleInstanceSet: # Calculate the number instances
+                numInstances = 1
+            else:
+                numInstances = len(odbSetInstNames)
 
-        # Loop through all of the field values (multiple for each element, so it gets really messy)
-        curFieldObjIndex = 0 # Index in the entire field value array (includes all integration points for all elements)
-        curUniqueElemIndex = 0 # Keeps track of the number of (unique) elements encountered
-        integPntIndex = 0 # Integration point index for the current element
-        foundNewElem = True # Will be True if next field value object corresponds to a new element object
-        for curFieldValObj in elemFieldValArr:
+            # Same as number of OdbMeshElements in odbSetObj.elements, but I don't have to go through the part instances with For-loops
+            numElements = len(elemFieldValArr) 
+            numElemOutPnts = 1 # Centroid so only one location within the element being queried
 
-            if foundNewElem:
-                foundNewElem = False
-                integPntIndex = 0
+            if doubleVals:
+                numDataFieldVals = 4 + len(elemFieldValArr[0].dataDouble) # Element Label, X, Y, Z, Field Values ...
+            else:
+                numDataFieldVals = 4 + len(elemFieldValArr[0].data)
+
+            # Can now instantiate the list of data that will be organized by part instances later and returned
+            allElemVals = np.zeros((numElements,numElemOutPnts,numDataFieldVals))
+            allElemInstNames = []
 
+            # Loop through all of the field values (one for each element for the CENTROID case)
+            curFieldObjIndex = 0
+            for curFieldValObj in elemFieldValArr: 
                 curElemInstObj = curFieldValObj.instance
                 if curElemInstObj is None:
                     print 'ERROR: An element was found that does not belong to a part instance.'
                     return
                 curElemInstName = curElemInstObj.name
-                allElemInstNames.append(curElemInstName) # Instance names that match up with the element index in allElemVals
                 curElemLabel = curFieldValObj.elementLabel
                 # From the field values, get the actual element object
                 curElemObj = curElemInstObj.getElementFromLabel(curElemLabel)
@@ -1293,108 +3230,1357 @@ def getIntegPntFieldValuesFromSetBatch(odbFilePath_in, odbStepPositionKey_in, od
                     tempNodeConnSetLabels = []
                     for curNodeConnIndex in range(len(curElemNodeConn)):
                         tempNodeConnSetLabels.append( [ curElemNodeInstNames[curNodeConnIndex] ,[ curElemNodeConn[curNodeConnIndex] ] ] )
-                
-                if coordFieldPresent: # Grab coordinates of all of the integration points of the same element from the COORD field
-                    peekAheadNewElement = False
-                    tempElemIndex = curFieldObjIndex
-                    elemArrLen = len(elemCoordFieldArr)
-                    curIntegPntCoords = []
-                    numIntegPnts = 0
-                    while (not peekAheadNewElement):
-                        tempCoordValObj = elemCoordFieldArr[tempElemIndex]
-                        tempPeekElemLabel = tempCoordValObj.elementLabel
-                        tempPeekInstObj = tempCoordValObj.instance
-                        tempPeekInstName = tempPeekInstObj.name
-                        
-                        if ((tempPeekInstName == curElemInstName) and (tempPeekElemLabel == curElemLabel)):
-                            numIntegPnts = numIntegPnts + 1
-                            if doubleVals:
-                                curCoordFieldData = tempCoordValObj.dataDouble # Tuple of floats
-                            else:
-                                curCoordFieldData = tempCoordValObj.data
-                            curIntegPntCoords.append(list(curCoordFieldData))
-                        else:
-                            peekAheadNewElement = True
 
-                        tempElemIndex = tempElemIndex + 1
-                        if tempElemIndex >= elemArrLen:
-                            peekAheadNewElement = True
-
-                else: # Need to calculate the coordinates manually from shape functions
-                    tempNodeOdbSet = myAssembly.NodeSetFromNodeLabels('tempNodeSetName' + str(curFieldObjIndex), tempNodeConnSetLabels)
+                if coordFieldPresent: # Grab coordinates of all of the centroid point if the COORD field is available
+                    curIntegPntCoords = []
+                    curNumIntegPnts = 1
+                    tempCoordValObj = elemCoordFieldArr[curFieldObjIndex]
+                    if doubleVals:
+                        curCoordFieldData = tempCoordValObj.dataDouble # Tuple of floats
+                    else:
+                        curCoordFieldData = tempCoordValObj.data
+                    curIntegPntCoords.append(list(curCoordFieldData))
+
+                else: # Otherwise, need to calculate the centroid of the element manually with shape functions
+                    tempNodeOdbSet = myAssembly.NodeSetFromNodeLabels(self.getTempSetName('tempNodeSetName'), tempNodeConnSetLabels)
                     curElemNodalCoords, curElemNodalCoordsShape = calcDeformedNodeCoords(odbFrame, tempNodeOdbSet) # Calculate the current coordinates of the element's nodes
 
                     if len(curElemNodalCoordsShape) == 2: # Make a 3D list, even if only one part instance was used in the node set
                         curElemNodalCoords = [curElemNodalCoords]
 
-                    # Use these node coordinates and element type to calculate the integration point locations via hand-coded element shape functions
-                    curIntegPntCoords, numIntegPnts = sf.getCorrectShapeFunc(curElemType, 'INTEGRATION_POINT', curElemNodalCoords) # Returns a 2D List
-                
-                if curFieldObjIndex == 0: # First time through; need to allocate the output array to the right size
-                    numIntegPnts_sum = 0 # Need to peek ahead and determine all the element types and number of respective integration points
-                    numUniqueElems_sum = 0
-                    maxIntegPnts = 1
-                    tempFoundNewElem = True
-                    tempUniqueElemIndex = 0
-                    for tempElemFieldVal in elemFieldValArr:
-                        if tempFoundNewElem:
-                            tempFoundNewElem = False
-                            tempElemInstObj = tempElemFieldVal.instance
-                            tempElemObj = tempElemInstObj.getElementFromLabel(tempElemFieldVal.elementLabel)
-                            tempElemType = tempElemObj.type
-                            tempNumIntegPnts = sf.getCorrectNumIntegPnts(tempElemType, 'INTEGRATION_POINT')
-                            if tempNumIntegPnts > maxIntegPnts:
-                                maxIntegPnts = tempNumIntegPnts
-                            numIntegPnts_sum = numIntegPnts_sum + tempNumIntegPnts
-                            numUniqueElems_sum = numUniqueElems_sum + 1
-
-                        tempUniqueElemIndex = tempUniqueElemIndex + 1
-
-                        if tempUniqueElemIndex >= tempNumIntegPnts:
-                            tempFoundNewElem = True
-                            tempUniqueElemIndex = 0
-
-                    # len(elemFieldValArr) includes integration points (thanks Abaqus). So have to skip past integration points to get number of unique elements
-                    numElements = numUniqueElems_sum
-                    # Can now instantiate the list of data that will be organized by part instances later and returned
-                    allElemVals = np.zeros((numElements,maxIntegPnts,numDataFieldVals))
+                    # Use these node coordinates and element type to calculate the centroid via hand-coded element shape functions
+                    curIntegPntCoords, curNumIntegPnts = sf.getCorrectShapeFunc(curElemType, 'CENTROID', curElemNodalCoords) # Returns a 2D List
+
+                if doubleVals:
+                    curFieldData = curFieldValObj.dataDouble # Tuple of floats
+                else:
+                    curFieldData = curFieldValObj.data
+                if isinstance(curFieldData, float) or isinstance(curFieldData, int):
+                    curFieldData = [curFieldData]
+
+                # Have everything, but it needs to be indexed correctly for storage
+                for integPntIndex in range(numElemOutPnts):
+                    tempDataList = [curElemLabel] + curIntegPntCoords[integPntIndex] + list(curFieldData)
+                    for curTempValIndex in range(len(tempDataList)):
+                        allElemVals[curFieldObjIndex,integPntIndex,curTempValIndex] = tempDataList[curTempValIndex]
+
+                allElemInstNames.append(curElemInstName) # Instance names that match up with the element index in allElemVals
+                curFieldObjIndex = curFieldObjIndex + 1
+
+                if (not quietMode) and ((curFieldObjIndex % 2000) == 0):
+                    print '\nExtracted field outputs from ', curFieldObjIndex, ' elements ...\n'
+
+        elif fieldPosKey == INTEGRATION_POINT:
+            if singleInstanceSet: # Calculate the number instances
+                numInstances = 1
+            else:
+                numInstances = len(odbSetInstNames)
 
             if doubleVals:
-                curFieldData = curFieldValObj.dataDouble # Tuple of floats
+                numDataFieldVals = 4 + len(elemFieldValArr[0].dataDouble) # Element Label, X, Y, Z, Field Values ...
             else:
-                curFieldData = curFieldValObj.data
-            if isinstance(curFieldData, float) or isinstance(curFieldData, int):
-                curFieldData = [curFieldData]
-
-            tempDataList = [curElemLabel] + curIntegPntCoords[integPntIndex] + list(curFieldData)
-            for curTempValIndex in range(len(tempDataList)):
-                allElemVals[curUniqueElemIndex,integPntIndex,curTempValIndex] = tempDataList[curTempValIndex]
-
-            curFieldObjIndex = curFieldObjIndex + 1
-            integPntIndex = integPntIndex + 1
-
-            if integPntIndex >= numIntegPnts:
-                foundNewElem = True
-                integPntIndex = 0
-
-            if foundNewElem:
-                curUniqueElemIndex = curUniqueElemIndex + 1
-                if (curUniqueElemIndex % 2000) == 0:
-                    print '\nExtracted field outputs from ', curUniqueElemIndex, ' elements ...\n'
-
-    # Reshaping the element data into a 4D list by, [instance][element][integ pnt][field data]
-    allElemValsList = allElemVals.tolist()
-    elemInstNamesUnique = sorted(set(allElemInstNames)) # Returns as a list
-    allElemVals_out = [ [] for _ in range(len(elemInstNamesUnique))] # Syntatic magic
-    for curElemIndex in range(len(allElemInstNames)):
-        curInstName = allElemInstNames[curElemIndex]
-        curInstIndex = elemInstNamesUnique.index(curInstName)
-        allElemVals_out[curInstIndex].append(allElemValsList[curElemIndex]) # This shit just went to a jagged 4D list; good stuff
+                numDataFieldVals = 4 + len(elemFieldValArr[0].data)
+
+            allElemInstNames = []
+
+            # Loop through all of the field values (multiple for each element, so it gets really messy)
+            curFieldObjIndex = 0 # Index in the entire field value array (includes all integration points for all elements)
+            curUniqueElemIndex = 0 # Keeps track of the number of (unique) elements encountered
+            integPntIndex = 0 # Integration point index for the current element
+            foundNewElem = True # Will be True if next field value object corresponds to a new element object
+            for curFieldValObj in elemFieldValArr:
+
+                if foundNewElem:
+                    foundNewElem = False
+                    integPntIndex = 0
+
+                    curElemInstObj = curFieldValObj.instance
+                    if curElemInstObj is None:
+                        print 'ERROR: An element was found that does not belong to a part instance.'
+                        return
+                    curElemInstName = curElemInstObj.name
+                    allElemInstNames.append(curElemInstName) # Instance names that match up with the element index in allElemVals
+                    curElemLabel = curFieldValObj.elementLabel
+                    # From the field values, get the actual element object
+                    curElemObj = curElemInstObj.getElementFromLabel(curElemLabel)
+
+                    # From the element object, get the node objects in order to calculate their current coordinates
+                    curElemType = curElemObj.type
+                    curElemNodeConn = curElemObj.connectivity # Node connectivity labels (i.e., integers) for the given element
+                    curElemNodeInstNames = curElemObj.instanceNames # list of instance names for each of the nodes that make up the element
+                    if curElemNodeInstNames is None:
+                        print 'ERROR: Elements were found that are made up of nodes which do not belong to a part instance.'
+                        return
+                    elif len(set(curElemNodeInstNames)) == 1: # Implies all nodes belong to one part instance (just one unique name)
+                        tempNodeConnSetLabels = [ [curElemNodeInstNames[0],curElemNodeConn] ]
+                    else: # Shitty - multiple part instances involved in the nodes that define this element. WHY?!
+                        tempNodeConnSetLabels = []
+                        for curNodeConnIndex in range(len(curElemNodeConn)):
+                            tempNodeConnSetLabels.append( [ curElemNodeInstNames[curNodeConnIndex] ,[ curElemNodeConn[curNodeConnIndex] ] ] )
+
+                    if coordFieldPresent: # Grab coordinates of all of the integration points of the same element from the COORD field
+                        peekAheadNewElement = False
+                        tempElemIndex = curFieldObjIndex
+                        elemArrLen = len(elemCoordFieldArr)
+                        curIntegPntCoords = []
+                        numIntegPnts = 0
+                        while (not peekAheadNewElement):
+                            tempCoordValObj = elemCoordFieldArr[tempElemIndex]
+                            tempPeekElemLabel = tempCoordValObj.elementLabel
+                            tempPeekInstObj = tempCoordValObj.instance
+                            tempPeekInstName = tempPeekInstObj.name
+
+                            if ((tempPeekInstName == curElemInstName) and (tempPeekElemLabel == curElemLabel)):
+                                numIntegPnts = numIntegPnts + 1
+                                if doubleVals:
+                                    curCoordFieldData = tempCoordValObj.dataDouble # Tuple of floats
+                                else:
+                                    curCoordFieldData = tempCoordValObj.data
+                                curIntegPntCoords.append(list(curCoordFieldData))
+                            else:
+                                peekAheadNewElement = True
+
+                            tempElemIndex = tempElemIndex + 1
+                            if tempElemIndex >= elemArrLen:
+                                peekAheadNewElement = True
+
+                    else: # Need to calculate the coordinates manually from shape functions
+                        tempNodeOdbSet = myAssembly.NodeSetFromNodeLabels(self.getTempSetName('tempNodeSetName'), tempNodeConnSetLabels)
+                        curElemNodalCoords, curElemNodalCoordsShape = calcDeformedNodeCoords(odbFrame, tempNodeOdbSet) # Calculate the current coordinates of the element's nodes
+
+                        if len(curElemNodalCoordsShape) == 2: # Make a 3D list, even if only one part instance was used in the node set
+                            curElemNodalCoords = [curElemNodalCoords]
+
+                        # Use these node coordinates and element type to calculate the integration point locations via hand-coded element shape functions
+                        curIntegPntCoords, numIntegPnts = sf.getCorrectShapeFunc(curElemType, 'INTEGRATION_POINT', curElemNodalCoords) # Returns a 2D List
+
+                    if curFieldObjIndex == 0: # First time through; need to allocate the output array to the right size
+                        numIntegPnts_sum = 0 # Need to peek ahead and determine all the element types and number of respective integration points
+                        numUniqueElems_sum = 0
+                        maxIntegPnts = 1
+                        tempFoundNewElem = True
+                        tempUniqueElemIndex = 0
+                        for tempElemFieldVal in elemFieldValArr:
+                            if tempFoundNewElem:
+                                tempFoundNewElem = False
+                                tempElemInstObj = tempElemFieldVal.instance
+                                tempElemObj = tempElemInstObj.getElementFromLabel(tempElemFieldVal.elementLabel)
+                                tempElemType = tempElemObj.type
+                                tempNumIntegPnts = sf.getCorrectNumIntegPnts(tempElemType, 'INTEGRATION_POINT')
+                                if tempNumIntegPnts > maxIntegPnts:
+                                    maxIntegPnts = tempNumIntegPnts
+                                numIntegPnts_sum = numIntegPnts_sum + tempNumIntegPnts
+                                numUniqueElems_sum = numUniqueElems_sum + 1
+
+                            tempUniqueElemIndex = tempUniqueElemIndex + 1
+
+                            if tempUniqueElemIndex >= tempNumIntegPnts:
+                                tempFoundNewElem = True
+                                tempUniqueElemIndex = 0
+
+                        # len(elemFieldValArr) includes integration points (thanks Abaqus). So have to skip past integration points to get number of unique elements
+                        numElements = numUniqueElems_sum
+                        # Can now instantiate the list of data that will be organized by part instances later and returned
+                        allElemVals = np.zeros((numElements,maxIntegPnts,numDataFieldVals))
 
-    odb.close()
-    print 'getNodeFieldValuesFromSetBatch(...) ended successfully!\n'
-    return (allElemVals_out, elemInstNamesUnique);
-# ----> END getIntegPntFieldValuesFromSetBatch(...) <----
+                if doubleVals:
+                    curFieldData = curFieldValObj.dataDouble # Tuple of floats
+                else:
+                    curFieldData = curFieldValObj.data
+                if isinstance(curFieldData, float) or isinstance(curFieldData, int):
+                    curFieldData = [curFieldData]
+
+                tempDataList = [curElemLabel] + curIntegPntCoords[integPntIndex] + list(curFieldData)
+                for curTempValIndex in range(len(tempDataList)):
+                    allElemVals[curUniqueElemIndex,integPntIndex,curTempValIndex] = tempDataList[curTempValIndex]
+
+                curFieldObjIndex = curFieldObjIndex + 1
+                integPntIndex = integPntIndex + 1
+
+                if integPntIndex >= numIntegPnts:
+                    foundNewElem = True
+                    integPntIndex = 0
+
+                if foundNewElem:
+                    curUniqueElemIndex = curUniqueElemIndex + 1
+                    if (not quietMode) and ((curUniqueElemIndex % 2000) == 0):
+                        print '\nExtracted field outputs from ', curUniqueElemIndex, ' elements ...\n'
+
+        # Reshaping the element data into a 4D list by, [instance][element][integ pnt][field data]
+        integPntResults = self.finishIntegPntFieldValues(allElemVals, allElemInstNames, list(odbFields.componentLabels), invariantKeys, csysSpec)
+        if integPntResults is None:
+            return
+        addRunCount('elements', len(allElemInstNames))
+
+        print 'getIntegPntFieldValuesFromSet(...) ended successfully!\n'
+        return integPntResults
+    # ----> END getIntegPntFieldValuesFromSet(...) <----
+
+    # Rotates the components of the rows of getNodeFieldValuesFromSet(...) into a local coordinate system and appends the
+    # tensor invariants, if requested. Returns the new rows, or None if either step failed.
+    def finishNodeFieldValues(self, nodeFieldValsIn, singleInstanceSetIn, componentLabelsIn, invariantKeysIn, csysSpecIn):
+        nodeFieldVals = nodeFieldValsIn
+        if csysSpecIn is not None:
+            csysObj = getCsysFromSpec(self.odb, csysSpecIn)
+            if csysObj is None:
+                return
+            with StageTimer('transform'):
+                if singleInstanceSetIn:
+                    nodeFieldVals = transformFieldValRows(nodeFieldVals, componentLabelsIn, csysObj)
+                else:
+                    nodeFieldVals = [transformFieldValRows(curInstVals, componentLabelsIn, csysObj) for curInstVals in nodeFieldVals]
+            if (nodeFieldVals is None) or (None in nodeFieldVals):
+                return
+
+        if invariantKeysIn is not None:
+            with StageTimer('invariants'):
+                if singleInstanceSetIn:
+                    nodeFieldVals = appendTensorInvariantCols(nodeFieldVals, componentLabelsIn, invariantKeysIn)
+                else:
+                    nodeFieldVals = [appendTensorInvariantCols(curInstVals, componentLabelsIn, invariantKeysIn) for curInstVals in nodeFieldVals]
+            if (nodeFieldVals is None) or (None in nodeFieldVals):
+                return
+        return nodeFieldVals
+
+    # Rotates the components of np.array[nElems,nPnts,4+nComps] of getIntegPntFieldValuesFromSet(...) into a local
+    # coordinate system, appends the tensor invariants (if requested), and splits the elements by part instance into the
+    # returned (4D list, sorted instance names). Returns None if the transformation or the invariants failed.
+    def finishIntegPntFieldValues(self, allElemValsIn, allElemInstNamesIn, componentLabelsIn, invariantKeysIn, csysSpecIn):
+        allElemVals = allElemValsIn
+        allElemInstNames = allElemInstNamesIn
+        if csysSpecIn is not None: # Rotate the components of all of the integration points at once
+            csysObj = getCsysFromSpec(self.odb, csysSpecIn)
+            if csysObj is None:
+                return
+            with StageTimer('transform'):
+                numElemRows, numElemPnts, numDataCols = allElemVals.shape
+                localComps = tf.transformFieldComponents(allElemVals[:,:,4:].reshape(numElemRows*numElemPnts, numDataCols - 4), componentLabelsIn,
+                                                         csysObj, allElemVals[:,:,1:4].reshape(numElemRows*numElemPnts, 3))
+                if localComps is None:
+                    return
+                allElemVals[:,:,4:] = localComps.reshape(numElemRows, numElemPnts, numDataCols - 4)
+
+        if invariantKeysIn is not None: # All of the integration points of all of the elements at once
+            with StageTimer('invariants'):
+                numElemRows, numElemPnts, numDataCols = allElemVals.shape
+                invariantVals = tf.calcTensorInvariants(allElemVals[:,:,4:].reshape(numElemRows*numElemPnts, numDataCols - 4), componentLabelsIn, invariantKeysIn)
+                if invariantVals is None:
+                    return
+                allElemVals = np.concatenate((allElemVals, invariantVals.reshape(numElemRows, numElemPnts, -1)), axis=2)
+
+        with StageTimer('reshape'):
+            allElemValsList = allElemVals.tolist()
+            elemInstNamesUnique = sorted(set(allElemInstNames)) # Returns as a list
+            allElemVals_out = [ [] for _ in range(len(elemInstNamesUnique))] # Syntatic magic
+            for curElemIndex in range(len(allElemInstNames)):
+                curInstName = allElemInstNames[curElemIndex]
+                curInstIndex = elemInstNamesUnique.index(curInstName)
+                allElemVals_out[curInstIndex].append(allElemValsList[curElemIndex]) # This shit just went to a jagged 4D list; good stuff
+        return (allElemVals_out, elemInstNamesUnique)
+
+    # Returns the names of the part instances of a region string: 'INSTANCE:<name>' for one part instance, or 'ASSEMBLY'
+    # for all of them. Returns None if odbSetStrIn is not a region string (i.e., it is a set), and an empty list if the
+    # part instance does not exist.
+    def getRegionInstanceNames(self, odbSetStrIn):
+        myInstances = self.odb.rootAssembly.instances
+        if odbSetStrIn.upper() == 'ASSEMBLY':
+            return sorted(myInstances.keys())
+        if not odbSetStrIn.upper().startswith('INSTANCE:'):
+            return None
+        odbInstName = odbSetStrIn[len('INSTANCE:'):].strip()
+        if odbInstName not in myInstances.keys():
+            print 'ERROR: Could not find the part instance ', odbInstName, '. Available: ', myInstances.keys()
+            return []
+        return [odbInstName]
+
+    # Extracts a NODAL or ELEMENT_NODAL field output of whole part instances (see getRegionInstanceNames(...)) with
+    # getSubset(region=instance), in the same format as getNodeFieldValuesFromSet(...). No set is created: the bulk data
+    # of each instance is placed directly into the order of its node array, together with the deformed coordinates. For
+    # ELEMENT_NODAL, the value of the first element that shares a node is used, like getNodeFieldValuesFromSet(...).
+    def getRegionNodeFieldValues(self, odbFrameIn, odbFieldsIn, regionInstNamesIn, fieldPosKeyIn):
+        myInstances = self.odb.rootAssembly.instances
+        instanceRows = []
+        instanceNames = []
+        for curInstName in regionInstNamesIn:
+            curInstObj = myInstances[curInstName]
+            bulkVals = getFieldBulkValues(odbFieldsIn, curInstObj, fieldPosKeyIn)
+            if bulkVals['data'].shape[0] == 0:
+                continue
+            curMeshArrs = self.getMeshArrays(curInstName)
+            numNodes = curMeshArrs['nodeLabels'].size
+            nodeIndices = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], bulkVals['nodeLabels'])
+            validMask = nodeIndices >= 0
+
+            # Assigned in reverse, so that the first row of a node (e.g., shared by several elements) is the one that is kept
+            nodeVals = np.zeros((numNodes, bulkVals['data'].shape[1]))
+            nodeVals[nodeIndices[validMask][::-1],:] = bulkVals['data'][validMask][::-1,:]
+            hasNodeVal = np.zeros(numNodes, dtype=bool)
+            hasNodeVal[nodeIndices[validMask]] = True
+
+            nodeCoords = calcDeformedNodeCoordsBulk(odbFrameIn, curInstObj, curMeshArrs)
+            with StageTimer('reshape'):
+                curRows = np.column_stack((nodeCoords[hasNodeVal,:], nodeVals[hasNodeVal,:])).tolist()
+                curLabels = curMeshArrs['nodeLabels'][hasNodeVal].tolist()
+                for rowIndex in range(len(curRows)):
+                    curRows[rowIndex].insert(0, curLabels[rowIndex])
+            instanceRows.append(curRows)
+            instanceNames.append(curInstName)
+            addRunCount('nodes', len(curRows))
+        return (instanceRows, instanceNames)
+
+    # Extracts an INTEGRATION_POINT or CENTROID field output of whole part instances (see getRegionInstanceNames(...))
+    # with getSubset(region=instance). Returns the np.array[nElems,nPnts,4+nComps] of [Element Label, X, Y, Z, Field
+    # Values ...] and the instance name of each element, as used by finishIntegPntFieldValues(...). The elements are in
+    # the order of the element array of each instance, and elements with fewer integration points are padded with zeros.
+    def getRegionIntegPntFieldValues(self, odbFrameIn, odbFieldsIn, regionInstNamesIn, fieldPosKeyIn):
+        myInstances = self.odb.rootAssembly.instances
+        coordFieldPresent = 'COORD' in odbFrameIn.fieldOutputs.keys()
+        instanceVals = []
+        allElemInstNames = []
+        for curInstName in regionInstNamesIn:
+            curInstObj = myInstances[curInstName]
+            bulkVals = getFieldBulkValues(odbFieldsIn, curInstObj, fieldPosKeyIn)
+            if bulkVals['data'].shape[0] == 0:
+                continue
+            curMeshArrs = self.getMeshArrays(curInstName)
+            elemIndices = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], bulkVals['elementLabels'])
+            integPnts = bulkVals['integPnts']
+            if fieldPosKeyIn == CENTROID:
+                integPnts = np.ones(integPnts.size, dtype=np.int64)
+            validMask = (elemIndices >= 0) & (integPnts >= 1)
+            uniqueElemIdx, elemRows = np.unique(elemIndices[validMask], return_inverse=True) # Sorted into the element array order
+            numElemPnts = int(np.max(integPnts[validMask]))
+
+            curElemVals = np.zeros((uniqueElemIdx.size, numElemPnts, 4 + bulkVals['data'].shape[1]))
+            curPntIdx = integPnts[validMask] - 1
+            curElemVals[elemRows,curPntIdx,0] = bulkVals['elementLabels'][validMask]
+            curElemVals[elemRows,curPntIdx,4:] = bulkVals['data'][validMask,:]
+
+            # Coordinates from COORD if it was written at every point, and otherwise from the element shape functions
+            hasCoords = False
+            if coordFieldPresent:
+                coordBulkVals = getFieldBulkValues(odbFrameIn.fieldOutputs['COORD'], curInstObj, fieldPosKeyIn)
+                coordElemIdx = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], coordBulkVals['elementLabels'])
+                coordIntegPnts = coordBulkVals['integPnts']
+                if fieldPosKeyIn == CENTROID:
+                    coordIntegPnts = np.ones(coordIntegPnts.size, dtype=np.int64)
+                coordElemRows = np.clip(np.searchsorted(uniqueElemIdx, coordElemIdx), 0, uniqueElemIdx.size - 1)
+                coordMask = (uniqueElemIdx[coordElemRows] == coordElemIdx) & (coordIntegPnts >= 1) & (coordIntegPnts <= numElemPnts)
+                hasPntCoords = np.zeros((uniqueElemIdx.size, numElemPnts), dtype=bool)
+                hasPntCoords[coordElemRows[coordMask],coordIntegPnts[coordMask]-1] = True
+                if np.all(hasPntCoords[elemRows,curPntIdx]):
+                    numCoordComps = min(3, coordBulkVals['data'].shape[1])
+                    curElemVals[coordElemRows[coordMask],coordIntegPnts[coordMask]-1,1:1+numCoordComps] = coordBulkVals['data'][coordMask,0:numCoordComps]
+                    hasCoords = True
+            if not hasCoords:
+                nodeCoords = calcDeformedNodeCoordsBulk(odbFrameIn, curInstObj, curMeshArrs)
+                curElemVals[elemRows,curPntIdx,1:4] = calcElemPntCoordsBulk(curMeshArrs, nodeCoords, bulkVals['elementLabels'][validMask], integPnts[validMask], fieldPosKeyIn)
+            instanceVals.append(curElemVals)
+            allElemInstNames.extend([curInstName]*uniqueElemIdx.size)
+
+        if len(instanceVals) == 0:
+            return (None, [])
+        maxElemPnts = max([curElemVals.shape[1] for curElemVals in instanceVals])
+        allElemVals = np.zeros((len(allElemInstNames), maxElemPnts, instanceVals[0].shape[2]))
+        elemIndex = 0
+        for curElemVals in instanceVals:
+            allElemVals[elemIndex:elemIndex+curElemVals.shape[0],0:curElemVals.shape[1],:] = curElemVals
+            elemIndex = elemIndex + curElemVals.shape[0]
+        return (allElemVals, allElemInstNames)
+
+    # See getExtrapolatedNodeFieldValuesBatch(...). The .odb file and the mesh tables are shared with the other calls.
+    def getExtrapolatedNodeFieldValues(self, odbStepPositionKey_in, odbFramePosition_in, odbSetStr_in, fieldOutputKey_in, averageNodes_in):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - See getIntegPntFieldValuesFromSetBatch(...)
+        odbFramePosition = odbFramePosition_in # int or float - See getIntegPntFieldValuesFromSetBatch(...)
+        odbSetStr = odbSetStr_in # str - Element set repository key or user-supplied element list file. See getIntegPntFieldValuesFromSetBatch(...)
+        fieldOutputKey = fieldOutputKey_in # str - The integration point field values output to extract (e.g., 'S' or 'PEEQ')
+        averageNodes = averageNodes_in # bool - Average the extrapolated values of elements that share a node if True
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        integPntResults = self.getIntegPntFieldValuesFromSet(odbStepPositionKey, odbFramePosition, odbSetStr, fieldOutputKey, INTEGRATION_POINT)
+        if integPntResults is None:
+            print 'Aborting ... the integration point field values could not be extracted.'
+            return
+        elemFieldVals, instanceNames = integPntResults
+
+        extrapResults = calcExtrapolatedNodeFieldVals(self.odb, elemFieldVals, instanceNames, averageNodes, self.meshArrsCache)
+        if extrapResults is None:
+            print 'Aborting ... the integration point field values could not be extrapolated to the nodes.'
+            return
+        nodeFieldVals_out, instanceNames_out = extrapResults
+
+        print 'getExtrapolatedNodeFieldValues(...) ended successfully!\n'
+        return (nodeFieldVals_out, instanceNames_out);
+    # ----> END getExtrapolatedNodeFieldValues(...) <----
+
+    # See probeFieldValuesBatch(...) for a description of the inputs and the returned arrays.
+    def probeFieldValues(self, odbStepPositionKey_in, odbFramePositions_in, probePnts_in, fieldOutputKey_in, fieldPosKey_in, odbInstanceNames_in=None, useDeformedCoords_in=True):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+        probePnts = np.atleast_2d(np.asarray(probePnts_in, dtype=float)) # array[nProbes,3] - Coordinates of the probe points
+        fieldOutputKey = fieldOutputKey_in # str - The field output to probe (e.g., 'V' or 'S')
+        fieldPosKey = fieldPosKey_in # SymbolicConstant - NODAL or INTEGRATION_POINT
+        odbInstanceNames = odbInstanceNames_in # list[str] - Part instances to search for the probes. None searches all of them.
+
+        # bool - If True, the probe points are located in the deformed configuration of each frame (fixed points in space).
+        #        If False, they are located in the undeformed configuration (i.e., they follow the material).
+        useDeformedCoords = useDeformedCoords_in
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        if fieldPosKey not in [NODAL, INTEGRATION_POINT]:
+            print 'ERROR: Probing is only supported for NODAL or INTEGRATION_POINT field outputs.'
+            return
+
+        myAssembly = self.odb.rootAssembly
+        odbStepObj = self.getStep(odbStepPositionKey)
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+        if odbInstanceNames is None:
+            odbInstanceNames = myAssembly.instances.keys()
+
+        print 'Building mesh tables for ', len(odbInstanceNames), ' part instance(s) ...'
+        allMeshArrs = {}
+        for curInstName in odbInstanceNames:
+            allMeshArrs[curInstName] = self.getMeshArrays(curInstName)
+
+        numProbes = probePnts.shape[0]
+        numFrames = len(odbFrames)
+        probeVals_out = None
+        frameTimes_out = np.zeros(numFrames)
+        probeElemLabels_out = np.zeros((numFrames,numProbes), dtype=np.int64)
+        probeInstNames_out = np.empty((numFrames,numProbes), dtype=object)
+        probeInstNames_out[:] = ''
+
+        for frameIndex in range(numFrames):
+            curFrame = odbFrames[frameIndex]
+            frameTimes_out[frameIndex] = curFrame.frameValue
+            odbFields = curFrame.fieldOutputs[fieldOutputKey]
+
+            for curInstName in odbInstanceNames:
+                unfoundProbes = np.where(probeElemLabels_out[frameIndex] == 0)[0]
+                if unfoundProbes.size == 0:
+                    break
+                curInstObj = myAssembly.instances[curInstName]
+                curMeshArrs = allMeshArrs[curInstName]
+                curNodeCoords = curMeshArrs['nodeCoords']
+                if useDeformedCoords:
+                    curNodeCoords = calcDeformedNodeCoordsBulk(curFrame, curInstObj, curMeshArrs)
+
+                elemIndices, natCoords = locateProbePntsInMesh(curMeshArrs, curNodeCoords, probePnts[unfoundProbes])
+                foundMask = elemIndices >= 0
+                if not np.any(foundMask):
+                    continue
+                foundProbes = unfoundProbes[foundMask]
+                foundElemIdx = elemIndices[foundMask]
+                foundNatCoords = natCoords[foundMask]
+
+                bulkVals = getFieldBulkValues(odbFields, curInstObj, fieldPosKey)
+                if bulkVals['data'].shape[0] == 0:
+                    continue
+                numComps = bulkVals['data'].shape[1]
+                if probeVals_out is None:
+                    probeVals_out = np.nan*np.ones((numFrames,numProbes,numComps))
+
+                if fieldPosKey == NODAL:
+                    nodeVals = np.nan*np.ones((curMeshArrs['nodeLabels'].size,numComps))
+                    nodeIndices = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], bulkVals['nodeLabels'])
+                    nodeVals[nodeIndices[nodeIndices >= 0]] = bulkVals['data'][nodeIndices >= 0]
+                else:
+                    # Gather the integration point values of just the elements that contain probes
+                    uniqueElemIdx, elemInv = np.unique(foundElemIdx, return_inverse=True)
+                    rowElemIdx = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], bulkVals['elementLabels'])
+                    rowLocalIdx = np.searchsorted(uniqueElemIdx, rowElemIdx)
+                    rowLocalIdx = np.clip(rowLocalIdx, 0, uniqueElemIdx.size - 1)
+                    rowMask = (uniqueElemIdx[rowLocalIdx] == rowElemIdx) & (bulkVals['integPnts'] >= 1)
+                    maxIntegPnts = max(1, bulkVals['integPnts'].max())
+                    integPntVals = np.zeros((uniqueElemIdx.size,maxIntegPnts,numComps))
+                    integPntVals[rowLocalIdx[rowMask],bulkVals['integPnts'][rowMask]-1] = bulkVals['data'][rowMask]
+
+                foundElemTypes = curMeshArrs['elemTypes'][foundElemIdx]
+                for curType in np.unique(foundElemTypes): # One batched interpolation for each element type
+                    curTypeMask = foundElemTypes == curType
+                    curNumNodes = sf.getCorrectNodesNatCoord(curType).shape[0]
+                    curNatCoords = foundNatCoords[curTypeMask]
+                    if sf.getElemShapeFamily(curType) in ['QUAD8', 'QUAD20']:
+                        curNatCoords = curNatCoords[:,0:3]
+
+                    if fieldPosKey == NODAL:
+                        curConnLabels = curMeshArrs['elemConn'][foundElemIdx[curTypeMask],0:curNumNodes]
+                        curConnIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], curConnLabels)
+                        curElemNodeVals = nodeVals[curConnIdx]
+                    else:
+                        curElemNodeVals = sf.extrapIntegPntValsToNodes(curType, integPntVals[elemInv[curTypeMask]])
+
+                    probeVals_out[frameIndex,foundProbes[curTypeMask]] = sf.interpNodeValsBatch(curType, curNatCoords, curElemNodeVals)
+
+                probeElemLabels_out[frameIndex,foundProbes] = curMeshArrs['elemLabels'][foundElemIdx]
+                probeInstNames_out[frameIndex,foundProbes] = curInstName
+
+            print 'Probed frame ', frameIndex+1, '/', numFrames, '    (step time: ', frameTimes_out[frameIndex], ')'
+
+        if probeVals_out is None:
+            print 'WARNING: None of the probe points were found inside of the mesh.'
+            probeVals_out = np.nan*np.ones((numFrames,numProbes,1))
+
+        # probeVals_out - np.array[nFrames,nProbes,nComponents] of the interpolated field values (NaN where a probe was not found)
+        # frameTimes_out - np.array[nFrames] of the step times of the frames
+        # probeElemLabels_out - np.array[nFrames,nProbes] of the labels of the elements containing the probes (0 if not found)
+        # probeInstNames_out - np.array[nFrames,nProbes] of the part instance names of those elements
+        print 'probeFieldValues(...) ended successfully!\n'
+        return (probeVals_out, frameTimes_out, probeElemLabels_out, probeInstNames_out);
+    # ----> END probeFieldValues(...) <----
+
+    # See getSpatialSelectionLabelsBatch(...) for a description of the inputs and the returned list.
+    def getSpatialSelectionLabels(self, odbStepPositionKey_in, odbFramePosition_in, selectorSpec_in, odbSetType_in, odbInstanceNames_in=None, elemSelectMode_in='CENTROID'):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step (ignored if odbFramePosition is None)
+
+        # int or float - Frame index or step time of the deformed coordinates. Use None to select on the undeformed coordinates.
+        odbFramePosition = odbFramePosition_in
+
+        # tuple or list[tuple] - Geometric selector(s). See evalSelectorSpec(...) in abaqus_moser_spatial_functions.py. For
+        # 'NEAR_SURFACE', the surface can also be given as the repository key (str) of a surface or node set, in which case
+        # the distance to the (deformed) nodes of that set is used.
+        selectorSpec = selectorSpec_in
+
+        odbSetType = odbSetType_in # str - 'NODE' or 'ELEMENT'
+        odbInstanceNames = odbInstanceNames_in # list[str] - Part instances to select from. None uses all of them.
+
+        # str - How elements are selected: 'CENTROID' (the centroid is inside), 'ALL_NODES' (all nodes are inside), or 
+        #       'ANY_NODE' (at least one node is inside)
+        elemSelectMode = elemSelectMode_in.upper()
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        odb = self.odb
+        myAssembly = odb.rootAssembly
+        odbFrame = None
+        if odbFramePosition is not None:
+            odbFrame = self.getFrame(odbStepPositionKey, odbFramePosition)
+            print 'Selecting on the deformed coordinates at step time: ', odbFrame.frameValue
+        else:
+            print 'Selecting on the undeformed coordinates.'
+        if odbInstanceNames is None:
+            odbInstanceNames = myAssembly.instances.keys()
+
+        # Nodal coordinates of each instance, needed by the selection as well as any surface given by a repository key
+        allMeshArrs = {}
+        allNodeCoords = {}
+        for curInstName in myAssembly.instances.keys():
+            curInstObj = myAssembly.instances[curInstName]
+            allMeshArrs[curInstName] = self.getMeshArrays(curInstName)
+            if odbFrame is not None:
+                allNodeCoords[curInstName] = calcDeformedNodeCoordsBulk(odbFrame, curInstObj, allMeshArrs[curInstName])
+            else:
+                allNodeCoords[curInstName] = allMeshArrs[curInstName]['nodeCoords']
+
+        # Replace the repository keys of any 'NEAR_SURFACE' selectors with the coordinates of the set's nodes
+        selectorSpecList = selectorSpec
+        if not isinstance(selectorSpecList, list):
+            selectorSpecList = [selectorSpecList]
+        resolvedSpecList = []
+        for curSpec in selectorSpecList:
+            if curSpec[0].upper().endswith('NEAR_SURFACE') and isinstance(curSpec[1], str):
+                surfSetObj = self.getSet(curSpec[1], 'ALL') # Element sets and surfaces also have nodes
+                if surfSetObj is None:
+                    print 'Aborting ... could not find the surface or node set, ', curSpec[1]
+                    return
+                surfPnts = [np.zeros((0,3))]
+                for curInstName, curNodeArr in setf.getOdbSetInstanceArrays(surfSetObj, 'NODE'): # Names from OdbSet.instanceNames
+                    if curInstName not in allMeshArrs:
+                        continue # Assembly-level nodes, e.g. reference points, are not part of an instance mesh
+                    curMeshArrs = allMeshArrs[curInstName]
+                    curLabels = np.array([curNode.label for curNode in curNodeArr], dtype=np.int64)
+                    curNodeIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], curLabels)
+                    surfPnts.append(allNodeCoords[curInstName][curNodeIdx[curNodeIdx >= 0]])
+                resolvedSpecList.append((curSpec[0], np.vstack(surfPnts)) + tuple(curSpec[2:]))
+            else:
+                resolvedSpecList.append(curSpec)
+
+        odbLabelList_out = []
+        for curInstName in odbInstanceNames:
+            curMeshArrs = allMeshArrs[curInstName]
+            curNodeCoords = allNodeCoords[curInstName]
+
+            if odbSetType.upper() == 'NODE':
+                selMask = sp.evalSelectorSpec(curNodeCoords, resolvedSpecList)
+                curLabels = curMeshArrs['nodeLabels']
+            elif odbSetType.upper() == 'ELEMENT':
+                curLabels = curMeshArrs['elemLabels']
+                connNodeIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], curMeshArrs['elemConn'])
+                connMask = connNodeIdx >= 0 # Connectivity is padded for elements with fewer nodes
+                if elemSelectMode == 'CENTROID':
+                    connCoords = curNodeCoords[np.where(connMask, connNodeIdx, 0)]*connMask[:,:,np.newaxis]
+                    elemCentroids = connCoords.sum(axis=1)/np.maximum(connMask.sum(axis=1), 1)[:,np.newaxis]
+                    selMask = sp.evalSelectorSpec(elemCentroids, resolvedSpecList)
+                else:
+                    nodeSelMask = sp.evalSelectorSpec(curNodeCoords, resolvedSpecList)
+                    connSelMask = nodeSelMask[np.where(connMask, connNodeIdx, 0)]
+                    if elemSelectMode == 'ALL_NODES':
+                        selMask = np.all(connSelMask | ~connMask, axis=1)
+                    else:
+                        selMask = np.any(connSelMask & connMask, axis=1)
+            else:
+                print 'ERROR: The set type must be either NODE or ELEMENT.'
+                return
+
+            odbLabelList_out.extend(sp.getOdbLabelListFromMask(selMask, curLabels, np.zeros(curLabels.size, dtype=np.int64), [curInstName]))
+            print 'Selected ', np.count_nonzero(selMask), ' of ', selMask.size, ' labels from part instance ', curInstName
+
+        print 'getSpatialSelectionLabels(...) ended successfully!\n'
+        return odbLabelList_out
+    # ----> END getSpatialSelectionLabels(...) <----
+
+    # See reduceFieldValuesBatch(...). The statistics of each frame are accumulated block by block, so the memory used
+    # only depends on the largest bulk data block, not on the number of frames or values.
+    def reduceFieldValues(self, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, componentKey_in=None, weightFieldKey_in=None, quantiles_in=(0.5, 0.99)):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+
+        # str - Repository key or user set file of the node set (NODAL) or element set (other positions), or None for the
+        #       entire model. See getSet(...).
+        odbSetStr = odbSetStr_in
+
+        fieldOutputKey = fieldOutputKey_in # str - The field output to reduce (e.g., 'S' or 'PEEQ')
+        fieldPosKey = fieldPosKey_in # SymbolicConstant - NODAL, INTEGRATION_POINT, CENTROID, or ELEMENT_NODAL
+
+        # The scalar that is reduced:
+        #   None - The first (or only) component of the field
+        #   str - A component label, e.g. 'S11'
+        #   SymbolicConstant - An invariant of FieldOutput.getScalarField(...), e.g. MISES or MAX_PRINCIPAL
+        componentKey = componentKey_in
+
+        # str - Field output with the weights of the weighted mean: 'IVOL' (integration point volumes) or 'EVOL'
+        #       (element volumes). None skips the weighted mean. Both need to be requested as field output in the analysis.
+        weightFieldKey = weightFieldKey_in
+
+        quantiles = list(quantiles_in) # list[float] - Quantiles to estimate (between 0 and 1)
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+
+        odbRegionObj = None
+        if odbSetStr is not None:
+            if fieldPosKey == NODAL:
+                odbRegionObj = self.getSet(odbSetStr, 'NODE')
+            else:
+                odbRegionObj = self.getSet(odbSetStr, 'ELEMENT')
+            if odbRegionObj is None:
+                return
+
+        print 'Reducing ', fieldOutputKey, ' over ', len(odbFrames), ' frame(s) ...'
+        frameStats_out = []
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            odbFields, compIndex = getFieldComponent(curFrame.fieldOutputs[fieldOutputKey], componentKey)
+            if odbFields is None:
+                return
+
+            with StageTimer('getSubset'):
+                odbSubFields = getFieldSubset(odbFields, odbRegionObj, fieldPosKey)
+                weightLookup = None
+                if weightFieldKey is not None:
+                    weightLookup = getFieldWeightLookup(curFrame.fieldOutputs[weightFieldKey], odbRegionObj)
+
+            fieldStats = rf.FieldStatsAccumulator(quantiles)
+            for curBlock in iterFieldBulkBlocks(odbSubFields):
+                if fieldPosKey == NODAL:
+                    curLabels = curBlock['nodeLabels']
+                else:
+                    curLabels = curBlock['elementLabels']
+                curWeights = None
+                if weightLookup is not None:
+                    curWeights = lookupFieldWeights(weightLookup, curBlock)
+                fieldStats.addBlock(curBlock['data'][:,compIndex], curBlock['instanceName'], curLabels, curBlock['integPnts'], curWeights)
+
+            curStats = fieldStats.getStats()
+            frameStats_out.append((curFrame.frameValue, curStats))
+            addRunCount('reducedValues', curStats['count'])
+            if not quietMode:
+                print 'Frame value ', curFrame.frameValue, ': min = ', curStats['min'], ', max = ', curStats['max'], ', mean = ', curStats['mean']
+
+        print 'reduceFieldValues(...) ended successfully!\n'
+        return frameStats_out
+    # ----> END reduceFieldValues(...) <----
+
+    # See getFieldEnvelopeBatch(...)
+    def getFieldEnvelope(self, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldOutputKey_in, fieldPosKey_in, componentKey_in=None):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+
+        # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...). EX: range(10, 51) for the frames 10 to 50.
+        odbFramePositions = odbFramePositions_in
+
+        # str - Repository key or user set file of the node set (NODAL) or element set (other positions), or None for the
+        #       entire model. See getSet(...).
+        odbSetStr = odbSetStr_in
+
+        fieldOutputKey = fieldOutputKey_in # str - The field output (e.g., 'S' or 'PEEQ')
+        fieldPosKey = fieldPosKey_in # SymbolicConstant - NODAL, INTEGRATION_POINT, CENTROID, or ELEMENT_NODAL
+        componentKey = componentKey_in # None, str, or SymbolicConstant - See getFieldComponent(...)
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+
+        odbRegionObj = None
+        if odbSetStr is not None:
+            if fieldPosKey == NODAL:
+                odbRegionObj = self.getSet(odbSetStr, 'NODE')
+            else:
+                odbRegionObj = self.getSet(odbSetStr, 'ELEMENT')
+            if odbRegionObj is None:
+                return
+
+        print 'Finding the envelope of ', fieldOutputKey, ' over ', len(odbFrames), ' frame(s) ...'
+        fieldEnvelope = rf.FieldEnvelopeAccumulator()
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            odbFields, compIndex = getFieldComponent(curFrame.fieldOutputs[fieldOutputKey], componentKey)
+            if odbFields is None:
+                return
+
+            with StageTimer('getSubset'):
+                odbSubFields = getFieldSubset(odbFields, odbRegionObj, fieldPosKey)
+            envFrameIndex = fieldEnvelope.addFrame(curFrame.frameValue)
+            for curBlock in iterFieldBulkBlocks(odbSubFields):
+                fieldEnvelope.addBlock(curBlock['data'][:,compIndex], curBlock['instanceName'], curBlock['nodeLabels'],
+                                       curBlock['elementLabels'], curBlock['integPnts'], envFrameIndex)
+                addRunCount('envelopeValues', curBlock['data'].shape[0])
+
+            if (not quietMode) and ((frameIndex % 100) == 0):
+                print 'Finished frame ', frameIndex+1, ' of ', len(odbFrames)
+
+        envelope_out = fieldEnvelope.getEnvelope()
+        print 'getFieldEnvelope(...) ended successfully!\n'
+        return envelope_out
+    # ----> END getFieldEnvelope(...) <----
+
+    # See getFieldValuesPlanBatch(...)
+    def getFieldValuesPlan(self, odbStepPositionKey_in, odbFramePositions_in, extractionRequests_in):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+        extractionRequests = extractionRequests_in # list[tuple] - (set, list of field output keys, position) for each request
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+        myAssembly = self.odb.rootAssembly
+
+        # ----> RESOLVE EACH SET ONCE, AND ONE UNION REGION FOR EACH POSITION <----
+        labelSets = [] # OdbLabelSet of each request
+        posGroups = {} # {position: {'requests': [request indices], 'fieldKeys': [keys], 'region': OdbSet}}
+        for curSetStr, curFieldKeys, curPosKey in extractionRequests:
+            if curPosKey not in [NODAL, INTEGRATION_POINT, CENTROID]:
+                print 'ERROR: Use NODAL, INTEGRATION_POINT, or CENTROID for the position of an extraction request, not ', curPosKey
+                return
+            curSetType = 'NODE'
+            if curPosKey != NODAL:
+                curSetType = 'ELEMENT'
+            odbSetObj = self.getSet(curSetStr, curSetType)
+            if odbSetObj is None:
+                return
+            labelSets.append(setf.buildLabelSetFromOdbSet(odbSetObj, curSetType))
+
+            curPosName = str(curPosKey)
+            if curPosName not in posGroups:
+                posGroups[curPosName] = {'posKey': curPosKey, 'setType': curSetType, 'requests': [], 'fieldKeys': [], 'regions': []}
+            posGroups[curPosName]['requests'].append(len(labelSets) - 1)
+            posGroups[curPosName]['regions'].append(odbSetObj)
+            for curFieldKey in curFieldKeys:
+                if curFieldKey not in posGroups[curPosName]['fieldKeys']:
+                    posGroups[curPosName]['fieldKeys'].append(curFieldKey)
+
+        for curPosName in posGroups.keys():
+            curGroup = posGroups[curPosName]
+            if len(set([curRegion.name for curRegion in curGroup['regions']])) == 1:
+                curGroup['region'] = curGroup['regions'][0]
+                continue
+            unionLabelSet = labelSets[curGroup['requests'][0]]
+            for requestIndex in curGroup['requests'][1:]:
+                unionLabelSet = unionLabelSet | labelSets[requestIndex]
+            if curGroup['setType'] == 'NODE':
+                curGroup['region'] = myAssembly.NodeSetFromNodeLabels(self.getTempSetName('planNodeSet'), unionLabelSet.toOdbLabelList())
+            else:
+                curGroup['region'] = myAssembly.ElementSetFromElementLabels(self.getTempSetName('planElemSet'), unionLabelSet.toOdbLabelList())
+
+        # ----> ONE PASS OVER THE FRAMES <----
+        planResults_out = [None]*len(extractionRequests)
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            frameFieldKeys = curFrame.fieldOutputs.keys()
+            nodeCoordsCache = {} # {instance name: deformed nodal coordinates of this frame}
+
+            for curPosName in sorted(posGroups.keys()):
+                curGroup = posGroups[curPosName]
+                curPosKey = curGroup['posKey']
+                groupBulkVals = {} # One getSubset(...) per field output for all of the requests of this position
+                for curFieldKey in curGroup['fieldKeys']:
+                    if curFieldKey not in frameFieldKeys:
+                        print 'ERROR: Could not find the field output ', curFieldKey, ' in the frame at ', curFrame.frameValue
+                        return
+                    groupBulkVals[curFieldKey] = getFieldBulkValues(curFrame.fieldOutputs[curFieldKey], curGroup['region'], curPosKey)
+                if (curPosKey != NODAL) and ('COORD' in frameFieldKeys) and ('COORD' not in groupBulkVals):
+                    groupBulkVals['COORD'] = getFieldBulkValues(curFrame.fieldOutputs['COORD'], curGroup['region'], curPosKey)
+
+                for requestIndex in curGroup['requests']:
+                    curFieldKeys = extractionRequests[requestIndex][1]
+                    if planResults_out[requestIndex] is None:
+                        planResults_out[requestIndex] = self.initPlanResult(labelSets[requestIndex], groupBulkVals, curFieldKeys, curPosKey, len(odbFrames))
+                    curResult = planResults_out[requestIndex]
+                    curResult['frameValues'][frameIndex] = curFrame.frameValue
+
+                    colIndex = 0
+                    for curFieldKey in curFieldKeys:
+                        numCols = joinPlanFieldValues(curResult, groupBulkVals[curFieldKey], curResult['values'][frameIndex], colIndex)
+                        colIndex = colIndex + numCols
+
+                    self.calcPlanCoords(curResult, curFrame, curPosKey, groupBulkVals.get('COORD'), nodeCoordsCache, curResult['coords'][frameIndex])
+
+            if not quietMode:
+                print 'Extracted the plan at frame value ', curFrame.frameValue, ' (', frameIndex+1, ' of ', len(odbFrames), ')'
+
+        for curResult in planResults_out:
+            if curResult is not None:
+                addRunCount('planValues', curResult['values'].size)
+        print 'getFieldValuesPlan(...) ended successfully!\n'
+        return planResults_out
+    # ----> END getFieldValuesPlan(...) <----
+
+    # Sets up the result of one request of getFieldValuesPlan(...), with its rows taken from the values of its first field
+    # output that are in its set
+    def initPlanResult(self, labelSetIn, groupBulkValsIn, fieldKeysIn, fieldPosKeyIn, numFramesIn):
+        refBulkVals = groupBulkValsIn[fieldKeysIn[0]]
+        if fieldPosKeyIn == NODAL:
+            refLabels = refBulkVals['nodeLabels']
+        else:
+            refLabels = refBulkVals['elementLabels']
+
+        planResult = {'instanceNames': [], 'fieldPosKey': fieldPosKeyIn}
+        instCodes = []
+        labels = []
+        integPnts = []
+        for curInstName in sorted(labelSetIn.getInstanceNames()):
+            if curInstName not in refBulkVals['instanceNames']:
+                continue
+            isCurRow = (refBulkVals['instCodes'] == refBulkVals['instanceNames'].index(curInstName))
+            isCurRow[isCurRow] = labelSetIn.contains(curInstName, refLabels[isCurRow])
+            curLabels = refLabels[isCurRow]
+            curIntegPnts = refBulkVals['integPnts'][isCurRow]
+            if fieldPosKeyIn == CENTROID:
+                curIntegPnts = np.zeros(curLabels.size, dtype=np.int64)
+            sortIdx = np.lexsort((curIntegPnts, curLabels))
+            planResult['instanceNames'].append(curInstName)
+            instCodes.append((len(planResult['instanceNames']) - 1)*np.ones(curLabels.size, dtype=np.int64))
+            labels.append(curLabels[sortIdx])
+            integPnts.append(curIntegPnts[sortIdx])
+
+        planResult['instCodes'] = np.concatenate([np.zeros(0, dtype=np.int64)] + instCodes)
+        planResult['labels'] = np.concatenate([np.zeros(0, dtype=np.int64)] + labels)
+        planResult['integPnts'] = np.concatenate([np.zeros(0, dtype=np.int64)] + integPnts)
+        planResult['columnLabels'] = []
+        for curFieldKey in fieldKeysIn:
+            curCompLabels = list(groupBulkValsIn[curFieldKey]['componentLabels'])
+            if len(curCompLabels) == 0:
+                curCompLabels = [curFieldKey]
+            planResult['columnLabels'].extend(curCompLabels)
+        numRows = planResult['labels'].size
+        planResult['frameValues'] = np.zeros(numFramesIn)
+        planResult['coords'] = np.zeros((numFramesIn, numRows, 3))
+        planResult['values'] = np.nan*np.ones((numFramesIn, numRows, len(planResult['columnLabels'])))
+        return planResult
+
+    # See getSurfaceFieldValuesBatch(...)
+    def getSurfaceFieldValues(self, odbStepPositionKey_in, odbFramePositions_in, odbSurfaceKey_in, fieldKeys_in):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+        odbSurfaceKey = odbSurfaceKey_in # str - Repository key of an element-based surface, e.g. 'rod1_surf'
+        fieldKeys = fieldKeys_in # list[str] - Keys of NODAL field outputs on the surface, e.g. ['CPRESS', 'CSHEAR1']. Can be empty.
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+        odbSurfaceObj = self.getSet(odbSurfaceKey, 'SURFACE')
+        if odbSurfaceObj is None:
+            return
+        facetArrs = getSurfaceFacetArrays(self.odb, odbSurfaceObj, self.meshArrsCache)
+        if facetArrs is None:
+            return
+        numFacets = facetArrs['elemLabels'].size
+        addRunCount('surfaceFacets', numFacets)
+        print 'Found ', numFacets, ' element faces on the surface ', odbSurfaceObj.name
+
+        surfResult_out = {'instanceNames': facetArrs['instanceNames'], 'instCodes': facetArrs['instCodes'],
+                          'elemLabels': facetArrs['elemLabels'], 'faceNums': facetArrs['faceNums'], 'columnLabels': [], 'columnFieldKeys': []}
+        surfResult_out['frameValues'] = np.zeros(len(odbFrames))
+        surfResult_out['centroids'] = np.zeros((len(odbFrames), numFacets, 3))
+        surfResult_out['normals'] = np.zeros((len(odbFrames), numFacets, 3))
+        surfResult_out['areas'] = np.zeros((len(odbFrames), numFacets))
+        valueCols = []
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            surfResult_out['frameValues'][frameIndex] = curFrame.frameValue
+
+            # ----> DEFORMED FACET GEOMETRY <----
+            for instIndex in range(len(facetArrs['instanceNames'])):
+                curInstName = facetArrs['instanceNames'][instIndex]
+                isCurFacet = facetArrs['instCodes'] == instIndex
+                curMeshArrs = self.getMeshArrays(curInstName)
+                curNodeCoords = calcDeformedNodeCoordsBulk(curFrame, self.odb.rootAssembly.instances[curInstName], curMeshArrs)
+                curCornerCoords = getFacetCornerCoords(curMeshArrs, curNodeCoords, facetArrs['faceNodeLabels'][isCurFacet], facetArrs['numCorners'][isCurFacet])
+                curCentroids, curNormals, curAreas = sp.calcFacetGeometry(curCornerCoords, facetArrs['numCorners'][isCurFacet])
+                surfResult_out['centroids'][frameIndex,isCurFacet,:] = curCentroids
+                surfResult_out['normals'][frameIndex,isCurFacet,:] = curNormals*facetArrs['normalSigns'][isCurFacet][:,np.newaxis]
+                surfResult_out['areas'][frameIndex,isCurFacet] = curAreas
+
+            # ----> AVERAGE THE NODAL FIELD VALUES ON EACH FACE <----
+            curFrameCols = []
+            for curFieldKey in fieldKeys:
+                if curFieldKey not in curFrame.fieldOutputs.keys():
+                    print 'ERROR: Could not find the field output ', curFieldKey, ' in the frame at ', curFrame.frameValue
+                    return
+                curBulkVals = getFieldBulkValues(curFrame.fieldOutputs[curFieldKey], odbSurfaceObj, NODAL)
+                curFrameCols.append(calcFacetFieldValues(facetArrs, curBulkVals))
+                if frameIndex == 0:
+                    curCompLabels = list(curBulkVals['componentLabels'])
+                    if len(curCompLabels) == 0:
+                        curCompLabels = [curFieldKey.split()[0]]
+                    surfResult_out['columnLabels'].extend(curCompLabels)
+                    surfResult_out['columnFieldKeys'].extend([curFieldKey]*len(curCompLabels))
+            if len(curFrameCols) == 0:
+                curFrameCols.append(np.zeros((numFacets, 0)))
+            valueCols.append(np.hstack(curFrameCols))
+
+            if not quietMode:
+                print 'Extracted the surface facets at frame value ', curFrame.frameValue, ' (', frameIndex+1, ' of ', len(odbFrames), ')'
+
+        if len(valueCols) == 0:
+            surfResult_out['values'] = np.zeros((0, numFacets, 0))
+        else:
+            surfResult_out['values'] = np.array(valueCols)
+        calcSurfaceResultants(surfResult_out)
+        print 'getSurfaceFieldValues(...) ended successfully!\n'
+        return surfResult_out
+    # ----> END getSurfaceFieldValues(...) <----
+
+    # See getNodeFieldResultantBatch(...)
+    def getNodeFieldResultant(self, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKey_in, momentPnt_in=None, useDeformedCoords_in=True, returnArray_in=False):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+        odbSetStr = odbSetStr_in # str - Repository key of a node set, or a user node set file
+        fieldKey = fieldKey_in # str - Key of a NODAL vector field output, e.g. 'RF' or 'CNORMF   ASSEMBLY_ROD1_SURF/ASSEMBLY_SHEET_SURF'
+        momentPnt = momentPnt_in # list[float] - [X, Y, Z] of the point to take the moments about. None to skip the moments.
+        useDeformedCoords = useDeformedCoords_in # bool - Take the moments with the deformed nodal coordinates if True
+        returnArray = returnArray_in # bool - If True, return np.array[nFrames,2] time series rather than lists of pairs
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+        odbSetObj = self.getSet(odbSetStr, 'NODE')
+        if odbSetObj is None:
+            return
+
+        frameValues = np.zeros(len(odbFrames))
+        forceSums = np.zeros((len(odbFrames), 3))
+        momentSums = np.zeros((len(odbFrames), 3))
+        compLabels = None
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            frameValues[frameIndex] = curFrame.frameValue
+            if fieldKey not in curFrame.fieldOutputs.keys():
+                print 'ERROR: Could not find the field output ', fieldKey, ' in the frame at ', curFrame.frameValue
+                return
+            bulkVals = getFieldBulkValues(curFrame.fieldOutputs[fieldKey], odbSetObj, NODAL)
+            if compLabels is None:
+                compLabels = list(bulkVals['componentLabels'])
+                if (len(compLabels) == 0) or (len(compLabels) > 3):
+                    print 'ERROR: The resultant needs a vector field output with up to 3 components. ', fieldKey, ' has ', compLabels
+                    return
+            numComps = bulkVals['data'].shape[1]
+            nodalForces = np.zeros((bulkVals['data'].shape[0], 3))
+            nodalForces[:,0:numComps] = bulkVals['data']
+            forceSums[frameIndex,:] = np.sum(nodalForces, axis=0)
+            addRunCount('nodes', nodalForces.shape[0])
+
+            if momentPnt is None:
+                continue
+            nodeCoords = np.zeros((nodalForces.shape[0], 3))
+            for instIndex in range(len(bulkVals['instanceNames'])): # The coordinates of the nodes of each instance at once
+                curInstName = bulkVals['instanceNames'][instIndex]
+                isCurNode = bulkVals['instCodes'] == instIndex
+                curMeshArrs = self.getMeshArrays(curInstName)
+                if not useDeformedCoords:
+                    curInstCoords = curMeshArrs['nodeCoords']
+                elif curInstName == '': # Assembly-level nodes, e.g. the reference point of a rigid body
+                    curInstCoords = self.calcAssemblyNodeCoords(curFrame, odbSetObj, curMeshArrs)
+                else:
+                    curInstCoords = calcDeformedNodeCoordsBulk(curFrame, self.odb.rootAssembly.instances[curInstName], curMeshArrs)
+                curNodeIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], bulkVals['nodeLabels'][isCurNode])
+                if np.any(curNodeIdx < 0):
+                    print 'ERROR: Could not find the coordinates of the nodes ', bulkVals['nodeLabels'][isCurNode][curNodeIdx < 0].tolist(), \
+                          ' of ', ('"' + curInstName + '"') if curInstName else 'the assembly', ' for the moments.'
+                    return
+                nodeCoords[isCurNode,:] = curInstCoords[curNodeIdx,:]
+            momentArms = nodeCoords - np.asarray(momentPnt, dtype=float).reshape(1,3)
+            momentSums[frameIndex,:] = np.sum(np.cross(momentArms, nodalForces), axis=0)
+
+        if compLabels is None:
+            print 'ERROR: No frames were found for the resultant of ', fieldKey
+            return
+        fieldRoot = fieldKey.split()[0]
+        resultantCols = [(compLabels[compIndex], forceSums[:,compIndex]) for compIndex in range(len(compLabels))]
+        resultantCols.append((fieldRoot + '_MAG', np.sqrt(np.sum(forceSums**2, axis=1))))
+        if momentPnt is not None:
+            resultantCols.extend([(fieldRoot + '_M' + str(compIndex+1), momentSums[:,compIndex]) for compIndex in range(3)])
+
+        resultantHists_out = {}
+        for curKey, curCol in resultantCols:
+            curHist = np.column_stack((frameValues, curCol))
+            if not returnArray:
+                curHist = curHist.tolist()
+            resultantHists_out[curKey] = curHist
+        print 'getNodeFieldResultant(...) ended successfully!\n'
+        return resultantHists_out
+    # ----> END getNodeFieldResultant(...) <----
+
+    # Deformed coordinates of the assembly-level nodes (see getMeshArrays('')) in a frame, in the order of
+    # meshArrsIn['nodeLabels']. Like calcDeformedNodeCoordsBulk(...), COORD is used if it is available and otherwise U is
+    # added to the initial coordinates, but the values are taken from a set (odbRegionObjIn) that contains the nodes,
+    # since the assembly is not a region of getSubset(...).
+    def calcAssemblyNodeCoords(self, odbFrameIn, odbRegionObjIn, meshArrsIn):
+        nodeCoords_out = meshArrsIn['nodeCoords'].copy()
+        frameFieldKeys = odbFrameIn.fieldOutputs.keys()
+        for curFieldKey in ['COORD', 'U']:
+            if curFieldKey not in frameFieldKeys:
+                continue
+            bulkVals = getFieldBulkValues(odbFrameIn.fieldOutputs[curFieldKey], odbRegionObjIn, NODAL)
+            if '' not in bulkVals['instanceNames']:
+                continue
+            isAsmNode = bulkVals['instCodes'] == bulkVals['instanceNames'].index('')
+            nodeIndices = getIndicesFromLabels(meshArrsIn['nodeLabels'], meshArrsIn['nodeSortIdx'], bulkVals['nodeLabels'][isAsmNode])
+            validMask = nodeIndices >= 0
+            numComps = min(3, bulkVals['data'].shape[1])
+            if curFieldKey == 'COORD':
+                nodeCoords_out[nodeIndices[validMask],0:numComps] = bulkVals['data'][isAsmNode][validMask,0:numComps]
+            else:
+                nodeCoords_out[nodeIndices[validMask],0:numComps] += bulkVals['data'][isAsmNode][validMask,0:numComps]
+            return nodeCoords_out
+        print 'WARNING: No COORD or displacement field, "U", was found for the assembly nodes. Using the undeformed coordinates.'
+        return nodeCoords_out
+
+    # See writeVtuFilesBatch(...)
+    def writeVtuFiles(self, odbStepPositionKey_in, odbFramePositions_in, vtuFilePathPrefix_in, nodeFieldKeys_in, elemFieldKeys_in, elemFieldPosKey_in=INTEGRATION_POINT, odbInstanceNames_in=None, useDeformedCoords_in=True):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+        vtuFilePathPrefix = vtuFilePathPrefix_in # str - Path of the files to write, without the frame number and extension
+        nodeFieldKeys = nodeFieldKeys_in # list[str] - NODAL field outputs to write as point data, e.g. ['U', 'V']
+        elemFieldKeys = elemFieldKeys_in # list[str] - Element field outputs to write as cell data, e.g. ['S', 'PEEQ']
+        elemFieldPosKey = elemFieldPosKey_in # SymbolicConstant - CENTROID, or INTEGRATION_POINT to average the integration points
+        odbInstanceNames = odbInstanceNames_in # list[str] - Part instances to write. None writes all of them.
+        useDeformedCoords = useDeformedCoords_in # bool - Write the deformed coordinates of each frame if True
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        if elemFieldPosKey not in [CENTROID, INTEGRATION_POINT]:
+            print 'ERROR: Use CENTROID or INTEGRATION_POINT for the cell data, not ', elemFieldPosKey
+            return
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+        myInstances = self.odb.rootAssembly.instances
+        if odbInstanceNames is None:
+            odbInstanceNames = sorted(myInstances.keys())
+
+        # ----> VTK CELLS OF ALL OF THE PART INSTANCES (ONCE) <----
+        vtkMesh = self.getVtkMeshArrays(odbInstanceNames)
+        if vtkMesh is None:
+            return
+        numPnts = vtkMesh['pntLabels'].size
+        numCells = vtkMesh['cellLabels'].size
+        print 'Writing ', numPnts, ' points and ', numCells, ' cells for ', len(odbFrames), ' frame(s) ...'
+
+        vtuFilePaths_out = []
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            frameFieldKeys = curFrame.fieldOutputs.keys()
+
+            pntCoords = np.zeros((numPnts, 3))
+            for instIndex in range(len(vtkMesh['instanceNames'])):
+                curInstName = vtkMesh['instanceNames'][instIndex]
+                curMeshArrs = self.getMeshArrays(curInstName)
+                curPntSlice = slice(vtkMesh['pntOffsets'][instIndex], vtkMesh['pntOffsets'][instIndex+1])
+                if useDeformedCoords:
+                    pntCoords[curPntSlice,:] = calcDeformedNodeCoordsBulk(curFrame, myInstances[curInstName], curMeshArrs)
+                else:
+                    pntCoords[curPntSlice,:] = curMeshArrs['nodeCoords']
+
+            pntData = [('NodeLabel', vtkMesh['pntLabels']), ('InstanceIndex', vtkMesh['pntInstCodes'].astype(np.int32))]
+            for curFieldKey in nodeFieldKeys:
+                if curFieldKey not in frameFieldKeys:
+                    print 'WARNING: The field output ', curFieldKey, ' is not in the frame at ', curFrame.frameValue, '. Skipping it.'
+                    continue
+                curFieldObj = curFrame.fieldOutputs[curFieldKey]
+                isSymTensor = (curFieldObj.type == TENSOR_3D_FULL) or vf.isSymTensorLabels(curFieldObj.componentLabels)
+                pntData.append((curFieldKey.split()[0], self.getVtkPntFieldValues(vtkMesh, curFieldObj), isSymTensor))
+
+            cellData = [('ElementLabel', vtkMesh['cellLabels']), ('InstanceIndex', vtkMesh['cellInstCodes'].astype(np.int32))]
+            for curFieldKey in elemFieldKeys:
+                if curFieldKey not in frameFieldKeys:
+                    print 'WARNING: The field output ', curFieldKey, ' is not in the frame at ', curFrame.frameValue, '. Skipping it.'
+                    continue
+                curFieldObj = curFrame.fieldOutputs[curFieldKey]
+                isSymTensor = (curFieldObj.type == TENSOR_3D_FULL) or vf.isSymTensorLabels(curFieldObj.componentLabels)
+                cellData.append((curFieldKey.split()[0], self.getVtkCellFieldValues(vtkMesh, curFieldObj, elemFieldPosKey), isSymTensor))
+
+            curVtuPath = vtuFilePathPrefix + '_' + ('%04d' % frameIndex) + '.vtu'
+            with StageTimer('write'):
+                numBytes = vf.writeVtuFile(curVtuPath, pntCoords, vtkMesh['cellConn'], vtkMesh['cellOffsets'], vtkMesh['cellTypes'], pntData, cellData)
+            addRunCount('bytesWritten', numBytes)
+            vtuFilePaths_out.append(curVtuPath)
+            if not quietMode:
+                print 'Wrote ', curVtuPath, ' (frame value ', curFrame.frameValue, ')'
+
+        with StageTimer('write'):
+            numBytes = vf.writePvdFile(vtuFilePathPrefix + '.pvd', vtuFilePaths_out, [curFrame.frameValue for curFrame in odbFrames])
+        addRunCount('bytesWritten', numBytes)
+        print 'writeVtuFiles(...) ended successfully!\n'
+        return vtuFilePaths_out
+    # ----> END writeVtuFiles(...) <----
+
+    # Builds the VTK points and cells of part instances for writeVtuFiles(...). The points are all of the nodes of each
+    # instance (in the order of getMeshArrays(...)), one instance after the other. Returns a dict with the VTK arrays
+    # ('cellConn', 'cellOffsets', 'cellTypes'), the labels and instance index of each point and cell, 'pntOffsets' (the
+    # first point of each instance), and 'cellElemIdx' (the element index in getMeshArrays(...) of each cell).
+    def getVtkMeshArrays(self, odbInstanceNamesIn):
+        vtkMesh = {'instanceNames': [], 'pntOffsets': [0]}
+        meshRows = {'pntLabels': [], 'pntInstCodes': [], 'cellConn': [], 'cellNumNodes': [], 'cellTypes': [],
+                    'cellLabels': [], 'cellInstCodes': [], 'cellElemIdx': []}
+        for curInstName in odbInstanceNamesIn:
+            curMeshArrs = self.getMeshArrays(curInstName)
+            instIndex = len(vtkMesh['instanceNames'])
+            pntOffset = vtkMesh['pntOffsets'][-1]
+            for curElemType in np.unique(curMeshArrs['elemTypes']): # All of the elements of one type at once
+                curCellType, curNumNodes = vf.getVtkCellType(curElemType)
+                if curCellType is None:
+                    print 'WARNING: Elements of type ', curElemType, ' in ', curInstName, ' are not supported as VTK cells. Skipping them.'
+                    continue
+                curElemIdx = np.nonzero(curMeshArrs['elemTypes'] == curElemType)[0]
+                curNodeIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], curMeshArrs['elemConn'][curElemIdx,0:curNumNodes])
+                isValidCell = np.all(curNodeIdx >= 0, axis=1)
+                meshRows['cellConn'].append((curNodeIdx[isValidCell,:] + pntOffset).ravel())
+                meshRows['cellNumNodes'].append(curNumNodes*np.ones(np.sum(isValidCell), dtype=np.int64))
+                meshRows['cellTypes'].append(curCellType*np.ones(np.sum(isValidCell), dtype=np.uint8))
+                meshRows['cellLabels'].append(curMeshArrs['elemLabels'][curElemIdx[isValidCell]])
+                meshRows['cellInstCodes'].append(instIndex*np.ones(np.sum(isValidCell), dtype=np.int64))
+                meshRows['cellElemIdx'].append(curElemIdx[isValidCell])
+            meshRows['pntLabels'].append(curMeshArrs['nodeLabels'])
+            meshRows['pntInstCodes'].append(instIndex*np.ones(curMeshArrs['nodeLabels'].size, dtype=np.int64))
+            vtkMesh['instanceNames'].append(curInstName)
+            vtkMesh['pntOffsets'].append(pntOffset + curMeshArrs['nodeLabels'].size)
+
+        if len(meshRows['cellTypes']) == 0:
+            print 'ERROR: None of the elements of the part instances ', odbInstanceNamesIn, ' can be written as VTK cells.'
+            return
+        for curKey in meshRows.keys():
+            vtkMesh[curKey] = np.concatenate(meshRows[curKey])
+        vtkMesh['cellOffsets'] = np.cumsum(vtkMesh['cellNumNodes'])
+        return vtkMesh
+
+    # Returns the values of a NODAL field output at the points of getVtkMeshArrays(...) as an np.array[nPnts,nComps]
+    # (NaN at the nodes without a value).
+    def getVtkPntFieldValues(self, vtkMeshIn, odbFieldsIn):
+        myInstances = self.odb.rootAssembly.instances
+        pntVals = None
+        for instIndex in range(len(vtkMeshIn['instanceNames'])):
+            curInstName = vtkMeshIn['instanceNames'][instIndex]
+            bulkVals = getFieldBulkValues(odbFieldsIn, myInstances[curInstName], NODAL)
+            if pntVals is None:
+                pntVals = np.nan*np.ones((vtkMeshIn['pntLabels'].size, max(1, len(bulkVals['componentLabels']))))
+            if bulkVals['data'].shape[0] == 0:
+                continue
+            curMeshArrs = self.getMeshArrays(curInstName)
+            nodeIndices = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], bulkVals['nodeLabels'])
+            validMask = nodeIndices >= 0
+            pntVals[vtkMeshIn['pntOffsets'][instIndex] + nodeIndices[validMask],:] = bulkVals['data'][validMask,:]
+        return pntVals
+
+    # Returns the values of an element field output on the cells of getVtkMeshArrays(...) as an np.array[nCells,nComps],
+    # either at the CENTROID or as the average of the INTEGRATION_POINT values of each element (NaN for cells without a
+    # value).
+    def getVtkCellFieldValues(self, vtkMeshIn, odbFieldsIn, elemFieldPosKeyIn):
+        myInstances = self.odb.rootAssembly.instances
+        cellVals = None
+        for instIndex in range(len(vtkMeshIn['instanceNames'])):
+            curInstName = vtkMeshIn['instanceNames'][instIndex]
+            bulkVals = getFieldBulkValues(odbFieldsIn, myInstances[curInstName], elemFieldPosKeyIn)
+            numComps = bulkVals['data'].shape[1]
+            if cellVals is None:
+                cellVals = np.nan*np.ones((vtkMeshIn['cellLabels'].size, max(1, numComps)))
+            if bulkVals['data'].shape[0] == 0:
+                continue
+
+            # Element index -> cell index of this instance, so that the rows are matched without a per-element search
+            curMeshArrs = self.getMeshArrays(curInstName)
+            isCurCell = np.nonzero(vtkMeshIn['cellInstCodes'] == instIndex)[0]
+            elemCellIdx = -np.ones(curMeshArrs['elemLabels'].size, dtype=np.int64)
+            elemCellIdx[vtkMeshIn['cellElemIdx'][isCurCell]] = isCurCell
+            rowElemIdx = getIndicesFromLabels(curMeshArrs['elemLabels'], curMeshArrs['elemSortIdx'], bulkVals['elementLabels'])
+            rowCellIdx = np.where(rowElemIdx >= 0, elemCellIdx[np.clip(rowElemIdx, 0, None)], -1)
+            validMask = rowCellIdx >= 0
+
+            numCellRows = np.bincount(rowCellIdx[validMask], minlength=cellVals.shape[0])
+            hasCellVal = numCellRows > 0
+            for compIndex in range(numComps):
+                compSums = np.bincount(rowCellIdx[validMask], weights=bulkVals['data'][validMask,compIndex], minlength=cellVals.shape[0])
+                cellVals[hasCellVal,compIndex] = compSums[hasCellVal]/numCellRows[hasCellVal]
+        return cellVals
+
+    # See writeFieldValuesToStoreBatch(...). The rows of each field are set up from its values in the first frame, like
+    # getFieldValuesPlan(...), and every frame is appended to the store as soon as it is extracted.
+    def writeFieldValuesToStore(self, odbStepPositionKey_in, odbFramePositions_in, odbSetStr_in, fieldKeys_in, fieldPosKey_in, h5FilePath_in, storeFieldPrefix_in='', writeCoords_in=True, compression_in='gzip'):
+
+        # ----> COPY FUNCTION INPUTS TO LOCAL VARIABLES <----
+        odbStepPositionKey = odbStepPositionKey_in # int or str - Index or repository key of the step
+        odbFramePositions = odbFramePositions_in # int, float, list, or 'ALL' - See getOdbFramesFromPositions(...)
+        odbSetStr = odbSetStr_in # str - Set repository key, user set file, 'INSTANCE:<name>', or 'ASSEMBLY'
+        fieldKeys = fieldKeys_in # list[str] - Field output keys, e.g. ['S', 'PEEQ']
+        fieldPosKey = fieldPosKey_in # SymbolicConstant - NODAL, INTEGRATION_POINT, or CENTROID
+        h5FilePath = h5FilePath_in # str - Path of the HDF5 file. It is created if it does not exist.
+        storeFieldPrefix = storeFieldPrefix_in # str - Prefix of the names of the fields in the store
+        writeCoords = writeCoords_in # bool - Also store the deformed coordinates of each frame if True
+        compression = compression_in # str - 'gzip', 'lzf', or None
+        # ----> END LOCAL VARIABLE DEFINITIONS <----
+
+        if fieldPosKey not in [NODAL, INTEGRATION_POINT, CENTROID]:
+            print 'ERROR: Use NODAL, INTEGRATION_POINT, or CENTROID for the position, not ', fieldPosKey
+            return
+        odbStepObj = self.getStep(odbStepPositionKey)
+        if odbStepObj is None:
+            return
+        odbFrames = getOdbFramesFromPositions(odbStepObj, odbFramePositions)
+
+        # ----> REGION AND ROWS OF THE SET (ONCE) <----
+        odbSetType = 'NODE'
+        meshLabelsKey = 'nodeLabels'
+        if fieldPosKey != NODAL:
+            odbSetType = 'ELEMENT'
+            meshLabelsKey = 'elemLabels'
+        regionInstNames = self.getRegionInstanceNames(odbSetStr)
+        if regionInstNames is None:
+            odbRegionObj = self.getSet(odbSetStr, odbSetType)
+            if odbRegionObj is None:
+                return
+            labelSet = setf.buildLabelSetFromOdbSet(odbRegionObj, odbSetType)
+        else:
+            if len(regionInstNames) == 0:
+                return
+            odbRegionObj = None # The whole model for 'ASSEMBLY'
+            if odbSetStr.upper() != 'ASSEMBLY':
+                odbRegionObj = self.odb.rootAssembly.instances[regionInstNames[0]]
+            labelSet = setf.OdbLabelSet(dict([(curInstName, self.getMeshArrays(curInstName)[meshLabelsKey]) for curInstName in regionInstNames]))
+
+        oldFileBytes = 0
+        if os.path.isfile(h5FilePath):
+            oldFileBytes = os.path.getsize(h5FilePath)
+        fieldStore = h5f.FieldResultsStore(h5FilePath)
+        if fieldStore.h5File is None:
+            return
+        storeResults = {} # {field output key: plan result dict of the rows of the field}
+        for frameIndex in range(len(odbFrames)):
+            curFrame = odbFrames[frameIndex]
+            frameFieldKeys = curFrame.fieldOutputs.keys()
+            nodeCoordsCache = {} # {instance name: deformed nodal coordinates of this frame}
+            coordBulkVals = None # COORD is only pulled if a frame is stored
+
+            for curFieldKey in fieldKeys:
+                if curFieldKey not in frameFieldKeys:
+                    print 'ERROR: Could not find the field output ', curFieldKey, ' in the frame at ', curFrame.frameValue
+                    fieldStore.close()
+                    return
+                storeFieldName = storeFieldPrefix + curFieldKey.split()[0]
+                if fieldStore.hasFrameValue(storeFieldName, curFrame.frameValue): # Before pulling the subset of the frame
+                    print 'WARNING: The frame at frame value ', curFrame.frameValue, ' is already in the field ', storeFieldName, '. Skipping it.'
+                    continue
+                bulkVals = getFieldBulkValues(curFrame.fieldOutputs[curFieldKey], odbRegionObj, fieldPosKey)
+                if curFieldKey not in storeResults:
+                    curResult = self.initPlanResult(labelSet, {curFieldKey: bulkVals}, [curFieldKey], fieldPosKey, 1)
+                    if not fieldStore.createField(storeFieldName, curResult['instanceNames'], curResult['instCodes'], curResult['labels'], curResult['integPnts'],
+                                                  curResult['columnLabels'], writeCoords, compression):
+                        fieldStore.close()
+                        return
+                    storeResults[curFieldKey] = curResult
+                    print 'Writing ', curResult['labels'].size, ' rows of ', curFieldKey, ' to the field ', storeFieldName, ' of ', h5FilePath
+                curResult = storeResults[curFieldKey]
+
+                curResult['values'][0,:,:] = np.nan
+                joinPlanFieldValues(curResult, bulkVals, curResult['values'][0], 0)
+                frameCoords = None
+                if writeCoords:
+                    if (coordBulkVals is None) and (fieldPosKey != NODAL) and ('COORD' in frameFieldKeys):
+                        coordBulkVals = getFieldBulkValues(curFrame.fieldOutputs['COORD'], odbRegionObj, fieldPosKey)
+                    self.calcPlanCoords(curResult, curFrame, fieldPosKey, coordBulkVals, nodeCoordsCache, curResult['coords'][0])
+                    frameCoords = curResult['coords'][0]
+                with StageTimer('write'):
+                    fieldStore.appendFrame(storeFieldName, curFrame.frameValue, curResult['values'][0], frameCoords)
+                addRunCount('storeValues', curResult['values'].size)
+
+            if not quietMode:
+                print 'Stored the frame at frame value ', curFrame.frameValue, ' (', frameIndex+1, ' of ', len(odbFrames), ')'
+
+        fieldStore.close()
+        addRunCount('bytesWritten', os.path.getsize(h5FilePath) - oldFileBytes)
+        print 'writeFieldValuesToStore(...) ended successfully!\n'
+        return [storeFieldPrefix + curFieldKey.split()[0] for curFieldKey in fieldKeys]
+    # ----> END writeFieldValuesToStore(...) <----
+
+    # Fills the coordinates (np.array[n,3]) of the rows of a result of getFieldValuesPlan(...) in one frame. Uses the
+    # COORD output if it is available at the position, and otherwise the deformed nodal coordinates (and shape functions).
+    def calcPlanCoords(self, planResultIn, odbFrameIn, fieldPosKeyIn, coordBulkValsIn, nodeCoordsCacheIn, coords_out):
+        if (coordBulkValsIn is not None) and (coordBulkValsIn['data'].shape[0] != 0):
+            coordCols = np.nan*np.ones((planResultIn['labels'].size, coordBulkValsIn['data'].shape[1]))
+            joinPlanFieldValues(planResultIn, coordBulkValsIn, coordCols, 0)
+            if not np.any(np.isnan(coordCols)):
+                coords_out[:,0:min(3, coordCols.shape[1])] = coordCols[:,0:3]
+                return
+
+        for instIndex in range(len(planResultIn['instanceNames'])):
+            curInstName = planResultIn['instanceNames'][instIndex]
+            isCurRow = planResultIn['instCodes'] == instIndex
+            curMeshArrs = self.getMeshArrays(curInstName)
+            if curInstName not in nodeCoordsCacheIn:
+                nodeCoordsCacheIn[curInstName] = calcDeformedNodeCoordsBulk(odbFrameIn, self.odb.rootAssembly.instances[curInstName], curMeshArrs)
+            curNodeCoords = nodeCoordsCacheIn[curInstName]
+            if fieldPosKeyIn == NODAL:
+                curNodeIdx = getIndicesFromLabels(curMeshArrs['nodeLabels'], curMeshArrs['nodeSortIdx'], planResultIn['labels'][isCurRow])
+                coords_out[isCurRow,:] = curNodeCoords[curNodeIdx,:]
+            else:
+                coords_out[isCurRow,:] = calcElemPntCoordsBulk(curMeshArrs, curNodeCoords, planResultIn['labels'][isCurRow], planResultIn['integPnts'][isCurRow], fieldPosKeyIn)
+# ----> END OdbSession <----
 
 
 # Creates a field output variable and permanently writes it to an Abaqus .odb file for each frame in a given step.
@@ -50,8 +50,8 @@ odbStepPositionKey_global = 'dynExplicit'
 # str - Repository key for the history region of interest
 odbHistRegKey_global = 'ElementSet  PIBATCH'
 #
-# list[str] - Repository keys for the history outputs of interest. All of these outputs will be outputted in the same file,
-#       and so they must all have the same output times (which also implies that they will be the same size). 
+# list[str] - Repository keys for the history outputs of interest. All of these outputs will be outputted in the same file.
+#       Outputs with different output times are aligned onto a common time grid (see the inputs below).
 odbHistOutKey_global = ['CFN1     ASSEMBLY_ROD1_SURF/ASSEMBLY_SHEETTOP_SURF', 'CFN2     ASSEMBLY_ROD1_SURF/ASSEMBLY_SHEETTOP_SURF', 'CFN3     ASSEMBLY_ROD1_SURF/ASSEMBLY_SHEETTOP_SURF',
                         'CFN1     ASSEMBLY_ROD2_SURF/ASSEMBLY_SHEETBOT_SURF', 'CFN2     ASSEMBLY_ROD2_SURF/ASSEMBLY_SHEETBOT_SURF', 'CFN3     ASSEMBLY_ROD2_SURF/ASSEMBLY_SHEETBOT_SURF']
 #
@@ -61,41 +61,34 @@ csvHistFilePath_global = './topBotTool_contactForces.csv'
 # list[str] - A list of strings to be written out first in the .csv file (as a header line)
 csvHistFileHeader_global = ['time [sec]', 'Rod1 Force X [N]', 'Rod1 Force Y [N]', 'Rod1 Force Z [N]', 'Rod2 Force X [N]', 'Rod2 Force Y [N]', 'Rod2 Force Z [N]']
 #
+# str - Common time grid of the output file, if the history outputs were not written at the same times
+#   'UNION'     - Every time at which any of the history outputs was written
+#   'REFERENCE' - The output times of one of the history outputs. histGridParam_global is its index (int).
+#   'UNIFORM'   - Evenly spaced times. histGridParam_global is the number of points (int) or the time increment (float).
+histGridMode_global = 'UNION'
+histGridParam_global = None
+#
+# str - 'LINEAR' interpolation between the output times, or 'STEP' to hold the last written value
+histInterpMode_global = 'LINEAR'
+#
+# tuple - Zero-phase low-pass filter for all of the history outputs, or None to write out the raw values. Examples:
+#   ('CFC', 60)                - SAE J211 channel frequency class 60 (time must be in seconds)
+#   ('BUTTERWORTH', 500.0, 4)  - 4th order Butterworth filter with a -3 dB cutoff frequency of 500 Hz (of the zero-phase filter)
+#   ('MOVING_AVERAGE', 11)     - Centered moving average over 11 output times (or a float for a window in seconds)
+histFilterSpec_global = None
+#
 # --------------------------------> END USER INPUTS <--------------------------------
 
 
 
-# Get all history outputs by iterating through the user-specified history output keys
-allHistData = [] # Will be a list of lists of pairs (a 3D list)
-for curHistOutKey in odbHistOutKey_global:
-    curHistData = []
-
-    # Some of my secret sauce going on here... 
-    # INPUTS - See above
-    #
-    # OUPUTS
-    # curHistData - curHistData is a 2D list for one of the history output keys with each column as: [step time, histOut1]
-    curHistData = am.getHistoryValuesBatch(odbFilePath_global, odbStepPositionKey_global, odbHistRegKey_global, curHistOutKey)
-    
-    allHistData.append(curHistData) # Make a 3D list by combining all of the 2D history lists
-
-allHistDataNP = np.array(allHistData) # numpy library is more powerful in manipulating n-dimensional arrays
+# Get all history outputs (opening the .odb file only once), and align them onto a common time grid
+#
+# OUTPUTS
+# allHist2DNP - np.array with each row as: [step time, histOut1, histOut2, ...]
+allHist2DNP = am.getAlignedHistoryValuesBatch(odbFilePath_global, odbStepPositionKey_global, odbHistRegKey_global, odbHistOutKey_global, 
+                                              histGridMode_global, histGridParam_global, histInterpMode_global, 'HOLD', histFilterSpec_global)
 print ''
-print 'Current shape of extracted data array: ', allHistDataNP.shape
-print 'Reshaping for file writing ...'
-
-# Reshape the list for the .csv file. 
-# Want to grab the output time once (as a column vector) and then combine all history variable outputs in subsequent columns.
-allHistTimesNP = allHistDataNP[0,:,0] # First column should contain the output times (assumed all history outputs have the same output times).
-allHistTimesNP = allHistTimesNP.flatten()
-for histIndex in range(allHistDataNP[:,0,0].size): # Loop through each of the history output lists 
-    curForceCol = allHistDataNP[histIndex,:,1]
-    curForceCol = curForceCol.flatten()
-
-    if histIndex == 0: 
-        allHist2DNP = np.column_stack((allHistTimesNP, curForceCol)) # Combine force column with output times for the first iteration
-    else:
-        allHist2DNP = np.column_stack((allHist2DNP, curForceCol)) # Continue adding history output columns to the matrix
+print 'Current shape of extracted data array: ', allHist2DNP.shape
 
 allHist2DOut = allHist2DNP.tolist() # Output will now be a 2D array with columns: [time, histOut1, histOut2, ...]
 
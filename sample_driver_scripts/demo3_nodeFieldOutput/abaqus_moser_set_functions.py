@@ -0,0 +1,276 @@
+import numpy as np
+
+
+# A set of node or element labels spread over one or more part instances. The labels of each instance are stored as a
+# sorted np.array of unique int64 values, so that unions, intersections, differences, and membership tests are done
+# with vectorized numpy operations rather than Python loops over lists of ints.
+#
+# Large sets that mostly consist of consecutive labels (e.g., all of the nodes of a meshed part) can be stored with
+# run-length range compression instead: each instance is then a pair of arrays, (starts, stops), of inclusive ranges.
+# The set operations work on either storage, and compress() / decompress() switch between them. If both sets of a union,
+# intersection, or difference are compressed, the operation works on the ranges directly (see combineLabelRanges(...)),
+# so its cost depends on the number of ranges rather than the number of labels.
+class OdbLabelSet(object):
+
+    # ----> INPUTS <----
+    # instLabelsIn - The labels of each instance, as either the list format of readCSVFileOdbSet(...) and
+    #                NodeSetFromNodeLabels(...), [['InstanceName1', [11,12,...]], ['InstanceName2', [21,22,...]]],
+    #                or a dict, {'InstanceName1': [11,12,...]}. The labels of an instance may be unsorted and repeated,
+    #                and an instance that appears more than once is merged. Use None for an empty set.
+    # useRangesIn - bool - If True, the labels are stored with range compression.
+    def __init__(self, instLabelsIn=None, useRangesIn=False):
+        self.instLabels = {} # dict{str: np.array[n]} - Sorted, unique labels of each instance (if not compressed)
+        self.instRanges = {} # dict{str: (np.array[r], np.array[r])} - Inclusive label ranges (if compressed)
+        self.useRanges = False
+
+        if instLabelsIn is None:
+            instLabelsIn = []
+        elif isinstance(instLabelsIn, dict):
+            instLabelsIn = [[curInstName, instLabelsIn[curInstName]] for curInstName in instLabelsIn.keys()]
+        for curInstName, curLabels in instLabelsIn:
+            curLabelsArr = np.asarray(curLabels, dtype=np.int64).ravel()
+            if curInstName in self.instLabels:
+                curLabelsArr = np.concatenate((self.instLabels[curInstName], curLabelsArr))
+            self.instLabels[curInstName] = np.unique(curLabelsArr)
+
+        if useRangesIn:
+            self.compress()
+
+    # Switches the storage to inclusive (start, stop) ranges of consecutive labels
+    def compress(self):
+        if self.useRanges:
+            return self
+        for curInstName in self.instLabels.keys():
+            self.instRanges[curInstName] = getLabelRanges(self.instLabels[curInstName])
+        self.instLabels = {}
+        self.useRanges = True
+        return self
+
+    # Switches the storage back to the sorted arrays of every label
+    def decompress(self):
+        if not self.useRanges:
+            return self
+        for curInstName in self.instRanges.keys():
+            curStarts, curStops = self.instRanges[curInstName]
+            self.instLabels[curInstName] = expandLabelRanges(curStarts, curStops)
+        self.instRanges = {}
+        self.useRanges = False
+        return self
+
+    # Returns the sorted list of instance names that contain at least one label
+    def getInstanceNames(self):
+        if self.useRanges:
+            return sorted([curInstName for curInstName in self.instRanges.keys() if self.instRanges[curInstName][0].size != 0])
+        return sorted([curInstName for curInstName in self.instLabels.keys() if self.instLabels[curInstName].size != 0])
+
+    # Returns the sorted np.array of labels of an instance (empty if the instance is not in the set)
+    def getLabels(self, instNameIn):
+        if self.useRanges:
+            if instNameIn not in self.instRanges:
+                return np.zeros(0, dtype=np.int64)
+            return expandLabelRanges(self.instRanges[instNameIn][0], self.instRanges[instNameIn][1])
+        if instNameIn not in self.instLabels:
+            return np.zeros(0, dtype=np.int64)
+        return self.instLabels[instNameIn]
+
+    # Returns the inclusive (starts, stops) ranges of consecutive labels of an instance
+    def getRanges(self, instNameIn):
+        if self.useRanges:
+            if instNameIn not in self.instRanges:
+                return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+            return self.instRanges[instNameIn]
+        return getLabelRanges(self.getLabels(instNameIn))
+
+    # Total number of labels over all instances
+    def __len__(self):
+        if self.useRanges:
+            return int(sum([np.sum(curStops - curStarts + 1) for curStarts, curStops in self.instRanges.values()]))
+        return int(sum([curLabels.size for curLabels in self.instLabels.values()]))
+
+    # Vectorized membership test. Returns an np.array[n] of bool for each of the labels in labelsIn.
+    def contains(self, instNameIn, labelsIn):
+        queryLabels = np.asarray(labelsIn, dtype=np.int64)
+        if self.useRanges:
+            curStarts, curStops = self.getRanges(instNameIn)
+            return isInLabelRanges(curStarts, curStops, queryLabels)
+
+        return isInSortedLabels(self.getLabels(instNameIn), queryLabels)
+
+    # Labels that are in either set. The result uses range compression only if both sets do.
+    def union(self, otherSetIn):
+        return self._combine(otherSetIn, 'UNION')
+
+    # Labels that are in both sets
+    def intersection(self, otherSetIn):
+        return self._combine(otherSetIn, 'INTERSECTION')
+
+    # Labels that are in this set, but not in otherSetIn
+    def difference(self, otherSetIn):
+        return self._combine(otherSetIn, 'DIFFERENCE')
+
+    def __or__(self, otherSetIn):
+        return self.union(otherSetIn)
+
+    def __and__(self, otherSetIn):
+        return self.intersection(otherSetIn)
+
+    def __sub__(self, otherSetIn):
+        return self.difference(otherSetIn)
+
+    def _combine(self, otherSetIn, operationIn):
+        allInstNames = set(self.getInstanceNames()) | set(otherSetIn.getInstanceNames())
+        if self.useRanges and otherSetIn.useRanges: # Never expand the ranges into labels
+            newSet_out = OdbLabelSet()
+            for curInstName in allInstNames:
+                newSet_out.instRanges[curInstName] = combineLabelRanges(self.getRanges(curInstName), otherSetIn.getRanges(curInstName), operationIn)
+            newSet_out.useRanges = True
+            return newSet_out
+
+        newInstLabels = {}
+        for curInstName in allInstNames:
+            curLabelsA = self.getLabels(curInstName)
+            curLabelsB = otherSetIn.getLabels(curInstName)
+            # Both arrays are sorted and unique, so membership is a binary search rather than another full sort
+            isInB = isInSortedLabels(curLabelsB, curLabelsA)
+            if operationIn == 'UNION':
+                newLabels = np.concatenate((curLabelsA[~isInB], curLabelsB))
+                newLabels.sort(kind='mergesort')
+                newInstLabels[curInstName] = newLabels
+            elif operationIn == 'INTERSECTION':
+                newInstLabels[curInstName] = curLabelsA[isInB]
+            else:
+                newInstLabels[curInstName] = curLabelsA[~isInB]
+
+        newSet_out = OdbLabelSet()
+        newSet_out.instLabels = newInstLabels # Already sorted and unique
+        return newSet_out
+
+    # Returns the labels in the exact format taken by NodeSetFromNodeLabels(...) and ElementSetFromElementLabels(...):
+    #   (('InstanceName1', (11, 12, ...)), ('InstanceName2', (21, 22, ...)))
+    # The labels are converted to Python ints, since Abaqus does not accept numpy integer types.
+    def toOdbLabelList(self):
+        odbLabelList_out = []
+        for curInstName in self.getInstanceNames():
+            odbLabelList_out.append((curInstName, tuple(self.getLabels(curInstName).tolist())))
+        return tuple(odbLabelList_out)
+
+    # Writes the set to a user set file that can be read by readCSVFileOdbSet(...) in abaqus_moser_utility_functions.py.
+    # If useGenerateIn is True, each instance is written as "*InstanceName, generate" followed by one "start, stop, 1"
+    # line per range of consecutive labels, which is much smaller for mostly contiguous sets.
+    def writeCSVFile(self, CSVFilePathIn, useGenerateIn=False, numColumnsIn=16):
+        with open(CSVFilePathIn, 'w') as csvfile:
+            for curInstName in self.getInstanceNames():
+                if useGenerateIn:
+                    csvfile.write('*' + curInstName + ', generate\n')
+                    curStarts, curStops = self.getRanges(curInstName)
+                    for rangeIndex in range(curStarts.size):
+                        csvfile.write('%d, %d, 1\n' % (curStarts[rangeIndex], curStops[rangeIndex]))
+                else:
+                    csvfile.write('*' + curInstName + '\n')
+                    curLabels = self.getLabels(curInstName)
+                    for rowStart in range(0, curLabels.size, numColumnsIn):
+                        csvfile.write(','.join([str(curLabel) for curLabel in curLabels[rowStart:rowStart+numColumnsIn]]) + '\n')
+
+    def __repr__(self):
+        instSummary = ', '.join([curInstName + ': ' + str(self.getRanges(curInstName)[0].size) + ' range(s)' for curInstName in self.getInstanceNames()])
+        return 'OdbLabelSet(' + str(len(self)) + ' labels; ' + instSummary + ')'
+# ----> END OdbLabelSet <----
+
+
+# Vectorized membership test of queryLabelsIn in an already sorted array of labels. Returns an np.array of bool with
+# the same shape as queryLabelsIn.
+def isInSortedLabels(sortedLabelsIn, queryLabelsIn):
+    sortedLabels = np.asarray(sortedLabelsIn, dtype=np.int64)
+    queryLabels = np.asarray(queryLabelsIn, dtype=np.int64)
+    if sortedLabels.size == 0:
+        return np.zeros(queryLabels.shape, dtype=bool)
+    sortedPos = np.clip(np.searchsorted(sortedLabels, queryLabels), 0, sortedLabels.size - 1)
+    return sortedLabels[sortedPos] == queryLabels
+
+
+# Run-length compression of a sorted array of unique labels into inclusive ranges of consecutive labels. Returns
+# (starts, stops) as np.array[r] of int64, e.g. [1,2,3,7,8,10] -> ([1,7,10], [3,8,10]).
+def getLabelRanges(sortedLabelsIn):
+    sortedLabels = np.asarray(sortedLabelsIn, dtype=np.int64)
+    if sortedLabels.size == 0:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    breakIdx = np.nonzero(np.diff(sortedLabels) != 1)[0]
+    starts_out = sortedLabels[np.concatenate(([0], breakIdx + 1))]
+    stops_out = sortedLabels[np.concatenate((breakIdx, [sortedLabels.size - 1]))]
+    return (starts_out, stops_out)
+
+
+# Vectorized membership test of queryLabelsIn in sorted, non-overlapping inclusive ranges (startsIn, stopsIn). Returns
+# an np.array of bool with the same shape as queryLabelsIn.
+def isInLabelRanges(startsIn, stopsIn, queryLabelsIn):
+    starts = np.asarray(startsIn, dtype=np.int64)
+    stops = np.asarray(stopsIn, dtype=np.int64)
+    queryLabels = np.asarray(queryLabelsIn, dtype=np.int64)
+    if starts.size == 0:
+        return np.zeros(queryLabels.shape, dtype=bool)
+    rangeIdx = np.searchsorted(starts, queryLabels, side='right') - 1
+    return (rangeIdx >= 0) & (queryLabels <= stops[np.clip(rangeIdx, 0, None)])
+
+
+# Union, intersection, or difference (operationIn is 'UNION', 'INTERSECTION', or 'DIFFERENCE') of two sets of labels
+# given as inclusive (starts, stops) ranges (see getLabelRanges(...)), without expanding them into labels. The range
+# boundaries of both sets split the labels into elementary intervals that are either fully inside or fully outside of
+# each set, so the operation is applied to one label per interval and the kept intervals are merged back into ranges.
+def combineLabelRanges(rangesAIn, rangesBIn, operationIn):
+    startsA, stopsA = rangesAIn
+    startsB, stopsB = rangesBIn
+    bounds = np.unique(np.concatenate((startsA, stopsA + 1, startsB, stopsB + 1)).astype(np.int64))
+    if bounds.size < 2:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    isInA = isInLabelRanges(startsA, stopsA, bounds[:-1]) # Interval i is [bounds[i], bounds[i+1] - 1]
+    isInB = isInLabelRanges(startsB, stopsB, bounds[:-1])
+    if operationIn == 'UNION':
+        isKept = isInA | isInB
+    elif operationIn == 'INTERSECTION':
+        isKept = isInA & isInB
+    else:
+        isKept = isInA & (~isInB)
+    isKeptPadded = np.concatenate(([False], isKept, [False]))
+    starts_out = bounds[:-1][isKept & (~isKeptPadded[:-2])] # Kept intervals that do not continue a kept interval
+    stops_out = bounds[1:][isKept & (~isKeptPadded[2:])] - 1 # Kept intervals that are not continued by a kept interval
+    return (starts_out, stops_out)
+
+
+# Inverse of getLabelRanges(...). Expands inclusive (starts, stops) ranges into a single array of labels without a
+# Python loop over the ranges.
+def expandLabelRanges(startsIn, stopsIn):
+    starts = np.asarray(startsIn, dtype=np.int64)
+    stops = np.asarray(stopsIn, dtype=np.int64)
+    rangeSizes = stops - starts + 1
+    if rangeSizes.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    localIndex = np.arange(rangeSizes.sum()) - np.repeat(np.cumsum(rangeSizes) - rangeSizes, rangeSizes)
+    return np.repeat(starts, rangeSizes) + localIndex
+
+
+# Builds an OdbLabelSet from an Abaqus OdbSet of nodes or elements (e.g., from getOdbSetFromKey(...) in
+# abaqus_moser_utility_functions.py). odbSetTypeIn is 'NODE' or 'ELEMENT'. For a surface, use 'NODE' to get the nodes
+# on the surface or 'ELEMENT' to get the elements that the faces belong to.
+def buildLabelSetFromOdbSet(odbSetObjIn, odbSetTypeIn, useRangesIn=False):
+    instLabelsList = []
+    for curInstName, curMeshArr in getOdbSetInstanceArrays(odbSetObjIn, odbSetTypeIn):
+        instLabelsList.append([curInstName, [curMeshObj.label for curMeshObj in curMeshArr]])
+    return OdbLabelSet(instLabelsList, useRangesIn)
+
+
+# Returns the list of (instance name, node or element array) pairs of an Abaqus OdbSet, with the names taken from
+# odbSetObjIn.instanceNames, which lines up with the per-instance arrays of a set that spans several part instances. A
+# set that spans one part instance has instanceNames = None and a single array that is not nested, so its name can only
+# come from the mesh objects themselves. odbSetTypeIn is 'NODE' or 'ELEMENT'.
+def getOdbSetInstanceArrays(odbSetObjIn, odbSetTypeIn):
+    odbSetObj = odbSetObjIn
+    if odbSetTypeIn.upper() == 'ELEMENT':
+        odbMeshArr = odbSetObj.elements
+    else:
+        odbMeshArr = odbSetObj.nodes
+
+    if odbSetObj.instanceNames is not None:
+        return [(odbSetObj.instanceNames[instIndex], odbMeshArr[instIndex]) for instIndex in range(len(odbSetObj.instanceNames))]
+    if (odbMeshArr is None) or (len(odbMeshArr) == 0):
+        return []
+    return [(odbMeshArr[0].instanceName, odbMeshArr)]
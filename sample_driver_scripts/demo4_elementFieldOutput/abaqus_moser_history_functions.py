@@ -0,0 +1,485 @@
+import re
+import fnmatch
+import numpy as np
+try:
+    import scipy.signal as sps # Faster filtering, if scipy is installed in the Abaqus Python
+except ImportError:
+    sps = None
+
+
+# ----> HISTORY OUTPUT ARRAYS <----
+# The functions below work on history outputs as numpy arrays of shape [n,2], where each row is [time, value] (the
+# format of HistoryOutput.data). Different history outputs of the same .odb file are often written at different times,
+# e.g. contact forces every increment and energies at fixed intervals, so they are aligned onto a common time grid
+# before they are combined into one table.
+
+# Converts the list of [time, value] pairs from getHistoryValuesBatch(...) (or HistoryOutput.data) into an np.array[n,2]
+# that is sorted by time. Abaqus repeats the time of the last increment of a step at the start of the next step, so for
+# repeated times, only the last value is kept so that the times are strictly increasing.
+def getHistoryArray(histDataIn):
+    histArr = np.asarray(histDataIn, dtype=float).reshape((-1, 2))
+    if histArr.shape[0] < 2:
+        return histArr
+    sortIdx = np.argsort(histArr[:,0], kind='mergesort') # Stable, so repeated times keep their order
+    histArr = histArr[sortIdx,:]
+    isLastOfTime = np.concatenate((histArr[1:,0] != histArr[:-1,0], [True]))
+    return histArr[isLastOfTime,:]
+
+
+# Returns the common time grid (np.array[m]) for a list of history arrays. gridModeIn is:
+#   'UNION'     - Every time at which any of the histories was written. Times closer than timeTolIn (relative to the
+#                 total time span) are merged into one.
+#   'REFERENCE' - The times of one of the histories. gridParamIn is its index in histArrsIn (int, default 0).
+#   'UNIFORM'   - Evenly spaced times over the span of all of the histories. gridParamIn is either the number of points
+#                 (int) or the time increment (float).
+def getCommonTimeGrid(histArrsIn, gridModeIn='UNION', gridParamIn=None, timeTolIn=1.0e-9):
+    histArrs = [getHistoryArray(curHistArr) for curHistArr in histArrsIn]
+    gridMode = gridModeIn.upper()
+    allTimes = np.concatenate([curHistArr[:,0] for curHistArr in histArrs])
+    if allTimes.size == 0:
+        return np.zeros(0)
+    timeMin = allTimes.min()
+    timeMax = allTimes.max()
+
+    if gridMode == 'UNION':
+        uniqueTimes = np.unique(allTimes)
+        if uniqueTimes.size < 2:
+            return uniqueTimes
+        isNewTime = np.concatenate(([True], np.diff(uniqueTimes) > timeTolIn*(timeMax - timeMin)))
+        return uniqueTimes[isNewTime]
+
+    elif gridMode == 'REFERENCE':
+        refIndex = 0
+        if gridParamIn is not None:
+            refIndex = int(gridParamIn)
+        return histArrs[refIndex][:,0].copy()
+
+    elif gridMode == 'UNIFORM':
+        if isinstance(gridParamIn, float):
+            numPnts = int(np.floor((timeMax - timeMin)/gridParamIn + 1.0e-9)) + 1
+            return timeMin + gridParamIn*np.arange(numPnts)
+        numPnts = max([curHistArr.shape[0] for curHistArr in histArrs])
+        if gridParamIn is not None:
+            numPnts = int(gridParamIn)
+        return np.linspace(timeMin, timeMax, numPnts)
+
+    print 'ERROR: Unknown time grid mode, ', gridModeIn
+    return
+# ----> END getCommonTimeGrid(...) <----
+
+
+# Resamples one history array at the given times. interpModeIn is 'LINEAR' (linear interpolation between the output
+# times) or 'STEP' (the last value written at or before each time, i.e. a zero-order hold). Times outside of the history
+# get the first/last value if extrapModeIn is 'HOLD', or NaN if it is 'NAN'. Returns an np.array[m] of values.
+def resampleHistory(histArrIn, gridTimesIn, interpModeIn='LINEAR', extrapModeIn='HOLD'):
+    histArr = getHistoryArray(histArrIn)
+    gridTimes = np.asarray(gridTimesIn, dtype=float)
+    if histArr.shape[0] == 0:
+        return np.nan*np.ones(gridTimes.shape)
+    histTimes = histArr[:,0]
+    histVals = histArr[:,1]
+
+    if interpModeIn.upper() == 'STEP':
+        valIdx = np.searchsorted(histTimes, gridTimes, side='right') - 1
+        gridVals = histVals[np.clip(valIdx, 0, histVals.size - 1)]
+    else:
+        gridVals = np.interp(gridTimes, histTimes, histVals) # Holds the end values outside of the history
+
+    if extrapModeIn.upper() == 'NAN':
+        gridVals = np.where((gridTimes < histTimes[0]) | (gridTimes > histTimes[-1]), np.nan, gridVals)
+    return gridVals
+# ----> END resampleHistory(...) <----
+
+
+# Aligns several history outputs onto one common time grid (see getCommonTimeGrid(...) and resampleHistory(...)).
+# interpModeIn may also be a list with one mode per history, e.g. 'STEP' for piecewise-constant outputs. Returns
+# (gridTimes, gridVals), where gridTimes is an np.array[m] and gridVals is an np.array[m,nHist] with one column per history.
+def alignHistories(histArrsIn, gridModeIn='UNION', gridParamIn=None, interpModeIn='LINEAR', extrapModeIn='HOLD'):
+    histArrs = [getHistoryArray(curHistArr) for curHistArr in histArrsIn]
+    gridTimes = getCommonTimeGrid(histArrs, gridModeIn, gridParamIn)
+    if gridTimes is None:
+        return
+
+    interpModes = interpModeIn
+    if isinstance(interpModes, str):
+        interpModes = [interpModes]*len(histArrs)
+
+    gridVals = np.zeros((gridTimes.size, len(histArrs)))
+    for histIndex in range(len(histArrs)):
+        gridVals[:,histIndex] = resampleHistory(histArrs[histIndex], gridTimes, interpModes[histIndex], extrapModeIn)
+    return (gridTimes, gridVals)
+# ----> END alignHistories(...) <----
+
+
+# Combines several history outputs into one 2D table for write2DListCSV(...): each row is [time, hist1, hist2, ...].
+# The histories are aligned first, so they do not need to have the same output times. See alignHistories(...). If
+# filterSpecIn is given (e.g., ('CFC', 60)), all of the aligned histories are filtered with filterHistoryValues(...).
+def getAlignedHistoryTable(histArrsIn, gridModeIn='UNION', gridParamIn=None, interpModeIn='LINEAR', extrapModeIn='HOLD', filterSpecIn=None):
+    alignedHists = alignHistories(histArrsIn, gridModeIn, gridParamIn, interpModeIn, extrapModeIn)
+    if alignedHists is None:
+        return
+    gridTimes, gridVals = alignedHists
+    if filterSpecIn is not None:
+        gridVals = filterHistoryValues(gridTimes, gridVals, filterSpecIn)
+        if gridVals is None:
+            return
+    return np.column_stack((gridTimes, gridVals))
+# ----> END getAlignedHistoryTable(...) <----
+
+
+# ----> HISTORY REGIONS <----
+# Node and element history output is written to one history region per node or element, with repository keys such as
+# 'Node ROD1-1.123' or 'Element ROD1-1.45 Int Point 1'. Other regions are named, e.g., 'Assembly ASSEMBLY' or
+# 'ElementSet  PIBATCH'.
+histRegionNamePattern = re.compile(r'^(Node|Element)\s+(\S+)\.(\d+)(?:\s+Int Point\s+(\d+))?')
+
+# Parses a history region name into (regionType, instanceName, label, integPnt), e.g. 'Node ROD1-1.123' gives
+# ('NODE', 'ROD1-1', 123, 0). Regions that do not belong to a single node or element give (None, None, None, None).
+def parseHistoryRegionName(histRegNameIn):
+    regionMatch = histRegionNamePattern.match(histRegNameIn)
+    if regionMatch is None:
+        return (None, None, None, None)
+    integPnt = 0
+    if regionMatch.group(4) is not None:
+        integPnt = int(regionMatch.group(4))
+    return (regionMatch.group(1).upper(), regionMatch.group(2), int(regionMatch.group(3)), integPnt)
+
+
+# Sorting key for history region names: node and element regions are ordered by instance name, label, and integration
+# point, followed by all of the other regions in alphabetical order.
+def getHistoryRegionSortKey(histRegNameIn):
+    regionType, instName, regionLabel, integPnt = parseHistoryRegionName(histRegNameIn)
+    if regionType is None:
+        return (1, '', '', 0, 0, histRegNameIn)
+    return (0, regionType, instName, regionLabel, integPnt, histRegNameIn)
+
+
+# Returns the keys (in their original order) that match a pattern. patternTypeIn is 'GLOB' for shell-style wildcards
+# (e.g., 'Node ROD1-1.*' or 'CFN?'), or 'REGEX' for a regular expression that must match from the start of the key.
+# patternIn may also be a list of patterns, in which case a key only has to match one of them.
+def matchHistoryKeys(keysIn, patternIn, patternTypeIn='GLOB'):
+    keyPatterns = patternIn
+    if isinstance(keyPatterns, str):
+        keyPatterns = [keyPatterns]
+    if patternTypeIn.upper() == 'REGEX':
+        compiledPatterns = [re.compile(curPattern) for curPattern in keyPatterns]
+    else:
+        compiledPatterns = [re.compile(fnmatch.translate(curPattern)) for curPattern in keyPatterns]
+    return [curKey for curKey in keysIn if any([curPattern.match(curKey) is not None for curPattern in compiledPatterns])]
+
+
+# Stacks the history arrays of many regions for the same output key into one matrix. If all of the histories have the
+# same output times (the usual case for one output request), the values are simply stacked. Otherwise, they are aligned
+# onto the union of their output times with linear interpolation (see alignHistories(...)). Returns (times, values),
+# where times is an np.array[m] and values is an np.array[m,nRegions].
+def stackHistories(histArrsIn):
+    histArrs = [np.asarray(curHistArr, dtype=float).reshape((-1, 2)) for curHistArr in histArrsIn]
+    if len(histArrs) == 0:
+        return (np.zeros(0), np.zeros((0, 0)))
+    refTimes = histArrs[0][:,0]
+    sameTimes = all([(curHistArr.shape[0] == refTimes.size) and np.array_equal(curHistArr[:,0], refTimes) for curHistArr in histArrs])
+    if sameTimes:
+        return (refTimes.copy(), np.column_stack([curHistArr[:,1] for curHistArr in histArrs]))
+    return alignHistories(histArrs, 'UNION')
+# ----> END stackHistories(...) <----
+
+
+# ----> DECIMATION OF LONG HISTORY OUTPUTS <----
+# Explicit analyses may write a history output at every increment, i.e. millions of points. The functions below reduce
+# a history to at most maxPntsIn points while it is read, without converting all of the points into a Python list or
+# one large array first: only chunkPntsIn points are converted to a numpy array at a time. The first and last points
+# are always kept. decimateModeIn is:
+#   'STRIDE' - Evenly spaced points (fastest, but peaks between the kept points are lost)
+#   'MINMAX' - The minimum and maximum of each bucket of consecutive points (keeps every peak of the signal)
+#   'LTTB'   - Largest-Triangle-Three-Buckets: the point of each bucket that forms the largest triangle with the kept point
+#              of the previous bucket and the average of the next bucket. Keeps the visual shape with a single point per bucket.
+
+# Reduces a history output to at most maxPntsIn points. histDataIn may be the tuple of (time, value) pairs of
+# HistoryOutput.data, a list of pairs, or an np.array[n,2]. Returns an np.array[m,2].
+def decimateHistory(histDataIn, maxPntsIn, decimateModeIn='LTTB', chunkPntsIn=1000000):
+    histData = histDataIn
+    numPnts = len(histData)
+    maxPnts = max(int(maxPntsIn), 3)
+    decimateMode = decimateModeIn.upper()
+    if numPnts <= maxPnts:
+        return np.asarray(histData, dtype=float).reshape((-1, 2))
+
+    if decimateMode == 'STRIDE':
+        keepIdx = np.unique(np.round(np.linspace(0, numPnts - 1, maxPnts)).astype(np.int64))
+        return np.array([histData[curIdx] for curIdx in keepIdx.tolist()], dtype=float).reshape((-1, 2))
+
+    firstPnt = np.asarray(histData[0], dtype=float).reshape((1, 2))
+    lastPnt = np.asarray(histData[numPnts-1], dtype=float).reshape((1, 2))
+    if decimateMode == 'MINMAX':
+        keptPnts = [firstPnt]
+        numBuckets = (maxPnts - 2)//2 # The first and last point plus up to two per bucket must fit in maxPnts
+        for curBucket in iterHistoryBuckets(histData, max(numBuckets, 1), chunkPntsIn):
+            minIdx = np.argmin(curBucket[:,1])
+            maxIdx = np.argmax(curBucket[:,1])
+            if numBuckets < 1: # Room for a single point only: keep the extreme furthest from the bucket mean
+                bucketMean = curBucket[:,1].mean()
+                if curBucket[maxIdx,1] - bucketMean >= bucketMean - curBucket[minIdx,1]:
+                    minIdx = maxIdx
+                else:
+                    maxIdx = minIdx
+            keptPnts.append(curBucket[sorted(set([minIdx, maxIdx])),:]) # In the order of time
+        keptPnts.append(lastPnt)
+        return np.concatenate(keptPnts, axis=0)
+
+    elif decimateMode == 'LTTB':
+        keptPnts = [firstPnt]
+        prevPnt = firstPnt[0]
+        curBucket = None
+        for nextBucket in iterHistoryBuckets(histData, maxPnts - 2, chunkPntsIn):
+            if curBucket is not None:
+                prevPnt = selectLargestTrianglePnt(prevPnt, curBucket, nextBucket.mean(axis=0))
+                keptPnts.append(prevPnt.reshape((1, 2)))
+            curBucket = nextBucket
+        keptPnts.append(selectLargestTrianglePnt(prevPnt, curBucket, lastPnt[0]).reshape((1, 2)))
+        keptPnts.append(lastPnt)
+        return np.concatenate(keptPnts, axis=0)
+
+    print 'ERROR: Unknown decimation mode, ', decimateModeIn
+    return
+# ----> END decimateHistory(...) <----
+
+
+# Yields the points between the first and the last point of a history as numBucketsIn consecutive buckets (each an
+# np.array[k,2]) of nearly equal size. Only about chunkPntsIn points are converted to numpy at a time.
+def iterHistoryBuckets(histDataIn, numBucketsIn, chunkPntsIn=1000000):
+    histData = histDataIn
+    numPnts = len(histData)
+    numBuckets = max(1, min(int(numBucketsIn), numPnts - 2))
+    bucketEdges = 1 + (np.arange(numBuckets + 1)*(numPnts - 2))//numBuckets # Excludes the first and last point
+
+    bucketIndex = 0
+    while bucketIndex < numBuckets:
+        # Convert a chunk of whole buckets at once
+        chunkStart = int(bucketEdges[bucketIndex])
+        lastBucketIndex = max(int(np.searchsorted(bucketEdges, chunkStart + chunkPntsIn, side='right')) - 1, bucketIndex + 1)
+        lastBucketIndex = min(lastBucketIndex, numBuckets)
+        chunkStop = int(bucketEdges[lastBucketIndex])
+        chunkArr = np.asarray(histData[chunkStart:chunkStop], dtype=float).reshape((-1, 2))
+        for curBucketIndex in range(bucketIndex, lastBucketIndex):
+            yield chunkArr[bucketEdges[curBucketIndex]-chunkStart:bucketEdges[curBucketIndex+1]-chunkStart,:]
+        bucketIndex = lastBucketIndex
+# ----> END iterHistoryBuckets(...) <----
+
+
+# Returns the point (np.array[2]) of bucketPntsIn that forms the triangle with the largest area together with prevPntIn
+# and nextPntIn. Used by the LTTB decimation.
+def selectLargestTrianglePnt(prevPntIn, bucketPntsIn, nextPntIn):
+    triAreas = np.abs((prevPntIn[0] - nextPntIn[0])*(bucketPntsIn[:,1] - prevPntIn[1]) -
+                      (prevPntIn[0] - bucketPntsIn[:,0])*(nextPntIn[1] - prevPntIn[1]))
+    return bucketPntsIn[np.argmax(triAreas),:]
+# ----> END selectLargestTrianglePnt(...) <----
+
+
+# ----> FILTERING OF HISTORY OUTPUTS <----
+# Zero-phase (forward and backward) low-pass filters for noisy history outputs such as contact forces of explicit
+# analyses. A filter is given as a tuple, like the selectors of evalSelectorSpec(...) in abaqus_moser_spatial_functions.py:
+#   ('CFC', cfcClass)                 - SAE J211 / ISO 6487 channel frequency class filter (e.g., 60, 180, 600, 1000).
+#                                       The times must be in seconds.
+#   ('BUTTERWORTH', cutoffFreq, order) - Butterworth low-pass filter with the -3 dB cutoff frequency in 1/(time unit).
+#                                       The cutoff is that of the zero-phase (forward and backward) filter.
+#   ('MOVING_AVERAGE', window)         - Centered moving average over a window of points (int) or of time (float)
+# The IIR filters are applied as second-order sections with scipy.signal if it is available, and otherwise with a
+# numpy implementation of the same filter. All of the columns (history outputs) are filtered at once.
+
+# Returns the second-order sections (np.array[1,6] of rows [b0, b1, b2, 1, a1, a2]) of the SAE J211 CFC filter for a
+# time increment of timeIncIn seconds. Applied forward and backward, this gives the 4-pole phaseless filter of SAE J211.
+# SAE J211 recommends a sample rate of at least 10 times the CFC; below that a warning is printed.
+def designCFCFilter(cfcClassIn, timeIncIn):
+    sampleFreq = 1.0/timeIncIn
+    if 2.0775*float(cfcClassIn) >= 0.5*sampleFreq:
+        print 'WARNING: The design frequency of CFC ', cfcClassIn, ' is above the Nyquist frequency of the (resampled) history. It is not filtered.'
+        return np.array([[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]])
+    if sampleFreq < 10.0*float(cfcClassIn):
+        print 'WARNING: The sample rate, ', sampleFreq, ' Hz, is below the SAE J211 recommendation of 10 times the CFC (', 10.0*float(cfcClassIn), ' Hz).'
+    designFreq = 2.0*np.pi*2.0775*float(cfcClassIn)
+    warpedFreq = np.tan(designFreq*timeIncIn/2.0)
+    freqDenom = 1.0 + np.sqrt(2.0)*warpedFreq + warpedFreq**2
+    coefA0 = warpedFreq**2/freqDenom
+    coefB1 = -2.0*(warpedFreq**2 - 1.0)/freqDenom
+    coefB2 = (-1.0 + np.sqrt(2.0)*warpedFreq - warpedFreq**2)/freqDenom
+    return np.array([[coefA0, 2.0*coefA0, coefA0, 1.0, -coefB1, -coefB2]])
+
+
+# Returns the second-order sections (np.array[k,6]) of a digital Butterworth low-pass filter, designed with the bilinear
+# transform and a pre-warped cutoff frequency, for a time increment of timeIncIn. A single pass is -3 dB at cutoffFreqIn.
+# Applied forward and backward, the gain is squared (-6 dB at cutoffFreqIn), so for zeroPhaseIn=True the cutoff of each
+# pass is raised such that the zero-phase filter is -3 dB at cutoffFreqIn (like the 2.0775 factor of designCFCFilter(...)).
+def designButterworthFilter(cutoffFreqIn, orderIn, timeIncIn, zeroPhaseIn=False):
+    filterOrder = int(orderIn)
+    sampleFreq = 1.0/timeIncIn
+    if cutoffFreqIn >= 0.5*sampleFreq:
+        print 'WARNING: The cutoff frequency is above the Nyquist frequency of the (resampled) history. It is not filtered.'
+        return np.array([[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]])
+    bilinK = 2.0*sampleFreq
+    warpedFreq = bilinK*np.tan(np.pi*cutoffFreqIn/sampleFreq) # Analog cutoff (rad/time) that maps onto cutoffFreqIn
+    if zeroPhaseIn: # |H|^2 = 1/sqrt(2) for each pass at cutoffFreqIn, i.e. 1/(1 + (w/wc)^(2n)) = 2^(-1/2)
+        warpedFreq = warpedFreq/(np.sqrt(2.0) - 1.0)**(1.0/(2.0*filterOrder))
+
+    filterSOS = []
+    for poleIndex in range(filterOrder//2): # Each pair of complex conjugate analog poles gives one section
+        poleReal = warpedFreq*np.cos(np.pi*(2.0*poleIndex + filterOrder + 1.0)/(2.0*filterOrder))
+        denomA0 = bilinK**2 - 2.0*poleReal*bilinK + warpedFreq**2
+        denomA1 = 2.0*(warpedFreq**2 - bilinK**2)
+        denomA2 = bilinK**2 + 2.0*poleReal*bilinK + warpedFreq**2
+        numB0 = warpedFreq**2
+        filterSOS.append([numB0/denomA0, 2.0*numB0/denomA0, numB0/denomA0, 1.0, denomA1/denomA0, denomA2/denomA0])
+    if (filterOrder % 2) == 1: # Real pole at -warpedFreq
+        denomA0 = bilinK + warpedFreq
+        filterSOS.append([warpedFreq/denomA0, warpedFreq/denomA0, 0.0, 1.0, (warpedFreq - bilinK)/denomA0, 0.0])
+    return np.array(filterSOS)
+
+
+# Applies second-order sections along the first axis of valsIn (np.array[m] or [m,n]), starting from the steady state
+# of the first value so that there is no start-up transient for signals that do not start at zero
+def applySOSFilter(filterSOSIn, valsIn):
+    filterSOS = np.asarray(filterSOSIn, dtype=float)
+    filteredVals = np.array(valsIn, dtype=float)
+    is1D = (filteredVals.ndim == 1)
+    if is1D:
+        filteredVals = filteredVals.reshape((-1, 1))
+    if filteredVals.shape[0] == 0:
+        return filteredVals.ravel() if is1D else filteredVals
+
+    for curSection in filterSOS:
+        numB0, numB1, numB2, denomA0, denomA1, denomA2 = curSection
+        dcGain = (numB0 + numB1 + numB2)/(1.0 + denomA1 + denomA2)
+        stateZ2 = (numB2 - denomA2*dcGain)*filteredVals[0,:] # Direct form II transposed states at steady state
+        stateZ1 = (numB1 - denomA1*dcGain)*filteredVals[0,:] + stateZ2
+        if sps is not None:
+            filteredVals = sps.lfilter([numB0, numB1, numB2], [1.0, denomA1, denomA2], filteredVals, axis=0, zi=np.vstack((stateZ1, stateZ2)))[0]
+        elif filteredVals.shape[1] <= 8: # A few columns: the recursion is faster with Python floats than with tiny arrays
+            for colIndex in range(filteredVals.shape[1]):
+                colVals = filteredVals[:,colIndex].tolist()
+                curZ1 = float(stateZ1[colIndex])
+                curZ2 = float(stateZ2[colIndex])
+                for rowIndex in range(len(colVals)):
+                    curX = colVals[rowIndex]
+                    curY = numB0*curX + curZ1
+                    curZ1 = numB1*curX - denomA1*curY + curZ2
+                    curZ2 = numB2*curX - denomA2*curY
+                    colVals[rowIndex] = curY
+                filteredVals[:,colIndex] = colVals
+        else: # Many columns: vectorized across the columns
+            for rowIndex in range(filteredVals.shape[0]):
+                curX = filteredVals[rowIndex,:].copy()
+                curY = numB0*curX + stateZ1
+                stateZ1 = numB1*curX - denomA1*curY + stateZ2
+                stateZ2 = numB2*curX - denomA2*curY
+                filteredVals[rowIndex,:] = curY
+
+    if is1D:
+        return filteredVals.ravel()
+    return filteredVals
+
+
+# Zero-phase filtering: applies the sections forward and then backward, after extending both ends of the signal by an
+# odd reflection of padLenIn points (to suppress the transients at the ends), like scipy.signal.sosfiltfilt(...)
+def applyZeroPhaseSOSFilter(filterSOSIn, valsIn, padLenIn=None):
+    filterSOS = np.asarray(filterSOSIn, dtype=float)
+    vals = np.asarray(valsIn, dtype=float)
+    padLen = padLenIn
+    if padLen is None:
+        padLen = 3*(2*filterSOS.shape[0] + 1)
+    padLen = min(padLen, vals.shape[0] - 1)
+    if padLen > 0:
+        padStart = 2.0*vals[0:1] - vals[padLen:0:-1]
+        padEnd = 2.0*vals[-1:] - vals[-2:-padLen-2:-1]
+        vals = np.concatenate((padStart, vals, padEnd), axis=0)
+    filteredVals = applySOSFilter(filterSOS, vals)
+    filteredVals = applySOSFilter(filterSOS, filteredVals[::-1])[::-1]
+    if padLen > 0:
+        filteredVals = filteredVals[padLen:-padLen]
+    return np.ascontiguousarray(filteredVals)
+
+
+# Centered moving average over windowPntsIn points (made odd) along the first axis. The window is shortened at the ends.
+def calcMovingAverage(valsIn, windowPntsIn):
+    vals = np.asarray(valsIn, dtype=float)
+    halfWindow = max(int(windowPntsIn)//2, 0)
+    numPnts = vals.shape[0]
+    cumVals = np.concatenate((np.zeros((1,) + vals.shape[1:]), np.cumsum(vals, axis=0)), axis=0)
+    winStart = np.clip(np.arange(numPnts) - halfWindow, 0, numPnts)
+    winStop = np.clip(np.arange(numPnts) + halfWindow + 1, 0, numPnts)
+    winCounts = (winStop - winStart).reshape((-1,) + (1,)*(vals.ndim - 1))
+    return (cumVals[winStop] - cumVals[winStart])/winCounts
+
+
+# Returns True if filterSpecIn is a valid filter tuple (see the description above). Otherwise, prints an error and
+# returns False, so that a typo such as ('CFC60',) is reported before any history output is read.
+def checkFilterSpec(filterSpecIn):
+    filterSpec = filterSpecIn
+    if (not isinstance(filterSpec, (tuple, list))) or (len(filterSpec) == 0) or (not isinstance(filterSpec[0], str)):
+        print 'ERROR: A filter must be a tuple such as (\'CFC\', 60), not ', filterSpec
+        return False
+    filterType = filterSpec[0].upper()
+    numParams = {'CFC': (1, 1), 'BUTTERWORTH': (1, 2), 'MOVING_AVERAGE': (1, 1)}
+    if filterType not in numParams:
+        print 'ERROR: Unknown filter type, ', filterSpec[0], '. Use one of ', sorted(numParams.keys())
+        return False
+    minParams, maxParams = numParams[filterType]
+    if (len(filterSpec) - 1 < minParams) or (len(filterSpec) - 1 > maxParams):
+        print 'ERROR: The filter ', filterSpec, ' needs ', minParams, ' to ', maxParams, ' parameter(s) after its type.'
+        return False
+    for curParam in filterSpec[1:]:
+        if (not isinstance(curParam, (int, long, float))) or (curParam <= 0):
+            print 'ERROR: The parameters of the filter ', filterSpec, ' must be positive numbers.'
+            return False
+    if (filterType == 'BUTTERWORTH') and (len(filterSpec) > 2) and (int(filterSpec[2]) != filterSpec[2]):
+        print 'ERROR: The order of the Butterworth filter must be an integer, not ', filterSpec[2]
+        return False
+    return True
+
+
+# Filters one or more history outputs with a filter tuple (see the description above). timesIn is an np.array[m] of
+# strictly increasing output times, and valsIn is an np.array[m] or [m,nHist] (e.g., the output of alignHistories(...)).
+# The filters need a constant time increment, so histories with nonuniform output times (e.g., every increment of an
+# explicit analysis) are resampled onto a uniform grid with the median time increment, filtered, and interpolated back
+# onto the original output times. Returns the filtered values with the same shape as valsIn, or None if the filter
+# tuple is invalid (see checkFilterSpec(...)).
+def filterHistoryValues(timesIn, valsIn, filterSpecIn, timeTolIn=1.0e-3):
+    histTimes = np.asarray(timesIn, dtype=float)
+    histVals = np.asarray(valsIn, dtype=float)
+    filterSpec = filterSpecIn
+    if not checkFilterSpec(filterSpec):
+        return
+    if histTimes.size < 3:
+        return histVals.copy()
+
+    timeIncs = np.diff(histTimes)
+    timeInc = np.median(timeIncs)
+    isUniform = np.all(np.abs(timeIncs - timeInc) <= timeTolIn*timeInc)
+    if isUniform:
+        gridVals = histVals
+    else:
+        gridTimes = histTimes[0] + timeInc*np.arange(int(np.floor((histTimes[-1] - histTimes[0])/timeInc)) + 2)
+        gridVals = np.interp(gridTimes, histTimes, histVals) if histVals.ndim == 1 else \
+                   np.column_stack([np.interp(gridTimes, histTimes, histVals[:,colIndex]) for colIndex in range(histVals.shape[1])])
+
+    filterType = filterSpec[0].upper()
+    if filterType == 'CFC':
+        filteredVals = applyZeroPhaseSOSFilter(designCFCFilter(filterSpec[1], timeInc), gridVals)
+    elif filterType == 'BUTTERWORTH':
+        filterOrder = 2
+        if len(filterSpec) > 2:
+            filterOrder = filterSpec[2]
+        filteredVals = applyZeroPhaseSOSFilter(designButterworthFilter(filterSpec[1], filterOrder, timeInc, True), gridVals)
+    elif filterType == 'MOVING_AVERAGE':
+        windowPnts = filterSpec[1]
+        if isinstance(windowPnts, float): # A window in time units
+            windowPnts = int(round(windowPnts/timeInc))
+        filteredVals = calcMovingAverage(gridVals, windowPnts)
+    else:
+        print 'ERROR: Unknown filter type, ', filterSpec[0]
+        return
+
+    if isUniform:
+        return filteredVals
+    if histVals.ndim == 1:
+        return np.interp(histTimes, gridTimes, filteredVals)
+    return np.column_stack([np.interp(histTimes, gridTimes, filteredVals[:,colIndex]) for colIndex in range(histVals.shape[1])])
+# ----> END filterHistoryValues(...) <----
@@ -384,4 +384,481 @@ def tet10ShapeFun(ndCoordsIn, natCoordIn):
 C3D10_integPnts_coord = np.matrix( [[0.58541020, 0.13819660, 0.13819660, 1.0 - 0.58541020 - 0.13819660 - 0.13819660],
                                     [0.13819660, 0.58541020, 0.13819660, 1.0 - 0.13819660 - 0.58541020 - 0.13819660],
                                     [0.13819660, 0.13819660, 0.58541020, 1.0 - 0.13819660 - 0.13819660 - 0.58541020],
-                                    [0.13819660, 0.13819660, 0.13819660, 1.0 - 0.13819660 - 0.13819660 - 0.13819660]])
\ No newline at end of file
+                                    [0.13819660, 0.13819660, 0.13819660, 1.0 - 0.13819660 - 0.13819660 - 0.13819660]])
+
+# Natural coordinates of the nodes in element C3D8 (and the corner nodes of C3D20R), following the Abaqus node numbering.
+C3D8_nodes_natCoord = np.array( [[-1.0, -1.0, -1.0],
+                                 [1.0, -1.0, -1.0],
+                                 [1.0, 1.0, -1.0],
+                                 [-1.0, 1.0, -1.0],
+                                 [-1.0, -1.0, 1.0],
+                                 [1.0, -1.0, 1.0],
+                                 [1.0, 1.0, 1.0],
+                                 [-1.0, 1.0, 1.0]] )
+
+# Natural coordinates of the 20 nodes in element C3D20R. The first 8 rows are the corner nodes and the remaining 12 rows
+# are the midside nodes; these are the same xez vectors used in quad20ShapeFun(...).
+C3D20_nodes_natCoord = np.array( [[-1.0, -1.0, -1.0],
+                                  [1.0, -1.0, -1.0],
+                                  [1.0, 1.0, -1.0],
+                                  [-1.0, 1.0, -1.0],
+                                  [-1.0, -1.0, 1.0],
+                                  [1.0, -1.0, 1.0],
+                                  [1.0, 1.0, 1.0],
+                                  [-1.0, 1.0, 1.0],
+                                  [0.0, -1.0, -1.0],
+                                  [1.0, 0.0, -1.0],
+                                  [0.0, 1.0, -1.0],
+                                  [-1.0, 0.0, -1.0],
+                                  [0.0, -1.0, 1.0],
+                                  [1.0, 0.0, 1.0],
+                                  [0.0, 1.0, 1.0],
+                                  [-1.0, 0.0, 1.0],
+                                  [-1.0, -1.0, 0.0],
+                                  [1.0, -1.0, 0.0],
+                                  [1.0, 1.0, 0.0],
+                                  [-1.0, 1.0, 0.0]] )
+
+# Natural coordinates of the 4 nodes in element C3D4. Same four-coordinate convention as tet4ShapeFun(...).
+C3D4_nodes_natCoord = np.array( [[1.0, 0.0, 0.0, 0.0],
+                                 [0.0, 1.0, 0.0, 0.0],
+                                 [0.0, 0.0, 1.0, 0.0],
+                                 [0.0, 0.0, 0.0, 1.0]] )
+
+# Natural coordinates of the 10 nodes in element C3D10. The midside nodes are 5:(1-2), 6:(2-3), 7:(3-1), 8:(1-4), 
+# 9:(2-4), and 10:(3-4), which is consistent with the shape functions in tet10ShapeFun(...).
+C3D10_nodes_natCoord = np.array( [[1.0, 0.0, 0.0, 0.0],
+                                  [0.0, 1.0, 0.0, 0.0],
+                                  [0.0, 0.0, 1.0, 0.0],
+                                  [0.0, 0.0, 0.0, 1.0],
+                                  [0.5, 0.5, 0.0, 0.0],
+                                  [0.0, 0.5, 0.5, 0.0],
+                                  [0.5, 0.0, 0.5, 0.0],
+                                  [0.5, 0.0, 0.0, 0.5],
+                                  [0.0, 0.5, 0.0, 0.5],
+                                  [0.0, 0.0, 0.5, 0.5]] )
+
+
+# Based on the element type, return the family of shape functions that describes the element geometry: 'QUAD8', 'QUAD20',
+# 'TET4', or 'TET10'. Returns None if the element type is not currently supported. 
+def getElemShapeFamily(elemTypeIn):
+    elemType = elemTypeIn # str - Abaqus element type identifier (very limited number of elements currently supported)
+
+    if elemType in ['C3D8R', 'C3D8RH', 'C3D8', 'C3D8H','C3D8I', 'C3D8IH']:
+        return 'QUAD8'
+    elif elemType in ['C3D20R', 'C3D20RH']:
+        return 'QUAD20'
+    elif elemType in ['C3D4', 'C3D4H']:
+        return 'TET4'
+    elif elemType in ['C3D10','C3D10H', 'C3D10M', 'C3D10MH']:
+        return 'TET10'
+    return None
+
+
+# Based on the element type, return the natural coordinates of the integration points as an np.array[nIP,3] for bricks
+# or an np.array[nIP,4] for tetrahedrals. Returns None if the element type is not currently supported.
+def getCorrectIntegPntsNatCoord(elemTypeIn):
+    elemType = elemTypeIn # str - Abaqus element type identifier (very limited number of elements currently supported)
+
+    if elemType in ['C3D8R', 'C3D8RH']:
+        return np.array(C3D8R_integPnts_coord)
+    elif elemType in ['C3D8', 'C3D8H','C3D8I', 'C3D8IH']:
+        return np.array(C3D8_integPnts_coord)
+    elif elemType in ['C3D20R', 'C3D20RH']:
+        return np.array(C3D20R_integPnts_coord)
+    elif elemType in ['C3D4', 'C3D4H']:
+        return np.array(C3D4_integPnts_coord)
+    elif elemType in ['C3D10','C3D10H', 'C3D10M', 'C3D10MH']:
+        return np.array(C3D10_integPnts_coord)
+    return None
+
+
+# Based on the element type, return the natural coordinates of the nodes (Abaqus node numbering) as an np.array[nNodes,3]
+# for bricks or an np.array[nNodes,4] for tetrahedrals. Returns None if the element type is not currently supported.
+def getCorrectNodesNatCoord(elemTypeIn):
+    shapeFamily = getElemShapeFamily(elemTypeIn)
+
+    if shapeFamily == 'QUAD8':
+        return C3D8_nodes_natCoord
+    elif shapeFamily == 'QUAD20':
+        return C3D20_nodes_natCoord
+    elif shapeFamily == 'TET4':
+        return C3D4_nodes_natCoord
+    elif shapeFamily == 'TET10':
+        return C3D10_nodes_natCoord
+    return None
+
+
+# Face-local node numbering of the element faces (FACE1, FACE2, ...), following the Abaqus element library. Each row lists
+# the nodes of a face (1-based, as in the element connectivity): first the corner nodes in order around the face, then the
+# midside nodes of the edges between them.
+C3D8_faceNodes = [[1, 2, 3, 4],
+                  [5, 8, 7, 6],
+                  [1, 5, 6, 2],
+                  [2, 6, 7, 3],
+                  [3, 7, 8, 4],
+                  [4, 8, 5, 1]]
+
+C3D20_faceNodes = [[1, 2, 3, 4, 9, 10, 11, 12],
+                   [5, 8, 7, 6, 16, 15, 14, 13],
+                   [1, 5, 6, 2, 17, 13, 18, 9],
+                   [2, 6, 7, 3, 18, 14, 19, 10],
+                   [3, 7, 8, 4, 19, 15, 20, 11],
+                   [4, 8, 5, 1, 20, 16, 17, 12]]
+
+C3D4_faceNodes = [[1, 2, 3],
+                  [1, 4, 2],
+                  [2, 4, 3],
+                  [3, 4, 1]]
+
+C3D10_faceNodes = [[1, 2, 3, 5, 6, 7],
+                   [1, 4, 2, 8, 9, 5],
+                   [2, 4, 3, 9, 10, 6],
+                   [3, 4, 1, 10, 8, 7]]
+
+
+# Based on the element type, return the face-local node numbering as an np.array[nFaces,nFaceNodes] of 0-based indices
+# into the element connectivity (row i is FACE(i+1)), and the number of corner nodes of each face. Returns (None, 0) if
+# the element type is not currently supported.
+def getElemFaceNodeTable(elemTypeIn):
+    shapeFamily = getElemShapeFamily(elemTypeIn)
+
+    if shapeFamily == 'QUAD8':
+        return (np.array(C3D8_faceNodes) - 1, 4)
+    elif shapeFamily == 'QUAD20':
+        return (np.array(C3D20_faceNodes) - 1, 4)
+    elif shapeFamily == 'TET4':
+        return (np.array(C3D4_faceNodes) - 1, 3)
+    elif shapeFamily == 'TET10':
+        return (np.array(C3D10_faceNodes) - 1, 3)
+    return (None, 0)
+
+
+# Vectorized versions of the shape functions above. Rather than mapping a single element, these return the values of
+# every shape function at every requested natural coordinate, so that they can be applied to many elements at once via
+# a single matrix product. natCoordIn should be an array[n,3] for the bricks or an array[n,4] for the tetrahedrals.
+# The functions return an np.array[n,nNodes] where the columns follow the Abaqus node numbering.
+def quad8ShapeFunVals(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+    xi = natCoord[:,0:1]
+    eta = natCoord[:,1:2]
+    mu = natCoord[:,2:3]
+    xez = C3D8_nodes_natCoord
+
+    return 0.125*(1.0 + xi*xez[:,0])*(1.0 + eta*xez[:,1])*(1.0 + mu*xez[:,2])
+
+def quad20ShapeFunVals(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+    xi = natCoord[:,0:1]
+    eta = natCoord[:,1:2]
+    zeta = natCoord[:,2:3]
+    xez = C3D20_nodes_natCoord
+
+    nieArr = np.zeros((natCoord.shape[0], 20))
+    cxez = xez[0:8,:] # Corner nodes
+    nieArr[:,0:8] = 0.125*(1.0 + xi*cxez[:,0])*(1.0 + eta*cxez[:,1])*(1.0 + zeta*cxez[:,2])*(xi*cxez[:,0] + eta*cxez[:,1] + zeta*cxez[:,2] - 2.0)
+
+    # Midside nodes. The natural coordinate that is zero for the node is the one that gets the (1 - x^2) term
+    midXi = np.where(xez[8:,0] == 0.0)[0] + 8
+    midEta = np.where(xez[8:,1] == 0.0)[0] + 8
+    midZeta = np.where(xez[8:,2] == 0.0)[0] + 8
+    nieArr[:,midXi] = 0.25*(1.0 - xi*xi)*(1.0 + eta*xez[midXi,1])*(1.0 + zeta*xez[midXi,2])
+    nieArr[:,midEta] = 0.25*(1.0 + xi*xez[midEta,0])*(1.0 - eta*eta)*(1.0 + zeta*xez[midEta,2])
+    nieArr[:,midZeta] = 0.25*(1.0 + xi*xez[midZeta,0])*(1.0 + eta*xez[midZeta,1])*(1.0 - zeta*zeta)
+
+    return nieArr
+
+def tet4ShapeFunVals(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+
+    return natCoord[:,0:4].copy()
+
+def tet10ShapeFunVals(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+    z1 = natCoord[:,0]
+    z2 = natCoord[:,1]
+    z3 = natCoord[:,2]
+    z4 = natCoord[:,3]
+
+    return np.column_stack((z1*(2.0*z1 - 1.0), z2*(2.0*z2 - 1.0), z3*(2.0*z3 - 1.0), z4*(2.0*z4 - 1.0),
+                            4.0*z1*z2, 4.0*z2*z3, 4.0*z3*z1, 4.0*z1*z4, 4.0*z2*z4, 4.0*z3*z4))
+
+
+# Driver for the vectorized shape functions. Returns an np.array[n,nNodes] of the shape function values of the given 
+# element type at the requested natural coordinates, or None if the element type is not currently supported.
+def getCorrectShapeFunVals(elemTypeIn, natCoordIn):
+    shapeFamily = getElemShapeFamily(elemTypeIn)
+
+    if shapeFamily == 'QUAD8':
+        return quad8ShapeFunVals(natCoordIn)
+    elif shapeFamily == 'QUAD20':
+        return quad20ShapeFunVals(natCoordIn)
+    elif shapeFamily == 'TET4':
+        return tet4ShapeFunVals(natCoordIn)
+    elif shapeFamily == 'TET10':
+        return tet10ShapeFunVals(natCoordIn)
+    return None
+
+
+# Polynomial basis used to extrapolate integration point values to the nodes. The basis is chosen so that it has exactly
+# as many terms as there are integration points: constant for one integration point, linear for the four integration
+# points of a tetrahedral, and trilinear for the 2x2x2 integration points of a brick. Returns an np.array[n,nTerms].
+def getExtrapBasisVals(shapeFamilyIn, numIntegPntsIn, natCoordIn):
+    shapeFamily = shapeFamilyIn # str - 'QUAD8', 'QUAD20', 'TET4', or 'TET10'
+    numIntegPnts = numIntegPntsIn # int - Number of integration points of the element type
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+
+    if numIntegPnts == 1:
+        return np.ones((natCoord.shape[0], 1))
+    elif shapeFamily in ['QUAD8', 'QUAD20'] and numIntegPnts == 8:
+        xi = natCoord[:,0]
+        eta = natCoord[:,1]
+        zeta = natCoord[:,2]
+        return np.column_stack((np.ones(xi.shape), xi, eta, zeta, xi*eta, eta*zeta, xi*zeta, xi*eta*zeta))
+    elif shapeFamily in ['TET4', 'TET10'] and numIntegPnts == 4:
+        return np.column_stack((np.ones(natCoord.shape[0]), natCoord[:,0], natCoord[:,1], natCoord[:,2]))
+    return None
+
+
+# Cache of the extrapolation matrices, keyed by the element type. Populated on demand by getCorrectExtrapMatrix(...)
+extrapMatrixCache = {}
+
+# Returns the np.array[nNodes,nIP] extrapolation matrix of an element type. Multiplying it with the integration point 
+# values of an element, np.array[nIP,nComponents], gives the (unaveraged) values at the nodes of that element. The matrix
+# is the extrapolation basis evaluated at the nodes times the pseudo-inverse of the basis evaluated at the integration
+# points. Returns None if the element type is not currently supported.
+def getCorrectExtrapMatrix(elemTypeIn):
+    elemType = elemTypeIn # str - Abaqus element type identifier (very limited number of elements currently supported)
+
+    if elemType in extrapMatrixCache:
+        return extrapMatrixCache[elemType]
+
+    shapeFamily = getElemShapeFamily(elemType)
+    if shapeFamily is None:
+        print 'WARNING: Element type ', elemType, ' is not currently supported for extrapolation to the nodes.'
+        return None
+
+    numIntegPnts = getCorrectNumIntegPnts(elemType, 'INTEGRATION_POINT')
+    integPntsBasis = getExtrapBasisVals(shapeFamily, numIntegPnts, getCorrectIntegPntsNatCoord(elemType))
+    nodesBasis = getExtrapBasisVals(shapeFamily, numIntegPnts, getCorrectNodesNatCoord(elemType))
+
+    extrapMatrix = np.dot(nodesBasis, np.linalg.pinv(integPntsBasis))
+    extrapMatrixCache[elemType] = extrapMatrix
+    return extrapMatrix
+
+
+# Extrapolates the integration point values of many elements of the same type to their nodes with one batched matrix
+# product. integPntValsIn should be an array[nElems,nIP,nComponents] (any integration point padding beyond the number
+# of integration points of the element type is ignored). Returns an np.array[nElems,nNodes,nComponents] with the nodes 
+# following the Abaqus node numbering, or None if the element type is not currently supported.
+def extrapIntegPntValsToNodes(elemTypeIn, integPntValsIn):
+    elemType = elemTypeIn # str - Abaqus element type identifier (very limited number of elements currently supported)
+    integPntVals = np.asarray(integPntValsIn, dtype=float)
+
+    extrapMatrix = getCorrectExtrapMatrix(elemType)
+    if extrapMatrix is None:
+        return None
+
+    numIntegPnts = extrapMatrix.shape[1]
+    if integPntVals.ndim != 3 or integPntVals.shape[1] < numIntegPnts:
+        print 'ERROR: Integration point values must be shaped [nElems, nIP, nComponents] in extrapIntegPntValsToNodes(...)'
+        return None
+
+    return np.einsum('ni,eic->enc', extrapMatrix, integPntVals[:,0:numIntegPnts,:])
+
+
+# Vectorized derivatives of the shape functions with respect to the natural coordinates. natCoordIn should be an 
+# array[n,3] for the bricks or an array[n,4] for the tetrahedrals. The functions return an np.array[n,nNodes,3]. For the 
+# tetrahedrals, the three independent natural coordinates are the first three (the fourth is 1 minus the other three),
+# and so the derivatives are taken with respect to those.
+def quad8ShapeFunDerivs(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+    xi = natCoord[:,0:1]
+    eta = natCoord[:,1:2]
+    mu = natCoord[:,2:3]
+    xez = C3D8_nodes_natCoord
+
+    dNdNat = np.zeros((natCoord.shape[0], 8, 3))
+    dNdNat[:,:,0] = 0.125*xez[:,0]*(1.0 + eta*xez[:,1])*(1.0 + mu*xez[:,2])
+    dNdNat[:,:,1] = 0.125*(1.0 + xi*xez[:,0])*xez[:,1]*(1.0 + mu*xez[:,2])
+    dNdNat[:,:,2] = 0.125*(1.0 + xi*xez[:,0])*(1.0 + eta*xez[:,1])*xez[:,2]
+    return dNdNat
+
+def quad20ShapeFunDerivs(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+    xi = natCoord[:,0:1]
+    eta = natCoord[:,1:2]
+    zeta = natCoord[:,2:3]
+    xez = C3D20_nodes_natCoord
+
+    dNdNat = np.zeros((natCoord.shape[0], 20, 3))
+    cx = xez[0:8,0] # Corner nodes
+    cy = xez[0:8,1]
+    cz = xez[0:8,2]
+    fx = 1.0 + xi*cx
+    fy = 1.0 + eta*cy
+    fz = 1.0 + zeta*cz
+    gSum = xi*cx + eta*cy + zeta*cz - 2.0
+    dNdNat[:,0:8,0] = 0.125*cx*fy*fz*(gSum + fx)
+    dNdNat[:,0:8,1] = 0.125*cy*fx*fz*(gSum + fy)
+    dNdNat[:,0:8,2] = 0.125*cz*fx*fy*(gSum + fz)
+
+    midXi = np.where(xez[8:,0] == 0.0)[0] + 8
+    midEta = np.where(xez[8:,1] == 0.0)[0] + 8
+    midZeta = np.where(xez[8:,2] == 0.0)[0] + 8
+    dNdNat[:,midXi,0] = 0.25*(-2.0*xi)*(1.0 + eta*xez[midXi,1])*(1.0 + zeta*xez[midXi,2])
+    dNdNat[:,midXi,1] = 0.25*(1.0 - xi*xi)*xez[midXi,1]*(1.0 + zeta*xez[midXi,2])
+    dNdNat[:,midXi,2] = 0.25*(1.0 - xi*xi)*(1.0 + eta*xez[midXi,1])*xez[midXi,2]
+    dNdNat[:,midEta,0] = 0.25*xez[midEta,0]*(1.0 - eta*eta)*(1.0 + zeta*xez[midEta,2])
+    dNdNat[:,midEta,1] = 0.25*(1.0 + xi*xez[midEta,0])*(-2.0*eta)*(1.0 + zeta*xez[midEta,2])
+    dNdNat[:,midEta,2] = 0.25*(1.0 + xi*xez[midEta,0])*(1.0 - eta*eta)*xez[midEta,2]
+    dNdNat[:,midZeta,0] = 0.25*xez[midZeta,0]*(1.0 + eta*xez[midZeta,1])*(1.0 - zeta*zeta)
+    dNdNat[:,midZeta,1] = 0.25*(1.0 + xi*xez[midZeta,0])*xez[midZeta,1]*(1.0 - zeta*zeta)
+    dNdNat[:,midZeta,2] = 0.25*(1.0 + xi*xez[midZeta,0])*(1.0 + eta*xez[midZeta,1])*(-2.0*zeta)
+    return dNdNat
+
+def tet4ShapeFunDerivs(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+
+    dNdNat = np.zeros((natCoord.shape[0], 4, 3))
+    dNdNat[:,0,0] = 1.0
+    dNdNat[:,1,1] = 1.0
+    dNdNat[:,2,2] = 1.0
+    dNdNat[:,3,:] = -1.0
+    return dNdNat
+
+def tet10ShapeFunDerivs(natCoordIn):
+    natCoord = np.atleast_2d(np.asarray(natCoordIn, dtype=float))
+    z1 = natCoord[:,0]
+    z2 = natCoord[:,1]
+    z3 = natCoord[:,2]
+    z4 = natCoord[:,3]
+
+    # Derivatives with respect to all four coordinates first, then apply the constraint z4 = 1 - z1 - z2 - z3
+    dNdZ = np.zeros((natCoord.shape[0], 10, 4))
+    dNdZ[:,0,0] = 4.0*z1 - 1.0
+    dNdZ[:,1,1] = 4.0*z2 - 1.0
+    dNdZ[:,2,2] = 4.0*z3 - 1.0
+    dNdZ[:,3,3] = 4.0*z4 - 1.0
+    dNdZ[:,4,0] = 4.0*z2
+    dNdZ[:,4,1] = 4.0*z1
+    dNdZ[:,5,1] = 4.0*z3
+    dNdZ[:,5,2] = 4.0*z2
+    dNdZ[:,6,2] = 4.0*z1
+    dNdZ[:,6,0] = 4.0*z3
+    dNdZ[:,7,0] = 4.0*z4
+    dNdZ[:,7,3] = 4.0*z1
+    dNdZ[:,8,1] = 4.0*z4
+    dNdZ[:,8,3] = 4.0*z2
+    dNdZ[:,9,2] = 4.0*z4
+    dNdZ[:,9,3] = 4.0*z3
+    return dNdZ[:,:,0:3] - dNdZ[:,:,3:4]
+
+
+# Driver for the vectorized shape function derivatives. Returns an np.array[n,nNodes,3], or None if the element type
+# is not currently supported.
+def getCorrectShapeFunDerivs(elemTypeIn, natCoordIn):
+    shapeFamily = getElemShapeFamily(elemTypeIn)
+
+    if shapeFamily == 'QUAD8':
+        return quad8ShapeFunDerivs(natCoordIn)
+    elif shapeFamily == 'QUAD20':
+        return quad20ShapeFunDerivs(natCoordIn)
+    elif shapeFamily == 'TET4':
+        return tet4ShapeFunDerivs(natCoordIn)
+    elif shapeFamily == 'TET10':
+        return tet10ShapeFunDerivs(natCoordIn)
+    return None
+
+
+# Solves a batch of 3x3 linear systems, A[i]*x[i] = b[i], using Cramer's rule. Written out by hand so that it does not
+# depend on the numpy version supporting stacked arrays in np.linalg.solve(...). Singular systems return zeros.
+def solve3x3Batch(AIn, bIn):
+    A = np.asarray(AIn, dtype=float) # np.array[n,3,3]
+    b = np.asarray(bIn, dtype=float) # np.array[n,3]
+
+    cof00 = A[:,1,1]*A[:,2,2] - A[:,1,2]*A[:,2,1]
+    cof01 = A[:,1,2]*A[:,2,0] - A[:,1,0]*A[:,2,2]
+    cof02 = A[:,1,0]*A[:,2,1] - A[:,1,1]*A[:,2,0]
+    detA = A[:,0,0]*cof00 + A[:,0,1]*cof01 + A[:,0,2]*cof02
+    safeDetA = np.where(np.abs(detA) > 0.0, detA, 1.0)
+
+    x = np.zeros(b.shape)
+    x[:,0] = (b[:,0]*cof00 + A[:,0,1]*(b[:,2]*A[:,1,2] - b[:,1]*A[:,2,2]) + A[:,0,2]*(b[:,1]*A[:,2,1] - b[:,2]*A[:,1,1]))/safeDetA
+    x[:,1] = (A[:,0,0]*(b[:,1]*A[:,2,2] - b[:,2]*A[:,1,2]) + b[:,0]*cof01 + A[:,0,2]*(b[:,2]*A[:,1,0] - b[:,1]*A[:,2,0]))/safeDetA
+    x[:,2] = (A[:,0,0]*(b[:,2]*A[:,1,1] - b[:,1]*A[:,2,1]) + A[:,0,1]*(b[:,1]*A[:,2,0] - b[:,2]*A[:,1,0]) + b[:,0]*cof02)/safeDetA
+    x[np.abs(detA) == 0.0] = 0.0
+    return x
+
+
+# Inverse isoparametric mapping: finds the natural coordinates of a batch of points, each paired with one element of the
+# same type, using a vectorized Newton iteration on the shape functions above. 
+#   elemNodeCoordsIn - array[n,nNodes,3] of the nodal coordinates of each element (Abaqus node ordering)
+#   pntCoordsIn - array[n,3] of the points to map, one for each element
+# Returns (natCoords, isConverged, isInside) where natCoords is an np.array[n,3] for the bricks or an np.array[n,4] for 
+# the tetrahedrals, and the last two are boolean np.array[n]. Returns None if the element type is not currently supported.
+def calcNatCoordsBatch(elemTypeIn, elemNodeCoordsIn, pntCoordsIn, maxIterIn=25, tolIn=1.0e-10, insideTolIn=1.0e-6):
+    elemType = elemTypeIn # str - Abaqus element type identifier (very limited number of elements currently supported)
+    elemNodeCoords = np.asarray(elemNodeCoordsIn, dtype=float)
+    pntCoords = np.asarray(pntCoordsIn, dtype=float)
+
+    shapeFamily = getElemShapeFamily(elemType)
+    if shapeFamily is None:
+        print 'WARNING: Element type ', elemType, ' is not currently supported for the inverse mapping.'
+        return None
+    isTet = shapeFamily in ['TET4', 'TET10']
+
+    numPnts = pntCoords.shape[0]
+    natCoord3 = np.zeros((numPnts,3)) # Independent natural coordinates. Start from the center of the element.
+    if isTet:
+        natCoord3[:] = 0.25
+
+    # Scale of each element, used to make the convergence tolerance relative
+    elemScale = np.max(elemNodeCoords.max(axis=1) - elemNodeCoords.min(axis=1), axis=1)
+    elemScale = np.where(elemScale > 0.0, elemScale, 1.0)
+
+    isConverged = np.zeros(numPnts, dtype=bool)
+    activeIdx = np.arange(numPnts)
+    for curIter in range(maxIterIn):
+        if activeIdx.size == 0:
+            break
+        curNat = natCoord3[activeIdx]
+        if isTet:
+            curNat = np.column_stack((curNat, 1.0 - curNat.sum(axis=1)))
+
+        curN = getCorrectShapeFunVals(elemType, curNat) # [n,nNodes]
+        curDN = getCorrectShapeFunDerivs(elemType, curNat) # [n,nNodes,3]
+        curX = elemNodeCoords[activeIdx]
+        residual = np.einsum('en,enc->ec', curN, curX) - pntCoords[activeIdx]
+        jacobian = np.einsum('enc,end->ecd', curX, curDN) # dx_c / dnat_d
+
+        deltaNat = solve3x3Batch(jacobian, -residual)
+        natCoord3[activeIdx] = natCoord3[activeIdx] + deltaNat
+
+        curConverged = (np.sqrt(np.sum(residual**2, axis=1)) <= tolIn*elemScale[activeIdx]) | (np.max(np.abs(deltaNat), axis=1) <= tolIn)
+        isConverged[activeIdx[curConverged]] = True
+        activeIdx = activeIdx[~curConverged]
+
+        # Points far outside of the element can make Newton wander off; keep the iterates bounded
+        natCoord3[activeIdx] = np.clip(natCoord3[activeIdx], -5.0, 5.0)
+
+    if isTet:
+        natCoords_out = np.column_stack((natCoord3, 1.0 - natCoord3.sum(axis=1)))
+        isInside_out = isConverged & np.all(natCoords_out >= -insideTolIn, axis=1)
+    else:
+        natCoords_out = natCoord3
+        isInside_out = isConverged & np.all(np.abs(natCoords_out) <= 1.0 + insideTolIn, axis=1)
+
+    return (natCoords_out, isConverged, isInside_out)
+
+
+# Interpolates nodal values at a batch of natural coordinates, one for each element of the same type.
+#   natCoordsIn - array[n,3] (bricks) or array[n,4] (tetrahedrals), e.g., from calcNatCoordsBatch(...)
+#   elemNodeValsIn - array[n,nNodes,nComponents] of the values at the nodes of each element (Abaqus node ordering)
+# Returns an np.array[n,nComponents], or None if the element type is not currently supported.
+def interpNodeValsBatch(elemTypeIn, natCoordsIn, elemNodeValsIn):
+    shapeVals = getCorrectShapeFunVals(elemTypeIn, natCoordsIn)
+    if shapeVals is None:
+        return None
+
+    return np.einsum('en,enc->ec', shapeVals, np.asarray(elemNodeValsIn, dtype=float))
@@ -38,6 +38,7 @@ import numpy as np
 
 # User defined modules
 import abaqus_moser_utility_functions as am
+import abaqus_moser_tensor_functions as tf
 import kinematicMain as egg
 
 # USER TIP - Should run the "driver_getOdbFileStructure.py" script ahead of time in order to identify existing 
@@ -93,6 +94,21 @@ csvFieldValFilePath_global = './rods12_sigIntegPnts.csv'
 #       depending on what is given in fieldPosKey_global. 
 csvFieldValFileHeader_global = ['Element Label', 'X1', 'X2', 'X3', 'S11', 'S22', 'S33', 'S12', 'S13', 'S23']
 #
+# None or list[str] - Invariants of the tensor field output to append after the field values (their names are appended to the 
+#       header automatically). Available: 'MISES', 'PRESS', 'TRESCA', 'MAX_PRINCIPAL', 'MID_PRINCIPAL', 'MIN_PRINCIPAL', 'TRIAXIALITY', 
+#       'LODE_ANGLE', and 'PRINCIPAL_DIRECTIONS' (nine columns). Keep None for a scalar field output such as 'PEEQ'. For the stress 
+#       field 'S', you could use e.g. ['MISES', 'PRESS', 'MAX_PRINCIPAL', 'MIN_PRINCIPAL', 'TRIAXIALITY']. Note, 'MISES' of a strain 
+#       field such as 'LE' is sqrt(3/2 e:e) of the deviatoric strain, not the equivalent strain of Abaqus (which is sqrt(2/3 e:e)).
+invariantKeys_global = None
+#
+# The coordinate system of the written stress components. They are rotated at each integration point (or centroid) using its 
+#       coordinates, e.g. into radial, hoop, and axial components of a cylindrical system aligned with a rod. Can be either:
+#       None - Keep the global coordinate system
+#       str - Name of a datum coordinate system in the .odb file (see the text file from Demo 1)
+#       tuple - (csysType, origin, pointOnXAxis, pointInXYPlane) where csysType is 'RECTANGULAR', 'CYLINDRICAL', or 'SPHERICAL'.
+#               EX: ('CYLINDRICAL', [0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]) for a cylindrical system about the Z-axis
+csysSpec_global = None
+#
 # ---- A NOTE ON COORDINATE VALUES ----
 # If the .odb file contains the COORD keyword within the input file indentifier, *ELEMENT OUTPUT, then this script will use this field
 # value output to determine the coordinates of the centroid or integration points. The COORD keyword must be entered manually in the input
@@ -117,10 +133,10 @@ csvFieldValFileHeader_global = ['Element Label', 'X1', 'X2', 'X3', 'S11', 'S22',
 #   [i] - The part instance (even if the element set spans just one part instance, this output is still 4D; just would need to use i = 0)
 #   [j] - Element in the current part instance (since the number of elements for each part instance could be different, this is a jagged list before the j index)
 #   [k] - Integration point in the current element (will be just one if CENTROID was chosen)
-#   [l] - Data for the current integration point, given as follows: [Element label, XCoord, YCoord, ZCoord, Field_Value_Outputs ... ]
+#   [l] - Data for the current integration point, given as follows: [Element label, XCoord, YCoord, ZCoord, Field_Value_Outputs ... , Invariants ... ]
 #
 # instanceNames - A list of instance names (i.e. list[str]) which correspond to index i in fieldValsOut.
-fieldValsOut, instanceNames = am.getIntegPntFieldValuesFromSetBatch(odbFilePath_global, odbStepPositionKey_global, odbFramePosition_global, odbSetStr_global, fieldOutputKey_global, fieldPosKey_global)
+fieldValsOut, instanceNames = am.getIntegPntFieldValuesFromSetBatch(odbFilePath_global, odbStepPositionKey_global, odbFramePosition_global, odbSetStr_global, fieldOutputKey_global, fieldPosKey_global, invariantKeys_global, csysSpec_global)
 
 # Reshaping the 4D array into a 2D array in order to write it out to a .csv file
 numInstances = len(instanceNames)
@@ -148,10 +164,14 @@ for instIndex in range(numInstances): # Start iterating through the list, starti
         
         outValsList.append(temp_allIntegPntsArr)
 
-csvFieldValFileHeader_out = csvFieldValFileHeader_global
+csvFieldValFileHeader_in = list(csvFieldValFileHeader_global)
+if invariantKeys_global is not None:
+    csvFieldValFileHeader_in = csvFieldValFileHeader_in + tf.getInvariantColumnNames(invariantKeys_global)
+
+csvFieldValFileHeader_out = csvFieldValFileHeader_in
 if numIntegPnts > 1: # For multiple integration points, extend the header (with an appended label) for each integration point
-    tempSubHeader = csvFieldValFileHeader_global[1:]
-    csvFieldValFileHeader_out = [csvFieldValFileHeader_global[0]]
+    tempSubHeader = csvFieldValFileHeader_in[1:]
+    csvFieldValFileHeader_out = [csvFieldValFileHeader_in[0]]
     for curIntegPnt in range(numIntegPnts):
         for curHeaderStr in tempSubHeader:
             csvFieldValFileHeader_out = csvFieldValFileHeader_out + [curHeaderStr + '_IP' + str(curIntegPnt)]